@@ -1,8 +1,16 @@
 import streamlit as st
 import pandas as pd
-import json
+import csv
 import os
-from geopy.geocoders import Nominatim
+import sys
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from src.data_manager import delete_friend, load_friends, save_friend, update_friends
+from src.friend_import import import_friends, parse_friends_file
+from src.geocoder import geocode_address
+from src.ui_components import select_group
 
 st.title("👥 Les Copaines")
 st.markdown("### Inscrivez vos amis et leurs adresses")
@@ -18,40 +26,9 @@ st.info(
 """
 )
 
-# Fichier pour stocker les données des amis
-DATA_FILE = "data/friends.json"
-
-
-# Fonction pour charger les données
-def load_friends():
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
-
-
-# Fonction pour sauvegarder les données
-def save_friends(friends):
-    os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(friends, f, ensure_ascii=False, indent=2)
-
-
-# Fonction pour géocoder une adresse
-@st.cache_data
-def geocode_address(address):
-    try:
-        geolocator = Nominatim(user_agent="oucekonboi_app")
-        location = geolocator.geocode(address)
-        if location:
-            return location.latitude, location.longitude, location.address
-        return None, None, None
-    except Exception:
-        return None, None, None
-
-
-# Charger les amis existants
-friends = load_friends()
+# Choisir le groupe, puis charger ses amis
+group_id = select_group()
+friends = load_friends(group_id)
 
 # Formulaire d'ajout d'un ami
 st.subheader("➕ Ajouter un ami")
@@ -87,23 +64,18 @@ with st.form("add_friend"):
                     st.warning(
                         f"Un ami nommé {name} existe déjà. Mise à jour de ses informations."
                     )
-                    existing_friend["email"] = email
-                    existing_friend["address"] = full_address or address
-                    existing_friend["latitude"] = lat
-                    existing_friend["longitude"] = lon
-                else:
-                    # Ajouter le nouvel ami
-                    new_friend = {
-                        "name": name,
+
+                # Ajouter le nouvel ami ou mettre à jour l'existant
+                save_friend(
+                    {
+                        "name": existing_friend["name"] if existing_friend else name,
                         "email": email,
                         "address": full_address or address,
                         "latitude": lat,
                         "longitude": lon,
-                    }
-                    friends.append(new_friend)
-
-                # Sauvegarder
-                save_friends(friends)
+                    },
+                    group_id,
+                )
                 st.success(f"✅ {name} a été ajouté avec succès!")
                 st.rerun()
             else:
@@ -113,6 +85,49 @@ with st.form("add_friend"):
         else:
             st.error("❌ Veuillez remplir au moins le nom et l'adresse.")
 
+# Import en masse depuis un fichier
+with st.expander("📥 Importer une liste d'amis (CSV ou JSON)"):
+    st.markdown(
+        "Colonnes attendues : **nom** (ou name), **adresse** (ou address) et "
+        "**email** (optionnel). Les adresses déjà connues ne sont pas "
+        "regéocodées."
+    )
+    uploaded_file = st.file_uploader(
+        "Fichier des amis", type=["csv", "json"], key="friends_file"
+    )
+
+    if uploaded_file is not None and st.button("Importer les amis"):
+        try:
+            new_friends = parse_friends_file(
+                uploaded_file.getvalue(), uploaded_file.name
+            )
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            st.error(f"❌ Fichier illisible : {e}")
+            new_friends = []
+
+        if new_friends:
+            progress_bar = st.progress(0.0, text="Géocodage des adresses...")
+
+            def show_progress(done, total):
+                progress_bar.progress(
+                    done / total if total else 1.0,
+                    text=f"Géocodage des adresses... {done}/{total}",
+                )
+
+            report = import_friends(new_friends, friends, progress=show_progress)
+            update_friends(report["friends"], group_id)
+
+            st.success(
+                f"✅ {len(report['added'])} amis ajoutés, "
+                f"{len(report['updated'])} mis à jour."
+            )
+            if report["failed"]:
+                st.warning(
+                    "⚠️ Adresses introuvables pour : " + ", ".join(report["failed"])
+                )
+        elif uploaded_file is not None:
+            st.warning("⚠️ Aucun ami avec un nom et une adresse dans ce fichier.")
+
 # Affichage des amis enregistrés
 st.subheader("📋 Amis enregistrés")
 
@@ -136,8 +151,7 @@ if friends:
 
     if friend_to_delete:
         if st.button(f"Supprimer {friend_to_delete}", type="secondary"):
-            friends = [f for f in friends if f["name"] != friend_to_delete]
-            save_friends(friends)
+            delete_friend(friend_to_delete, group_id)
             st.success(f"✅ {friend_to_delete} a été supprimé.")
             st.rerun()
 
@@ -10,23 +10,38 @@ import os
 # Ajouter le dossier src au path Python
 sys.path.append(os.path.join(os.path.dirname(__file__), "..", ".."))
 
-from src.data_manager import load_friends
-from src.geo_utils import calculate_center, calculate_average_distance
-from src.transit_utils import (
-    calculate_weighted_center_by_transit_time,
-    calculate_average_transit_time,
+from src.data_manager import get_group_version
+from src.pipeline import (
+    candidates_stage,
+    center_stage,
+    costs_stage,
+    friends_stage,
+    ranking_stage,
 )
-from src.bar_finder import get_bars_around_center
+from src.street_graph import PROFILE_LABELS, street_graph_available
+from src.transit_utils import OBJECTIVE_LABELS, STOP_REASON_LABELS
 from src.map_utils import create_interactive_map, display_map
+from src.metrics import span, start_metrics_server, start_trace
+from src.warmup import (
+    QUERY_LOG_ENABLED,
+    get_query_log,
+    query_key,
+    start_warmup_thread,
+)
 from src.ui_components import (
     display_header,
     display_no_friends_warning,
     display_center_info,
+    display_progress_events,
     display_search_results,
     display_statistics,
     display_bars_ranking,
     display_best_bar_details,
+    display_performance_panel,
+    display_profile_report,
     display_refresh_button,
+    select_group,
+    start_requested_profile,
 )
 
 # Configuration de la page
@@ -34,142 +49,229 @@ st.set_page_config(
     page_title="Oucekonboi - Trouveur de bars", page_icon="🍻", layout="wide"
 )
 
-# Affichage de l'en-tête
-display_header()
+# Le calcul est découpé en étapes mises en cache (module src.pipeline) :
+# chaque étape n'est recalculée que si ses entrées ont changé. Les étapes
+# du calcul sont renvoyées avec le résultat pour être affichées, y compris
+# quand il vient du cache.
 
-# Charger les amis
-friends = load_friends()
+# Préchauffage périodique des caches (si OUCEKONBOI_WARMUP_INTERVAL_S > 0)
+start_warmup_thread()
 
-# Vérifier si des amis sont enregistrés
-if not friends:
-    display_no_friends_warning()
+# Mesure du temps passé dans chaque étape (module src.metrics), exposée
+# sur /metrics si OUCEKONBOI_METRICS_PORT > 0
+start_metrics_server()
+trace = start_trace()
 
-# Calculer le centre géographique des amis (barycentre)
-st.subheader("🚇 Calcul du barycentre optimisé par transport")
+# Profil de cette exécution seulement si la page est ouverte avec ?profile=1
+profile = start_requested_profile()
 
-# Choix du mode de calcul
-calc_mode = st.radio(
-    "Mode de calcul du barycentre :",
-    ["🗺️ Distance géographique", "🚇 Temps de transport en commun"],
-    help="Choisissez comment calculer le centre optimal du groupe",
-)
+try:
+    # Affichage de l'en-tête
+    display_header()
 
-if calc_mode == "🚇 Temps de transport en commun":
-    with st.spinner(
-        "🚇 Calcul du barycentre optimisé par transport (cela peut prendre quelques secondes)..."
-    ):
-        center_lat, center_lon, transit_times, calc_info = (
-            calculate_weighted_center_by_transit_time(friends)
+    # Choisir le groupe et charger ses amis
+    group_id = select_group()
+    group_version = get_group_version(group_id)
+    friends_result = friends_stage(group_id, group_version)
+    friends = friends_result.value
+
+    # Vérifier si des amis sont enregistrés
+    if not friends:
+        display_no_friends_warning()
+
+    # Calculer le centre géographique des amis (barycentre)
+    st.subheader("🚇 Calcul du barycentre optimisé par transport")
+
+    # Modes sur le réseau de rues, proposés si le réseau a été construit
+    # (module src.street_graph) : barycentre géographique, bars classés par
+    # distance sur le réseau
+    network_modes = (
+        {
+            "🚶 Distance à pied (réseau de rues)": "walk",
+            "🚲 Distance à vélo (réseau de rues)": "bike",
+        }
+        if street_graph_available()
+        else {}
+    )
+
+    # Choix du mode de calcul
+    calc_mode = st.radio(
+        "Mode de calcul du barycentre :",
+        ["🗺️ Distance géographique", "🚇 Temps de transport en commun", *network_modes],
+        help="Choisissez comment calculer le centre optimal du groupe",
+    )
+
+    if calc_mode == "🚇 Temps de transport en commun":
+        objective = st.selectbox(
+            "Objectif d'optimisation :",
+            list(OBJECTIVE_LABELS),
+            format_func=lambda key: OBJECTIVE_LABELS[key].capitalize(),
+            help="Temps total de tout le groupe, temps de l'ami le plus éloigné, "
+            "ou médiane géométrique des positions",
         )
 
-    # Afficher un résumé des résultats d'optimisation
-    if calc_info:
-        st.subheader("📊 Résumé de l'optimisation")
+        with st.spinner("🚇 Calcul du barycentre optimisé par transport..."):
+            center = center_stage(friends_result, "transit", objective)
+        (center_lat, center_lon, transit_times, calc_info), events = center.value
+        display_progress_events(events)
+
+        # Afficher un résumé des résultats d'optimisation
+        if calc_info:
+            st.subheader("📊 Résumé de l'optimisation")
+
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric(
+                    "⏱️ Temps initial moyen", f"{calc_info['avg_initial_time']:.0f} min"
+                )
+            with col2:
+                st.metric(
+                    "⏱️ Temps final moyen", f"{calc_info['avg_final_time']:.0f} min"
+                )
+            with col3:
+                improvement = calc_info["time_improvement"]
+                emoji = "📈" if improvement > 0 else "📊"
+                st.metric(f"{emoji} Amélioration", f"{improvement:+.0f} min")
 
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric(
-                "⏱️ Temps initial moyen", f"{calc_info['avg_initial_time']:.0f} min"
+            st.info(
+                f"📏 Le barycentre a été déplacé de **{calc_info['displacement_km']:.0f} mètres** "
+                f"pour optimiser les temps de trajet."
             )
-        with col2:
-            st.metric("⏱️ Temps final moyen", f"{calc_info['avg_final_time']:.0f} min")
-        with col3:
-            improvement = calc_info["time_improvement"]
-            emoji = "📈" if improvement > 0 else "📊"
-            st.metric(f"{emoji} Amélioration", f"{improvement:+.0f} min")
-
-        st.info(
-            f"📏 Le barycentre a été déplacé de **{calc_info['displacement_km']:.0f} mètres** "
-            f"pour optimiser les temps de trajet."
+
+            with st.expander(
+                f"🔁 Convergence : {calc_info['iterations']} itérations en "
+                f"{calc_info['elapsed_ms']:.1f} ms "
+                f"({STOP_REASON_LABELS[calc_info['stop_reason']]})"
+            ):
+                st.line_chart(
+                    [step["cost"] for step in calc_info["trace"]],
+                    x_label="Itération",
+                    y_label=(
+                        "Objectif (km)"
+                        if calc_info["objective"] == "median"
+                        else "Objectif (min)"
+                    ),
+                )
+
+            # Afficher les différences de temps individuelles
+            st.subheader("⏱️ Comparaison des temps de trajet")
+            st.markdown("**Temps vers l'ancien barycentre vs nouveau barycentre :**")
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("**🔴 Ancien barycentre :**")
+                for name, old_time in calc_info["initial_times"].items():
+                    st.write(f"🚇 {name}: {old_time:.0f} min")
+
+            with col2:
+                st.markdown("**🟢 Nouveau barycentre :**")
+                for name, new_time in transit_times.items():
+                    old_time = calc_info["initial_times"][name]
+                    diff = new_time - old_time
+                    emoji = "✅" if diff <= 0 else "⚠️"
+                    st.write(f"{emoji} {name}: {new_time:.0f} min ({diff:+.0f})")
+
+        # Stocker les informations pour la carte
+        initial_center = calc_info.get("initial_center") if calc_info else None
+        use_transit_for_bars = True
+    else:
+        objective = None  # Pas d'objectif d'optimisation en mode géographique
+        center = center_stage(friends_result, "distance", objective)
+        (center_lat, center_lon, _, _), events = center.value
+        display_progress_events(events)
+        initial_center = None  # Pas d'ancien centre en mode géographique
+        use_transit_for_bars = False
+
+    # Afficher les informations du barycentre et obtenir le rayon de recherche
+    radius_km = display_center_info(center_lat, center_lon)
+
+    # Obtenir et classer les bars autour du barycentre
+    mode = (
+        "transit" if use_transit_for_bars else network_modes.get(calc_mode, "distance")
+    )
+    with st.spinner(
+        f"🔍 Recherche des bars dans un rayon de {radius_km} km autour du centre du groupe..."
+    ):
+        candidates = candidates_stage(center_lat, center_lon, radius_km)
+        costs = costs_stage(candidates, friends_result, mode)
+        ranking = ranking_stage(candidates, costs, friends_result, mode)
+    display_progress_events(candidates.value[1])
+    bars_sorted = ranking.value
+    bars = bars_sorted
+
+    # Journal des requêtes, pour le préchauffage des caches (module src.warmup) :
+    # une seule ligne par session tant que les paramètres ne changent pas
+    logged_query = query_key(group_id, group_version, mode, objective, radius_km)
+    if QUERY_LOG_ENABLED and st.session_state.get("logged_query") != logged_query:
+        get_query_log().record(
+            group_id,
+            group_version,
+            mode,
+            objective,
+            radius_km,
+            (center_lat, center_lon),
+            sum(
+                result.elapsed_ms
+                for result in (friends_result, center, candidates, costs, ranking)
+            ),
         )
+        st.session_state.logged_query = logged_query
 
-        # Afficher les différences de temps individuelles
-        st.subheader("⏱️ Comparaison des temps de trajet")
-        st.markdown("**Temps vers l'ancien barycentre vs nouveau barycentre :**")
-
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown("**🔴 Ancien barycentre :**")
-            for name, old_time in calc_info["initial_times"].items():
-                st.write(f"🚇 {name}: {old_time:.0f} min")
-
-        with col2:
-            st.markdown("**🟢 Nouveau barycentre :**")
-            for name, new_time in transit_times.items():
-                old_time = calc_info["initial_times"][name]
-                diff = new_time - old_time
-                emoji = "✅" if diff <= 0 else "⚠️"
-                st.write(f"{emoji} {name}: {new_time:.0f} min ({diff:+.0f})")
-
-    # Stocker les informations pour la carte
-    initial_center = calc_info.get("initial_center") if calc_info else None
-    use_transit_for_bars = True
-else:
-    center_lat, center_lon = calculate_center(friends)
-    st.success("✅ Barycentre géographique calculé (centre de masse des positions)")
-    initial_center = None  # Pas d'ancien centre en mode géographique
-    use_transit_for_bars = False
-
-# Afficher les informations du barycentre et obtenir le rayon de recherche
-radius_km = display_center_info(center_lat, center_lon)
-
-# Obtenir la liste des bars autour du barycentre
-with st.spinner(
-    f"🔍 Recherche des bars dans un rayon de {radius_km} km autour du centre du groupe..."
-):
-    bars = get_bars_around_center(center_lat, center_lon, radius_km=radius_km)
-
-# Afficher les résultats de la recherche
-display_search_results(len(bars))
-
-# Calculer la distance/temps moyen pour chaque bar
-if use_transit_for_bars:
-    with st.spinner("🚇 Calcul des temps de trajet vers les bars..."):
-        for bar in bars:
-            bar["avg_time"] = calculate_average_transit_time(
-                bar["lat"], bar["lon"], friends
-            )
-            bar["avg_distance"] = bar["avg_time"]  # Pour compatibilité avec l'affichage
-
-    # Trier les bars par temps de trajet moyen
-    bars_sorted = sorted(bars, key=lambda x: x["avg_time"])
-    metric_unit = "min"
-    metric_type = "Temps moyen"
-else:
-    for bar in bars:
-        bar["avg_distance"] = calculate_average_distance(
-            bar["lat"], bar["lon"], friends
+    # Afficher les résultats de la recherche
+    display_search_results(len(bars))
+
+    if use_transit_for_bars:
+        metric_unit = "min"
+        metric_type = "Temps moyen"
+    elif mode in PROFILE_LABELS:
+        metric_unit = "km"
+        metric_type = f"Distance moyenne {PROFILE_LABELS[mode]}"
+    else:
+        metric_unit = "km"
+        metric_type = "Distance moyenne"
+
+    # Afficher les statistiques
+    best_bar = bars_sorted[0]
+    display_statistics(friends, bars, best_bar, metric_type, metric_unit)
+
+    # Créer et afficher la carte interactive. La carte est construite à chaque
+    # exécution : le rendu folium la modifie, elle ne peut donc pas être
+    # partagée entre sessions par le cache des étapes, et la copier coûterait
+    # autant que la construire.
+    st.subheader("🗺️ Carte interactive")
+    with span("render.map"):
+        map_obj = create_interactive_map(
+            center_lat, center_lon, friends, bars_sorted, radius_km, initial_center
         )
+        map_data = display_map(map_obj)
 
-    # Trier les bars par distance moyenne
-    bars_sorted = sorted(bars, key=lambda x: x["avg_distance"])
-    metric_unit = "km"
-    metric_type = "Distance moyenne"
+    # Afficher le classement des bars
+    with span("render.ranking"):
+        display_bars_ranking(bars_sorted, metric_type, metric_unit)
 
-# Afficher les statistiques
-best_bar = bars_sorted[0]
-display_statistics(friends, bars, best_bar, metric_type, metric_unit)
+    # Afficher les détails du meilleur bar
+    display_best_bar_details(
+        best_bar,
+        friends,
+        center_lat,
+        center_lon,
+        use_transit_for_bars,
+        metric_type,
+        metric_unit,
+        network_modes.get(calc_mode),
+    )
 
-# Créer et afficher la carte interactive
-st.subheader("🗺️ Carte interactive")
-map_obj = create_interactive_map(
-    center_lat, center_lon, friends, bars_sorted, radius_km, initial_center
-)
-map_data = display_map(map_obj)
-
-# Afficher le classement des bars
-display_bars_ranking(bars_sorted, metric_type, metric_unit)
-
-# Afficher les détails du meilleur bar
-display_best_bar_details(
-    best_bar,
-    friends,
-    center_lat,
-    center_lon,
-    use_transit_for_bars,
-    metric_type,
-    metric_unit,
-)
+    # Bouton de rafraîchissement des étapes choisies
+    display_refresh_button(
+        {
+            result.stage: result.key
+            for result in (friends_result, center, candidates, costs, ranking)
+        }
+    )
 
-# Bouton de rafraîchissement
-display_refresh_button()
+    # Mesures de performance de l'exécution (optionnel)
+    display_performance_panel(trace)
+finally:
+    # Profil de l'exécution (?profile=1), arrêté même si elle est interrompue
+    # (st.stop, nouvelle exécution, erreur)
+    display_profile_report(profile)
@@ -2,6 +2,12 @@ import streamlit as st
 import pandas as pd
 import json
 import os
+import sys
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.paths import DATA_DIR
 
 # Configuration de la page
 st.set_page_config(
@@ -13,9 +19,7 @@ st.title("🍻 Oucekonboi - Trouveur de bars")
 st.markdown("### Trouvez le bar parfait le plus proche de tous vos amis !")
 
 # Créer le dossier data s'il n'existe pas
-data_dir = "data"
-if not os.path.exists(data_dir):
-    os.makedirs(data_dir)
+os.makedirs(DATA_DIR, exist_ok=True)
 
 # Instructions
 st.markdown(
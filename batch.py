@@ -0,0 +1,11 @@
+"""
+Calcul en lot des bars recommandés pour tous les groupes d'amis.
+
+Voir `src/batch.py` pour les options (python batch.py --help).
+"""
+
+from src.batch import main
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+Mesure des performances des calculs sur des données synthétiques.
+
+Voir `src/benchmark.py` pour les options (python benchmark.py --help).
+"""
+
+from src.benchmark import main
+
+
+if __name__ == "__main__":
+    main()
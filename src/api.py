@@ -0,0 +1,445 @@
+"""
+Module pour le service HTTP/JSON de recommandation de bars.
+
+Serveur asyncio (bibliothèque standard uniquement) qui expose le même
+calcul que la page Oucekonboi : barycentre → recherche des bars →
+classement. Les étapes de calcul (optimisation, classement) tournent dans
+un pool de processus ; la recherche des bars et le géocodage, qui attendent
+le réseau ou le disque, tournent dans des threads et sont attendus sans
+bloquer la boucle. Chaque requête a un délai maximum et la réponse détaille
+le temps passé dans chaque étape.
+
+Routes :
+- GET /health : état du service ;
+- GET /metrics : durées des étapes au format Prometheus (`src.metrics`) ;
+- POST /rank : {"friends": [{"name", "latitude", "longitude"} ou
+  {"name", "address"}], "mode", "objective", "radius_km", "top"}.
+
+Exemple :
+    python -m src.api --port 8600 --workers 4 --backend local
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+from src.bar_finder import BAR_BACKENDS, DEFAULT_BAR_BACKEND, get_bars_around_center
+from src.batch import BAR_FIELDS, CALC_INFO_FIELDS
+from src.engine import MODES, compute_center, rank_bars
+from src.metrics import prometheus_text, record_span
+from src.transit_utils import OBJECTIVE_LABELS
+
+
+DEFAULT_TIMEOUT_S = 10.0
+MAX_BODY_BYTES = 1024 * 1024
+MAX_FRIENDS = 10_000
+# Délai d'inactivité d'une connexion keep-alive
+IDLE_TIMEOUT_S = 30.0
+
+
+class RequestError(Exception):
+    """Requête invalide (réponse 4xx)."""
+
+    def __init__(self, message, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_rank_request(payload):
+    """
+    Valide le corps d'une requête /rank.
+
+    Args:
+        payload (dict): Corps JSON décodé
+
+    Returns:
+        dict: Paramètres validés (friends, mode, objective, radius_km, top)
+    """
+    if not isinstance(payload, dict):
+        raise RequestError("Le corps doit être un objet JSON")
+
+    friends = payload.get("friends")
+    if not isinstance(friends, list) or not friends:
+        raise RequestError('"friends" doit être une liste non vide')
+    if len(friends) > MAX_FRIENDS:
+        raise RequestError(f"Au plus {MAX_FRIENDS} amis par requête")
+
+    parsed_friends = []
+    for index, friend in enumerate(friends):
+        if not isinstance(friend, dict):
+            raise RequestError(f"Ami n°{index} invalide")
+        name = str(friend.get("name") or f"ami-{index}")
+        if friend.get("latitude") is not None and friend.get("longitude") is not None:
+            try:
+                lat, lon = float(friend["latitude"]), float(friend["longitude"])
+            except (TypeError, ValueError):
+                raise RequestError(f"Coordonnées invalides pour {name}")
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                raise RequestError(f"Coordonnées hors limites pour {name}")
+            parsed_friends.append({"name": name, "latitude": lat, "longitude": lon})
+        elif friend.get("address"):
+            parsed_friends.append({"name": name, "address": str(friend["address"])})
+        else:
+            raise RequestError(f"{name} : coordonnées ou adresse requises")
+
+    mode = payload.get("mode", "distance")
+    if mode not in MODES:
+        raise RequestError(f'"mode" doit valoir {" ou ".join(MODES)}')
+    objective = payload.get("objective", "sum")
+    if objective not in OBJECTIVE_LABELS:
+        raise RequestError(f'"objective" doit valoir {", ".join(OBJECTIVE_LABELS)}')
+    try:
+        radius_km = float(payload.get("radius_km", 0.6))
+        top = int(payload.get("top", 10))
+    except (TypeError, ValueError):
+        raise RequestError('"radius_km" et "top" doivent être des nombres')
+    if not 0 < radius_km <= 50:
+        raise RequestError('"radius_km" doit être compris entre 0 et 50')
+
+    return {
+        "friends": parsed_friends,
+        "mode": mode,
+        "objective": objective,
+        "radius_km": radius_km,
+        "top": max(1, top),
+    }
+
+
+class RankingService:
+    """
+    Calcul des recommandations pour le service HTTP.
+
+    Args:
+        workers (int): Nombre de processus pour les calculs (0 : threads du
+            processus courant, pratique pour les tests)
+        backend (str): Source des bars (voir `BAR_BACKENDS`)
+        timeout_s (float): Délai maximum d'une requête en secondes
+    """
+
+    def __init__(self, workers=None, backend=None, timeout_s=DEFAULT_TIMEOUT_S):
+        self.backend = backend or DEFAULT_BAR_BACKEND
+        self.timeout_s = timeout_s
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        # Processus lancés par "spawn" : un fork copierait les connexions
+        # clientes ouvertes (et les verrous des threads en cours)
+        self._cpu_pool = (
+            ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            if self.workers
+            else None
+        )
+        self._started_at = time.monotonic()
+        self._stats = {"requests": 0, "in_flight": 0, "errors": 0, "timeouts": 0}
+
+    def close(self):
+        """Arrête le pool de processus."""
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(cancel_futures=True)
+
+    async def _run_cpu(self, function, *args):
+        """Exécute un calcul dans le pool de processus (ou un thread)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._cpu_pool, function, *args)
+
+    def health(self):
+        """
+        Renvoie l'état du service.
+
+        Returns:
+            dict: Statut, source des bars, processus, requêtes en cours et
+                compteurs
+        """
+        return {
+            "status": "ok",
+            "backend": self.backend,
+            "workers": self.workers,
+            "uptime_s": round(time.monotonic() - self._started_at, 1),
+            **self._stats,
+        }
+
+    async def rank(self, request):
+        """
+        Calcule le classement des bars pour une requête validée, avec un
+        délai maximum.
+
+        Args:
+            request (dict): Paramètres renvoyés par `parse_rank_request`
+
+        Returns:
+            dict: Centre, bars classés, infos d'optimisation, avertissements
+                et temps par étape ("timings_ms")
+        """
+        self._stats["requests"] += 1
+        self._stats["in_flight"] += 1
+        try:
+            return await asyncio.wait_for(self._rank(request), self.timeout_s)
+        except asyncio.TimeoutError:
+            self._stats["timeouts"] += 1
+            raise RequestError(
+                f"Délai de {self.timeout_s:g} s dépassé", HTTPStatus.GATEWAY_TIMEOUT
+            )
+        except RequestError:
+            self._stats["errors"] += 1
+            raise
+        finally:
+            self._stats["in_flight"] -= 1
+
+    async def _rank(self, request):
+        """Enchaîne les étapes du calcul en mesurant leur durée."""
+        timings = {}
+        started_at = stage_started_at = time.perf_counter()
+
+        def lap(stage):
+            nonlocal stage_started_at
+            now = time.perf_counter()
+            timings[stage] = round((now - stage_started_at) * 1000, 3)
+            record_span(f"api.{stage}", timings[stage])
+            stage_started_at = now
+
+        friends = await self._geocode(request["friends"])
+        lap("geocode")
+        if not friends:
+            raise RequestError("Aucune adresse n'a pu être localisée")
+
+        center_lat, center_lon, transit_times, calc_info = await self._run_cpu(
+            compute_center, friends, request["mode"], request["objective"]
+        )
+        lap("center")
+
+        events = []
+        bars = await asyncio.to_thread(
+            get_bars_around_center,
+            center_lat,
+            center_lon,
+            request["radius_km"],
+            self.backend,
+            events.append,
+        )
+        lap("bar_search")
+
+        ranked = await self._run_cpu(rank_bars, bars, friends, request["mode"])
+        lap("ranking")
+        timings["total"] = round((time.perf_counter() - started_at) * 1000, 3)
+
+        response = {
+            "center": [float(center_lat), float(center_lon)],
+            "bars": [
+                {field: bar[field] for field in BAR_FIELDS if field in bar}
+                for bar in ranked[: request["top"]]
+            ],
+            "timings_ms": timings,
+        }
+        if calc_info:
+            response["transit_times"] = transit_times
+            response["calc_info"] = {
+                field: calc_info[field] for field in CALC_INFO_FIELDS
+            }
+        missing = len(request["friends"]) - len(friends)
+        warnings = [event["message"] for event in events]
+        if missing:
+            warnings.append(f"{missing} adresse(s) introuvable(s)")
+        if warnings:
+            response["warnings"] = warnings
+        return response
+
+    async def _geocode(self, friends):
+        """Géocode en parallèle les amis donnés par adresse."""
+        to_geocode = [friend for friend in friends if "latitude" not in friend]
+        if not to_geocode:
+            return friends
+
+        from src.geocoder import geocode_address
+
+        results = await asyncio.gather(
+            *(asyncio.to_thread(geocode_address, f["address"]) for f in to_geocode)
+        )
+        located = {}
+        for friend, (lat, lon, _) in zip(to_geocode, results):
+            if lat is not None:
+                located[id(friend)] = {**friend, "latitude": lat, "longitude": lon}
+        return [
+            located.get(id(friend), friend)
+            for friend in friends
+            if "latitude" in friend or id(friend) in located
+        ]
+
+    async def handle(self, method, path, body):
+        """
+        Traite une requête HTTP.
+
+        Args:
+            method (str): Méthode HTTP
+            path (str): Chemin demandé
+            body (bytes): Corps de la requête
+
+        Returns:
+            tuple: (statut HTTP, corps JSON de la réponse, ou texte pour
+                /metrics)
+        """
+        path = path.split("?", 1)[0]
+        try:
+            if path == "/health":
+                if method != "GET":
+                    raise RequestError(
+                        "Méthode non autorisée", HTTPStatus.METHOD_NOT_ALLOWED
+                    )
+                return HTTPStatus.OK, self.health()
+            if path == "/metrics":
+                if method != "GET":
+                    raise RequestError(
+                        "Méthode non autorisée", HTTPStatus.METHOD_NOT_ALLOWED
+                    )
+                return HTTPStatus.OK, prometheus_text()
+            if path == "/rank":
+                if method != "POST":
+                    raise RequestError(
+                        "Méthode non autorisée", HTTPStatus.METHOD_NOT_ALLOWED
+                    )
+                try:
+                    payload = json.loads(body or b"null")
+                except ValueError:
+                    raise RequestError("Corps JSON invalide")
+                return HTTPStatus.OK, await self.rank(parse_rank_request(payload))
+            raise RequestError(f"Route inconnue : {path}", HTTPStatus.NOT_FOUND)
+        except RequestError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            self._stats["errors"] += 1
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {
+                "error": f"{type(e).__name__}: {e}"
+            }
+
+
+async def _read_request(reader):
+    """
+    Lit une requête HTTP/1.1 sur une connexion.
+
+    Returns:
+        tuple: (méthode, chemin, en-têtes, corps), ou None si la connexion
+            est fermée
+    """
+    try:
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT_S)
+    except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+        return None
+
+    lines = head.decode("latin-1").split("\r\n")
+    method, path, version = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY_BYTES:
+        raise RequestError("Corps trop volumineux", HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+    body = await reader.readexactly(length) if length else b""
+    headers[":version"] = version
+    return method, path, headers, body
+
+
+def _encode_response(status, payload, keep_alive):
+    """Construit une réponse HTTP/1.1 avec un corps JSON (ou texte brut)."""
+    if isinstance(payload, str):
+        body = payload.encode()
+        content_type = "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        content_type = "application/json; charset=utf-8"
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode() + body
+
+
+async def serve(service, host="127.0.0.1", port=8600):
+    """
+    Démarre le serveur HTTP.
+
+    Args:
+        service (RankingService): Service de calcul
+        host (str): Adresse d'écoute
+        port (int): Port d'écoute (0 : port libre choisi par le système)
+
+    Returns:
+        asyncio.Server: Serveur démarré
+    """
+
+    async def handle_connection(reader, writer):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except (RequestError, ValueError) as e:
+                    status = getattr(e, "status", HTTPStatus.BAD_REQUEST)
+                    writer.write(_encode_response(status, {"error": str(e)}, False))
+                    break
+                if request is None:
+                    break
+
+                method, path, headers, body = request
+                keep_alive = (
+                    headers.get("connection", "").lower() != "close"
+                    and headers[":version"] == "HTTP/1.1"
+                )
+                status, payload = await service.handle(method, path, body)
+                writer.write(_encode_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle_connection, host, port, backlog=1024)
+
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande du service HTTP."""
+    parser = argparse.ArgumentParser(
+        description="Service HTTP/JSON de recommandation de bars."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processus de calcul (par défaut : nb de CPU)",
+    )
+    parser.add_argument("--backend", choices=BAR_BACKENDS, default=DEFAULT_BAR_BACKEND)
+    parser.add_argument(
+        "--timeout", type=float, default=DEFAULT_TIMEOUT_S, help="Délai par requête (s)"
+    )
+    args = parser.parse_args(argv)
+
+    service = RankingService(args.workers, args.backend, args.timeout)
+
+    async def run():
+        server = await serve(service, args.host, args.port)
+        print(f"🍻 Service de recommandation sur http://{args.host}:{args.port}")
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,91 +1,66 @@
 """
-Module pour la recherche de bars via l'API Overpass.
+Module pour la recherche de bars via l'API Overpass ou un index local.
 """
 
-import requests
-import streamlit as st
+import functools
+import os
+import time
 
+from src.bar_index import get_bar_index
+from src.geo_utils import bounding_box, distance_matrix
+from src.metrics import span
+from src.overpass_cache import DEFAULT_TTL_S, get_overpass_cache
+from src.progress import notify
 
-@st.cache_data
-def get_bars_around_center(center_lat, center_lon, radius_km: float = 0.6):
+
+# Source des bars : "overpass" (API en ligne) ou "local" (index SQLite)
+BAR_BACKENDS = ("overpass", "local")
+DEFAULT_BAR_BACKEND = os.environ.get("OUCEKONBOI_BAR_BACKEND", "overpass")
+
+# Rayon maximum proposé par le curseur : les bars sont récupérés une fois
+# dans ce rayon, puis filtrés en mémoire pour les rayons plus petits
+MAX_SEARCH_RADIUS_KM = 2.0
+
+
+def get_bars_around_center(
+    center_lat, center_lon, radius_km: float = 0.6, backend=None, progress=None
+):
     """
     Recherche des bars autour du centre géographique du groupe d'amis
-    en utilisant l'API Overpass d'OpenStreetMap.
+    en utilisant l'API Overpass d'OpenStreetMap ou l'index local.
+
+    Les bars candidats sont récupérés une seule fois par centre dans le
+    rayon maximum, puis filtrés ici par distance exacte : changer le rayon
+    ne déclenche aucune nouvelle recherche. Les 10 bars renvoyés sont les
+    plus proches du centre.
 
     Args:
         center_lat (float): Latitude du centre
         center_lon (float): Longitude du centre
         radius_km (float): Rayon de recherche en kilomètres
+        backend (str): "overpass" ou "local" (par défaut DEFAULT_BAR_BACKEND)
+        progress (callable): Fonction de rappel recevant les erreurs de
+            recherche (voir `src.progress`)
 
     Returns:
         list: Liste des bars trouvés avec leurs informations
     """
     try:
-        # Convertir le rayon en degrés (approximatif)
-        radius_deg = radius_km / 111.0  # 1 degré ≈ 111 km
-
-        # Requête Overpass pour trouver les bars
-        overpass_url = "http://overpass-api.de/api/interpreter"
-        overpass_query = f"""
-        [out:json][timeout:25];
-        (
-          node["amenity"="bar"]({center_lat-radius_deg},{center_lon-radius_deg},{center_lat+radius_deg},{center_lon+radius_deg});
-          node["amenity"="pub"]({center_lat-radius_deg},{center_lon-radius_deg},{center_lat+radius_deg},{center_lon+radius_deg});
-        );
-        out geom;
-        """
-
-        response = requests.get(
-            overpass_url, params={"data": overpass_query}, timeout=30
+        candidates, distances = get_bar_candidates(
+            center_lat,
+            center_lon,
+            max(radius_km, MAX_SEARCH_RADIUS_KM),
+            backend or DEFAULT_BAR_BACKEND,
         )
-        data = response.json()
-
-        bars = []
-        for element in data.get("elements", []):
-            if "tags" in element and "name" in element["tags"]:
-                name = element["tags"]["name"]
-                lat = element["lat"]
-                lon = element["lon"]
-
-                # Déterminer le type de bar
-                amenity = element["tags"].get("amenity", "bar")
-                bar_type = "Pub" if amenity == "pub" else "Bar"
-
-                # Construire l'adresse approximative
-                address_parts = []
-                if "addr:housenumber" in element["tags"]:
-                    address_parts.append(element["tags"]["addr:housenumber"])
-                if "addr:street" in element["tags"]:
-                    address_parts.append(element["tags"]["addr:street"])
-                if "addr:postcode" in element["tags"]:
-                    address_parts.append(element["tags"]["addr:postcode"])
-
-                # Ajouter la ville selon la position
-                if (
-                    center_lat >= 48.8
-                    and center_lat <= 48.9
-                    and center_lon >= 2.2
-                    and center_lon <= 2.5
-                ):
-                    address_parts.append("Paris")
-                else:
-                    address_parts.append("France")
-
-                address = (
-                    ", ".join(address_parts)
-                    if address_parts
-                    else f"Près de {center_lat:.3f}, {center_lon:.3f}"
-                )
-
-                bars.append(
-                    {
-                        "name": name,
-                        "lat": lat,
-                        "lon": lon,
-                        "address": address,
-                        "type": bar_type,
-                    }
-                )
+        # Les plus proches d'abord : l'ordre des candidats (identifiants
+        # OSM) ne doit pas décider des bars gardés par la limite de 10
+        bars = [
+            bar
+            for distance, bar in sorted(
+                zip(distances, candidates), key=lambda pair: pair[0]
+            )
+            if distance <= radius_km
+        ]
 
         # Si on trouve moins de 10 bars, ajouter quelques bars populaires connus
         if len(bars) < 10:
@@ -94,10 +69,186 @@ def get_bars_around_center(center_lat, center_lon, radius_km: float = 0.6):
         return bars[:10]  # Limiter à 10 bars maximum
 
     except Exception as e:
-        st.error(f"Erreur lors de la recherche de bars: {str(e)}")
+        notify(
+            progress,
+            "bar_search",
+            f"Erreur lors de la recherche de bars: {str(e)}",
+            level="error",
+        )
         return get_fallback_bars(center_lat, center_lon)
 
 
+def bar_data_version(backend=None):
+    """
+    Renvoie la version des données de bars d'une source.
+
+    Pour l'index local, la version change à chaque reconstruction ; pour
+    Overpass, elle change à chaque période de validité du cache de tuiles.
+    Les résultats calculés à partir des bars l'incluent dans leur clé.
+
+    Args:
+        backend (str): "overpass" ou "local" (par défaut DEFAULT_BAR_BACKEND)
+
+    Returns:
+        str: Version des données
+    """
+    backend = backend or DEFAULT_BAR_BACKEND
+    if backend == "local":
+        try:
+            return f"local:{get_bar_index().version}"
+        except FileNotFoundError:
+            return "local:absent"
+    return f"{backend}:{int(time.time() // DEFAULT_TTL_S)}"
+
+
+def get_bar_candidates(center_lat, center_lon, radius_km, backend):
+    """
+    Récupère tous les bars dans un rayon donné autour d'un centre.
+
+    Le résultat est gardé en mémoire par centre et par version des données
+    (voir `bar_data_version`) : une reconstruction de l'index local ou
+    l'expiration du cache de tuiles Overpass relance la recherche. Chaque
+    appel renvoie des copies des bars, que l'appelant peut modifier (ajout
+    des temps moyens).
+
+    Args:
+        center_lat (float): Latitude du centre
+        center_lon (float): Longitude du centre
+        radius_km (float): Rayon de recherche en kilomètres
+        backend (str): "overpass" ou "local"
+
+    Returns:
+        tuple: (liste des bars dans le rayon, liste de leurs distances au
+            centre en km)
+    """
+    with span("bars.candidates") as timing:
+        misses = _cached_bar_candidates.cache_info().misses
+        bars, distances = _cached_bar_candidates(
+            center_lat, center_lon, radius_km, backend, bar_data_version(backend)
+        )
+        timing.cached = _cached_bar_candidates.cache_info().misses == misses
+    return [dict(bar) for bar in bars], list(distances)
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_bar_candidates(center_lat, center_lon, radius_km, backend, version):
+    """Recherche des bars candidats, mise en cache par centre, rayon et version."""
+    if backend == "overpass":
+        elements = fetch_overpass_elements(center_lat, center_lon, radius_km)
+    elif backend == "local":
+        with span("bars.local_index"):
+            elements = get_bar_index().query_radius(center_lat, center_lon, radius_km)
+    else:
+        raise ValueError(
+            f"Source de bars inconnue: {backend!r} "
+            f"(attendu: {', '.join(BAR_BACKENDS)})"
+        )
+
+    bars = parse_bar_elements(elements, center_lat, center_lon)
+    if not bars:
+        return (), ()
+
+    distances = distance_matrix(
+        (center_lat, center_lon), [(bar["lat"], bar["lon"]) for bar in bars]
+    )[0]
+    in_radius = distances <= radius_km
+    return (
+        tuple(bar for bar, keep in zip(bars, in_radius) if keep),
+        tuple(distances[in_radius].tolist()),
+    )
+
+
+def clear_bar_candidates():
+    """Oublie les bars candidats gardés en mémoire (ils seront relus)."""
+    _cached_bar_candidates.cache_clear()
+
+
+def fetch_overpass_elements(center_lat, center_lon, radius_km):
+    """
+    Récupère les bars et pubs autour d'un point via l'API Overpass.
+
+    Les réponses sont mises en cache sur disque par tuile (voir
+    `src.overpass_cache`) : seules les zones jamais vues ou expirées
+    déclenchent une requête réseau.
+
+    Args:
+        center_lat (float): Latitude du centre
+        center_lon (float): Longitude du centre
+        radius_km (float): Rayon de recherche en kilomètres
+
+    Returns:
+        list: Éléments bruts renvoyés par Overpass
+    """
+    cache = get_overpass_cache()
+    with span("bars.overpass") as timing:
+        upstream_queries = cache.stats()["upstream_queries"]
+        elements = cache.get_elements(*bounding_box(center_lat, center_lon, radius_km))
+        timing.cached = cache.stats()["upstream_queries"] == upstream_queries
+    return elements
+
+
+def parse_bar_elements(elements, center_lat, center_lon):
+    """
+    Met en forme les éléments OpenStreetMap (Overpass ou index local).
+
+    Args:
+        elements (list): Éléments avec "lat", "lon" et "tags"
+        center_lat (float): Latitude du centre de recherche
+        center_lon (float): Longitude du centre de recherche
+
+    Returns:
+        list: Liste des bars nommés avec leurs informations
+    """
+    bars = []
+    for element in elements:
+        if "tags" in element and "name" in element["tags"]:
+            name = element["tags"]["name"]
+            lat = element["lat"]
+            lon = element["lon"]
+
+            # Déterminer le type de bar
+            amenity = element["tags"].get("amenity", "bar")
+            bar_type = "Pub" if amenity == "pub" else "Bar"
+
+            # Construire l'adresse approximative
+            address_parts = []
+            if "addr:housenumber" in element["tags"]:
+                address_parts.append(element["tags"]["addr:housenumber"])
+            if "addr:street" in element["tags"]:
+                address_parts.append(element["tags"]["addr:street"])
+            if "addr:postcode" in element["tags"]:
+                address_parts.append(element["tags"]["addr:postcode"])
+
+            # Ajouter la ville selon la position
+            if (
+                center_lat >= 48.8
+                and center_lat <= 48.9
+                and center_lon >= 2.2
+                and center_lon <= 2.5
+            ):
+                address_parts.append("Paris")
+            else:
+                address_parts.append("France")
+
+            address = (
+                ", ".join(address_parts)
+                if address_parts
+                else f"Près de {center_lat:.3f}, {center_lon:.3f}"
+            )
+
+            bars.append(
+                {
+                    "name": name,
+                    "lat": lat,
+                    "lon": lon,
+                    "address": address,
+                    "type": bar_type,
+                }
+            )
+
+    return bars
+
+
 def get_fallback_bars(center_lat, center_lon):
     """
     Retourne une liste de bars populaires de fallback.
@@ -0,0 +1,400 @@
+"""
+Module pour l'index spatial local des bars (SQLite R*Tree).
+
+L'index est construit une fois à partir d'un extrait OpenStreetMap
+(fichier .osm.pbf ou export JSON d'Overpass) puis interrogé sans réseau.
+Les bars cartographiés comme des points (nodes) et comme des contours de
+bâtiment (ways, indexés à leur centre) sont retenus, comme dans les
+requêtes Overpass de `src.overpass_cache`. Les résultats ont la même forme
+que les éléments renvoyés par Overpass (`{"type", "id", "lat", "lon",
+"tags"}`), ce qui permet de réutiliser le même code de mise en forme des
+bars.
+
+À l'ouverture, les positions et attributs des bars sont chargés en
+mémoire (quelques Mo pour une région) : le R*Tree ne renvoie que des
+clés, et une recherche de 2 km dans un quartier dense (un millier de
+bars) prend de l'ordre de la milliseconde.
+
+Construction de l'index :
+
+    python -m src.bar_index paris-bars.json --index data/bars.sqlite
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from src.geo_utils import bounding_box, distance_matrix
+from src.paths import data_path
+
+
+DEFAULT_INDEX_FILE = os.environ.get("OUCEKONBOI_BAR_INDEX", data_path("bars.sqlite"))
+
+# Valeurs de la clé amenity retenues dans l'index
+BAR_AMENITIES = ("bar", "pub")
+
+# Tags OSM conservés dans l'index (colonnes de la table bars)
+INDEXED_TAGS = ("name", "amenity", "addr:housenumber", "addr:street", "addr:postcode")
+
+# Version du format de l'index : un index plus ancien doit être reconstruit
+INDEX_FORMAT = 2
+
+# Clé interne (R*Tree) : les identifiants OSM des nodes et des ways se
+# recouvrent, les bars sont numérotés dans l'ordre (type, identifiant)
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    key INTEGER PRIMARY KEY,
+    type TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    lat REAL NOT NULL,
+    lon REAL NOT NULL,
+    name TEXT,
+    amenity TEXT,
+    housenumber TEXT,
+    street TEXT,
+    postcode TEXT
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS bars_rtree USING rtree(
+    key, min_lat, max_lat, min_lon, max_lon
+);
+"""
+
+_BBOX_QUERY = """
+SELECT key FROM bars_rtree
+WHERE max_lat >= ? AND min_lat <= ? AND max_lon >= ? AND min_lon <= ?
+"""
+
+
+def read_overpass_json(path):
+    """
+    Lit les bars d'un export JSON d'Overpass.
+
+    Les ways doivent porter leur centre (`out center`) ou leur géométrie
+    (`out geom`).
+
+    Args:
+        path (str): Chemin du fichier JSON (`{"elements": [...]}`)
+
+    Yields:
+        dict: Nodes et ways ayant une amenity bar ou pub, positionnés
+            (centre pour les ways)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    for element in data.get("elements", []):
+        tags = element.get("tags", {})
+        if tags.get("amenity") not in BAR_AMENITIES:
+            continue
+        position = element_position(element)
+        if position is not None:
+            yield {
+                "type": element.get("type", "node"),
+                "id": element["id"],
+                "lat": position[0],
+                "lon": position[1],
+                "tags": tags,
+            }
+
+
+def element_position(element):
+    """
+    Renvoie la position d'un élément Overpass.
+
+    Args:
+        element (dict): Node (`lat`, `lon`) ou way avec `center` ou
+            `geometry`
+
+    Returns:
+        tuple: (latitude, longitude) ; None si l'élément n'est pas positionné
+    """
+    if "lat" in element and "lon" in element:
+        return element["lat"], element["lon"]
+    if "center" in element:
+        return element["center"]["lat"], element["center"]["lon"]
+    geometry = element.get("geometry")
+    if geometry:
+        return _centroid([(point["lat"], point["lon"]) for point in geometry])
+    return None
+
+
+def _centroid(points):
+    """Centre des sommets d'un contour (le dernier répète le premier)."""
+    if len(points) > 1 and points[0] == points[-1]:
+        points = points[:-1]
+    lats, lons = zip(*points)
+    return sum(lats) / len(lats), sum(lons) / len(lons)
+
+
+def read_osm_pbf(path):
+    """
+    Lit les bars d'un extrait OpenStreetMap au format .osm.pbf.
+
+    Nécessite le paquet optionnel `osmium` (pyosmium).
+
+    Args:
+        path (str): Chemin du fichier .osm.pbf
+
+    Returns:
+        list: Nodes et ways (à leur centre) ayant une amenity bar ou pub
+    """
+    try:
+        import osmium
+    except ImportError as e:
+        raise ImportError(
+            "La lecture des fichiers .osm.pbf nécessite pyosmium "
+            "(pip install osmium)"
+        ) from e
+
+    elements = []
+
+    class BarHandler(osmium.SimpleHandler):
+        def node(self, n):
+            if n.tags.get("amenity") in BAR_AMENITIES and n.location.valid():
+                elements.append(
+                    {
+                        "type": "node",
+                        "id": n.id,
+                        "lat": n.location.lat,
+                        "lon": n.location.lon,
+                        "tags": {tag.k: tag.v for tag in n.tags},
+                    }
+                )
+
+        def way(self, w):
+            if w.tags.get("amenity") not in BAR_AMENITIES:
+                return
+            points = [
+                (node.location.lat, node.location.lon)
+                for node in w.nodes
+                if node.location.valid()
+            ]
+            if points:
+                lat, lon = _centroid(points)
+                elements.append(
+                    {
+                        "type": "way",
+                        "id": w.id,
+                        "lat": lat,
+                        "lon": lon,
+                        "tags": {tag.k: tag.v for tag in w.tags},
+                    }
+                )
+
+    # Positions des nodes gardées pendant la lecture : centre des ways
+    BarHandler().apply_file(path, locations=True)
+    return elements
+
+
+def build_index(source_path, index_file=DEFAULT_INDEX_FILE):
+    """
+    Construit (ou remplace) l'index spatial à partir d'un extrait OSM.
+
+    Args:
+        source_path (str): Fichier .osm.pbf ou export JSON d'Overpass
+        index_file (str): Chemin du fichier SQLite à créer
+
+    Returns:
+        int: Nombre de bars indexés
+    """
+    if source_path.endswith(".pbf"):
+        elements = read_osm_pbf(source_path)
+    else:
+        elements = read_overpass_json(source_path)
+
+    directory = os.path.dirname(index_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # Construction dans un fichier temporaire puis remplacement atomique,
+    # pour ne jamais exposer un index à moitié écrit
+    tmp_file = index_file + ".tmp"
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+
+    unique = {(element["type"], element["id"]): element for element in elements}
+    connection = sqlite3.connect(tmp_file)
+    try:
+        connection.executescript(_SCHEMA)
+        connection.execute(f"PRAGMA user_version = {INDEX_FORMAT}")
+        for key, type_id in enumerate(sorted(unique)):
+            element = unique[type_id]
+            connection.execute(
+                "INSERT INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, *type_id, element["lat"], element["lon"])
+                + tuple(element["tags"].get(tag) for tag in INDEXED_TAGS),
+            )
+            connection.execute(
+                "INSERT INTO bars_rtree VALUES (?, ?, ?, ?, ?)",
+                (key, element["lat"], element["lat"], element["lon"], element["lon"]),
+            )
+        connection.commit()
+    finally:
+        connection.close()
+
+    os.replace(tmp_file, index_file)
+    return len(unique)
+
+
+def file_version(path):
+    """
+    Renvoie la version d'un fichier de données (date et taille).
+
+    Args:
+        path (str): Chemin du fichier
+
+    Returns:
+        str: Version du fichier ; None s'il n'existe pas
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+class BarIndex:
+    """
+    Index spatial des bars en lecture seule.
+
+    La recherche spatiale passe par le R*Tree de SQLite, qui ne renvoie
+    que des clés ; positions et attributs sont lus une fois à l'ouverture
+    et gardés en mémoire. La connexion, ouverte en même temps et partagée
+    par les threads (sessions Streamlit), voit toujours le fichier lu à
+    l'ouverture, même s'il est remplacé depuis : recherche et attributs
+    viennent du même état de l'index.
+    """
+
+    def __init__(self, index_file=DEFAULT_INDEX_FILE):
+        if not os.path.exists(index_file):
+            raise FileNotFoundError(
+                f"Index des bars introuvable: {index_file} "
+                f"(construisez-le avec `python -m src.bar_index <extrait OSM>`)"
+            )
+        self.index_file = index_file
+        # Version des données : change à chaque reconstruction de l'index
+        self.version = file_version(index_file)
+        self._lock = threading.Lock()
+
+        uri = f"file:{os.path.abspath(index_file)}?mode=ro"
+        self._connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        index_format = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if index_format != INDEX_FORMAT:
+            self._connection.close()
+            raise ValueError(
+                f"Index des bars au format {index_format} (attendu: {INDEX_FORMAT}), "
+                f"reconstruisez-le avec `python -m src.bar_index <extrait OSM>`"
+            )
+        rows = self._connection.execute("SELECT * FROM bars ORDER BY key").fetchall()
+        # Les clés valent 0..n-1 : la clé est la position dans les tableaux
+        self._positions = np.array([(row[3], row[4]) for row in rows]).reshape(-1, 2)
+        self._elements = [
+            {
+                "type": row[1],
+                "id": row[2],
+                "lat": row[3],
+                "lon": row[4],
+                "tags": {
+                    tag: value
+                    for tag, value in zip(INDEXED_TAGS, row[5:])
+                    if value is not None
+                },
+            }
+            for row in rows
+        ]
+
+    def _query_keys(self, south, west, north, east):
+        """Clés des bars d'une boîte englobante, dans l'ordre (type, id)."""
+        with self._lock:
+            rows = self._connection.execute(
+                _BBOX_QUERY, (south, north, west, east)
+            ).fetchall()
+        return np.sort(np.fromiter((row[0] for row in rows), np.int64, len(rows)))
+
+    def query_bbox(self, south, west, north, east):
+        """
+        Renvoie les bars contenus dans une boîte englobante.
+
+        Args:
+            south (float): Latitude minimale
+            west (float): Longitude minimale
+            north (float): Latitude maximale
+            east (float): Longitude maximale
+
+        Returns:
+            list: Éléments au format Overpass, triés par type et identifiant
+        """
+        return [
+            self._elements[key] for key in self._query_keys(south, west, north, east)
+        ]
+
+    def query_radius(self, lat, lon, radius_km):
+        """
+        Renvoie les bars situés à moins de `radius_km` d'un point.
+
+        Args:
+            lat (float): Latitude du centre
+            lon (float): Longitude du centre
+            radius_km (float): Rayon de recherche en kilomètres
+
+        Returns:
+            list: Éléments au format Overpass, triés par type et identifiant
+        """
+        keys = self._query_keys(*bounding_box(lat, lon, radius_km))
+        if len(keys) == 0:
+            return []
+
+        distances = distance_matrix(
+            (lat, lon), self._positions[keys], method="equirectangular"
+        )[0]
+        return [self._elements[key] for key in keys[distances <= radius_km]]
+
+    def __len__(self):
+        return len(self._elements)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_bar_index(index_file=DEFAULT_INDEX_FILE):
+    """
+    Renvoie l'index des bars partagé par le processus.
+
+    L'index est rouvert quand le fichier a été reconstruit depuis son
+    ouverture : sa version (et celle des résultats qui en dépendent) change.
+
+    Args:
+        index_file (str): Chemin du fichier SQLite de l'index
+
+    Returns:
+        BarIndex: Index ouvert en lecture seule
+    """
+    with _indexes_lock:
+        index = _indexes.get(index_file)
+        if index is None or index.version != file_version(index_file):
+            index = _indexes[index_file] = BarIndex(index_file)
+        return index
+
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande pour construire l'index."""
+    parser = argparse.ArgumentParser(
+        description="Construit l'index spatial local des bars à partir d'un extrait OSM."
+    )
+    parser.add_argument("source", help="Fichier .osm.pbf ou export JSON d'Overpass")
+    parser.add_argument(
+        "--index", default=DEFAULT_INDEX_FILE, help="Fichier SQLite à créer"
+    )
+    args = parser.parse_args(argv)
+
+    count = build_index(args.source, args.index)
+    print(f"✅ {count} bars indexés dans {args.index}")
+
+
+if __name__ == "__main__":
+    main()
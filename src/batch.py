@@ -0,0 +1,403 @@
+"""
+Module pour le calcul des recommandations en lot, sans interface.
+
+Pour chaque groupe d'amis, le même moteur que la page Oucekonboi
+(`src.engine.plan_meeting`) calcule le point de rendez-vous puis le
+classement des bars. Les groupes sont répartis par paquets sur un pool de
+processus ; les résultats sont écrits au fil de l'eau, dans l'ordre
+d'entrée, au format JSON Lines (un groupe par ligne).
+
+Avec --resume, les groupes déjà présents dans le fichier de sortie sont
+sautés : un traitement interrompu reprend là où il s'était arrêté.
+
+Exemple :
+    python batch.py --output data/recommendations.jsonl --workers 8
+    python batch.py groups.csv --mode transit --output out.jsonl --resume
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from src.bar_finder import DEFAULT_BAR_BACKEND, BAR_BACKENDS
+from src.engine import MODES, plan_meeting
+from src.transit_utils import OBJECTIVE_LABELS
+
+
+# Colonnes acceptées dans un fichier CSV de groupes (français ou anglais)
+GROUP_COLUMNS = ("group", "groupe", "group_id")
+DEFAULT_CHUNK_SIZE = 16
+
+# Champs des bars recopiés dans la sortie
+BAR_FIELDS = ("name", "lat", "lon", "address", "type", "avg_distance", "avg_time")
+
+# Infos d'optimisation recopiées dans la sortie (sans la trace complète)
+CALC_INFO_FIELDS = (
+    "avg_initial_time",
+    "avg_final_time",
+    "time_improvement",
+    "displacement_km",
+    "iterations",
+    "stop_reason",
+    "elapsed_ms",
+)
+
+
+def read_groups(path):
+    """
+    Lit des groupes d'amis depuis un fichier JSON ou CSV.
+
+    Formats acceptés :
+    - JSON : liste de {"id": ..., "friends": [...]}, objet {"groups": [...]}
+      ou objet {id du groupe: [amis]} ;
+    - CSV : une ligne par ami avec les colonnes group (ou groupe), name (ou
+      nom), latitude et longitude, les amis étant regroupés par groupe.
+
+    Args:
+        path (str): Chemin du fichier
+
+    Returns:
+        list: Groupes {"id": str, "friends": list}, dans l'ordre du fichier
+    """
+    with open(path, "r", encoding="utf-8-sig") as f:
+        content = f.read()
+
+    if path.lower().endswith(".json"):
+        data = json.loads(content)
+        if isinstance(data, dict) and "groups" in data:
+            data = data["groups"]
+        if isinstance(data, dict):
+            return [
+                {"id": str(group_id), "friends": friends}
+                for group_id, friends in data.items()
+            ]
+        return [
+            {"id": str(group.get("id", index)), "friends": group["friends"]}
+            for index, group in enumerate(data)
+        ]
+
+    groups = {}
+    for row in csv.DictReader(io.StringIO(content)):
+        row = {key.strip().lower(): value for key, value in row.items() if key}
+        group_id = next((row[c] for c in GROUP_COLUMNS if row.get(c)), "default")
+        try:
+            friend = {
+                "name": row.get("name") or row.get("nom") or "",
+                "address": row.get("address") or row.get("adresse") or "",
+                "latitude": float(row["latitude"]),
+                "longitude": float(row["longitude"]),
+            }
+        except (KeyError, TypeError, ValueError):
+            continue  # Ami sans coordonnées exploitables
+        groups.setdefault(group_id, []).append(friend)
+    return [
+        {"id": group_id, "friends": friends} for group_id, friends in groups.items()
+    ]
+
+
+def read_store_groups():
+    """
+    Lit tous les groupes du stockage des amis (voir `src.data_manager`).
+
+    Returns:
+        list: Groupes {"id": str, "friends": list}
+    """
+    from src.data_manager import list_groups, load_friends
+
+    return [
+        {"id": group["id"], "friends": load_friends(group["id"])}
+        for group in list_groups()
+    ]
+
+
+def process_group(group, options):
+    """
+    Calcule la recommandation d'un groupe.
+
+    Args:
+        group (dict): Groupe {"id": str, "friends": list}
+        options (dict): Paramètres de `plan_meeting` (mode, objective,
+            radius_km, backend) et nombre de bars gardés ("top")
+
+    Returns:
+        dict: Ligne de résultat (sérialisable en JSON)
+    """
+    started_at = time.perf_counter()
+    events = []
+    line = {"group_id": group["id"], "friends": len(group["friends"])}
+    try:
+        result = plan_meeting(
+            group["friends"],
+            mode=options["mode"],
+            objective=options["objective"],
+            radius_km=options["radius_km"],
+            backend=options["backend"],
+            progress=events.append,
+        )
+    except Exception as e:
+        line["error"] = f"{type(e).__name__}: {e}"
+    else:
+        line["center"] = [float(result["center"][0]), float(result["center"][1])]
+        line["bars"] = [
+            {field: bar[field] for field in BAR_FIELDS if field in bar}
+            for bar in result["bars"][: options["top"]]
+        ]
+        if result["calc_info"]:
+            line["calc_info"] = {
+                field: result["calc_info"][field] for field in CALC_INFO_FIELDS
+            }
+    warnings = [e["message"] for e in events if e["level"] in ("warning", "error")]
+    if warnings:
+        line["warnings"] = warnings
+    line["elapsed_ms"] = (time.perf_counter() - started_at) * 1000
+    return line
+
+
+def process_chunk(chunk, options):
+    """
+    Calcule les recommandations d'un paquet de groupes (dans un processus
+    du pool).
+
+    Returns:
+        list: Lignes de résultat, dans l'ordre du paquet
+    """
+    return [process_group(group, options) for group in chunk]
+
+
+def _init_worker(workers):
+    """Partage le débit autorisé vers Overpass entre les processus du pool."""
+    from src.http_client import UPSTREAMS, configure_client
+
+    overpass = UPSTREAMS["overpass"]
+    configure_client(
+        "overpass",
+        rate_per_s=overpass["rate_per_s"] / workers,
+        max_concurrency=max(1, overpass["max_concurrency"] // workers),
+    )
+
+
+def iter_results(groups, options, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Calcule les recommandations de tous les groupes, dans l'ordre d'entrée.
+
+    Les paquets sont soumis au pool au fur et à mesure (au plus deux par
+    processus en attente), ce qui borne la mémoire utilisée quel que soit
+    le nombre de groupes.
+
+    Args:
+        groups (iterable): Groupes {"id": str, "friends": list}
+        options (dict): Options de `process_group`
+        workers (int): Nombre de processus (1 : calcul dans le processus
+            courant)
+        chunk_size (int): Nombre de groupes par paquet
+
+    Yields:
+        dict: Lignes de résultat, dans l'ordre des groupes
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunked(groups, chunk_size)
+
+    if workers == 1:
+        for chunk in chunks:
+            yield from process_chunk(chunk, options)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(workers,)
+    ) as executor:
+        pending = deque()
+        try:
+            for chunk in chunks:
+                pending.append(executor.submit(process_chunk, chunk, options))
+                if len(pending) >= 2 * workers:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        except BaseException:
+            # Interruption : les paquets pas encore commencés sont abandonnés
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+
+def _chunked(items, size):
+    """Découpe un itérable en listes de `size` éléments."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def completed_group_ids(output_path):
+    """
+    Liste les groupes déjà écrits dans un fichier de sortie.
+
+    Une dernière ligne incomplète (interruption pendant l'écriture) est
+    retirée du fichier.
+
+    Args:
+        output_path (str): Fichier JSON Lines de sortie
+
+    Returns:
+        set: Identifiants des groupes déjà traités
+    """
+    if not os.path.exists(output_path):
+        return set()
+
+    done = set()
+    valid_size = 0
+    with open(output_path, "rb") as f:
+        for raw_line in f:
+            if not raw_line.endswith(b"\n"):
+                break
+            try:
+                done.add(json.loads(raw_line)["group_id"])
+            except (ValueError, KeyError):
+                break
+            valid_size += len(raw_line)
+
+    if valid_size != os.path.getsize(output_path):
+        with open(output_path, "r+b") as f:
+            f.truncate(valid_size)
+    return done
+
+
+def run_batch(
+    groups,
+    output_path,
+    options,
+    workers=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    resume=False,
+    report_every_s=5.0,
+    log=sys.stderr,
+):
+    """
+    Calcule les recommandations de groupes et les écrit en JSON Lines.
+
+    Args:
+        groups (list): Groupes {"id": str, "friends": list}
+        output_path (str): Fichier de sortie ("-" pour la sortie standard)
+        options (dict): Options de `process_group`
+        workers (int): Nombre de processus
+        chunk_size (int): Nombre de groupes par paquet
+        resume (bool): Sauter les groupes déjà présents dans la sortie
+        report_every_s (float): Intervalle entre deux messages de débit
+        log: Flux des messages de progression
+
+    Returns:
+        dict: Bilan avec les nombres de groupes traités, sautés et en
+            erreur, la durée et le débit (groupes/s)
+    """
+    done = completed_group_ids(output_path) if resume and output_path != "-" else set()
+    todo = [group for group in groups if group["id"] not in done]
+
+    if output_path == "-":
+        output = sys.stdout
+    else:
+        directory = os.path.dirname(output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        output = open(output_path, "a" if resume else "w", encoding="utf-8")
+
+    started_at = last_report = time.perf_counter()
+    processed = errors = 0
+    try:
+        for line in iter_results(todo, options, workers, chunk_size):
+            output.write(json.dumps(line, ensure_ascii=False) + "\n")
+            output.flush()
+            processed += 1
+            errors += "error" in line
+
+            now = time.perf_counter()
+            if log and now - last_report >= report_every_s:
+                last_report = now
+                print(
+                    f"⏳ {processed}/{len(todo)} groupes, "
+                    f"{processed / (now - started_at):.1f} groupes/s",
+                    file=log,
+                )
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    elapsed_s = time.perf_counter() - started_at
+    return {
+        "processed": processed,
+        "skipped": len(groups) - len(todo),
+        "errors": errors,
+        "elapsed_s": elapsed_s,
+        "groups_per_s": processed / elapsed_s if elapsed_s > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande du calcul en lot."""
+    parser = argparse.ArgumentParser(
+        description="Calcule les bars recommandés pour de nombreux groupes d'amis."
+    )
+    parser.add_argument(
+        "groups",
+        nargs="?",
+        help="Fichier JSON ou CSV des groupes (par défaut : tous les groupes "
+        "enregistrés dans l'application)",
+    )
+    parser.add_argument(
+        "--output", "-o", default="-", help="Fichier JSON Lines de sortie"
+    )
+    parser.add_argument("--mode", choices=MODES, default="distance")
+    parser.add_argument("--objective", choices=list(OBJECTIVE_LABELS), default="sum")
+    parser.add_argument("--radius", type=float, default=0.6, help="Rayon en km")
+    parser.add_argument("--backend", choices=BAR_BACKENDS, default=DEFAULT_BAR_BACKEND)
+    parser.add_argument("--top", type=int, default=10, help="Bars gardés par groupe")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Processus (par défaut : nb de CPU)"
+    )
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reprendre un traitement interrompu (groupes déjà écrits sautés)",
+    )
+    args = parser.parse_args(argv)
+
+    groups = read_groups(args.groups) if args.groups else read_store_groups()
+    options = {
+        "mode": args.mode,
+        "objective": args.objective,
+        "radius_km": args.radius,
+        "backend": args.backend,
+        "top": args.top,
+    }
+
+    try:
+        summary = run_batch(
+            groups,
+            args.output,
+            options,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            resume=args.resume,
+        )
+    except KeyboardInterrupt:
+        print("⏹️ Interrompu : relancez avec --resume pour continuer.", file=sys.stderr)
+        sys.exit(130)
+    print(
+        f"✅ {summary['processed']} groupes traités "
+        f"({summary['skipped']} déjà faits, {summary['errors']} en erreur) "
+        f"en {summary['elapsed_s']:.1f} s, {summary['groups_per_s']:.1f} groupes/s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""
+Module pour la mesure des performances des calculs sur des données synthétiques.
+
+Les groupes d'amis (2 à 10 000) et les bars candidats (10 à 100 000) sont
+générés autour de Paris à partir d'une graine : deux exécutions mesurent
+exactement les mêmes calculs. Chaque cas (chemin de calcul × taille) est
+répété jusqu'à une durée minimale et la médiane des répétitions est
+retenue.
+
+Les résultats peuvent être enregistrés comme référence, puis comparés à
+la référence : un cas régresse si sa médiane dépasse celle de référence
+de plus du seuil (en proportion) et d'une durée minimale (le bruit des
+cas très courts n'est pas une régression).
+
+Exemple :
+    python benchmark.py --save-baseline
+    python benchmark.py --check --threshold 0.25
+    python benchmark.py --quick --path rank_bars_distance
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from src.engine import rank_bars
+from src.geo_utils import calculate_average_distance, calculate_center, km_per_degree
+from src.paths import data_path
+from src.transit_utils import (
+    calculate_average_transit_time,
+    calculate_weighted_center_by_transit_time,
+)
+
+
+DEFAULT_BASELINE_FILE = os.environ.get(
+    "OUCEKONBOI_BENCHMARK_BASELINE", data_path("benchmark_baseline.json")
+)
+
+DEFAULT_SEED = 42
+DEFAULT_THRESHOLD = 0.25  # Régression au-delà de +25 % ...
+DEFAULT_MIN_DELTA_MS = 0.5  # ... et d'au moins 0,5 ms
+DEFAULT_MIN_TIME_S = 0.2  # Durée minimale de mesure par cas
+DEFAULT_MAX_REPEATS = 50
+MIN_REPEATS = 3
+
+PARIS_CENTER = (48.8566, 2.3522)
+FRIENDS_SPREAD_KM = 5.0  # Écart type de la position des amis
+BARS_RADIUS_KM = 2.0  # Rayon de la zone des bars candidats
+
+FRIEND_SIZES = (2, 10, 100, 1_000, 10_000)
+BAR_SIZES = (10, 100, 1_000, 10_000, 100_000)
+
+# Tailles mesurées par chemin : (amis, bars). Le classement croise les
+# deux ensembles ; ses plus grandes tailles ne sont pas croisées entre elles
+# (10 000 × 100 000 distances ne tiennent pas dans un calcul interactif).
+BENCHMARK_SIZES = {
+    "calculate_center": [(n, 0) for n in FRIEND_SIZES],
+    "calculate_average_distance": [(n, 1) for n in FRIEND_SIZES],
+    "calculate_average_transit_time": [(n, 1) for n in FRIEND_SIZES],
+    "calculate_weighted_center_by_transit_time": [(n, 0) for n in FRIEND_SIZES],
+    "rank_bars_distance": [(10, n) for n in BAR_SIZES] + [(10_000, 10), (1_000, 1_000)],
+    "rank_bars_transit": [(10, n) for n in BAR_SIZES] + [(10_000, 10), (1_000, 1_000)],
+    "create_interactive_map": [(n, 10) for n in FRIEND_SIZES],
+}
+
+# Sous-ensemble rapide (tests, vérification avant un commit)
+QUICK_SIZES = {
+    path: [size for size in sizes if size[0] <= 100 and size[1] <= 1_000]
+    for path, sizes in BENCHMARK_SIZES.items()
+}
+
+
+def synthetic_friends(count, seed=DEFAULT_SEED):
+    """
+    Génère un groupe d'amis répartis autour de Paris.
+
+    Args:
+        count (int): Nombre d'amis
+        seed (int): Graine du générateur
+
+    Returns:
+        list: Amis {"name", "address", "latitude", "longitude"}
+    """
+    rng = np.random.default_rng([seed, 1, count])
+    offsets = _offsets_deg(rng.normal(0, FRIENDS_SPREAD_KM, size=(count, 2)))
+    return [
+        {
+            "name": f"Ami {i + 1}",
+            "address": "",
+            "latitude": float(PARIS_CENTER[0] + d_lat),
+            "longitude": float(PARIS_CENTER[1] + d_lon),
+        }
+        for i, (d_lat, d_lon) in enumerate(offsets)
+    ]
+
+
+def synthetic_bars(count, seed=DEFAULT_SEED):
+    """
+    Génère des bars candidats répartis uniformément dans un disque autour de Paris.
+
+    Args:
+        count (int): Nombre de bars
+        seed (int): Graine du générateur
+
+    Returns:
+        list: Bars {"name", "lat", "lon", "address", "type"}
+    """
+    rng = np.random.default_rng([seed, 2, count])
+    radius = BARS_RADIUS_KM * np.sqrt(rng.uniform(size=count))
+    angle = rng.uniform(0, 2 * np.pi, size=count)
+    offsets = _offsets_deg(
+        np.column_stack((radius * np.sin(angle), radius * np.cos(angle)))
+    )
+    return [
+        {
+            "name": f"Bar {i + 1}",
+            "lat": float(PARIS_CENTER[0] + d_lat),
+            "lon": float(PARIS_CENTER[1] + d_lon),
+            "address": "",
+            "type": "bar" if i % 3 else "pub",
+        }
+        for i, (d_lat, d_lon) in enumerate(offsets)
+    ]
+
+
+def _offsets_deg(offsets_km):
+    """Convertit des décalages (nord, est) en km en degrés autour de Paris."""
+    return offsets_km / km_per_degree(PARIS_CENTER[0])
+
+
+def _benchmark_call(path, friends, bars):
+    """Renvoie la fonction sans argument qui exécute un chemin de calcul."""
+    if path == "calculate_center":
+        return lambda: calculate_center(friends)
+    if path == "calculate_average_distance":
+        return lambda: calculate_average_distance(
+            bars[0]["lat"], bars[0]["lon"], friends
+        )
+    if path == "calculate_average_transit_time":
+        return lambda: calculate_average_transit_time(
+            bars[0]["lat"], bars[0]["lon"], friends
+        )
+    if path == "calculate_weighted_center_by_transit_time":
+        return lambda: calculate_weighted_center_by_transit_time(friends)
+    if path in ("rank_bars_distance", "rank_bars_transit"):
+        mode = path.rsplit("_", 1)[1]
+        # rank_bars ajoute les coûts aux bars : une copie par appel
+        return lambda: rank_bars([dict(bar) for bar in bars], friends, mode)
+    if path == "create_interactive_map":
+        # Importé ici : map_utils charge Streamlit (via streamlit_folium)
+        from src.map_utils import create_interactive_map
+
+        lat, lon = calculate_center(friends)
+        ranked = rank_bars([dict(bar) for bar in bars], friends)
+
+        def create_and_render():
+            # La carte folium n'est construite qu'au rendu HTML : il est mesuré
+            m = create_interactive_map(lat, lon, friends, ranked, 0.6)
+            return m.get_root().render()
+
+        return create_and_render
+    raise ValueError(
+        f"Chemin inconnu: {path!r} (attendu: {', '.join(BENCHMARK_SIZES)})"
+    )
+
+
+def measure(func, min_time_s=DEFAULT_MIN_TIME_S, max_repeats=DEFAULT_MAX_REPEATS):
+    """
+    Mesure une fonction en la répétant jusqu'à une durée minimale.
+
+    Args:
+        func (callable): Fonction sans argument
+        min_time_s (float): Durée totale minimale des répétitions
+        max_repeats (int): Nombre maximum de répétitions
+
+    Returns:
+        dict: Répétitions ("repeats"), médiane et minimum en millisecondes
+    """
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < MIN_REPEATS or (
+        len(timings) < max_repeats and time.perf_counter() - started < min_time_s
+    ):
+        call_started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - call_started) * 1000)
+    return {
+        "repeats": len(timings),
+        "median_ms": statistics.median(timings),
+        "min_ms": min(timings),
+    }
+
+
+def case_name(path, friends_count, bars_count):
+    """Nom d'un cas : chemin et tailles, par exemple `rank_bars_distance/f10/b1000`."""
+    return f"{path}/f{friends_count}/b{bars_count}"
+
+
+def run_benchmarks(
+    sizes=None,
+    paths=None,
+    seed=DEFAULT_SEED,
+    min_time_s=DEFAULT_MIN_TIME_S,
+    progress=None,
+):
+    """
+    Mesure tous les cas demandés.
+
+    Args:
+        sizes (dict): Tailles par chemin (par défaut BENCHMARK_SIZES)
+        paths (list): Chemins mesurés (par défaut : tous)
+        seed (int): Graine des données synthétiques
+        min_time_s (float): Durée minimale de mesure par cas
+        progress (callable): Fonction appelée avec (nom du cas, mesure)
+
+    Returns:
+        dict: {"meta": {...}, "cases": {nom du cas: mesure}}
+    """
+    sizes = sizes or BENCHMARK_SIZES
+    cases = {}
+    for path in paths or sizes:
+        for friends_count, bars_count in sizes[path]:
+            friends = synthetic_friends(friends_count, seed)
+            bars = synthetic_bars(bars_count, seed)
+            result = measure(_benchmark_call(path, friends, bars), min_time_s)
+            name = case_name(path, friends_count, bars_count)
+            cases[name] = result
+            if progress:
+                progress(name, result)
+    return {
+        "meta": {
+            "seed": seed,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "cases": cases,
+    }
+
+
+def compare_to_baseline(
+    results,
+    baseline,
+    threshold=DEFAULT_THRESHOLD,
+    min_delta_ms=DEFAULT_MIN_DELTA_MS,
+):
+    """
+    Compare des mesures à la référence.
+
+    Args:
+        results (dict): Mesures (voir `run_benchmarks`)
+        baseline (dict): Mesures de référence
+        threshold (float): Hausse relative tolérée de la médiane
+        min_delta_ms (float): Hausse absolue en dessous de laquelle un cas
+            ne régresse jamais
+
+    Returns:
+        list: Cas communs {"case", "baseline_ms", "current_ms", "ratio",
+            "regressed"}, du plus au moins ralenti
+    """
+    comparisons = []
+    for name, current in results["cases"].items():
+        reference = baseline["cases"].get(name)
+        if reference is None:
+            continue
+        before, after = reference["median_ms"], current["median_ms"]
+        ratio = after / before if before > 0 else float("inf")
+        comparisons.append(
+            {
+                "case": name,
+                "baseline_ms": before,
+                "current_ms": after,
+                "ratio": ratio,
+                "regressed": ratio > 1 + threshold and after - before > min_delta_ms,
+            }
+        )
+    comparisons.sort(key=lambda c: c["ratio"], reverse=True)
+    return comparisons
+
+
+def load_baseline(path=DEFAULT_BASELINE_FILE):
+    """
+    Lit les mesures de référence.
+
+    Args:
+        path (str): Fichier JSON de référence
+
+    Returns:
+        dict: Mesures de référence, ou None si le fichier n'existe pas
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(results, path=DEFAULT_BASELINE_FILE):
+    """
+    Enregistre des mesures comme référence.
+
+    Les cas absents des nouvelles mesures (chemin ou tailles non mesurés)
+    gardent leur référence précédente.
+
+    Args:
+        results (dict): Mesures (voir `run_benchmarks`)
+        path (str): Fichier JSON de référence
+    """
+    baseline = load_baseline(path) or {"cases": {}}
+    baseline["meta"] = results["meta"]
+    baseline["cases"].update(results["cases"])
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande des mesures de performance."""
+    parser = argparse.ArgumentParser(
+        description="Mesure les performances des calculs sur des données synthétiques."
+    )
+    parser.add_argument(
+        "--path",
+        action="append",
+        choices=list(BENCHMARK_SIZES),
+        help="Chemin mesuré (répétable, par défaut : tous)",
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="Petites tailles seulement (≤ 100 amis)"
+    )
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME_S)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_FILE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Enregistrer les mesures comme nouvelle référence",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Échouer (code 1) si un cas régresse par rapport à la référence",
+    )
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS)
+    args = parser.parse_args(argv)
+
+    def print_case(name, result):
+        print(
+            f"{name:<60} {result['median_ms']:>11.3f} ms "
+            f"(min {result['min_ms']:.3f}, {result['repeats']} répétitions)",
+            file=sys.stderr,
+        )
+
+    results = run_benchmarks(
+        QUICK_SIZES if args.quick else BENCHMARK_SIZES,
+        args.path,
+        args.seed,
+        args.min_time,
+        print_case,
+    )
+
+    exit_code = 0
+    if args.check:
+        baseline = load_baseline(args.baseline)
+        if baseline is None:
+            print(f"❌ Pas de référence : {args.baseline}", file=sys.stderr)
+            sys.exit(2)
+        comparisons = compare_to_baseline(
+            results, baseline, args.threshold, args.min_delta_ms
+        )
+        regressions = [c for c in comparisons if c["regressed"]]
+        for c in regressions:
+            print(
+                f"❌ {c['case']} : {c['baseline_ms']:.3f} → {c['current_ms']:.3f} ms "
+                f"(×{c['ratio']:.2f})",
+                file=sys.stderr,
+            )
+        print(
+            f"{'❌' if regressions else '✅'} {len(regressions)} régression(s) sur "
+            f"{len(comparisons)} cas comparés (seuil +{args.threshold:.0%})",
+            file=sys.stderr,
+        )
+        exit_code = 1 if regressions else 0
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"💾 Référence enregistrée : {args.baseline}", file=sys.stderr)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,502 @@
 """
-Module pour la gestion des données des amis.
+Module pour la gestion des données des amis, organisés en groupes.
+
+Les amis sont stockés dans une base SQLite en mode WAL : chaque ajout,
+mise à jour ou suppression est une transaction sur une seule ligne, ce qui
+évite de perdre des écritures quand plusieurs sessions modifient la liste
+en même temps.
+
+Chaque ami appartient à un groupe (une équipe). Chaque groupe a son propre
+numéro de version, incrémenté à chaque écriture dans ce groupe : la liste
+d'un groupe reste en mémoire tant qu'elle n'a pas changé, et modifier un
+groupe ne touche ni au cache ni à la version des autres.
+
+L'ancien fichier JSON est importé une seule fois, dans le groupe par défaut,
+à la première ouverture de la base.
 """
 
 import json
 import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from src.metrics import record_span
+from src.paths import data_path
+
+
+DATA_FILE = data_path("friends.json")
+DB_FILE = os.environ.get("OUCEKONBOI_FRIENDS_DB", data_path("friends.sqlite"))
+
+DEFAULT_GROUP = "default"
+DEFAULT_GROUP_NAME = "Mon groupe"
+
+FRIEND_FIELDS = ("name", "email", "address", "latitude", "longitude")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS groups (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS friends (
+    id INTEGER PRIMARY KEY,
+    group_id TEXT NOT NULL REFERENCES groups (id),
+    name_key TEXT NOT NULL,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL DEFAULT '',
+    address TEXT NOT NULL DEFAULT '',
+    latitude REAL,
+    longitude REAL,
+    UNIQUE (group_id, name_key)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_UPSERT = """
+INSERT INTO friends (group_id, name_key, name, email, address, latitude, longitude)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (group_id, name_key) DO UPDATE SET
+    name = excluded.name,
+    email = excluded.email,
+    address = excluded.address,
+    latitude = excluded.latitude,
+    longitude = excluded.longitude
+"""
+
+_FRIEND_COLUMNS = "name, email, address, latitude, longitude"
+
+
+def _name_key(name):
+    """Clé d'unicité d'un ami dans son groupe : son nom, sans tenir compte de la casse."""
+    return name.strip().lower()
 
 
-DATA_FILE = "data/friends.json"
+def _row_values(friend, group_id):
+    """Valeurs d'un ami dans l'ordre des colonnes de `_UPSERT`."""
+    return (
+        group_id,
+        _name_key(friend["name"]),
+        friend["name"],
+        friend.get("email") or "",
+        friend.get("address") or "",
+        friend.get("latitude"),
+        friend.get("longitude"),
+    )
 
 
-def load_friends():
+def slugify(name):
     """
-    Charge la liste des amis depuis le fichier JSON.
+    Construit un identifiant de groupe à partir de son nom.
+
+    Args:
+        name (str): Nom du groupe
+
+    Returns:
+        str: Identifiant en minuscules, sans accents ni espaces
+    """
+    ascii_name = (
+        unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    )
+    return re.sub(r"[^a-z0-9]+", "-", ascii_name.lower()).strip("-") or "groupe"
+
+
+class FriendsStore:
+    """
+    Stockage transactionnel des amis par groupe (SQLite, mode WAL).
+
+    Args:
+        db_file (str): Fichier SQLite de la base
+        json_file (str): Ancien fichier JSON à importer à la création
+    """
+
+    def __init__(self, db_file=DB_FILE, json_file=DATA_FILE):
+        self.db_file = db_file
+        self._local = threading.local()
+        self._cache_lock = threading.Lock()
+        self._cache = {}  # group_id -> (version, amis)
+
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = self._connection()
+        db.execute("PRAGMA journal_mode=WAL")
+        self._transaction(lambda db: self._create_schema(db, json_file))
+
+    def _connection(self):
+        """Connexion propre au thread courant (une session Streamlit par thread)."""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            self._local.db = db
+        return db
+
+    def _transaction(self, work):
+        """
+        Exécute `work(db)` dans une transaction en écriture.
+
+        Returns:
+            Valeur renvoyée par `work`
+        """
+        db = self._connection()
+        # Attente du verrou d'écriture : mesure de la contention entre sessions
+        started = time.perf_counter()
+        db.execute("BEGIN IMMEDIATE")
+        record_span("friends.lock_wait", (time.perf_counter() - started) * 1000)
+        try:
+            result = work(db)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return result
+
+    def _create_schema(self, db, json_file):
+        """Crée les tables, convertit l'ancien schéma et importe le JSON."""
+        columns = [row[1] for row in db.execute("PRAGMA table_info(friends)")]
+        if columns and "group_id" not in columns:
+            # Base créée avant les groupes : tous les amis vont dans le
+            # groupe par défaut
+            db.execute("ALTER TABLE friends RENAME TO friends_ungrouped")
+        for statement in _SCHEMA.split(";"):
+            if statement.strip():
+                db.execute(statement)
+        db.execute(
+            "INSERT OR IGNORE INTO groups (id, name) VALUES (?, ?)",
+            (DEFAULT_GROUP, DEFAULT_GROUP_NAME),
+        )
+        if columns and "group_id" not in columns:
+            db.execute(
+                f"INSERT INTO friends (id, group_id, name_key, {_FRIEND_COLUMNS}) "
+                f"SELECT id, ?, name_key, {_FRIEND_COLUMNS} FROM friends_ungrouped",
+                (DEFAULT_GROUP,),
+            )
+            db.execute("DROP TABLE friends_ungrouped")
+            db.execute("DELETE FROM meta WHERE key = 'version'")
+
+        migrated = db.execute(
+            "SELECT 1 FROM meta WHERE key = 'migrated_from'"
+        ).fetchone()
+        if not migrated:
+            friends = []
+            if json_file and os.path.exists(json_file):
+                with open(json_file, "r", encoding="utf-8") as f:
+                    friends = json.load(f)
+            db.executemany(
+                _UPSERT, [_row_values(friend, DEFAULT_GROUP) for friend in friends]
+            )
+            db.execute(
+                "INSERT INTO meta VALUES ('migrated_from', ?)", (json_file or "",)
+            )
+            self._bump_version(db, DEFAULT_GROUP)
+
+    @staticmethod
+    def _bump_version(db, group_id):
+        """Incrémente la version d'un groupe, en le créant au besoin."""
+        db.execute(
+            "INSERT INTO groups (id, name, version) VALUES (?, ?, 1) "
+            "ON CONFLICT (id) DO UPDATE SET version = version + 1",
+            (group_id, group_id),
+        )
+
+    def _write(self, group_id, statements):
+        """
+        Exécute des écritures sur un groupe dans une seule transaction et
+        incrémente la version du groupe.
+
+        Args:
+            group_id (str): Identifiant du groupe
+            statements (list): Couples (requête SQL, paramètres)
+
+        Returns:
+            int: Nombre total de lignes modifiées
+        """
+
+        def work(db):
+            changed = sum(
+                db.execute(sql, params).rowcount for sql, params in statements
+            )
+            if changed:
+                self._bump_version(db, group_id)
+            return changed
+
+        return self._transaction(work)
+
+    def list_groups(self):
+        """
+        Liste les groupes avec leur nombre d'amis.
+
+        Returns:
+            list: Groupes avec les clés "id", "name" et "size", par nom
+        """
+        rows = self._connection().execute(
+            "SELECT groups.id, groups.name, COUNT(friends.id) FROM groups "
+            "LEFT JOIN friends ON friends.group_id = groups.id "
+            "GROUP BY groups.id ORDER BY groups.name"
+        )
+        return [{"id": id_, "name": name, "size": size} for id_, name, size in rows]
+
+    def create_group(self, name):
+        """
+        Crée un groupe vide.
+
+        Args:
+            name (str): Nom affiché du groupe
+
+        Returns:
+            str: Identifiant du groupe (dérivé du nom, rendu unique)
+        """
+        base_id = slugify(name)
+
+        def work(db):
+            group_id, suffix = base_id, 1
+            while db.execute(
+                "SELECT 1 FROM groups WHERE id = ?", (group_id,)
+            ).fetchone():
+                suffix += 1
+                group_id = f"{base_id}-{suffix}"
+            db.execute(
+                "INSERT INTO groups (id, name) VALUES (?, ?)", (group_id, name.strip())
+            )
+            return group_id
+
+        return self._transaction(work)
+
+    def version(self, group_id=DEFAULT_GROUP):
+        """
+        Renvoie le numéro de version d'un groupe.
+
+        Args:
+            group_id (str): Identifiant du groupe
+
+        Returns:
+            int: Version, incrémentée à chaque modification du groupe (0 si
+                le groupe n'existe pas)
+        """
+        row = (
+            self._connection()
+            .execute("SELECT version FROM groups WHERE id = ?", (group_id,))
+            .fetchone()
+        )
+        return row[0] if row else 0
+
+    def load(self, group_id=DEFAULT_GROUP):
+        """
+        Renvoie les amis d'un groupe, relus seulement si le groupe a changé.
+
+        Args:
+            group_id (str): Identifiant du groupe
+
+        Returns:
+            list: Copie de la liste des amis, dans l'ordre d'inscription
+        """
+        version = self.version(group_id)
+        with self._cache_lock:
+            cached = self._cache.get(group_id)
+
+        if cached is None or cached[0] != version:
+            rows = (
+                self._connection()
+                .execute(
+                    f"SELECT {_FRIEND_COLUMNS} FROM friends "
+                    "WHERE group_id = ? ORDER BY id",
+                    (group_id,),
+                )
+                .fetchall()
+            )
+            cached = (version, [dict(zip(FRIEND_FIELDS, row)) for row in rows])
+            with self._cache_lock:
+                self._cache[group_id] = cached
+
+        return [dict(friend) for friend in cached[1]]
+
+    def upsert(self, friend, group_id=DEFAULT_GROUP):
+        """
+        Ajoute un ami, ou met à jour celui du groupe qui porte le même nom.
+
+        Args:
+            friend (dict): Ami avec au moins les clés "name" et "address"
+            group_id (str): Identifiant du groupe
+        """
+        self.upsert_many([friend], group_id)
+
+    def upsert_many(self, friends, group_id=DEFAULT_GROUP):
+        """
+        Ajoute ou met à jour plusieurs amis dans une seule transaction.
+
+        Args:
+            friends (list): Amis à enregistrer
+            group_id (str): Identifiant du groupe
+        """
+        self._write(
+            group_id, [(_UPSERT, _row_values(friend, group_id)) for friend in friends]
+        )
+
+    def delete(self, name, group_id=DEFAULT_GROUP):
+        """
+        Supprime un ami.
+
+        Args:
+            name (str): Nom de l'ami (sans tenir compte de la casse)
+            group_id (str): Identifiant du groupe
+
+        Returns:
+            bool: True si un ami a été supprimé
+        """
+        return bool(
+            self._write(
+                group_id,
+                [
+                    (
+                        "DELETE FROM friends WHERE group_id = ? AND name_key = ?",
+                        (group_id, _name_key(name)),
+                    )
+                ],
+            )
+        )
+
+    def replace_all(self, friends, group_id=DEFAULT_GROUP):
+        """
+        Remplace toute la liste d'amis d'un groupe dans une seule transaction.
+
+        Args:
+            friends (list): Nouvelle liste des amis
+            group_id (str): Identifiant du groupe
+        """
+        keys = [_name_key(friend["name"]) for friend in friends]
+        placeholders = ", ".join("?" * len(keys))
+        self._write(
+            group_id,
+            [
+                (
+                    "DELETE FROM friends WHERE group_id = ? "
+                    f"AND name_key NOT IN ({placeholders})",
+                    [group_id, *keys],
+                )
+            ]
+            + [(_UPSERT, _row_values(friend, group_id)) for friend in friends],
+        )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_friends_store():
+    """
+    Renvoie le stockage des amis partagé par le processus.
+
+    Returns:
+        FriendsStore: Stockage ouvert sur DB_FILE
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = FriendsStore()
+        return _store
+
+
+def list_groups():
+    """
+    Liste les groupes d'amis.
+
+    Returns:
+        list: Groupes avec les clés "id", "name" et "size"
+    """
+    return get_friends_store().list_groups()
+
+
+def create_group(name):
+    """
+    Crée un nouveau groupe d'amis.
+
+    Args:
+        name (str): Nom du groupe
+
+    Returns:
+        str: Identifiant du groupe créé
+    """
+    return get_friends_store().create_group(name)
+
+
+def get_group_version(group_id=DEFAULT_GROUP):
+    """
+    Renvoie la version d'un groupe, à utiliser dans les clés de cache.
+
+    Args:
+        group_id (str): Identifiant du groupe
+
+    Returns:
+        int: Version du groupe
+    """
+    return get_friends_store().version(group_id)
+
+
+def load_friends(group_id=DEFAULT_GROUP):
+    """
+    Charge la liste des amis d'un groupe.
+
+    Args:
+        group_id (str): Identifiant du groupe
 
     Returns:
         list: Liste des amis avec leurs informations
     """
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
+    return get_friends_store().load(group_id)
 
 
-def save_friends(friends):
+def save_friend(friend, group_id=DEFAULT_GROUP):
     """
-    Sauvegarde la liste des amis dans le fichier JSON.
+    Ajoute ou met à jour un ami (même nom, sans tenir compte de la casse).
+
+    Args:
+        friend (dict): Ami à enregistrer
+        group_id (str): Identifiant du groupe
+    """
+    get_friends_store().upsert(friend, group_id)
+
+
+def update_friends(friends, group_id=DEFAULT_GROUP):
+    """
+    Ajoute ou met à jour plusieurs amis dans une seule transaction.
+
+    Args:
+        friends (list): Amis à enregistrer
+        group_id (str): Identifiant du groupe
+    """
+    get_friends_store().upsert_many(friends, group_id)
+
+
+def save_friends(friends, group_id=DEFAULT_GROUP):
+    """
+    Sauvegarde la liste complète des amis d'un groupe.
+
+    Les amis absents de la liste sont supprimés ; pour une modification
+    ponctuelle, préférer `save_friend`, `update_friends` ou
+    `delete_friend`, qui ne touchent pas aux modifications faites en
+    parallèle par d'autres sessions.
 
     Args:
         friends (list): Liste des amis à sauvegarder
+        group_id (str): Identifiant du groupe
+    """
+    get_friends_store().replace_all(friends, group_id)
+
+
+def delete_friend(name, group_id=DEFAULT_GROUP):
+    """
+    Supprime un ami.
+
+    Args:
+        name (str): Nom de l'ami à supprimer
+        group_id (str): Identifiant du groupe
+
+    Returns:
+        bool: True si l'ami existait
     """
-    os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(friends, f, ensure_ascii=False, indent=2)
+    return get_friends_store().delete(name, group_id)
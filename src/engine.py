@@ -0,0 +1,219 @@
+"""
+Module pour le moteur de calcul : barycentre du groupe, recherche et
+classement des bars.
+
+Ce module ne dépend pas de Streamlit ; les pages, les traitements par lots
+et les benchmarks l'utilisent de la même façon. Les étapes du calcul sont
+signalées à une fonction de rappel optionnelle (voir `src.progress`).
+"""
+
+from src.bar_finder import get_bars_around_center
+from src.geo_utils import (
+    as_points,
+    average_cost_by_bar,
+    calculate_average_distances,
+    calculate_center,
+    distance_matrix,
+    friends_coordinates,
+)
+from src.progress import notify
+from src.street_graph import PROFILES, network_distance_matrix
+from src.transit_utils import (
+    calculate_average_transit_times,
+    calculate_weighted_center_by_transit_time,
+    get_transit_time_matrix,
+)
+
+
+# Modes de calcul : "distance" (barycentre géographique, classement par
+# distance moyenne), "transit" (barycentre optimisé, classement par
+# temps de transport moyen), "walk" ou "bike" (barycentre géographique,
+# classement par distance moyenne sur le réseau de rues)
+MODES = ("distance", "transit") + PROFILES
+
+
+def compute_center(friends, mode="distance", objective="sum", progress=None):
+    """
+    Calcule le point de rendez-vous du groupe.
+
+    Args:
+        friends (list): Liste des amis avec leurs coordonnées
+        mode (str): Mode de calcul (voir `MODES`)
+        objective (str): Objectif d'optimisation en mode "transit"
+            (voir `OBJECTIVE_LABELS`)
+        progress (callable): Fonction de rappel recevant les étapes du calcul
+
+    Returns:
+        tuple: (latitude, longitude, temps de trajet par ami, infos de
+            calcul) ; les deux derniers sont vides hors du mode "transit"
+    """
+    if mode == "transit":
+        return calculate_weighted_center_by_transit_time(
+            friends, objective=objective, progress=progress
+        )
+    if mode not in MODES:
+        raise ValueError(f"Mode inconnu: {mode!r} (attendu: {', '.join(MODES)})")
+
+    center_lat, center_lon = calculate_center(friends)
+    notify(
+        progress,
+        "center",
+        "✅ Barycentre géographique calculé (centre de masse des positions)",
+        level="success",
+        center=(center_lat, center_lon),
+    )
+    return center_lat, center_lon, {}, {}
+
+
+def bar_costs(bars, friends, mode="distance"):
+    """
+    Calcule le coût moyen de chaque bar pour le groupe.
+
+    Args:
+        bars (list): Liste des bars avec leurs clés "lat" et "lon"
+        friends (list): Liste des amis
+        mode (str): "distance", "walk", "bike" (km) ou "transit" (minutes)
+
+    Returns:
+        np.ndarray: Coût moyen de chaque bar, dans l'ordre de `bars`
+    """
+    if mode == "transit":
+        return calculate_average_transit_times(bars, friends)
+    if mode in PROFILES:
+        return average_cost_by_bar(
+            bars,
+            friends,
+            lambda friend_points, bar_points: network_distance_matrix(
+                friend_points, bar_points, mode
+            ),
+        )
+    return calculate_average_distances(bars, friends)
+
+
+def cost_matrix(bars, friends, mode="distance"):
+    """
+    Calcule le coût de chaque bar pour chaque ami.
+
+    Destiné aux listes de bars courtes (résultats d'une recherche) ; pour
+    classer beaucoup de bars, `bar_costs` borne la mémoire utilisée.
+
+    Args:
+        bars (list): Liste des bars avec leurs clés "lat" et "lon"
+        friends (list): Liste des amis (seuls les amis localisés comptent)
+        mode (str): "distance", "walk", "bike" (km) ou "transit" (minutes)
+
+    Returns:
+        np.ndarray: Matrice (amis localisés × bars) des coûts
+    """
+    bar_points = as_points([(bar["lat"], bar["lon"]) for bar in bars])
+    friend_points = friends_coordinates(friends)
+    if mode == "transit":
+        return get_transit_time_matrix(friend_points, bar_points)
+    if mode in PROFILES:
+        return network_distance_matrix(friend_points, bar_points, mode)
+    return distance_matrix(friend_points, bar_points)
+
+
+def sort_bars_by_cost(bars, costs, mode="distance"):
+    """
+    Ajoute les coûts moyens aux bars puis les trie.
+
+    Les bars reçoivent la clé "avg_distance" (km, ou minutes en mode
+    "transit" pour compatibilité avec l'affichage) et, en mode "transit",
+    la clé "avg_time".
+
+    Args:
+        bars (list): Liste des bars
+        costs (array-like): Coût moyen de chaque bar (voir `bar_costs`)
+        mode (str): Mode de calcul (voir `MODES`)
+
+    Returns:
+        list: Bars triés du meilleur au moins bon
+    """
+    for bar, cost in zip(bars, costs):
+        bar["avg_distance"] = float(cost)
+        if mode == "transit":
+            bar["avg_time"] = bar["avg_distance"]
+    return sorted(bars, key=lambda x: x["avg_distance"])
+
+
+def rank_bars(bars, friends, mode="distance"):
+    """
+    Classe des bars selon la distance ou le temps de trajet moyen du groupe.
+
+    Args:
+        bars (list): Liste des bars avec leurs clés "lat" et "lon"
+        friends (list): Liste des amis
+        mode (str): Mode de calcul (voir `MODES`)
+
+    Returns:
+        list: Bars triés du meilleur au moins bon (voir `sort_bars_by_cost`)
+    """
+    return sort_bars_by_cost(bars, bar_costs(bars, friends, mode), mode)
+
+
+def find_ranked_bars(
+    friends,
+    center_lat,
+    center_lon,
+    radius_km,
+    mode="distance",
+    backend=None,
+    progress=None,
+):
+    """
+    Recherche les bars autour d'un centre puis les classe pour le groupe.
+
+    Args:
+        friends (list): Liste des amis
+        center_lat (float): Latitude du centre
+        center_lon (float): Longitude du centre
+        radius_km (float): Rayon de recherche en kilomètres
+        mode (str): Mode de calcul (voir `MODES`)
+        backend (str): Source des bars (voir `BAR_BACKENDS`)
+        progress (callable): Fonction de rappel recevant les étapes du calcul
+
+    Returns:
+        list: Bars triés du meilleur au moins bon
+    """
+    bars = get_bars_around_center(
+        center_lat, center_lon, radius_km=radius_km, backend=backend, progress=progress
+    )
+    return rank_bars(bars, friends, mode)
+
+
+def plan_meeting(
+    friends,
+    mode="distance",
+    objective="sum",
+    radius_km=0.6,
+    backend=None,
+    progress=None,
+):
+    """
+    Calcule le point de rendez-vous d'un groupe et le classement des bars.
+
+    Args:
+        friends (list): Liste des amis avec leurs coordonnées
+        mode (str): Mode de calcul (voir `MODES`)
+        objective (str): Objectif d'optimisation en mode "transit"
+        radius_km (float): Rayon de recherche des bars en kilomètres
+        backend (str): Source des bars (voir `BAR_BACKENDS`)
+        progress (callable): Fonction de rappel recevant les étapes du calcul
+
+    Returns:
+        dict: Centre ("center"), temps de trajet par ami ("transit_times"),
+            infos d'optimisation ("calc_info") et bars classés ("bars")
+    """
+    center_lat, center_lon, transit_times, calc_info = compute_center(
+        friends, mode, objective, progress
+    )
+    bars = find_ranked_bars(
+        friends, center_lat, center_lon, radius_km, mode, backend, progress
+    )
+    return {
+        "center": (center_lat, center_lon),
+        "transit_times": transit_times,
+        "calc_info": calc_info,
+        "bars": bars,
+    }
@@ -0,0 +1,118 @@
+"""
+Module pour l'import en masse d'amis depuis un fichier CSV ou JSON.
+"""
+
+import csv
+import io
+import json
+
+from src.geocoder import geocode_addresses
+
+
+# Noms de colonnes acceptés (français ou anglais)
+COLUMN_ALIASES = {
+    "name": ("name", "nom"),
+    "email": ("email", "e-mail", "mail"),
+    "address": ("address", "adresse"),
+}
+
+
+def parse_friends_file(content, filename):
+    """
+    Lit une liste d'amis depuis le contenu d'un fichier CSV ou JSON.
+
+    Le CSV doit avoir une ligne d'en-tête avec au moins les colonnes nom et
+    adresse ; le JSON est une liste d'objets (ou un objet avec une clé
+    "friends"). Un fichier dans un autre format lève une ValueError.
+
+    Args:
+        content (str | bytes): Contenu du fichier
+        filename (str): Nom du fichier (l'extension choisit le format)
+
+    Returns:
+        list: Amis avec les clés "name", "email" et "address"
+    """
+    if isinstance(content, bytes):
+        content = content.decode("utf-8-sig")
+
+    if filename.lower().endswith(".json"):
+        data = json.loads(content)
+        rows = data.get("friends", []) if isinstance(data, dict) else data
+        if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+            raise ValueError(
+                'le JSON doit être une liste d\'objets (ou un objet avec une clé "friends")'
+            )
+    else:
+        try:
+            dialect = csv.Sniffer().sniff(content[:4096], delimiters=",;\t")
+            rows = list(csv.DictReader(io.StringIO(content), dialect=dialect))
+        except csv.Error as e:
+            raise ValueError(f"format CSV non reconnu ({e})") from e
+
+    friends = []
+    for row in rows:
+        normalized = {key.strip().lower(): value for key, value in row.items() if key}
+        friend = {
+            field: str(
+                next(
+                    (normalized[a] for a in aliases if normalized.get(a)),
+                    "",
+                )
+            ).strip()
+            for field, aliases in COLUMN_ALIASES.items()
+        }
+        if friend["name"] and friend["address"]:
+            friends.append(friend)
+    return friends
+
+
+def import_friends(new_friends, friends, progress=None):
+    """
+    Géocode et ajoute une liste d'amis à la liste existante.
+
+    Un ami dont le nom existe déjà (sans tenir compte de la casse) est mis
+    à jour, comme dans le formulaire d'ajout.
+
+    Args:
+        new_friends (list): Amis à importer ("name", "email", "address")
+        friends (list): Liste des amis existants (modifiée sur place)
+        progress (callable): Fonction appelée avec (adresses traitées, total)
+
+    Returns:
+        dict: Rapport avec les listes de noms "added", "updated" et "failed",
+            et la liste "friends" des amis ajoutés ou modifiés (à enregistrer)
+    """
+    results = geocode_addresses(
+        [friend["address"] for friend in new_friends], progress=progress
+    )
+    by_name = {friend["name"].lower(): friend for friend in friends}
+    report = {"added": [], "updated": [], "failed": [], "friends": []}
+
+    for new_friend in new_friends:
+        lat, lon, full_address = results[new_friend["address"]]
+        if not (lat and lon):
+            report["failed"].append(new_friend["name"])
+            continue
+
+        values = {
+            "email": new_friend["email"],
+            "address": full_address or new_friend["address"],
+            "latitude": lat,
+            "longitude": lon,
+        }
+        existing_friend = by_name.get(new_friend["name"].lower())
+        if existing_friend:
+            existing_friend.update(values)
+            report["updated"].append(new_friend["name"])
+            changed = existing_friend
+        else:
+            friend = {"name": new_friend["name"], **values}
+            friends.append(friend)
+            by_name[friend["name"].lower()] = friend
+            report["added"].append(new_friend["name"])
+            changed = friend
+        # Un même ami peut apparaître plusieurs fois dans le fichier
+        if all(changed is not other for other in report["friends"]):
+            report["friends"].append(changed)
+
+    return report
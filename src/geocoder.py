@@ -0,0 +1,262 @@
+"""
+Module pour le géocodage des adresses via Nominatim.
+
+Les résultats sont conservés dans un cache disque (SQLite), indexé par
+l'adresse normalisée : une adresse déjà vue n'est jamais redemandée,
+même après un redémarrage. Les adresses introuvables sont aussi mises en
+cache, pour une durée plus courte.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src.http_client import get_client
+from src.metrics import span
+from src.paths import data_path
+
+
+DEFAULT_CACHE_FILE = os.environ.get(
+    "OUCEKONBOI_GEOCODE_CACHE", data_path("geocode_cache.sqlite")
+)
+
+# Durée de vie des adresses introuvables (une adresse corrigée dans OSM
+# peut devenir trouvable)
+NOT_FOUND_TTL_S = 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocodes (
+    key TEXT PRIMARY KEY,
+    latitude REAL,
+    longitude REAL,
+    display_name TEXT,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+def normalize_address(address):
+    """
+    Normalise une adresse pour servir de clé de cache.
+
+    Args:
+        address (str): Adresse saisie
+
+    Returns:
+        str: Adresse en minuscules, sans ponctuation superflue ni espaces
+            multiples
+    """
+    address = unicodedata.normalize("NFKC", address).casefold()
+    return re.sub(r"[\s,;]+", " ", address).strip(" .")
+
+
+class GeocodeCache:
+    """
+    Cache persistant des résultats de géocodage.
+
+    Args:
+        cache_file (str): Fichier SQLite du cache
+    """
+
+    def __init__(self, cache_file=DEFAULT_CACHE_FILE):
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+        directory = os.path.dirname(cache_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(cache_file, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def get_many(self, keys):
+        """
+        Cherche plusieurs adresses normalisées dans le cache.
+
+        Args:
+            keys (list): Adresses normalisées
+
+        Returns:
+            dict: Résultats (lat, lon, adresse complète) des adresses
+                présentes, indexés par clé
+        """
+        found = {}
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                row = self._db.execute(
+                    "SELECT latitude, longitude, display_name, fetched_at "
+                    "FROM geocodes WHERE key = ?",
+                    (key,),
+                ).fetchone()
+                if row is None or (row[0] is None and now - row[3] > NOT_FOUND_TTL_S):
+                    self._stats["misses"] += 1
+                else:
+                    self._stats["hits"] += 1
+                    found[key] = (row[0], row[1], row[2])
+        return found
+
+    def get(self, key):
+        """
+        Cherche une adresse normalisée dans le cache.
+
+        Args:
+            key (str): Adresse normalisée
+
+        Returns:
+            tuple: (lat, lon, adresse complète), ou None si absente
+        """
+        return self.get_many([key]).get(key)
+
+    def put(self, key, result):
+        """
+        Enregistre un résultat de géocodage.
+
+        Args:
+            key (str): Adresse normalisée
+            result (tuple): (lat, lon, adresse complète), avec des None si
+                l'adresse est introuvable
+        """
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?, ?)",
+                (key, *result, time.time()),
+            )
+            self._db.commit()
+
+    def stats(self):
+        """
+        Renvoie les statistiques d'utilisation du cache.
+
+        Returns:
+            dict: Nombre d'adresses trouvées (hits) et manquantes (misses)
+        """
+        with self._lock:
+            return dict(self._stats)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_geocode_cache():
+    """
+    Renvoie le cache de géocodage partagé par le processus.
+
+    Returns:
+        GeocodeCache: Cache ouvert sur DEFAULT_CACHE_FILE
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = GeocodeCache()
+        return _cache
+
+
+def query_nominatim(address):
+    """
+    Interroge Nominatim (via le client HTTP partagé), sans cache.
+
+    Args:
+        address (str): Adresse à localiser
+
+    Returns:
+        tuple: (latitude, longitude, adresse complète), ou
+            (None, None, None) si l'adresse est introuvable
+    """
+    results = get_client("nominatim").get_json(
+        "/search", params={"q": address, "format": "json", "limit": 1}
+    )
+    if results:
+        location = results[0]
+        return (
+            float(location["lat"]),
+            float(location["lon"]),
+            location.get("display_name", address),
+        )
+    return None, None, None
+
+
+def geocode_address(address):
+    """
+    Géocode une adresse, en passant par le cache disque.
+
+    Args:
+        address (str): Adresse à localiser
+
+    Returns:
+        tuple: (latitude, longitude, adresse complète), ou
+            (None, None, None) si l'adresse est introuvable ou en cas d'erreur
+    """
+    cache = get_geocode_cache()
+    key = normalize_address(address)
+
+    with span("geocode") as timing:
+        cached = cache.get(key)
+        timing.cached = cached is not None
+        if cached is not None:
+            return cached
+        return _fetch_and_store(cache, address, key)
+
+
+def _fetch_and_store(cache, address, key):
+    """Géocode une adresse absente du cache et enregistre le résultat."""
+    try:
+        result = query_nominatim(address)
+    except Exception:
+        # Les erreurs réseau ne sont pas mises en cache
+        return None, None, None
+
+    cache.put(key, result)
+    return result
+
+
+def geocode_addresses(addresses, progress=None, max_workers=4):
+    """
+    Géocode un lot d'adresses.
+
+    Les doublons (après normalisation) sont regroupés, les adresses déjà en
+    cache ne sont pas redemandées et les autres sont géocodées en parallèle ;
+    le débit reste borné par le limiteur du client Nominatim.
+
+    Args:
+        addresses (list): Adresses à localiser
+        progress (callable): Fonction appelée avec (adresses traitées, total)
+        max_workers (int): Nombre de requêtes préparées en parallèle
+
+    Returns:
+        dict: Résultat (lat, lon, adresse complète) pour chaque adresse
+    """
+    cache = get_geocode_cache()
+    keys = {address: normalize_address(address) for address in addresses}
+    unique = {}
+    for address, key in keys.items():
+        unique.setdefault(key, address)
+
+    with span("geocode.cache_lookup"):
+        results = cache.get_many(list(unique))
+    to_fetch = [key for key in unique if key not in results]
+
+    total = len(unique)
+    done = total - len(to_fetch)
+    if progress:
+        progress(done, total)
+
+    if to_fetch:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(_fetch_and_store, cache, unique[key], key): key
+                for key in to_fetch
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                done += 1
+                if progress:
+                    progress(done, total)
+
+    return {address: results[key] for address, key in keys.items()}
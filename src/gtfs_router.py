@@ -0,0 +1,863 @@
+"""
+Module pour le calcul des temps de trajet en transport à partir d'un flux GTFS.
+
+Le flux (par exemple celui d'Île-de-France Mobilités) est converti une fois
+en tableaux NumPy compacts : lignes découpées en « routes » au sens RAPTOR
+(trajets de même suite d'arrêts, sans dépassement), horaires à plat,
+correspondances à pied entre arrêts proches. Les requêtes se font ensuite
+sans réseau, avec l'algorithme RAPTOR (tours successifs, une
+correspondance de plus à chaque tour) :
+
+- un tour traite en un seul calcul vectorisé tous les arrêts améliorés au
+  tour précédent, pour toutes les origines à la fois ;
+- une requête donne l'heure d'arrivée au plus tôt à *tous* les arrêts :
+  une requête par ami suffit pour tous les bars candidats (un-vers-plusieurs),
+  et le résultat est gardé en mémoire par origine ;
+- la marche d'accès (origine → arrêts) et de sortie (arrêts → destination)
+  passe par un index spatial en grille des arrêts.
+
+Construction des horaires :
+
+    python -m src.gtfs_router IDFM-gtfs.zip --date 20261020
+"""
+
+import argparse
+import datetime
+import json
+import os
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+
+import numpy as np
+
+from src.geo_utils import as_points, distance_matrix, km_per_degree
+from src.paths import data_path
+
+
+DEFAULT_TIMETABLE_FILE = os.environ.get(
+    "OUCEKONBOI_TRANSIT_TIMETABLE", data_path("transit_timetable.npz")
+)
+
+# Heure de départ des trajets (les amis partent pour le bar en soirée)
+DEFAULT_DEPARTURE = os.environ.get("OUCEKONBOI_TRANSIT_DEPARTURE", "19:00")
+
+# Marche : 5 km/h (comme l'estimation par paliers de `src.transit_utils`)
+WALK_S_PER_KM = 720.0
+# Marche maximale vers ou depuis un arrêt (accès, sortie)
+ACCESS_MAX_KM = 1.0
+# Marche maximale entre deux arrêts pour une correspondance
+FOOTPATH_MAX_KM = 0.4
+# Marche directe maximale de l'origine à la destination, sans transport :
+# au-delà, une destination hors du réseau est injoignable
+DIRECT_WALK_MAX_KM = 2.0
+# Marge pour monter dans un véhicule (quai, attente à la porte)
+BOARDING_SLACK_S = 60
+# Nombre de tours RAPTOR : jusqu'à MAX_ROUNDS - 1 correspondances
+MAX_ROUNDS = 5
+
+# Nombre d'origines dont les heures d'arrivée aux arrêts sont gardées
+PROFILE_CACHE_SIZE = 64
+
+# Clé de recherche des départs : position de route × TIME_SHIFT + heure (s),
+# les horaires GTFS pouvant dépasser 24 h
+TIME_SHIFT = 2**20
+
+TIMETABLE_FORMAT = 1
+
+# Colonnes des jours de la semaine de calendar.txt
+WEEKDAYS = (
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+)
+
+_TIMETABLE_ARRAYS = (
+    "stop_lat",
+    "stop_lon",
+    "stop_names",
+    "route_stop_start",
+    "route_stops",
+    "route_time_start",
+    "route_trips",
+    "arrival_times",
+    "board_keys",
+    "stop_rp_start",
+    "stop_rp",
+    "foot_start",
+    "foot_to",
+    "foot_s",
+)
+
+
+def parse_time(value):
+    """
+    Convertit une heure "HH:MM" ou "HH:MM:SS" en secondes depuis minuit.
+
+    Args:
+        value (str): Heure (les heures GTFS peuvent dépasser 24)
+
+    Returns:
+        int: Secondes depuis minuit
+    """
+    parts = [int(part) for part in value.strip().split(":")]
+    if len(parts) == 2:
+        parts.append(0)
+    hours, minutes, seconds = parts
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def _ranges(starts, counts):
+    """Concatène les intervalles [starts[i], starts[i] + counts[i])."""
+    counts = np.asarray(counts, dtype=np.int64)
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(
+        np.asarray(starts, dtype=np.int64) - np.cumsum(counts) + counts, counts
+    )
+    return offsets + np.arange(total, dtype=np.int64)
+
+
+class GridIndex:
+    """
+    Index spatial de points sur une grille régulière.
+
+    Les points sont projetés sur un plan local (km) autour de leur latitude
+    moyenne, puis triés par cellule ; une recherche dans un rayon inférieur
+    au côté des cellules ne parcourt que les 9 cellules voisines. Toutes
+    les requêtes d'un lot sont traitées en un seul calcul vectorisé.
+
+    Args:
+        points: Séquence de points (lat, lon)
+        cell_km (float): Côté des cellules en km (rayon maximum des recherches)
+    """
+
+    def __init__(self, points, cell_km):
+        points = as_points(points)
+        self.cell_km = cell_km
+        ref_lat = float(points[:, 0].mean()) if len(points) else 0.0
+        self._km_per_deg = np.array(km_per_degree(ref_lat))
+        self._xy = points * self._km_per_deg
+        keys = self._keys(np.floor(self._xy / cell_km).astype(np.int64))
+        self._order = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[self._order]
+
+    @staticmethod
+    def _keys(cells):
+        """Clé entière d'une cellule (ligne, colonne)."""
+        return cells[:, 0] * 2**24 + (cells[:, 1] + 2**23)
+
+    def query(self, points, radius_km):
+        """
+        Renvoie les paires (requête, point indexé) à moins d'une distance.
+
+        Args:
+            points: Séquence de points (lat, lon) à rechercher
+            radius_km (float): Rayon de recherche en km (au plus `cell_km`)
+
+        Returns:
+            tuple: (indices des requêtes, indices des points, distances en km),
+                triés par requête
+        """
+        radius_km = min(radius_km, self.cell_km)
+        xy = as_points(points) * self._km_per_deg
+        cells = np.floor(xy / self.cell_km).astype(np.int64)
+
+        queries, starts, counts = [], [], []
+        for d_row in (-1, 0, 1):
+            for d_col in (-1, 0, 1):
+                keys = self._keys(cells + (d_row, d_col))
+                lo = np.searchsorted(self._sorted_keys, keys, side="left")
+                hi = np.searchsorted(self._sorted_keys, keys, side="right")
+                queries.append(np.arange(len(xy)))
+                starts.append(lo)
+                counts.append(hi - lo)
+        counts = np.concatenate(counts)
+        query_idx = np.repeat(np.concatenate(queries), counts)
+        point_idx = self._order[_ranges(np.concatenate(starts), counts)]
+
+        distances = np.hypot(*(xy[query_idx] - self._xy[point_idx]).T)
+        keep = distances <= radius_km
+        order = np.argsort(query_idx[keep], kind="stable")
+        return (
+            query_idx[keep][order],
+            point_idx[keep][order],
+            distances[keep][order],
+        )
+
+
+def _read_gtfs_table(gtfs_path, name, columns, dtype=str):
+    """
+    Lit une table d'un flux GTFS (dossier ou archive zip).
+
+    Args:
+        gtfs_path (str): Dossier ou fichier .zip du flux
+        name (str): Nom du fichier (par exemple "stops.txt")
+        columns (tuple): Colonnes à lire (les absentes sont ignorées)
+        dtype: Type des colonnes ("category" pour les grandes tables aux
+            valeurs répétées, comme stop_times.txt)
+
+    Returns:
+        pandas.DataFrame: Table de chaînes de caractères (None si absente)
+    """
+    import pandas as pd
+
+    options = dict(
+        dtype=dtype,
+        keep_default_na=False,
+        encoding="utf-8-sig",
+        usecols=lambda column: column.strip() in columns,
+    )
+    if os.path.isdir(gtfs_path):
+        path = os.path.join(gtfs_path, name)
+        if not os.path.exists(path):
+            return None
+        table = pd.read_csv(path, **options)
+    else:
+        with zipfile.ZipFile(gtfs_path) as archive:
+            if name not in archive.namelist():
+                return None
+            with archive.open(name) as f:
+                table = pd.read_csv(f, **options)
+    table.columns = [column.strip() for column in table.columns]
+    return table
+
+
+def _active_services(gtfs_path, service_date):
+    """
+    Renvoie les services GTFS actifs un jour donné.
+
+    Args:
+        gtfs_path (str): Dossier ou fichier .zip du flux
+        service_date (datetime.date): Jour de service
+
+    Returns:
+        set: Identifiants des services actifs (None : flux sans calendrier,
+            tous les services sont retenus)
+    """
+    calendar = _read_gtfs_table(
+        gtfs_path,
+        "calendar.txt",
+        ("service_id", "start_date", "end_date") + WEEKDAYS,
+    )
+    exceptions = _read_gtfs_table(
+        gtfs_path, "calendar_dates.txt", ("service_id", "date", "exception_type")
+    )
+    if calendar is None and exceptions is None:
+        return None
+
+    day = service_date.strftime("%Y%m%d")
+    weekday = WEEKDAYS[service_date.weekday()]
+    active = set()
+    if calendar is not None:
+        running = (
+            (calendar["start_date"] <= day)
+            & (calendar["end_date"] >= day)
+            & (calendar[weekday] == "1")
+        )
+        active.update(calendar.loc[running, "service_id"])
+    if exceptions is not None:
+        today = exceptions[exceptions["date"] == day]
+        active.update(today.loc[today["exception_type"] == "1", "service_id"])
+        active.difference_update(
+            today.loc[today["exception_type"] == "2", "service_id"]
+        )
+    return active
+
+
+def _by_category(column, convert):
+    """
+    Convertit une colonne catégorielle valeur distincte par valeur distincte.
+
+    Args:
+        column (pandas.Series): Colonne de type "category"
+        convert (callable): Fonction (pandas.Series de valeurs distinctes)
+            -> tableau de flottants
+
+    Returns:
+        np.ndarray: Valeurs converties de chaque ligne (NaN si absentes)
+    """
+    import pandas as pd
+
+    values = np.r_[convert(pd.Series(column.cat.categories)), np.nan]
+    # Code -1 (valeur absente) : dernier élément, NaN
+    return values[column.cat.codes.to_numpy()]
+
+
+def _seconds(column):
+    """Convertit une colonne d'heures GTFS "H:MM:SS" en secondes (NaN si vide)."""
+    import pandas as pd
+
+    parts = column.str.strip().str.split(":", expand=True)
+    if parts.shape[1] < 3:
+        return np.full(len(column), np.nan)
+    hours, minutes, seconds = (
+        pd.to_numeric(parts[i], errors="coerce") for i in range(3)
+    )
+    return (hours * 3600 + minutes * 60 + seconds).to_numpy(dtype=float)
+
+
+def _fifo_routes(stops, arrivals, departures):
+    """
+    Découpe les trajets d'une même suite d'arrêts en routes sans dépassement.
+
+    RAPTOR suppose qu'un trajet parti plus tôt arrive plus tôt à chaque
+    arrêt ; les trajets qui en doublent un autre (omnibus et direct sur les
+    mêmes arrêts) vont dans une route distincte.
+
+    Args:
+        stops (np.ndarray): Suite des arrêts
+        arrivals (np.ndarray): Heures d'arrivée (trajets × arrêts)
+        departures (np.ndarray): Heures de départ (trajets × arrêts)
+
+    Returns:
+        list: Routes (arrêts, arrivées, départs), trajets triés par départ
+    """
+    order = np.lexsort(departures.T[::-1])
+    routes = []  # [indices des trajets]
+    for trip in order:
+        for route in routes:
+            last = route[-1]
+            if np.all(arrivals[trip] >= arrivals[last]) and np.all(
+                departures[trip] >= departures[last]
+            ):
+                route.append(trip)
+                break
+        else:
+            routes.append([trip])
+    return [(stops, arrivals[route], departures[route]) for route in routes]
+
+
+def build_timetable(
+    gtfs_path, timetable_file=DEFAULT_TIMETABLE_FILE, service_date=None
+):
+    """
+    Construit (ou remplace) les horaires compacts d'un flux GTFS.
+
+    Seuls les trajets d'un jour de service sont retenus ; un flux sans
+    calendrier est pris en entier.
+
+    Args:
+        gtfs_path (str): Dossier ou fichier .zip du flux GTFS
+        timetable_file (str): Fichier .npz à créer
+        service_date (datetime.date): Jour de service (par défaut aujourd'hui)
+
+    Returns:
+        dict: Métadonnées des horaires (nombre d'arrêts, de routes, de
+            trajets, de correspondances, durée de construction)
+    """
+    import pandas as pd
+
+    started = time.perf_counter()
+    service_date = service_date or datetime.date.today()
+
+    stops = _read_gtfs_table(
+        gtfs_path,
+        "stops.txt",
+        ("stop_id", "stop_name", "stop_lat", "stop_lon", "location_type"),
+    )
+    if "location_type" in stops:
+        # Arrêts et quais seulement (pas les gares, entrées ni nœuds)
+        stops = stops[stops["location_type"].isin(("", "0"))]
+    stops = stops.reset_index(drop=True)
+    stop_index = {stop_id: i for i, stop_id in enumerate(stops["stop_id"])}
+
+    trips = _read_gtfs_table(gtfs_path, "trips.txt", ("trip_id", "service_id"))
+    services = _active_services(gtfs_path, service_date)
+    if services is not None:
+        trips = trips[trips["service_id"].isin(services)]
+    if trips.empty:
+        raise ValueError(
+            f"Aucun trajet le {service_date:%d/%m/%Y} dans {gtfs_path} "
+            f"(choisissez un autre jour avec --date)"
+        )
+    trip_index = {trip_id: i for i, trip_id in enumerate(trips["trip_id"])}
+
+    # Plusieurs millions de lignes pour un grand réseau : colonnes lues en
+    # catégories, chaque valeur distincte (heure, trajet, arrêt) n'est
+    # convertie qu'une fois
+    stop_times = _read_gtfs_table(
+        gtfs_path,
+        "stop_times.txt",
+        ("trip_id", "arrival_time", "departure_time", "stop_id", "stop_sequence"),
+        dtype="category",
+    )
+    trip_col = _by_category(
+        stop_times["trip_id"], lambda ids: ids.map(trip_index).to_numpy(dtype=float)
+    )
+    stop_col = _by_category(
+        stop_times["stop_id"], lambda ids: ids.map(stop_index).to_numpy(dtype=float)
+    )
+    sequence = _by_category(
+        stop_times["stop_sequence"],
+        lambda values: pd.to_numeric(values, errors="coerce").to_numpy(dtype=float),
+    )
+    arrivals = _by_category(stop_times["arrival_time"], _seconds)
+    departures = _by_category(stop_times["departure_time"], _seconds)
+    del stop_times
+    # Un seul des deux horaires renseigné : l'autre lui est égal ; les
+    # arrêts sans horaire (non desservis à heure fixe) sont ignorés
+    arrivals = np.where(np.isnan(arrivals), departures, arrivals)
+    departures = np.where(np.isnan(departures), arrivals, departures)
+    keep = ~(np.isnan(trip_col) | np.isnan(stop_col) | np.isnan(arrivals))
+    trip_col = trip_col[keep].astype(np.int64)
+    stop_col = stop_col[keep].astype(np.int64)
+    sequence = sequence[keep]
+    arrivals = arrivals[keep].astype(np.int32)
+    departures = departures[keep].astype(np.int32)
+
+    order = np.lexsort((sequence, trip_col))
+    trip_col, stop_col = trip_col[order], stop_col[order]
+    arrivals, departures = arrivals[order], departures[order]
+
+    # Trajets regroupés par suite d'arrêts
+    bounds = np.flatnonzero(np.diff(trip_col)) + 1
+    patterns = {}
+    for start, end in zip(np.r_[0, bounds], np.r_[bounds, len(trip_col)]):
+        if end - start >= 2:
+            patterns.setdefault(stop_col[start:end].tobytes(), []).append((start, end))
+
+    routes = []
+    for key, spans in patterns.items():
+        rows = np.array([np.arange(start, end) for start, end in spans])
+        routes.extend(
+            _fifo_routes(
+                np.frombuffer(key, dtype=np.int64), arrivals[rows], departures[rows]
+            )
+        )
+
+    timetable = _pack_routes(routes, len(stops))
+    stop_points = stops[["stop_lat", "stop_lon"]].to_numpy(dtype=float)
+    timetable.update(_footpaths(stop_points))
+    timetable["stop_lat"] = stop_points[:, 0]
+    timetable["stop_lon"] = stop_points[:, 1]
+    timetable["stop_names"] = stops["stop_name"].to_numpy(dtype=str)
+
+    metadata = {
+        "format": TIMETABLE_FORMAT,
+        "source": os.path.basename(os.path.normpath(gtfs_path)),
+        "service_date": service_date.isoformat(),
+        "stops": len(stops),
+        "routes": len(routes),
+        "trips": int(sum(len(route[1]) for route in routes)),
+        "stop_times": int(len(timetable["arrival_times"])),
+        "footpaths": int(len(timetable["foot_to"])),
+        "build_s": round(time.perf_counter() - started, 2),
+    }
+
+    directory = os.path.dirname(timetable_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Écriture dans un fichier temporaire puis remplacement atomique
+    tmp_file = timetable_file + ".tmp.npz"
+    np.savez(tmp_file, metadata=np.array(json.dumps(metadata)), **timetable)
+    os.replace(tmp_file, timetable_file)
+    return metadata
+
+
+def _pack_routes(routes, stop_count):
+    """
+    Range les routes dans des tableaux à plat.
+
+    - `route_stops[route_stop_start[r] + p]` : arrêt à la position p de la
+      route r (une « position de route » par couple (r, p), numérotées dans
+      cet ordre) ;
+    - `arrival_times[route_time_start[r] + t * longueur + p]` : arrivée du
+      trajet t de la route r à la position p ;
+    - `board_keys` : pour chaque position de route, les départs de ses
+      trajets dans l'ordre, codés position × TIME_SHIFT + heure ; le tableau
+      entier est trié, une recherche dichotomique donne le premier trajet
+      qui part après une heure donnée ;
+    - `stop_rp[stop_rp_start[s]:stop_rp_start[s + 1]]` : positions de route
+      où l'on peut monter à l'arrêt s (toutes sauf les terminus).
+
+    Args:
+        routes (list): Routes (arrêts, arrivées, départs) de `_fifo_routes`
+        stop_count (int): Nombre d'arrêts
+
+    Returns:
+        dict: Tableaux des routes
+    """
+    lengths = np.array([len(stops) for stops, _, _ in routes], dtype=np.int64)
+    trips = np.array([len(arrivals) for _, arrivals, _ in routes], dtype=np.int64)
+    route_stop_start = np.r_[0, np.cumsum(lengths)]
+    route_time_start = np.r_[0, np.cumsum(lengths * trips)]
+
+    route_stops = np.concatenate([stops for stops, _, _ in routes]).astype(np.int32)
+    arrival_times = np.concatenate([arrivals.ravel() for _, arrivals, _ in routes])
+    rp_count = len(route_stops)
+    rp_ids = np.arange(rp_count, dtype=np.int64)
+    # Départs par position (colonnes des tableaux trajets × arrêts)
+    board_times = np.concatenate([departures.T.ravel() for _, _, departures in routes])
+    board_keys = np.repeat(rp_ids, np.repeat(trips, lengths)) * TIME_SHIFT + board_times
+
+    # Positions où l'on peut monter, regroupées par arrêt
+    boardable = np.ones(rp_count, dtype=bool)
+    boardable[route_stop_start[1:] - 1] = False
+    stop_rp = rp_ids[boardable][np.argsort(route_stops[boardable], kind="stable")]
+    stop_rp_start = np.r_[
+        0, np.cumsum(np.bincount(route_stops[boardable], minlength=stop_count))
+    ]
+
+    return {
+        "route_stop_start": route_stop_start,
+        "route_stops": route_stops,
+        "route_time_start": route_time_start,
+        "route_trips": trips,
+        "arrival_times": arrival_times.astype(np.int32),
+        "board_keys": board_keys,
+        "stop_rp_start": stop_rp_start,
+        "stop_rp": stop_rp.astype(np.int32),
+    }
+
+
+def _footpaths(stop_points):
+    """
+    Calcule les correspondances à pied entre arrêts proches.
+
+    Args:
+        stop_points (np.ndarray): Tableau (n, 2) des arrêts
+
+    Returns:
+        dict: Correspondances par arrêt de départ (`foot_start`, `foot_to`,
+            `foot_s` en secondes de marche)
+    """
+    source, target, distances = GridIndex(stop_points, FOOTPATH_MAX_KM).query(
+        stop_points, FOOTPATH_MAX_KM
+    )
+    other = source != target
+    return {
+        "foot_start": np.r_[
+            0, np.cumsum(np.bincount(source[other], minlength=len(stop_points)))
+        ],
+        "foot_to": target[other].astype(np.int32),
+        "foot_s": np.ceil(distances[other] * WALK_S_PER_KM).astype(np.int32),
+    }
+
+
+class TransitRouter:
+    """
+    Calcul des temps de trajet en transport sur des horaires compacts.
+
+    Les horaires sont chargés une fois en mémoire. Les heures d'arrivée aux
+    arrêts depuis une origine (le résultat coûteux de RAPTOR) sont gardées
+    pour les `PROFILE_CACHE_SIZE` dernières origines : évaluer de nouvelles
+    destinations depuis les mêmes amis (bars candidats, itérations de
+    l'optimiseur) ne coûte que la marche de sortie.
+
+    Args:
+        timetable_file (str): Fichier .npz créé par `build_timetable`
+        cache_size (int): Nombre d'origines gardées en mémoire
+    """
+
+    def __init__(
+        self, timetable_file=DEFAULT_TIMETABLE_FILE, cache_size=PROFILE_CACHE_SIZE
+    ):
+        if not os.path.exists(timetable_file):
+            raise FileNotFoundError(
+                f"Horaires de transport introuvables: {timetable_file} "
+                f"(construisez-les avec `python -m src.gtfs_router <flux GTFS>`)"
+            )
+        self.timetable_file = timetable_file
+        # Version des données : change à chaque reconstruction des horaires
+        stat = os.stat(timetable_file)
+        self.version = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+        with np.load(timetable_file) as data:
+            self.metadata = json.loads(str(data["metadata"]))
+            for name in _TIMETABLE_ARRAYS:
+                setattr(self, name, data[name])
+
+        self.stop_count = len(self.stop_lat)
+        self.route_count = len(self.route_trips)
+        lengths = np.diff(self.route_stop_start)
+        self.route_lengths = lengths
+        self.rp_route = np.repeat(np.arange(self.route_count), lengths)
+        self.rp_position = np.arange(len(self.route_stops)) - np.repeat(
+            self.route_stop_start[:-1], lengths
+        )
+        # Début des départs de chaque position de route dans `board_keys`
+        self.rp_board_start = np.r_[0, np.cumsum(np.repeat(self.route_trips, lengths))]
+        self.stop_grid = GridIndex(
+            np.column_stack((self.stop_lat, self.stop_lon)), ACCESS_MAX_KM
+        )
+
+        self.cache_size = cache_size
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def earliest_arrivals(self, origins, departure_s):
+        """
+        Renvoie l'heure d'arrivée au plus tôt à chaque arrêt depuis des origines.
+
+        Args:
+            origins: Séquence de N points (lat, lon) de départ
+            departure_s (int): Heure de départ en secondes depuis minuit
+
+        Returns:
+            np.ndarray: Tableau (N, arrêts) des heures d'arrivée en secondes
+                (inf pour les arrêts injoignables)
+        """
+        origins = as_points(origins)
+        keys = [(round(lat, 4), round(lon, 4), departure_s) for lat, lon in origins]
+        arrivals = np.empty((len(origins), self.stop_count))
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                profile = self._profiles.get(key)
+                if profile is None:
+                    missing.append(i)
+                else:
+                    self._profiles.move_to_end(key)
+                    arrivals[i] = profile
+            self._stats["hits"] += len(origins) - len(missing)
+            self._stats["misses"] += len(missing)
+
+        if missing:
+            computed = self._raptor(origins[missing], departure_s)
+            arrivals[missing] = computed
+            with self._lock:
+                for i, profile in zip(missing, computed):
+                    self._profiles[keys[i]] = profile
+                while len(self._profiles) > self.cache_size:
+                    self._profiles.popitem(last=False)
+        return arrivals
+
+    def _raptor(self, origins, departure_s):
+        """Tours RAPTOR pour toutes les origines d'un lot à la fois."""
+        count, stops = len(origins), self.stop_count
+        best = np.full(count * stops, np.inf)
+
+        # Marche d'accès vers les arrêts proches
+        origin_idx, stop_idx, distances = self.stop_grid.query(origins, ACCESS_MAX_KM)
+        np.minimum.at(
+            best, origin_idx * stops + stop_idx, departure_s + distances * WALK_S_PER_KM
+        )
+        marked = np.flatnonzero(np.isfinite(best))
+
+        for _ in range(MAX_ROUNDS):
+            if len(marked) == 0:
+                break
+            reached = self._scan_routes(marked, best, stops)
+            improved = np.flatnonzero(reached < best)
+            best[improved] = reached[improved]
+
+            walked = self._walk_transfers(improved, best, stops)
+            transferred = np.flatnonzero(walked < best)
+            best[transferred] = walked[transferred]
+            marked = np.zeros(len(best), dtype=bool)
+            marked[improved] = True
+            marked[transferred] = True
+            marked = np.flatnonzero(marked)
+
+        return best.reshape(count, stops)
+
+    def _scan_routes(self, marked, best, stops):
+        """
+        Parcourt les routes depuis les arrêts marqués (un tour RAPTOR).
+
+        Pour chaque (origine, route), le trajet emprunté à une position est
+        le plus tôt parmi ceux attrapés aux positions précédentes : sans
+        dépassement, c'est le plus petit indice de trajet, calculé par un
+        minimum cumulé.
+
+        Args:
+            marked (np.ndarray): Indices (origine × arrêts + arrêt) améliorés
+                au tour précédent
+            best (np.ndarray): Meilleures heures d'arrivée connues (à plat)
+            stops (int): Nombre d'arrêts
+
+        Returns:
+            np.ndarray: Heures d'arrivée obtenues à ce tour (à plat)
+        """
+        reached = np.full_like(best, np.inf)
+        origin, stop = np.divmod(marked, stops)
+        first = self.stop_rp_start[stop]
+        counts = self.stop_rp_start[stop + 1] - first
+        rp = self.stop_rp[_ranges(first, counts)].astype(np.int64)
+        origin = np.repeat(origin, counts)
+        ready = np.ceil(np.repeat(best[marked], counts) + BOARDING_SLACK_S)
+
+        # Premier trajet qui part après l'heure où l'on est prêt
+        found = np.searchsorted(
+            self.board_keys, rp * TIME_SHIFT + ready.astype(np.int64)
+        )
+        boarded = found < self.rp_board_start[rp + 1]
+        origin, rp = origin[boarded], rp[boarded]
+        trip = found[boarded] - self.rp_board_start[rp]
+        if len(rp) == 0:
+            return reached
+
+        order = np.argsort(origin * len(self.route_stops) + rp)
+        origin, rp, trip = origin[order], rp[order], trip[order]
+        route, position = self.rp_route[rp], self.rp_position[rp]
+
+        # Minimum cumulé des trajets par (origine, route) : chaque groupe
+        # est décalé pour que les groupes précédents ne l'atteignent pas
+        group = origin * self.route_count + route
+        first_of_group = np.r_[True, group[1:] != group[:-1]]
+        group_rank = np.cumsum(first_of_group)
+        shift = (group_rank[-1] - group_rank + 1) * (int(self.route_trips.max()) + 1)
+        trip = np.minimum.accumulate(shift + trip) - shift
+
+        # Chaque montée dessert les positions jusqu'à la montée suivante
+        last_of_group = np.r_[first_of_group[1:], True]
+        end = np.where(
+            last_of_group, self.route_lengths[route] - 1, np.r_[position[1:], 0]
+        )
+        served = end - position
+        positions = _ranges(position + 1, served)
+        route = np.repeat(route, served)
+        times = self.arrival_times[
+            self.route_time_start[route]
+            + np.repeat(trip, served) * self.route_lengths[route]
+            + positions
+        ]
+        targets = (
+            np.repeat(origin, served) * stops
+            + self.route_stops[self.route_stop_start[route] + positions]
+        )
+        np.minimum.at(reached, targets, times)
+        return reached
+
+    def _walk_transfers(self, improved, best, stops):
+        """Heures d'arrivée par une correspondance à pied depuis les arrêts améliorés."""
+        walked = np.full_like(best, np.inf)
+        origin, stop = np.divmod(improved, stops)
+        first = self.foot_start[stop]
+        counts = self.foot_start[stop + 1] - first
+        edges = _ranges(first, counts)
+        np.minimum.at(
+            walked,
+            np.repeat(origin, counts) * stops + self.foot_to[edges],
+            np.repeat(best[improved], counts) + self.foot_s[edges],
+        )
+        return walked
+
+    def time_matrix(self, origins, destinations, departure=DEFAULT_DEPARTURE):
+        """
+        Calcule les temps de trajet de chaque origine vers chaque destination.
+
+        Une requête RAPTOR par origine (gardée en mémoire) couvre toutes les
+        destinations ; la marche directe est retenue si elle est plus rapide.
+
+        Args:
+            origins: Séquence de N points (lat, lon) d'origine
+            destinations: Séquence de M points (lat, lon) de destination
+            departure (str): Heure de départ "HH:MM"
+
+        Returns:
+            np.ndarray: Matrice (N, M) des temps de trajet en minutes (inf si
+                la destination est injoignable)
+        """
+        origins, destinations = as_points(origins), as_points(destinations)
+        departure_s = parse_time(departure)
+        arrivals = self.earliest_arrivals(origins, departure_s)
+
+        # Marche de sortie depuis les arrêts proches de chaque destination
+        result = np.full((len(origins), len(destinations)), np.inf)
+        dest_idx, stop_idx, distances = self.stop_grid.query(
+            destinations, ACCESS_MAX_KM
+        )
+        if len(dest_idx):
+            candidates = arrivals[:, stop_idx] + distances * WALK_S_PER_KM
+            starts = np.flatnonzero(np.r_[True, dest_idx[1:] != dest_idx[:-1]])
+            result[:, dest_idx[starts]] = np.minimum.reduceat(
+                candidates, starts, axis=1
+            )
+
+        # Marche directe, sans transport
+        walk_km = distance_matrix(origins, destinations, method="equirectangular")
+        direct = np.where(
+            walk_km <= DIRECT_WALK_MAX_KM, departure_s + walk_km * WALK_S_PER_KM, np.inf
+        )
+        return (np.minimum(result, direct) - departure_s) / 60
+
+    def time_pairs(self, origins, destinations, departure=DEFAULT_DEPARTURE):
+        """
+        Calcule les temps de trajet pour des paires de points.
+
+        Args:
+            origins: Séquence de N points (lat, lon) d'origine
+            destinations: Séquence de N points (lat, lon) de destination
+            departure (str): Heure de départ "HH:MM"
+
+        Returns:
+            np.ndarray: Temps de trajet en minutes de origins[i] à destinations[i]
+        """
+        origins, destinations = as_points(origins), as_points(destinations)
+        unique, inverse = np.unique(origins, axis=0, return_inverse=True)
+        matrix = self.time_matrix(unique, destinations, departure)
+        return matrix[inverse.ravel(), np.arange(len(destinations))]
+
+    def stats(self):
+        """
+        Renvoie la taille des horaires et les compteurs du cache des origines.
+
+        Returns:
+            dict: Arrêts, routes, trajets, origines en cache, hits, misses
+        """
+        with self._lock:
+            return {
+                "stops": self.stop_count,
+                "routes": self.route_count,
+                "trips": int(self.route_trips.sum()),
+                "cached_origins": len(self._profiles),
+                **self._stats,
+            }
+
+
+_routers = {}
+_routers_lock = threading.Lock()
+
+
+def get_transit_router(timetable_file=DEFAULT_TIMETABLE_FILE):
+    """
+    Renvoie le calculateur d'itinéraires partagé par le processus.
+
+    Args:
+        timetable_file (str): Fichier .npz des horaires
+
+    Returns:
+        TransitRouter: Calculateur chargé en mémoire
+    """
+    with _routers_lock:
+        if timetable_file not in _routers:
+            _routers[timetable_file] = TransitRouter(timetable_file)
+        return _routers[timetable_file]
+
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande pour construire les horaires."""
+    parser = argparse.ArgumentParser(
+        description="Construit les horaires compacts du calcul d'itinéraires à partir d'un flux GTFS."
+    )
+    parser.add_argument("gtfs", help="Dossier ou fichier .zip du flux GTFS")
+    parser.add_argument(
+        "--timetable", default=DEFAULT_TIMETABLE_FILE, help="Fichier .npz à créer"
+    )
+    parser.add_argument(
+        "--date",
+        type=lambda value: datetime.datetime.strptime(value, "%Y%m%d").date(),
+        help="Jour de service AAAAMMJJ (par défaut aujourd'hui)",
+    )
+    args = parser.parse_args(argv)
+
+    metadata = build_timetable(args.gtfs, args.timetable, args.date)
+    size_mb = os.path.getsize(args.timetable) / 2**20
+    print(
+        f"✅ {metadata['stops']} arrêts, {metadata['routes']} routes, "
+        f"{metadata['trips']} trajets, {metadata['footpaths']} correspondances à pied "
+        f"en {metadata['build_s']:.1f} s ({size_mb:.1f} Mo) dans {args.timetable}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+Module pour les appels HTTP vers les services externes (Overpass, Nominatim).
+
+Chaque service amont dispose d'un client partagé par tout le processus :
+
+- session `requests` avec pool de connexions (keep-alive) ;
+- nombre de requêtes simultanées borné et limiteur de débit à jetons
+  (Nominatim impose 1 requête/s) ;
+- nouvelles tentatives avec attente exponentielle sur 429/5xx et erreurs
+  réseau (l'en-tête Retry-After est respecté, dans la limite du délai
+  maximum d'une requête : au-delà, l'erreur remonte sans attendre) ;
+- regroupement des requêtes identiques en cours (« single-flight ») :
+  plusieurs sessions Streamlit qui demandent la même chose au même moment
+  partagent un seul appel amont.
+
+Les URLs se configurent par variables d'environnement, ce qui permet de
+viser un serveur local de substitution pour les tests. Avec la variable
+OUCEKONBOI_HTTP_RECORD, chaque réponse reçue est aussi enregistrée dans ce
+dossier, pour être rejouée par ce serveur (voir `src.http_fixtures`).
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.http_fixtures import FixtureStore
+from src.metrics import span
+
+
+UPSTREAMS = {
+    "overpass": {
+        "base_url": os.environ.get(
+            "OUCEKONBOI_OVERPASS_URL", "http://overpass-api.de/api/interpreter"
+        ),
+        "rate_per_s": 2.0,
+        "burst": 2,
+        "max_concurrency": 2,  # Overpass accorde 2 créneaux par adresse IP
+        "timeout_s": 30,
+        "max_retries": 2,
+        "backoff_s": 0.5,
+    },
+    "nominatim": {
+        "base_url": os.environ.get(
+            "OUCEKONBOI_NOMINATIM_URL", "https://nominatim.openstreetmap.org"
+        ),
+        "rate_per_s": 1.0,  # Politique d'usage de Nominatim : 1 requête/s
+        "burst": 1,
+        "max_concurrency": 1,
+        "timeout_s": 10,
+        "max_retries": 2,
+        "backoff_s": 1.0,
+        "headers": {"User-Agent": "oucekonboi_app"},
+    },
+}
+
+# Dossier d'enregistrement des réponses (vide : pas d'enregistrement)
+RECORD_DIR = os.environ.get("OUCEKONBOI_HTTP_RECORD", "")
+
+# Codes HTTP qui justifient une nouvelle tentative
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class UpstreamError(Exception):
+    """Erreur définitive d'un service amont après épuisement des tentatives."""
+
+
+class TokenBucket:
+    """
+    Limiteur de débit à jetons, partagé entre threads.
+
+    Args:
+        rate_per_s (float): Jetons ajoutés par seconde
+        burst (int): Nombre maximum de jetons accumulés
+    """
+
+    def __init__(self, rate_per_s, burst=1):
+        self.rate_per_s = rate_per_s
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Attend qu'un jeton soit disponible puis le consomme."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst,
+                    self._tokens + (now - self._updated_at) * self.rate_per_s,
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_s = (1 - self._tokens) / self.rate_per_s
+            time.sleep(wait_s)
+
+
+class UpstreamClient:
+    """
+    Client HTTP partagé pour un service amont.
+
+    Args:
+        name (str): Nom du service (pour les messages et statistiques)
+        base_url (str): URL de base du service
+        rate_per_s (float): Débit maximum en requêtes par seconde
+        burst (int): Nombre de requêtes autorisées en rafale
+        max_concurrency (int): Nombre maximum de requêtes simultanées
+        timeout_s (float): Délai maximum d'une requête en secondes
+        max_retries (int): Nombre de nouvelles tentatives sur 429/5xx
+        backoff_s (float): Attente de base avant une nouvelle tentative
+        headers (dict): En-têtes ajoutés à chaque requête
+        record_dir (str): Dossier où enregistrer les réponses reçues (vide :
+            pas d'enregistrement)
+    """
+
+    def __init__(
+        self,
+        name,
+        base_url,
+        rate_per_s=1.0,
+        burst=1,
+        max_concurrency=2,
+        timeout_s=30,
+        max_retries=3,
+        backoff_s=1.0,
+        headers=None,
+        record_dir=RECORD_DIR,
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.timeout_s = timeout_s
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=max_concurrency, max_retries=0
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(headers or {})
+        self.fixtures = FixtureStore(record_dir) if record_dir else None
+
+        self._bucket = TokenBucket(rate_per_s, burst)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "upstream_calls": 0,
+            "coalesced": 0,
+            "retries": 0,
+            "errors": 0,
+        }
+
+    def get_json(self, path="", params=None):
+        """
+        Envoie une requête GET et renvoie la réponse JSON décodée.
+
+        Les requêtes identiques déjà en cours sont regroupées : l'objet
+        renvoyé peut alors être partagé entre appelants et ne doit pas être
+        modifié.
+
+        Args:
+            path (str): Chemin ajouté à l'URL de base
+            params (dict): Paramètres de la requête
+
+        Returns:
+            Réponse JSON décodée
+        """
+        url = self.base_url + path
+        key = (url, json.dumps(params or {}, sort_keys=True))
+
+        with self._lock:
+            self._stats["requests"] += 1
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                leader = False
+            else:
+                future = Future()
+                self._in_flight[key] = future
+                leader = True
+
+        # Une requête regroupée avec une autre déjà en cours compte comme
+        # servie par un cache
+        with span(f"http.{self.name}", cached=not leader):
+            if not leader:
+                return future.result()
+
+            try:
+                result = self._request_with_retries(url, params)
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            else:
+                future.set_result(result)
+                if self.fixtures is not None:
+                    self.fixtures.save(self.name, path, params, result)
+                return result
+            finally:
+                with self._lock:
+                    del self._in_flight[key]
+
+    def _request_with_retries(self, url, params):
+        """Exécute une requête avec limitation de débit et nouvelles tentatives."""
+        for attempt in range(self.max_retries + 1):
+            self._bucket.acquire()
+            retry_after = None
+            try:
+                with self._slots:
+                    with self._lock:
+                        self._stats["upstream_calls"] += 1
+                    response = self.session.get(
+                        url, params=params, timeout=self.timeout_s
+                    )
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response.json()
+                error = UpstreamError(
+                    f"{self.name}: HTTP {response.status_code} pour {url}"
+                )
+                retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = UpstreamError(f"{self.name}: {e}")
+
+            if attempt == self.max_retries:
+                break
+            # Une attente plus longue que le délai d'une requête bloquerait
+            # la session et celles qui attendent la même requête : on abandonne
+            if retry_after is not None and retry_after > self.timeout_s:
+                error = UpstreamError(
+                    f"{error} (Retry-After: {retry_after:g} s, "
+                    f"au-delà du délai de {self.timeout_s:g} s)"
+                )
+                break
+            with self._lock:
+                self._stats["retries"] += 1
+            delay = self.backoff_s * 2**attempt * (1 + random.random() / 2)
+            time.sleep(retry_after if retry_after is not None else delay)
+
+        with self._lock:
+            self._stats["errors"] += 1
+        raise error
+
+    def stats(self):
+        """
+        Renvoie les compteurs d'utilisation du client.
+
+        Returns:
+            dict: Requêtes reçues, appels amont, requêtes regroupées,
+                nouvelles tentatives et erreurs définitives
+        """
+        with self._lock:
+            return dict(self._stats)
+
+
+def _parse_retry_after(value):
+    """Convertit un en-tête Retry-After en secondes (None si absent)."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(name):
+    """
+    Renvoie le client partagé d'un service amont.
+
+    Args:
+        name (str): Nom du service ("overpass", "nominatim")
+
+    Returns:
+        UpstreamClient: Client du service
+    """
+    with _clients_lock:
+        if name not in _clients:
+            _clients[name] = UpstreamClient(name, **UPSTREAMS[name])
+        return _clients[name]
+
+
+def configure_client(name, **overrides):
+    """
+    Remplace la configuration d'un service amont (URL, débit...).
+
+    Le client existant est recréé au prochain appel de `get_client`.
+
+    Args:
+        name (str): Nom du service
+        **overrides: Paramètres de `UpstreamClient` à remplacer
+    """
+    with _clients_lock:
+        UPSTREAMS[name] = {**UPSTREAMS.get(name, {}), **overrides}
+        _clients.pop(name, None)
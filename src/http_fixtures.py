@@ -0,0 +1,485 @@
+"""
+Module pour l'enregistrement et le rejeu des réponses Overpass et Nominatim.
+
+Les mesures de performance de bout en bout (recherche des bars,
+géocodage) ne doivent pas dépendre de la latence et des limites des
+services publics :
+
+- enregistrement : avec OUCEKONBOI_HTTP_RECORD=<dossier>, le client HTTP
+  partagé (`src.http_client`) écrit chaque réponse reçue dans le dossier,
+  un fichier JSON par requête (service, chemin, paramètres) ;
+- rejeu : `StandInServer` sert ces réponses en local, avec une latence et
+  un taux d'erreurs injectés (graine fixe) : la même mesure peut être
+  refaite sans réseau, y compris le comportement des nouvelles tentatives
+  et l'efficacité des caches.
+
+Le serveur répond sous /overpass et /nominatim ; /_stats renvoie ses
+compteurs. Une requête sans réponse enregistrée reçoit une erreur 404.
+
+Exemple :
+    python -m src.http_fixtures record --groups groups.json
+    python -m src.http_fixtures serve --port 8700 --latency-ms 300 --error-rate 0.05
+    python -m src.http_fixtures replay --latency-ms 300 --error-rate 0.05
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from src.paths import data_path
+
+
+DEFAULT_FIXTURES_DIR = os.environ.get(
+    "OUCEKONBOI_HTTP_FIXTURES", data_path("http_fixtures")
+)
+DEFAULT_PORT = 8700
+DEFAULT_ERROR_STATUS = 503
+DEFAULT_SEED = 42
+
+
+def fixture_key(upstream, path, params):
+    """
+    Calcule la clé d'une requête enregistrée.
+
+    Les valeurs des paramètres sont comparées sous forme de texte, comme
+    elles circulent dans l'URL.
+
+    Args:
+        upstream (str): Nom du service ("overpass", "nominatim")
+        path (str): Chemin ajouté à l'URL de base du service
+        params (dict): Paramètres de la requête
+
+    Returns:
+        str: Empreinte hexadécimale de la requête
+    """
+    canonical = json.dumps(
+        [upstream, path, {k: str(v) for k, v in (params or {}).items()}],
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+
+class FixtureStore:
+    """
+    Réponses enregistrées, un fichier JSON par requête et par service.
+
+    Args:
+        directory (str): Dossier des réponses
+    """
+
+    def __init__(self, directory=DEFAULT_FIXTURES_DIR):
+        self.directory = directory
+
+    def _path(self, upstream, key):
+        return os.path.join(self.directory, upstream, f"{key}.json")
+
+    def save(self, upstream, path, params, body):
+        """
+        Enregistre (ou remplace) la réponse d'une requête.
+
+        Args:
+            upstream (str): Nom du service
+            path (str): Chemin de la requête
+            params (dict): Paramètres de la requête
+            body: Réponse JSON décodée
+        """
+        file_path = self._path(upstream, fixture_key(upstream, path, params))
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        record = {
+            "upstream": upstream,
+            "path": path,
+            "params": {k: str(v) for k, v in (params or {}).items()},
+            "recorded_at": time.time(),
+            "body": body,
+        }
+        # Écriture atomique : un enregistrement interrompu ne laisse pas de
+        # fichier tronqué
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp_path, file_path)
+
+    def load(self, upstream, path, params):
+        """
+        Relit la réponse enregistrée d'une requête.
+
+        Args:
+            upstream (str): Nom du service
+            path (str): Chemin de la requête
+            params (dict): Paramètres de la requête
+
+        Returns:
+            Réponse JSON décodée, ou None si la requête n'a pas été enregistrée
+        """
+        file_path = self._path(upstream, fixture_key(upstream, path, params))
+        try:
+            with open(file_path, encoding="utf-8") as f:
+                return json.load(f)["body"]
+        except FileNotFoundError:
+            return None
+
+    def counts(self):
+        """
+        Compte les réponses enregistrées.
+
+        Returns:
+            dict: {service: nombre de réponses}
+        """
+        if not os.path.isdir(self.directory):
+            return {}
+        return {
+            upstream: sum(
+                name.endswith(".json")
+                for name in os.listdir(os.path.join(self.directory, upstream))
+            )
+            for upstream in sorted(os.listdir(self.directory))
+            if os.path.isdir(os.path.join(self.directory, upstream))
+        }
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """Sert les réponses enregistrées (voir `StandInServer`)."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/_stats":
+            self._send(200, self.server.stats())
+            return
+
+        upstream, _, path = url.path.lstrip("/").partition("/")
+        path = f"/{path}" if path else ""
+        params = {
+            k: v[0] for k, v in parse_qs(url.query, keep_blank_values=True).items()
+        }
+
+        status, delay_s = self.server.draw(upstream)
+        time.sleep(delay_s)
+        if status != 200:
+            self._send(status, {"error": "Erreur injectée"})
+            return
+        body = self.server.fixtures.load(upstream, path, params)
+        if body is None:
+            self.server.count("missing")
+            self._send(404, {"error": f"Aucune réponse enregistrée pour {self.path}"})
+            return
+        self.server.count("served")
+        self._send(200, body)
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    Serveur local qui rejoue les réponses enregistrées.
+
+    Args:
+        fixtures (FixtureStore): Réponses enregistrées
+        host (str): Adresse d'écoute
+        port (int): Port d'écoute (0 : port libre choisi par le système)
+        latency_ms (float): Latence ajoutée à chaque réponse
+        jitter_ms (float): Variation aléatoire de la latence (0 à jitter_ms)
+        error_rate (float): Proportion de réponses remplacées par une erreur
+        error_status (int): Code HTTP des erreurs injectées
+        seed (int): Graine du tirage de la latence et des erreurs
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        fixtures,
+        host="127.0.0.1",
+        port=DEFAULT_PORT,
+        latency_ms=0.0,
+        jitter_ms=0.0,
+        error_rate=0.0,
+        error_status=DEFAULT_ERROR_STATUS,
+        seed=DEFAULT_SEED,
+    ):
+        super().__init__((host, port), _StandInHandler)
+        self.fixtures = fixtures
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "served": 0, "missing": 0, "injected_errors": 0}
+        self._thread = None
+
+    @property
+    def url(self):
+        """URL de base du serveur."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def draw(self, upstream):
+        """Tire le statut et la latence d'une réponse (ordre des requêtes)."""
+        with self._lock:
+            self._stats["requests"] += 1
+            delay_ms = self.latency_ms + self._random.uniform(0, self.jitter_ms)
+            if self._random.random() < self.error_rate:
+                self._stats["injected_errors"] += 1
+                return self.error_status, delay_ms / 1000
+            return 200, delay_ms / 1000
+
+    def count(self, name):
+        """Incrémente un compteur du serveur."""
+        with self._lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        """
+        Renvoie les compteurs du serveur.
+
+        Returns:
+            dict: Requêtes reçues, servies, sans réponse enregistrée et
+                erreurs injectées
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def start(self):
+        """
+        Lance le serveur dans un thread de fond.
+
+        Returns:
+            StandInServer: Le serveur lui-même
+        """
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="oucekonboi-stand-in", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Arrête le serveur et libère le port."""
+        self.shutdown()
+        self.server_close()
+
+
+def use_stand_in(server, unthrottled=False):
+    """
+    Dirige les clients Overpass et Nominatim vers un serveur de substitution.
+
+    Args:
+        server (StandInServer): Serveur lancé
+        unthrottled (bool): Lever les limites de débit des services publics
+            (sinon, elles sont respectées comme en production)
+    """
+    from src.http_client import configure_client
+
+    for upstream in ("overpass", "nominatim"):
+        overrides = {"base_url": f"{server.url}/{upstream}"}
+        if unthrottled:
+            overrides.update(rate_per_s=1000.0, burst=100)
+        configure_client(upstream, **overrides)
+
+
+def run_workload(groups, radius_km=0.6, rounds=2):
+    """
+    Géocode les adresses et recherche les bars de chaque groupe.
+
+    Chaque tour refait les mêmes recherches : le premier remplit les
+    caches, les suivants mesurent leur efficacité.
+
+    Args:
+        groups (list): Groupes {"id": str, "friends": list}
+        radius_km (float): Rayon de recherche des bars
+        rounds (int): Nombre de tours
+
+    Returns:
+        dict: Durée par tour, statistiques des spans (`src.metrics`), des
+            clients HTTP, du serveur et des caches
+    """
+    from src.bar_finder import get_bars_around_center
+    from src.geo_utils import calculate_center
+    from src.geocoder import geocode_addresses, get_geocode_cache
+    from src.http_client import get_client
+    from src.metrics import summary
+    from src.overpass_cache import get_overpass_cache
+
+    rounds_ms = []
+    errors = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for group in groups:
+            addresses = [f["address"] for f in group["friends"] if f.get("address")]
+            located = geocode_addresses(addresses)
+            friends = []
+            for friend in group["friends"]:
+                lat, lon, _ = located.get(friend.get("address"), (None, None, None))
+                if lat is not None:
+                    friend = {**friend, "latitude": lat, "longitude": lon}
+                friends.append(friend)
+            center_lat, center_lon = calculate_center(friends)
+            get_bars_around_center(
+                center_lat, center_lon, radius_km, "overpass", errors.append
+            )
+        rounds_ms.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "rounds_ms": rounds_ms,
+        "spans": {
+            name: stats
+            for name, stats in summary().items()
+            if name.startswith(("http.", "geocode", "bars."))
+        },
+        "clients": {
+            name: get_client(name).stats() for name in ("overpass", "nominatim")
+        },
+        "caches": {
+            "geocode": get_geocode_cache().stats(),
+            "overpass": get_overpass_cache().stats(),
+        },
+        "errors": [event["message"] for event in errors],
+    }
+
+
+def _use_fresh_caches(cache_dir):
+    """Fait pointer les caches disque du processus vers un dossier neuf."""
+    # Les chemins des caches sont lus à l'import de leurs modules
+    if "src.geocoder" in sys.modules or "src.overpass_cache" in sys.modules:
+        raise RuntimeError("Les caches doivent être choisis avant leur import")
+    os.makedirs(cache_dir, exist_ok=True)
+    os.environ["OUCEKONBOI_GEOCODE_CACHE"] = os.path.join(cache_dir, "geocode.sqlite")
+    os.environ["OUCEKONBOI_OVERPASS_CACHE"] = os.path.join(cache_dir, "overpass.sqlite")
+
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande de l'enregistrement et du rejeu."""
+    parser = argparse.ArgumentParser(
+        description="Enregistre et rejoue les réponses Overpass et Nominatim."
+    )
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_workload_options(command):
+        command.add_argument(
+            "--groups",
+            help="Fichier JSON ou CSV des groupes (par défaut : tous les groupes "
+            "enregistrés dans l'application)",
+        )
+        command.add_argument("--radius", type=float, default=0.6)
+        command.add_argument(
+            "--cache-dir", help="Dossier des caches disque (par défaut : neuf)"
+        )
+
+    def add_server_options(command):
+        command.add_argument("--latency-ms", type=float, default=0.0)
+        command.add_argument("--jitter-ms", type=float, default=0.0)
+        command.add_argument("--error-rate", type=float, default=0.0)
+        command.add_argument("--error-status", type=int, default=DEFAULT_ERROR_STATUS)
+        command.add_argument("--seed", type=int, default=DEFAULT_SEED)
+
+    record = commands.add_parser(
+        "record", help="Interroge les vrais services et enregistre les réponses"
+    )
+    add_workload_options(record)
+
+    serve = commands.add_parser("serve", help="Lance le serveur de substitution")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=DEFAULT_PORT)
+    add_server_options(serve)
+
+    replay = commands.add_parser(
+        "replay",
+        help="Mesure la recherche et le géocodage sur les réponses enregistrées",
+    )
+    add_workload_options(replay)
+    add_server_options(replay)
+    replay.add_argument("--rounds", type=int, default=2)
+    replay.add_argument(
+        "--unthrottled",
+        action="store_true",
+        help="Lever les limites de débit de Nominatim et Overpass",
+    )
+
+    commands.add_parser("list", help="Compte les réponses enregistrées")
+    args = parser.parse_args(argv)
+    fixtures = FixtureStore(args.fixtures)
+
+    if args.command == "list":
+        print(json.dumps(fixtures.counts(), indent=2))
+        return
+
+    if args.command == "serve":
+        server = StandInServer(
+            fixtures,
+            args.host,
+            args.port,
+            args.latency_ms,
+            args.jitter_ms,
+            args.error_rate,
+            args.error_status,
+            args.seed,
+        )
+        print(
+            f"🛰️ Serveur de substitution sur {server.url} : "
+            f"OUCEKONBOI_OVERPASS_URL={server.url}/overpass "
+            f"OUCEKONBOI_NOMINATIM_URL={server.url}/nominatim",
+            file=sys.stderr,
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+        return
+
+    # Caches neufs : toutes les requêtes partent vers le service (ou le
+    # serveur de substitution) au premier tour
+    _use_fresh_caches(args.cache_dir or tempfile.mkdtemp(prefix="oucekonboi-"))
+    from src.batch import read_groups, read_store_groups
+    from src.http_client import configure_client
+
+    groups = read_groups(args.groups) if args.groups else read_store_groups()
+
+    if args.command == "record":
+        for upstream in ("overpass", "nominatim"):
+            configure_client(upstream, record_dir=args.fixtures)
+        report = run_workload(groups, args.radius, rounds=1)
+        report["fixtures"] = fixtures.counts()
+    else:
+        server = StandInServer(
+            fixtures,
+            port=0,
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            error_status=args.error_status,
+            seed=args.seed,
+        ).start()
+        use_stand_in(server, args.unthrottled)
+        try:
+            report = run_workload(groups, args.radius, args.rounds)
+        finally:
+            report_server = server.stats()
+            server.stop()
+        report["server"] = report_server
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,478 @@
+"""
+Module pour le test de charge des pages Streamlit avec des sessions simultanées.
+
+Chaque session simulée est un `AppTest` de Streamlit exécuté dans son propre
+processus : `AppTest` s'appuie sur l'instance globale du runtime Streamlit
+et sur sa configuration, que deux sessions d'un même processus se
+disputeraient. Les sessions se comportent donc comme des répliques : elles
+partagent le stockage des amis, le cache de géocodage et le stockage des
+résultats (fichiers SQLite), chacune gardant ses caches en mémoire. Elles
+attendent d'être toutes prêtes (imports faits) avant de démarrer ensemble.
+Deux scénarios réalistes :
+
+- "explorer" (page Oucekonboi) : ouverture, passage en mode transport,
+  changement d'objectif, déplacement du curseur de rayon, retour au mode
+  distance ;
+- "editor" (page Les Copaines) : ouverture, ajout d'un ami, suppression.
+
+Le rapport donne les percentiles de durée par réexécution (par page et par
+action), la mémoire totale des processus de session, les taux de succès
+des caches (cumulés sur les sessions) et la contention sur le stockage des
+amis (attente du verrou d'écriture SQLite, voir `src.data_manager`).
+
+Les données sont isolées : base d'amis, journal des requêtes, cache de
+géocodage et stockage de résultats sont créés dans un dossier temporaire.
+
+Exemple :
+    python -m src.loadtest --sessions 8 --editors 2 --iterations 3
+"""
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from src.paths import ROOT_DIR
+
+
+PAGES = {
+    "explorer": os.path.join(ROOT_DIR, "app", "pages", "Oucekonboi.py"),
+    "editor": os.path.join(ROOT_DIR, "app", "pages", "Les_Copaines.py"),
+}
+
+LOADTEST_GROUP = "loadtest"
+DEFAULT_GROUP_SIZE = 12
+DEFAULT_TIMEOUT_S = 120
+
+# Attente du verrou d'écriture au-delà de laquelle une écriture est contendue
+CONTENTION_THRESHOLD_MS = 10.0
+
+# Valeurs successives du curseur de rayon (glissement de 0,35 à 1,05 km)
+RADIUS_DRAG_KM = (0.35, 0.45, 0.55, 0.65, 0.75, 0.85, 0.95, 1.05)
+
+# Modules importés par chaque session avant le départ commun
+PRELOADED_MODULES = ("streamlit.testing.v1", "src.map_utils", "src.ui_components")
+
+TRANSIT_MODE = "🚇 Temps de transport en commun"
+DISTANCE_MODE = "🗺️ Distance géographique"
+
+
+def _widget(widgets, label):
+    """Renvoie le widget d'une liste qui porte un libellé donné."""
+    return next(widget for widget in widgets if widget.label == label)
+
+
+def explorer_actions(at, rng):
+    """
+    Scénario de la page Oucekonboi : une suite d'actions (nom, réexécution).
+
+    Args:
+        at (AppTest): Session simulée
+        rng (random.Random): Tirage des choix de la session
+
+    Yields:
+        tuple: (nom de l'action, fonction lançant la réexécution)
+    """
+    yield "open", at.run
+    yield "transit_mode", lambda: at.radio[0].set_value(TRANSIT_MODE).run()
+    objective = _widget(at.selectbox, "Objectif d'optimisation :")
+    yield "objective", lambda: objective.set_value(
+        rng.choice([o for o in objective.options if o != objective.value])
+    ).run()
+    slider = _widget(at.slider, "🔍 Rayon de recherche (km)")
+    for radius_km in RADIUS_DRAG_KM:
+        yield "radius", lambda radius_km=radius_km: slider.set_value(radius_km).run()
+    yield "distance_mode", lambda: at.radio[0].set_value(DISTANCE_MODE).run()
+
+
+def editor_actions(at, rng):
+    """
+    Scénario de la page Les Copaines : ajout puis suppression d'un ami.
+
+    Args:
+        at (AppTest): Session simulée
+        rng (random.Random): Tirage des choix de la session
+
+    Yields:
+        tuple: (nom de l'action, fonction lançant la réexécution)
+    """
+    yield "open", at.run
+    name = f"Charge {rng.randrange(10**6)}"
+
+    def add_friend():
+        _widget(at.text_input, "Nom de l'ami").set_value(name)
+        _widget(at.text_area, "Adresse complète").set_value(rng.choice(ADDRESSES))
+        return _widget(at.button, "Ajouter l'ami").click().run()
+
+    yield "add_friend", add_friend
+
+    def delete_friend():
+        at.selectbox(key="delete_friend").set_value(name).run()
+        return _widget(at.button, f"Supprimer {name}").click().run()
+
+    yield "delete_friend", delete_friend
+
+
+SCENARIOS = {"explorer": explorer_actions, "editor": editor_actions}
+
+# Adresses saisies par les éditeurs, préenregistrées dans le cache de
+# géocodage : le test ne dépend pas de Nominatim
+ADDRESSES = [
+    f"{number} rue de la Charge, 750{district:02d} Paris"
+    for number, district in zip(range(1, 21), range(1, 21))
+]
+
+
+def _rss_mb():
+    """Mémoire résidente du processus en Mo (None hors Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return None
+
+
+def _percentiles(values):
+    """Nombre, p50, p95 et maximum d'une liste de durées en ms."""
+    if not values:
+        return {"count": 0}
+    p50, p95 = np.percentile(values, (50, 95))
+    return {
+        "count": len(values),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "max_ms": float(max(values)),
+    }
+
+
+def prepare_environment(work_dir, backend=None):
+    """
+    Isole les données du test dans un dossier de travail.
+
+    Doit être appelé avant l'import des modules de l'application : les
+    chemins des bases sont lus à l'import (les processus de session
+    héritent des variables d'environnement).
+
+    Args:
+        work_dir (str): Dossier des bases du test
+        backend (str): Source des bars ("overpass" ou "local", par défaut
+            celle de l'application)
+    """
+    if "src.data_manager" in sys.modules:
+        raise RuntimeError("L'environnement doit être préparé avant l'import")
+    os.makedirs(work_dir, exist_ok=True)
+    os.environ["OUCEKONBOI_FRIENDS_DB"] = os.path.join(work_dir, "friends.sqlite")
+    os.environ["OUCEKONBOI_QUERY_LOG"] = os.path.join(work_dir, "query_log.sqlite")
+    os.environ["OUCEKONBOI_GEOCODE_CACHE"] = os.path.join(work_dir, "geocode.sqlite")
+    os.environ["OUCEKONBOI_RESULT_STORE"] = os.path.join(work_dir, "results.sqlite")
+    os.environ["OUCEKONBOI_RESULT_BACKEND"] = "sqlite"
+    if backend:
+        os.environ["OUCEKONBOI_BAR_BACKEND"] = backend
+
+
+def seed_data(group_size=DEFAULT_GROUP_SIZE, seed=0):
+    """
+    Crée le groupe du test et préenregistre les adresses des éditeurs.
+
+    Args:
+        group_size (int): Nombre d'amis du groupe
+        seed (int): Graine des positions des amis
+    """
+    from src.benchmark import synthetic_friends
+    from src.data_manager import get_friends_store, save_friends
+    from src.geocoder import get_geocode_cache, normalize_address
+
+    store = get_friends_store()
+    if LOADTEST_GROUP not in {group["id"] for group in store.list_groups()}:
+        store.create_group(LOADTEST_GROUP)
+    save_friends(synthetic_friends(group_size, seed), LOADTEST_GROUP)
+
+    cache = get_geocode_cache()
+    rng = random.Random(seed)
+    for address in ADDRESSES:
+        cache.put(
+            normalize_address(address),
+            (48.83 + rng.uniform(0, 0.06), 2.30 + rng.uniform(0, 0.1), address),
+        )
+
+
+def run_session(scenario, iterations, seed, results, timeout_s=DEFAULT_TIMEOUT_S):
+    """
+    Exécute un scénario plusieurs fois dans une nouvelle session.
+
+    Args:
+        scenario (str): "explorer" ou "editor"
+        iterations (int): Nombre de répétitions du scénario
+        seed (int): Graine des choix de la session
+        results (list): Liste complétée par les mesures des réexécutions
+        timeout_s (float): Délai maximum d'une réexécution
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed)
+    at = AppTest.from_file(PAGES[scenario], default_timeout=timeout_s)
+    at.query_params["group"] = LOADTEST_GROUP
+
+    for _ in range(iterations):
+        for action, rerun in SCENARIOS[scenario](at, rng):
+            started = time.perf_counter()
+            error = None
+            try:
+                rerun()
+                if at.exception:
+                    error = at.exception[0].value
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            results.append(
+                {
+                    "scenario": scenario,
+                    "action": action,
+                    "ms": (time.perf_counter() - started) * 1000,
+                    "error": error,
+                }
+            )
+            if error:
+                # Session dans un état inconnu : on repart d'une page neuve
+                at = AppTest.from_file(PAGES[scenario], default_timeout=timeout_s)
+                at.query_params["group"] = LOADTEST_GROUP
+                break
+
+
+def _merge_counts(stats):
+    """Additionne les compteurs de cache de plusieurs sessions."""
+    merged = {}
+    for counts in stats:
+        for name, value in counts.items():
+            if name != "hit_rate":
+                merged[name] = merged.get(name, 0) + value
+    if "hits" in merged and "misses" in merged:
+        lookups = merged["hits"] + merged["misses"]
+        merged["hit_rate"] = merged["hits"] / lookups if lookups else 0.0
+    return merged
+
+
+def _session_process(scenario, iterations, seed, timeout_s, barrier, delay_s, out):
+    """
+    Processus d'une session : attend les autres, joue le scénario et
+    renvoie ses mesures dans la file `out`.
+    """
+    report = {"results": [], "memory": [], "error": None}
+    try:
+        # Imports faits avant le départ commun : hors des durées mesurées
+        for module in PRELOADED_MODULES:
+            importlib.import_module(module)
+        from src.geocoder import get_geocode_cache
+        from src.metrics import summary
+        from src.pipeline import get_stage_cache
+        from src.transit_utils import transit_cache_stats
+
+        memory = report["memory"]
+        memory.append(_rss_mb())
+        stop = threading.Event()
+
+        def sample_memory():
+            while not stop.wait(0.5):
+                memory.append(_rss_mb())
+
+        sampler = threading.Thread(target=sample_memory, daemon=True)
+        sampler.start()
+        try:
+            barrier.wait(timeout_s)
+        except threading.BrokenBarrierError:
+            pass  # Une session n'a pas démarré : les autres partent quand même
+        time.sleep(delay_s)
+
+        run_session(scenario, iterations, seed, report["results"], timeout_s)
+        stop.set()
+        sampler.join()
+        memory.append(_rss_mb())
+
+        report["stages"] = get_stage_cache().stats()
+        report["transit_times"] = transit_cache_stats()
+        report["geocode"] = get_geocode_cache().stats()
+        report["lock_wait"] = summary().get("friends.lock_wait", {})
+    except Exception as e:
+        report["error"] = f"{type(e).__name__}: {e}"
+    out.put(report)
+
+
+def run_load_test(sessions=4, editors=1, iterations=2, ramp_s=0.0, seed=0):
+    """
+    Lance des sessions simultanées et mesure leurs réexécutions.
+
+    Args:
+        sessions (int): Nombre total de sessions simultanées (un processus
+            chacune)
+        editors (int): Nombre de sessions sur la page Les Copaines (les
+            autres explorent la page Oucekonboi)
+        iterations (int): Nombre de répétitions du scénario par session
+        ramp_s (float): Délai entre les démarrages de deux sessions
+        seed (int): Graine des choix des sessions
+
+    Returns:
+        dict: Rapport (durées, mémoire, caches, contention, erreurs)
+    """
+    from src.metrics import summary
+
+    # Processus neufs : ceux du test n'héritent pas des connexions SQLite
+    # ouvertes par ce processus (données du test)
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(sessions)
+    out = context.Queue()
+    processes = [
+        context.Process(
+            target=_session_process,
+            args=(
+                "editor" if i < editors else "explorer",
+                iterations,
+                seed + i,
+                DEFAULT_TIMEOUT_S,
+                barrier,
+                i * ramp_s,
+                out,
+            ),
+            name=f"loadtest-session-{i}",
+        )
+        for i in range(sessions)
+    ]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    reports = []
+    while len(reports) < sessions:
+        try:
+            reports.append(out.get(timeout=1.0))
+        except queue.Empty:
+            if not any(process.is_alive() for process in processes):
+                break
+    for process in processes:
+        process.join()
+    elapsed_s = time.perf_counter() - started
+
+    results = [result for report in reports for result in report["results"]]
+    errors = {}
+    for error in [result["error"] for result in results] + [
+        report["error"] for report in reports
+    ]:
+        if error:
+            errors[error] = errors.get(error, 0) + 1
+    if len(reports) < sessions:
+        errors["session interrompue"] = sessions - len(reports)
+
+    by_action = {}
+    for result in results:
+        key = f"{result['scenario']}.{result['action']}"
+        by_action.setdefault(key, []).append(result["ms"])
+
+    def total_memory(pick):
+        values = [pick(report["memory"]) for report in reports if report["memory"]]
+        return sum(values) if values and None not in values else None
+
+    stages = {}
+    for report in reports:
+        for stage, counts in report.get("stages", {}).items():
+            stages.setdefault(stage, []).append(counts)
+    stages = {stage: _merge_counts(counts) for stage, counts in stages.items()}
+    # Écritures des sessions et de la préparation des données (ce processus)
+    lock_waits = [report.get("lock_wait", {}) for report in reports]
+    lock_waits.append(summary().get("friends.lock_wait", {}))
+    lock_wait_p95_ms = max(wait.get("p95_ms", 0.0) for wait in lock_waits)
+
+    return {
+        "sessions": sessions,
+        "editors": editors,
+        "elapsed_s": elapsed_s,
+        "reruns_per_s": len(results) / elapsed_s if elapsed_s else 0.0,
+        "reruns": _percentiles([result["ms"] for result in results]),
+        "actions": {
+            key: _percentiles(values) for key, values in sorted(by_action.items())
+        },
+        "memory_mb": {
+            "start": total_memory(lambda memory: memory[0]),
+            "peak": total_memory(
+                lambda memory: max((m for m in memory if m is not None), default=None)
+            ),
+            "end": total_memory(lambda memory: memory[-1]),
+        },
+        "caches": {
+            "stages": {
+                stage: {
+                    "hit_rate": (counts["hits"] + counts["store_hits"])
+                    / max(1, counts["hits"] + counts["store_hits"] + counts["misses"]),
+                    **counts,
+                }
+                for stage, counts in stages.items()
+            },
+            "transit_times": _merge_counts(
+                report["transit_times"]
+                for report in reports
+                if "transit_times" in report
+            ),
+            "geocode": _merge_counts(
+                report["geocode"] for report in reports if "geocode" in report
+            ),
+        },
+        "friends_store": {
+            "writes": sum(wait.get("count", 0) for wait in lock_waits),
+            "lock_wait_p95_ms": lock_wait_p95_ms,
+            "contended": lock_wait_p95_ms > CONTENTION_THRESHOLD_MS,
+        },
+        "errors": errors,
+    }
+
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande du test de charge."""
+    parser = argparse.ArgumentParser(
+        description="Simule des sessions simultanées sur les pages de l'application."
+    )
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument(
+        "--editors", type=int, default=1, help="Sessions sur la page Les Copaines"
+    )
+    parser.add_argument("--iterations", type=int, default=2)
+    parser.add_argument(
+        "--ramp", type=float, default=0.0, help="Secondes entre sessions"
+    )
+    parser.add_argument("--group-size", type=int, default=DEFAULT_GROUP_SIZE)
+    parser.add_argument("--backend", choices=("overpass", "local"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--work-dir", help="Dossier des bases du test (par défaut : neuf)"
+    )
+    args = parser.parse_args(argv)
+
+    prepare_environment(
+        args.work_dir or tempfile.mkdtemp(prefix="oucekonboi-load-"), args.backend
+    )
+    seed_data(args.group_size, args.seed)
+    report = run_load_test(
+        args.sessions, args.editors, args.iterations, args.ramp, args.seed
+    )
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if report["friends_store"]["contended"]:
+        print(
+            f"⚠️ Contention sur le stockage des amis : p95 d'attente du verrou "
+            f"{report['friends_store']['lock_wait_p95_ms']:.0f} ms",
+            file=sys.stderr,
+        )
+    print(
+        f"{'❌' if report['errors'] else '✅'} {report['reruns']['count']} réexécutions, "
+        f"p95 {report['reruns'].get('p95_ms', 0):.0f} ms, "
+        f"{sum(report['errors'].values())} erreur(s)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -122,6 +122,9 @@ def display_map(map_obj):
     """
     Affiche la carte dans Streamlit.
 
+    Le rendu folium modifie la carte (éléments ajoutés à chaque rendu) :
+    la carte ne doit pas être partagée entre sessions.
+
     Args:
         map_obj (folium.Map): Objet carte à afficher
 
@@ -0,0 +1,237 @@
+"""
+Module pour la mémoïsation bornée des fonctions numériques appelées en boucle.
+
+`QuantizedCache` met en cache une fonction de points géographiques :
+
+- les coordonnées sont arrondies à une grille (10 m par défaut) avant de
+  former la clé, de sorte que des positions quasi identiques partagent la
+  même entrée ; la fonction est évaluée au centre de la cellule, le
+  résultat ne dépend donc pas de l'ordre des appels ;
+- éviction LRU, durée de vie optionnelle des entrées et plafond mémoire ;
+- compteurs de succès, d'échecs, d'évictions et d'expirations ;
+- utilisable depuis plusieurs threads (sessions Streamlit, service HTTP) ;
+- consultation vectorisée d'un lot de points, les entrées manquantes étant
+  calculées en un seul appel.
+
+Ce module ne dépend pas de Streamlit.
+"""
+
+import math
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from src.geo_utils import as_points
+
+# Longueur moyenne d'un degré de latitude (km), suffisante pour la grille
+KM_PER_DEGREE_LAT = 111.32
+
+# Coût mémoire d'un nœud d'OrderedDict hors clé et valeur (octets, CPython)
+_DICT_NODE_BYTES = 100
+
+
+class QuantizedCache:
+    """
+    Cache LRU borné d'une fonction de points (lat, lon) arrondis à une grille.
+
+    La fonction reçoit un tableau (n, 2) par argument point et renvoie un
+    tableau de n valeurs : elle est toujours appelée sur un lot.
+
+    Args:
+        func (callable): Fonction vectorisée (points, ...) -> valeurs
+        arity (int): Nombre d'arguments points de la fonction
+        grid_m (float): Pas de la grille en mètres
+        max_entries (int): Nombre maximum d'entrées
+        max_bytes (int): Mémoire maximum estimée (None pour aucune limite)
+        ttl_s (float): Durée de vie des entrées en secondes (None pour aucune)
+        clock (callable): Horloge en secondes (remplaçable dans les tests)
+    """
+
+    def __init__(
+        self,
+        func,
+        arity=2,
+        grid_m=10.0,
+        max_entries=100_000,
+        max_bytes=None,
+        ttl_s=None,
+        clock=time.monotonic,
+    ):
+        if grid_m <= 0:
+            raise ValueError(f"Pas de grille invalide: {grid_m!r} (attendu: > 0)")
+        self.func = func
+        self.arity = arity
+        self.grid_m = grid_m
+        self.ttl_s = ttl_s
+        self._clock = clock
+        self._lat_step = grid_m / 1000 / KM_PER_DEGREE_LAT
+
+        self.entry_bytes = _entry_size(arity)
+        self.max_entries = max_entries
+        if max_bytes is not None:
+            self.max_entries = min(max_entries, max_bytes // self.entry_bytes)
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def snap(self, points):
+        """
+        Renvoie les indices de cellule de la grille pour des points.
+
+        Le pas en longitude s'élargit avec la latitude pour garder des
+        cellules d'environ `grid_m` mètres de côté.
+
+        Args:
+            points: Un point (lat, lon) ou une séquence de points
+
+        Returns:
+            np.ndarray: Tableau (n, 2) d'entiers (ligne, colonne)
+        """
+        points = as_points(points)
+        rows = np.rint(points[:, 0] / self._lat_step)
+        cols = np.rint(points[:, 1] / self._lon_steps(rows))
+        return np.column_stack([rows, cols]).astype(np.int64)
+
+    def cell_centers(self, cells):
+        """
+        Renvoie les coordonnées des centres de cellules de la grille.
+
+        Args:
+            cells (np.ndarray): Tableau (n, 2) d'indices de cellule
+
+        Returns:
+            np.ndarray: Tableau (n, 2) de (latitude, longitude)
+        """
+        rows = cells[:, 0].astype(float)
+        return np.column_stack(
+            [rows * self._lat_step, cells[:, 1] * self._lon_steps(rows)]
+        )
+
+    def _lon_steps(self, rows):
+        """Pas en longitude (degrés) pour chaque ligne de la grille."""
+        cos_lat = np.cos(np.radians(rows * self._lat_step))
+        return self._lat_step / np.maximum(cos_lat, 1e-6)
+
+    def get(self, *points):
+        """
+        Renvoie la valeur de la fonction pour un jeu de points.
+
+        Args:
+            *points: `arity` points (lat, lon)
+
+        Returns:
+            float: Valeur (éventuellement en cache) de la fonction
+        """
+        # Chemin rapide sans NumPy pour un appel isolé déjà en cache
+        key = tuple(self._snap_point(lat, lon) for lat, lon in points)
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (self.ttl_s is None or entry[1] > now):
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry[0]
+        return float(self.get_many(*([point] for point in points))[0])
+
+    def _snap_point(self, lat, lon):
+        """Indices de cellule d'un point isolé (même arrondi que `snap`)."""
+        row = round(lat / self._lat_step)
+        cos_lat = math.cos(math.radians(row * self._lat_step))
+        return row, round(lon / (self._lat_step / max(cos_lat, 1e-6)))
+
+    def get_many(self, *point_arrays):
+        """
+        Renvoie les valeurs de la fonction pour un lot de jeux de points.
+
+        Args:
+            *point_arrays: `arity` séquences de n points (lat, lon)
+
+        Returns:
+            np.ndarray: Les n valeurs, dans l'ordre des points
+        """
+        if len(point_arrays) != self.arity:
+            raise TypeError(
+                f"{len(point_arrays)} séquences de points reçues "
+                f"(attendu: {self.arity})"
+            )
+        cells = [self.snap(points) for points in point_arrays]
+        keys = list(zip(*(map(tuple, c.tolist()) for c in cells)))
+        values = np.empty(len(keys))
+        missing = {}
+
+        now = self._clock()
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and self.ttl_s is not None and entry[1] <= now:
+                    del self._entries[key]
+                    self._stats["expirations"] += 1
+                    entry = None
+                if entry is None:
+                    missing.setdefault(key, []).append(i)
+                    continue
+                self._entries.move_to_end(key)
+                values[i] = entry[0]
+            self._stats["hits"] += len(keys) - sum(map(len, missing.values()))
+            self._stats["misses"] += sum(map(len, missing.values()))
+
+        if not missing:
+            return values
+
+        # Calcul des entrées manquantes hors verrou, en un seul appel
+        first = [indices[0] for indices in missing.values()]
+        computed = np.asarray(
+            self.func(*(self.cell_centers(c[first]) for c in cells)), dtype=float
+        )
+        expires_at = now + self.ttl_s if self.ttl_s is not None else None
+
+        with self._lock:
+            for (key, indices), value in zip(missing.items(), computed.tolist()):
+                values[indices] = value
+                self._entries[key] = (value, expires_at)
+                self._entries.move_to_end(key)
+            overflow = len(self._entries) - self.max_entries
+            for _ in range(max(0, overflow)):
+                self._entries.popitem(last=False)
+            self._stats["evictions"] += max(0, overflow)
+        return values
+
+    def clear(self):
+        """Vide le cache (les compteurs sont conservés)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Renvoie les compteurs du cache.
+
+        Returns:
+            dict: Succès, échecs, évictions, expirations, taux de succès,
+                nombre d'entrées et mémoire estimée
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        stats["approx_bytes"] = stats["size"] * self.entry_bytes
+        return stats
+
+
+def _entry_size(arity):
+    """Estime la mémoire d'une entrée : clé, valeur et nœud du dictionnaire."""
+    cell = (1_000_000_000, 1_000_000_000)
+    key = (cell,) * arity
+    entry = (0.0, 0.0)
+    return (
+        sys.getsizeof(key)
+        + arity * (sys.getsizeof(cell) + 2 * sys.getsizeof(cell[0]))
+        + sys.getsizeof(entry)
+        + 2 * sys.getsizeof(entry[0])
+        + _DICT_NODE_BYTES
+    )
@@ -0,0 +1,264 @@
+"""
+Module pour la mesure du temps passé dans chaque étape et appel externe.
+
+Les « spans » sont des mesures de durée nommées (`stage.center`,
+`http.overpass`, `geocode`, `render.map`...) :
+
+- `span(name)` mesure un bloc de code, `record_span` enregistre une durée
+  déjà mesurée ; un span peut être marqué comme servi par un cache ;
+- les durées sont agrégées par nom pour tout le processus (nombre
+  d'appels, succès de cache, total et derniers échantillons pour les
+  percentiles p50/p95) ;
+- les spans de l'exécution en cours (une exécution de page Streamlit, par
+  thread) sont aussi gardés à part pour le panneau « Performance » ;
+- export au format texte Prometheus (`prometheus_text`, servi par
+  `start_metrics_server` ou la route /metrics du service HTTP) et en JSON
+  Lines (un span par ligne dans le fichier OUCEKONBOI_METRICS_JSONL).
+
+Le coût d'un span est de l'ordre de la microseconde. Ce module ne dépend
+pas de Streamlit.
+"""
+
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+# Nombre d'échantillons gardés par span pour les percentiles
+SAMPLES_PER_SPAN = 2048
+
+# Fichier JSON Lines des spans (vide : pas d'export)
+METRICS_JSONL = os.environ.get("OUCEKONBOI_METRICS_JSONL", "")
+
+# Port du serveur /metrics de l'application (0 : pas de serveur)
+METRICS_PORT = int(os.environ.get("OUCEKONBOI_METRICS_PORT", "0"))
+
+# Adresse d'écoute du serveur /metrics (locale par défaut, comme `src.api`)
+METRICS_HOST = os.environ.get("OUCEKONBOI_METRICS_HOST", "127.0.0.1")
+
+PERCENTILES = (50, 95)
+
+_lock = threading.Lock()
+_spans = {}
+_jsonl_file = None
+_current_trace = contextvars.ContextVar("oucekonboi_trace", default=None)
+
+
+class Span:
+    """
+    Mesure en cours : le bloc `with span(...)` peut préciser `cached`.
+
+    Args:
+        name (str): Nom du span
+        cached (bool): True si le résultat vient d'un cache
+    """
+
+    def __init__(self, name, cached=False):
+        self.name = name
+        self.cached = cached
+        self.elapsed_ms = 0.0
+
+
+@contextlib.contextmanager
+def span(name, cached=False):
+    """
+    Mesure la durée d'un bloc de code.
+
+    Args:
+        name (str): Nom du span
+        cached (bool): True si le résultat vient d'un cache (modifiable
+            dans le bloc via l'objet renvoyé)
+
+    Yields:
+        Span: Mesure en cours
+    """
+    current = Span(name, cached)
+    started = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.elapsed_ms = (time.perf_counter() - started) * 1000
+        record_span(name, current.elapsed_ms, current.cached)
+
+
+def record_span(name, elapsed_ms, cached=False):
+    """
+    Enregistre une durée déjà mesurée.
+
+    Args:
+        name (str): Nom du span
+        elapsed_ms (float): Durée en millisecondes
+        cached (bool): True si le résultat vient d'un cache
+    """
+    with _lock:
+        stats = _spans.get(name)
+        if stats is None:
+            stats = _spans[name] = {
+                "count": 0,
+                "cache_hits": 0,
+                "total_ms": 0.0,
+                "samples": deque(maxlen=SAMPLES_PER_SPAN),
+            }
+        stats["count"] += 1
+        stats["cache_hits"] += bool(cached)
+        stats["total_ms"] += elapsed_ms
+        stats["samples"].append(elapsed_ms)
+
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.append({"span": name, "ms": elapsed_ms, "cached": bool(cached)})
+    if METRICS_JSONL:
+        _write_jsonl(
+            {
+                "ts": time.time(),
+                "span": name,
+                "ms": round(elapsed_ms, 3),
+                "cached": bool(cached),
+            }
+        )
+
+
+def _write_jsonl(record):
+    """Ajoute un span au fichier JSON Lines."""
+    global _jsonl_file
+    line = json.dumps(record) + "\n"
+    with _lock:
+        if _jsonl_file is None:
+            directory = os.path.dirname(METRICS_JSONL)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            _jsonl_file = open(METRICS_JSONL, "a", buffering=1, encoding="utf-8")
+        _jsonl_file.write(line)
+
+
+def start_trace():
+    """
+    Commence à garder à part les spans de l'exécution en cours (thread).
+
+    Returns:
+        list: Spans de l'exécution, complétée au fil des mesures
+    """
+    trace = []
+    _current_trace.set(trace)
+    return trace
+
+
+def summary():
+    """
+    Renvoie les statistiques de chaque span depuis le démarrage du processus.
+
+    Returns:
+        dict: {nom: {"count", "cache_hits", "total_ms", "p50_ms", "p95_ms"}}
+    """
+    with _lock:
+        snapshot = {
+            name: (stats["count"], stats["cache_hits"], stats["total_ms"])
+            + (np.array(stats["samples"]),)
+            for name, stats in _spans.items()
+        }
+    result = {}
+    for name, (count, cache_hits, total_ms, samples) in sorted(snapshot.items()):
+        quantiles = np.percentile(samples, PERCENTILES)
+        result[name] = {
+            "count": count,
+            "cache_hits": cache_hits,
+            "total_ms": total_ms,
+            **{f"p{p}_ms": float(q) for p, q in zip(PERCENTILES, quantiles)},
+        }
+    return result
+
+
+def reset():
+    """Oublie toutes les mesures (tests, nouvelle campagne de mesures)."""
+    with _lock:
+        _spans.clear()
+
+
+def prometheus_text():
+    """
+    Exporte les statistiques au format texte de Prometheus.
+
+    Chaque span est un « summary » en secondes (quantiles 0.5 et 0.95 sur
+    les derniers échantillons, somme et nombre d'appels) complété d'un
+    compteur de succès de cache.
+
+    Returns:
+        str: Texte au format d'exposition Prometheus
+    """
+    lines = [
+        "# HELP oucekonboi_span_seconds Durée des étapes et appels externes.",
+        "# TYPE oucekonboi_span_seconds summary",
+    ]
+    stats = summary()
+    for name, values in stats.items():
+        label = f'span="{name}"'
+        for p in PERCENTILES:
+            lines.append(
+                f'oucekonboi_span_seconds{{{label},quantile="{p / 100}"}} '
+                f"{values[f'p{p}_ms'] / 1000:.6f}"
+            )
+        lines.append(
+            f"oucekonboi_span_seconds_sum{{{label}}} {values['total_ms'] / 1000:.6f}"
+        )
+        lines.append(f"oucekonboi_span_seconds_count{{{label}}} {values['count']}")
+    lines += [
+        "# HELP oucekonboi_span_cache_hits_total Appels servis par un cache.",
+        "# TYPE oucekonboi_span_cache_hits_total counter",
+    ]
+    for name, values in stats.items():
+        lines.append(
+            f'oucekonboi_span_cache_hits_total{{span="{name}"}} {values["cache_hits"]}'
+        )
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Sert /metrics au format Prometheus."""
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST):
+    """
+    Lance (une seule fois par processus) le serveur /metrics.
+
+    Args:
+        port (int): Port d'écoute (0 ou moins : rien n'est lancé)
+        host (str): Adresse d'écoute ("0.0.0.0" pour toutes les interfaces)
+
+    Returns:
+        ThreadingHTTPServer: Serveur lancé, ou None s'il est inactif
+    """
+    global _server
+    if port <= 0:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(
+                target=_server.serve_forever, name="oucekonboi-metrics", daemon=True
+            ).start()
+        return _server
@@ -0,0 +1,213 @@
+"""
+Module pour l'optimisation itérative du point de rendez-vous.
+
+Les itérations se font dans un repère plan local (en km) centré sur le
+point de départ ; chaque évaluation du coût est un seul appel vectorisé
+à une fonction de matrice de coûts (distances, temps de trajet...).
+
+Objectifs disponibles :
+
+- ``"sum"`` : minimise la somme des coûts (moindres carrés repondérés,
+  poids = pente locale du coût / distance, estimée par différences finies).
+- ``"max"`` : minimise le coût maximum (algorithme de Lawson : les poids
+  se concentrent sur les amis les plus défavorisés).
+- ``"median"`` : médiane géométrique des positions (algorithme de Weiszfeld) ;
+  l'objectif est alors la somme des distances aux amis en km, et non le
+  coût renvoyé par la matrice de coûts.
+"""
+
+import time
+
+import numpy as np
+
+from src.geo_utils import as_points, distance_matrix, km_per_degree
+
+
+OBJECTIVES = ("sum", "max", "median")
+
+# Pas des différences finies pour estimer la pente du coût (km)
+_GRADIENT_STEP_KM = 0.01
+# Distance minimale pour éviter la division par zéro dans Weiszfeld (km)
+_MIN_DISTANCE_KM = 1e-6
+
+
+def equirectangular_cost(origins, destinations):
+    """
+    Matrice de coûts par défaut : distances en km (approximation locale).
+
+    Args:
+        origins: Séquence de N points (lat, lon)
+        destinations: Séquence de M points (lat, lon)
+
+    Returns:
+        np.ndarray: Matrice (N, M) des distances en kilomètres
+    """
+    return distance_matrix(origins, destinations, method="equirectangular")
+
+
+def optimize_meeting_point(
+    points,
+    cost_matrix=equirectangular_cost,
+    objective="sum",
+    start=None,
+    tolerance_km=0.001,
+    max_iter=500,
+    time_budget_s=0.1,
+):
+    """
+    Cherche le point de rendez-vous qui minimise l'objectif choisi.
+
+    L'algorithme s'arrête dès que le déplacement d'une itération passe sous
+    `tolerance_km`, que `max_iter` itérations sont faites ou que le budget
+    de temps est épuisé. Le meilleur point rencontré est toujours renvoyé,
+    il n'est donc jamais moins bon que le point de départ.
+
+    Args:
+        points: Séquence de N points (lat, lon) des amis
+        cost_matrix (callable): Fonction (origines, destinations) renvoyant
+            la matrice (N, M) des coûts
+        objective (str): "sum", "max" ou "median"
+        start (tuple): Point de départ (lat, lon), barycentre par défaut
+        tolerance_km (float): Déplacement minimal avant convergence (km)
+        max_iter (int): Nombre maximum d'itérations
+        time_budget_s (float): Budget de temps en secondes (None = illimité)
+
+    Returns:
+        dict: Résultat avec les clés "point", "cost", "costs", "start_cost",
+            "iterations", "converged", "stop_reason", "elapsed_ms" et "trace"
+            (une entrée par itération : point, objectif du point ("cost") et
+            meilleur objectif rencontré jusque-là ("best_cost"))
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(
+            f"Objectif inconnu: {objective!r} (attendu: {', '.join(OBJECTIVES)})"
+        )
+
+    started_at = time.perf_counter()
+    friend_points = as_points(points)
+    if len(friend_points) == 0:
+        raise ValueError("Au moins un point est nécessaire pour l'optimisation")
+
+    if start is None:
+        start = friend_points.mean(axis=0)
+    lat0, lon0 = float(start[0]), float(start[1])
+    km_per_deg_lat, km_per_deg_lon = km_per_degree(lat0)
+
+    # Positions des amis dans le repère plan local (km)
+    friend_xy = np.column_stack(
+        (
+            (friend_points[:, 1] - lon0) * km_per_deg_lon,
+            (friend_points[:, 0] - lat0) * km_per_deg_lat,
+        )
+    )
+
+    def to_latlon(xy):
+        return xy[..., 1] / km_per_deg_lat + lat0, xy[..., 0] / km_per_deg_lon + lon0
+
+    def evaluate(candidates_xy):
+        lats, lons = to_latlon(candidates_xy)
+        return cost_matrix(friend_points, np.column_stack((lats, lons)))
+
+    def score(xy, costs):
+        if objective == "median":
+            offsets = friend_xy - xy
+            return float(np.hypot(offsets[:, 0], offsets[:, 1]).sum())
+        if objective == "max":
+            return float(costs.max())
+        return float(costs.mean())
+
+    current = np.zeros(2)
+    start_costs = evaluate(current[np.newaxis, :])[:, 0]
+    current_costs = start_costs
+    best_xy, best_costs = current, start_costs
+    best_score = score(current, start_costs)
+    start_score = best_score
+    trace = [
+        {
+            "iteration": 0,
+            "lat": lat0,
+            "lon": lon0,
+            "cost": best_score,
+            "best_cost": best_score,
+        }
+    ]
+
+    lawson_weights = np.full(len(friend_points), 1.0 / len(friend_points))
+    converged = False
+    stop_reason = "max_iter"
+    iterations = 0
+
+    for iteration in range(1, max_iter + 1):
+        if (
+            time_budget_s is not None
+            and time.perf_counter() - started_at >= time_budget_s
+        ):
+            stop_reason = "time_budget"
+            break
+
+        offsets = friend_xy - current
+        distances = np.maximum(np.hypot(offsets[:, 0], offsets[:, 1]), _MIN_DISTANCE_KM)
+
+        if objective == "median":
+            weights = 1.0 / distances
+            proposal = weights @ friend_xy / weights.sum()
+            costs = evaluate(proposal[np.newaxis, :])[:, 0]
+        elif objective == "max":
+            # Algorithme de Lawson : le poids de chaque ami est multiplié par
+            # son coût, jusqu'à ne garder que les plus défavorisés
+            lawson_weights = lawson_weights * current_costs
+            lawson_weights /= lawson_weights.sum()
+            proposal = lawson_weights @ friend_xy
+            costs = evaluate(proposal[np.newaxis, :])[:, 0]
+        else:
+            # Coût de chaque ami après un petit pas en x puis en y
+            probes = current + np.array(
+                [[_GRADIENT_STEP_KM, 0.0], [0.0, _GRADIENT_STEP_KM]]
+            )
+            gradients = (
+                evaluate(probes) - current_costs[:, np.newaxis]
+            ) / _GRADIENT_STEP_KM
+            slopes = np.hypot(gradients[:, 0], gradients[:, 1])
+            weights = slopes / distances
+            if weights.sum() <= 0:
+                converged, stop_reason = True, "tolerance"
+                break
+            proposal = weights @ friend_xy / weights.sum()
+            costs = evaluate(proposal[np.newaxis, :])[:, 0]
+
+        step_km = float(np.hypot(*(proposal - current)))
+        current, current_costs = proposal, costs
+        iterations = iteration
+        proposal_score = score(proposal, costs)
+
+        if proposal_score < best_score:
+            best_xy, best_costs, best_score = proposal, costs, proposal_score
+
+        lat, lon = to_latlon(current)
+        trace.append(
+            {
+                "iteration": iteration,
+                "lat": float(lat),
+                "lon": float(lon),
+                "cost": proposal_score,
+                "best_cost": best_score,
+                "step_km": step_km,
+            }
+        )
+
+        if step_km < tolerance_km:
+            converged, stop_reason = True, "tolerance"
+            break
+
+    best_lat, best_lon = to_latlon(best_xy)
+    return {
+        "point": (float(best_lat), float(best_lon)),
+        "cost": best_score,
+        "costs": best_costs,
+        "start_cost": start_score,
+        "iterations": iterations,
+        "converged": converged,
+        "stop_reason": stop_reason,
+        "elapsed_ms": (time.perf_counter() - started_at) * 1000,
+        "trace": trace,
+    }
@@ -0,0 +1,271 @@
+"""
+Module pour le cache disque des réponses Overpass, découpé en tuiles.
+
+L'espace est découpé en tuiles fixes de TILE_DEG degrés. Une recherche
+couvre sa boîte englobante avec ces tuiles ; seules les tuiles absentes
+ou expirées sont demandées à Overpass, en une seule requête groupée.
+Les éléments sont stockés par tuile avec leur date de récupération, si
+bien que des recherches qui se recouvrent (autres groupes, autres rayons)
+réutilisent les mêmes données. Les bars cartographiés comme des contours
+(ways) sont demandés avec leur centre et rangés à cette position, comme
+dans l'index local de `src.bar_index`.
+"""
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+from src.bar_index import element_position
+from src.http_client import get_client
+from src.paths import data_path
+
+
+DEFAULT_CACHE_FILE = os.environ.get(
+    "OUCEKONBOI_OVERPASS_CACHE", data_path("overpass_cache.sqlite")
+)
+
+TILE_DEG = 0.01  # ≈ 1.1 km en latitude, 0.7 km en longitude à Paris
+DEFAULT_TTL_S = 7 * 24 * 3600  # Les bars changent peu : une semaine
+
+# Version du contenu des tuiles : les tuiles d'une version antérieure
+# (nodes seulement) sont oubliées à l'ouverture
+TILES_FORMAT = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tiles (
+    ty INTEGER NOT NULL,
+    tx INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    elements TEXT NOT NULL,
+    PRIMARY KEY (ty, tx)
+);
+"""
+
+
+def tiles_for_bbox(south, west, north, east):
+    """
+    Liste les tuiles qui couvrent une boîte englobante.
+
+    Args:
+        south (float): Latitude minimale
+        west (float): Longitude minimale
+        north (float): Latitude maximale
+        east (float): Longitude maximale
+
+    Returns:
+        list: Clés (ty, tx) des tuiles
+    """
+    y0, y1 = math.floor(south / TILE_DEG), math.floor(north / TILE_DEG)
+    x0, x1 = math.floor(west / TILE_DEG), math.floor(east / TILE_DEG)
+    return [(ty, tx) for ty in range(y0, y1 + 1) for tx in range(x0, x1 + 1)]
+
+
+def tile_bbox(tile):
+    """
+    Renvoie la boîte englobante d'une tuile.
+
+    Args:
+        tile (tuple): Clé (ty, tx) de la tuile
+
+    Returns:
+        tuple: (sud, ouest, nord, est) en degrés
+    """
+    ty, tx = tile
+    return (ty * TILE_DEG, tx * TILE_DEG, (ty + 1) * TILE_DEG, (tx + 1) * TILE_DEG)
+
+
+def tile_of(lat, lon):
+    """Renvoie la clé (ty, tx) de la tuile contenant un point."""
+    return math.floor(lat / TILE_DEG), math.floor(lon / TILE_DEG)
+
+
+def build_tiles_query(tiles):
+    """
+    Construit une requête Overpass unique couvrant plusieurs tuiles.
+
+    Args:
+        tiles (list): Clés (ty, tx) des tuiles à récupérer
+
+    Returns:
+        str: Requête Overpass QL
+    """
+    statements = "\n".join(
+        '  nw["amenity"~"^(bar|pub)$"]({:.6f},{:.6f},{:.6f},{:.6f});'.format(
+            *tile_bbox(tile)
+        )
+        for tile in tiles
+    )
+    return f"[out:json][timeout:25];\n(\n{statements}\n);\nout center;"
+
+
+def fetch_overpass_query(query):
+    """
+    Envoie une requête à l'API Overpass (via le client HTTP partagé).
+
+    Args:
+        query (str): Requête Overpass QL
+
+    Returns:
+        list: Éléments renvoyés par Overpass
+    """
+    return get_client("overpass").get_json(params={"data": query}).get("elements", [])
+
+
+class OverpassTileCache:
+    """
+    Cache persistant des éléments Overpass par tuile, avec durée de vie.
+
+    Args:
+        cache_file (str): Fichier SQLite du cache
+        ttl_s (float): Durée de vie d'une tuile en secondes
+        fetcher (callable): Fonction (requête) -> éléments, pour remplacer
+            l'appel réseau (tests, serveur local)
+    """
+
+    def __init__(
+        self, cache_file=DEFAULT_CACHE_FILE, ttl_s=DEFAULT_TTL_S, fetcher=None
+    ):
+        self.cache_file = cache_file
+        self.ttl_s = ttl_s
+        self.fetcher = fetcher or fetch_overpass_query
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "upstream_queries": 0}
+
+        directory = os.path.dirname(cache_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(cache_file, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != TILES_FORMAT:
+            self._db.execute("DELETE FROM tiles")
+            self._db.execute(f"PRAGMA user_version = {TILES_FORMAT}")
+            self._db.commit()
+
+    def get_elements(self, south, west, north, east):
+        """
+        Renvoie les éléments contenus dans une boîte englobante.
+
+        Les tuiles manquantes sont récupérées en une seule requête Overpass.
+
+        Args:
+            south (float): Latitude minimale
+            west (float): Longitude minimale
+            north (float): Latitude maximale
+            east (float): Longitude maximale
+
+        Returns:
+            list: Éléments Overpass dans la boîte, triés par type et identifiant
+        """
+        tiles = tiles_for_bbox(south, west, north, east)
+        cached = self._load_tiles(tiles)
+        missing = [tile for tile in tiles if tile not in cached]
+
+        if missing:
+            cached.update(self._fetch_tiles(missing))
+
+        elements = {}
+        for tile in tiles:
+            for element in cached[tile]:
+                if south <= element["lat"] <= north and west <= element["lon"] <= east:
+                    elements[element.get("type", "node"), element["id"]] = element
+        return [elements[key] for key in sorted(elements)]
+
+    def _load_tiles(self, tiles):
+        """Charge les tuiles encore valides depuis le disque."""
+        now = time.time()
+        found = {}
+        with self._lock:
+            for ty, tx in tiles:
+                row = self._db.execute(
+                    "SELECT fetched_at, elements FROM tiles WHERE ty = ? AND tx = ?",
+                    (ty, tx),
+                ).fetchone()
+                if row is None:
+                    self._stats["misses"] += 1
+                elif now - row[0] > self.ttl_s:
+                    self._stats["misses"] += 1
+                    self._stats["expired"] += 1
+                else:
+                    self._stats["hits"] += 1
+                    found[(ty, tx)] = json.loads(row[1])
+        return found
+
+    def _fetch_tiles(self, tiles):
+        """Récupère des tuiles auprès d'Overpass et les enregistre."""
+        elements = self.fetcher(build_tiles_query(tiles))
+        with self._lock:
+            self._stats["upstream_queries"] += 1
+
+        by_tile = {tile: [] for tile in tiles}
+        for element in elements:
+            position = element_position(element)
+            if position is None:
+                continue
+            # Ways rangés à leur centre, avec les mêmes clés que les nodes
+            element = {key: value for key, value in element.items() if key != "center"}
+            element["lat"], element["lon"] = position
+            tile = tile_of(*position)
+            if tile in by_tile:
+                by_tile[tile].append(element)
+
+        now = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO tiles VALUES (?, ?, ?, ?)",
+                [
+                    (ty, tx, now, json.dumps(tile_elements, ensure_ascii=False))
+                    for (ty, tx), tile_elements in by_tile.items()
+                ],
+            )
+            self._db.commit()
+        return by_tile
+
+    def stats(self):
+        """
+        Renvoie les statistiques d'utilisation du cache.
+
+        Returns:
+            dict: Compteurs de tuiles trouvées (hits), manquantes (misses),
+                expirées, requêtes envoyées à Overpass et taux de succès
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def purge_expired(self):
+        """
+        Supprime les tuiles expirées du disque.
+
+        Returns:
+            int: Nombre de tuiles supprimées
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "DELETE FROM tiles WHERE fetched_at < ?", (time.time() - self.ttl_s,)
+            )
+            self._db.commit()
+            return cursor.rowcount
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_overpass_cache():
+    """
+    Renvoie le cache de tuiles Overpass partagé par le processus.
+
+    Returns:
+        OverpassTileCache: Cache ouvert sur DEFAULT_CACHE_FILE
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = OverpassTileCache()
+        return _cache
@@ -0,0 +1,28 @@
+"""
+Module pour les chemins des fichiers de données.
+
+Les fichiers de données (bases SQLite, index, horaires, réseau de rues...)
+sont rangés par défaut dans le dossier `data/` à la racine du dépôt, quel
+que soit le dossier courant : l'application et les outils en ligne de
+commande lisent et écrivent les mêmes fichiers d'où qu'ils soient lancés.
+Chaque fichier reste modifiable par sa propre variable d'environnement.
+"""
+
+import os
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT_DIR, "data")
+
+
+def data_path(name):
+    """
+    Renvoie le chemin d'un fichier du dossier de données.
+
+    Args:
+        name (str): Nom du fichier dans `data/`
+
+    Returns:
+        str: Chemin absolu du fichier
+    """
+    return os.path.join(DATA_DIR, name)
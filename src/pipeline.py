@@ -0,0 +1,445 @@
+"""
+Module pour le calcul d'une recommandation en étapes mises en cache.
+
+Le calcul suit les étapes de `STAGES` : amis → centre → bars candidats →
+coûts → classement. Le résultat de chaque étape est mis en cache
+sous l'empreinte (SHA-256) du contenu de ses entrées. Les étapes en aval
+reçoivent l'empreinte du *résultat* des étapes en amont : une modification
+ne recalcule que les étapes dont les entrées ont réellement changé (changer
+le rayon ne recalcule pas le centre, recalculer un centre identique ne
+recalcule pas le classement).
+
+Le cache est partagé par toutes les sessions du processus ; `invalidate`
+supprime une entrée précise ou toute une étape, sans toucher aux autres.
+Les résultats en cache sont partagés : ils ne doivent pas être modifiés.
+
+Les étapes de `PERSISTENT_STAGES` sont aussi enregistrées dans le stockage
+partagé entre processus (voir `src.result_store`) : une autre réplique, ou
+la même après un redémarrage, relit le centre, les bars et le classement
+au lieu de les recalculer. La version des données de bars fait partie des
+entrées de l'étape "candidates", donc de la clé de toutes les étapes en
+aval : la clé du classement dépend des amis, du mode, de l'objectif, du
+rayon et de la version des données. En mode "transit", la version des
+horaires (voir `transit_data_version`) fait de même partie des entrées
+du centre et des coûts ; en modes "walk" et "bike", celle du réseau de
+rues (voir `street_graph_version`) fait partie des entrées des coûts.
+
+Ce module ne dépend pas de Streamlit.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from src.bar_finder import (
+    bar_data_version,
+    clear_bar_candidates,
+    get_bars_around_center,
+)
+from src.data_manager import load_friends
+from src.engine import compute_center, cost_matrix, sort_bars_by_cost
+from src.geo_utils import located_friends
+from src.metrics import record_span
+from src.result_store import get_result_store
+from src.street_graph import PROFILES, street_graph_version
+from src.transit_utils import transit_data_version
+
+
+# Étapes du calcul, de l'amont vers l'aval
+STAGES = ("friends", "center", "candidates", "costs", "ranking")
+
+# Étapes enregistrées dans le stockage partagé entre processus (la liste
+# des amis se relit dans sa base)
+PERSISTENT_STAGES = ("center", "candidates", "costs", "ranking")
+
+# Libellés des étapes pour l'interface
+STAGE_LABELS = {
+    "friends": "Liste des amis",
+    "center": "Barycentre",
+    "candidates": "Bars candidats",
+    "costs": "Coûts par ami et par bar",
+    "ranking": "Classement",
+}
+
+# Nombre maximum d'entrées gardées par étape
+DEFAULT_MAX_ENTRIES = 256
+
+
+class StageResult:
+    """
+    Résultat d'une étape : valeur, clé de cache et empreinte du contenu.
+
+    Passé en entrée d'une autre étape, il est représenté par son empreinte.
+
+    Args:
+        stage (str): Nom de l'étape
+        key (str): Clé de cache (empreinte des entrées)
+        value: Valeur calculée
+        digest (str): Empreinte de la valeur (None si non calculée)
+        cached (bool): True si la valeur vient du cache
+        elapsed_ms (float): Durée de l'étape, recherche en cache comprise
+    """
+
+    def __init__(self, stage, key, value, digest, cached, elapsed_ms=0.0):
+        self.stage = stage
+        self.key = key
+        self.value = value
+        self.digest = digest
+        self.cached = cached
+        self.elapsed_ms = elapsed_ms
+
+
+def content_hash(*parts):
+    """
+    Calcule l'empreinte du contenu d'une suite de valeurs.
+
+    Les valeurs sont sérialisées en JSON (clés triées) ; les tableaux NumPy
+    et les résultats d'étape (`StageResult`) sont acceptés.
+
+    Args:
+        *parts: Valeurs sérialisables
+
+    Returns:
+        str: Empreinte SHA-256 hexadécimale
+    """
+    encoded = json.dumps(
+        parts, sort_keys=True, separators=(",", ":"), default=_encode_part
+    )
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def _encode_part(value):
+    """Sérialisation JSON des valeurs non standard pour `content_hash`."""
+    if isinstance(value, StageResult):
+        return {"stage": value.stage, "digest": value.digest or value.key}
+    if isinstance(value, np.ndarray):
+        return {
+            "shape": value.shape,
+            "dtype": str(value.dtype),
+            "data": hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest(),
+        }
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Valeur non prise en charge: {type(value).__name__}")
+
+
+def _timed_result(stage, key, value, digest, cached, started):
+    """Construit le résultat d'une étape et enregistre sa durée (`src.metrics`)."""
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    record_span(f"stage.{stage}", elapsed_ms, cached)
+    return StageResult(stage, key, value, digest, cached=cached, elapsed_ms=elapsed_ms)
+
+
+class StageCache:
+    """
+    Cache LRU des résultats d'étapes, une file par étape, sûr entre threads.
+
+    Args:
+        max_entries (int): Nombre maximum d'entrées gardées par étape
+        store (ResultStore): Stockage partagé entre processus pour les
+            étapes de `PERSISTENT_STAGES` (None pour aucun)
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, store=None):
+        self.max_entries = max_entries
+        self.store = store
+        self._entries = {stage: OrderedDict() for stage in STAGES}
+        self._stats = {
+            stage: {"hits": 0, "store_hits": 0, "misses": 0} for stage in STAGES
+        }
+        # Clés invalidées : leur prochain calcul ne relit pas le stockage
+        self._refresh = set()
+        self._lock = threading.Lock()
+
+    def run(self, stage, inputs, compute):
+        """
+        Renvoie le résultat d'une étape, calculé seulement s'il est absent.
+
+        Le résultat est cherché en mémoire, puis dans le stockage partagé
+        pour les étapes de `PERSISTENT_STAGES`. Un résultat relu depuis le
+        stockage a traversé JSON : les tuples y sont des listes et les
+        tableaux NumPy des listes.
+
+        Args:
+            stage (str): Nom de l'étape (voir `STAGES`)
+            inputs (tuple): Entrées de l'étape (valeurs ou `StageResult`)
+            compute (callable): Fonction sans argument calculant la valeur
+
+        Returns:
+            StageResult: Résultat de l'étape
+        """
+        if stage not in self._entries:
+            raise ValueError(
+                f"Étape inconnue: {stage!r} (attendu: {', '.join(STAGES)})"
+            )
+        started = time.perf_counter()
+        key = content_hash(stage, inputs)
+        with self._lock:
+            entry = self._entries[stage].get(key)
+            if entry is not None:
+                self._entries[stage].move_to_end(key)
+                self._stats[stage]["hits"] += 1
+                return _timed_result(stage, key, entry[0], entry[1], True, started)
+            refresh = key in self._refresh
+            self._refresh.discard(key)
+
+        persistent = self.store is not None and stage in PERSISTENT_STAGES
+        record = self.store.get(key) if persistent and not refresh else None
+        if record is not None:
+            value, digest = record["value"], record["digest"]
+        else:
+            # Calcul hors verrou : les autres étapes et sessions ne sont pas bloquées
+            value = compute()
+            digest = content_hash(value)
+            if persistent:
+                self.store.put(key, {"value": value, "digest": digest})
+
+        with self._lock:
+            self._stats[stage]["store_hits" if record is not None else "misses"] += 1
+            entries = self._entries[stage]
+            entries[key] = (value, digest)
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+        return _timed_result(stage, key, value, digest, record is not None, started)
+
+    def invalidate(self, stage, key=None):
+        """
+        Supprime une entrée d'une étape, ou toutes ses entrées, de la mémoire.
+
+        Les étapes en aval n'ont pas besoin d'être invalidées : elles sont
+        recalculées si le nouveau résultat diffère de l'ancien. Le stockage
+        partagé n'est pas consulté pour le prochain calcul d'une entrée
+        invalidée, dont le résultat le remplace.
+
+        Args:
+            stage (str): Nom de l'étape
+            key (str): Clé de l'entrée (None pour toute l'étape)
+
+        Returns:
+            int: Nombre d'entrées supprimées
+        """
+        with self._lock:
+            entries = self._entries[stage]
+            keys = list(entries) if key is None else [key]
+            self._refresh.update(keys)
+            return sum(entries.pop(k, None) is not None for k in keys)
+
+    def stats(self):
+        """
+        Renvoie les compteurs de chaque étape.
+
+        Returns:
+            dict: {étape: {"hits", "store_hits", "misses", "size"}}
+        """
+        with self._lock:
+            return {
+                stage: dict(self._stats[stage], size=len(self._entries[stage]))
+                for stage in STAGES
+            }
+
+
+_stage_cache = None
+_stage_cache_lock = threading.Lock()
+
+
+def get_stage_cache():
+    """
+    Renvoie le cache d'étapes partagé par le processus.
+
+    Returns:
+        StageCache: Cache d'étapes, adossé au stockage partagé
+    """
+    global _stage_cache
+    with _stage_cache_lock:
+        if _stage_cache is None:
+            _stage_cache = StageCache(store=get_result_store())
+        return _stage_cache
+
+
+def friends_stage(group_id, version):
+    """
+    Étape "friends" : amis d'un groupe à une version donnée.
+
+    Args:
+        group_id (str): Identifiant du groupe
+        version (int): Version du groupe
+
+    Returns:
+        StageResult: Liste des amis
+    """
+    return get_stage_cache().run(
+        "friends", (group_id, version), lambda: load_friends(group_id)
+    )
+
+
+def _transit_version(mode):
+    """Version des données de temps de trajet, en mode "transit" seulement."""
+    return transit_data_version() if mode == "transit" else None
+
+
+def _costs_version(mode):
+    """Version des données des coûts : horaires ou réseau de rues selon le mode."""
+    return street_graph_version() if mode in PROFILES else _transit_version(mode)
+
+
+def center_stage(friends, mode, objective):
+    """
+    Étape "center" : barycentre du groupe.
+
+    Args:
+        friends (StageResult): Résultat de l'étape "friends"
+        mode (str): Mode de calcul (voir `MODES`)
+        objective (str): Objectif d'optimisation en mode "transit"
+
+    Returns:
+        StageResult: ((latitude, longitude, temps par ami, infos de calcul),
+            étapes du calcul)
+    """
+    # Les modes sur le réseau de rues partagent le barycentre géographique
+    if mode in PROFILES:
+        mode = "distance"
+
+    def compute():
+        events = []
+        result = compute_center(friends.value, mode, objective, events.append)
+        return result, events
+
+    return get_stage_cache().run(
+        "center", (friends, mode, objective, _transit_version(mode)), compute
+    )
+
+
+def candidates_stage(center_lat, center_lon, radius_km, backend=None):
+    """
+    Étape "candidates" : bars dans le rayon de recherche.
+
+    La version des données de bars fait partie des entrées : reconstruire
+    l'index local invalide les résultats qui en dépendent.
+
+    Args:
+        center_lat (float): Latitude du centre
+        center_lon (float): Longitude du centre
+        radius_km (float): Rayon de recherche en km
+        backend (str): Source des bars (voir `BAR_BACKENDS`)
+
+    Returns:
+        StageResult: (liste des bars, étapes du calcul)
+    """
+
+    def compute():
+        events = []
+        bars = get_bars_around_center(
+            center_lat, center_lon, radius_km, backend, events.append
+        )
+        return bars, events
+
+    return get_stage_cache().run(
+        "candidates",
+        (center_lat, center_lon, radius_km, bar_data_version(backend)),
+        compute,
+    )
+
+
+def costs_stage(candidates, friends, mode):
+    """
+    Étape "costs" : coût de chaque bar candidat pour chaque ami localisé.
+
+    Args:
+        candidates (StageResult): Résultat de l'étape "candidates"
+        friends (StageResult): Résultat de l'étape "friends"
+        mode (str): Mode de calcul (voir `MODES`)
+
+    Returns:
+        StageResult: Matrice (amis localisés × bars) des coûts (km ou minutes)
+    """
+    return get_stage_cache().run(
+        "costs",
+        (candidates, friends, mode, _costs_version(mode)),
+        lambda: cost_matrix(candidates.value[0], friends.value, mode),
+    )
+
+
+def ranking_stage(candidates, costs, friends, mode):
+    """
+    Étape "ranking" : bars triés du meilleur au moins bon.
+
+    Chaque bar reçoit son coût moyen (voir `sort_bars_by_cost`) et le
+    détail par ami dans la clé "friend_costs" ({nom: coût}).
+
+    Args:
+        candidates (StageResult): Résultat de l'étape "candidates"
+        costs (StageResult): Résultat de l'étape "costs"
+        friends (StageResult): Résultat de l'étape "friends"
+        mode (str): Mode de calcul (voir `MODES`)
+
+    Returns:
+        StageResult: Liste des bars triés avec leurs coûts
+    """
+
+    def compute():
+        bars = candidates.value[0]
+        names = [friend["name"] for friend in located_friends(friends.value)]
+        matrix = np.asarray(costs.value, dtype=float).reshape(len(names), len(bars))
+        averages = matrix.mean(axis=0) if names else np.full(len(bars), np.inf)
+        ranked = [
+            dict(bar, friend_costs=dict(zip(names, matrix[:, i].tolist())))
+            for i, bar in enumerate(bars)
+        ]
+        return sort_bars_by_cost(ranked, averages, mode)
+
+    return get_stage_cache().run("ranking", (candidates, costs, friends, mode), compute)
+
+
+def recommend(group_id, version, mode, objective, radius_km, backend=None):
+    """
+    Enchaîne les étapes du calcul d'une recommandation, jusqu'au classement.
+
+    Args:
+        group_id (str): Identifiant du groupe
+        version (int): Version du groupe
+        mode (str): Mode de calcul (voir `MODES`)
+        objective (str): Objectif d'optimisation en mode "transit"
+        radius_km (float): Rayon de recherche en km
+        backend (str): Source des bars (voir `BAR_BACKENDS`)
+
+    Returns:
+        dict: Résultat de chaque étape, par nom d'étape
+    """
+    friends = friends_stage(group_id, version)
+    center = center_stage(friends, mode, objective)
+    center_lat, center_lon = center.value[0][:2]
+    candidates = candidates_stage(center_lat, center_lon, radius_km, backend)
+    costs = costs_stage(candidates, friends, mode)
+    ranking = ranking_stage(candidates, costs, friends, mode)
+    return {
+        result.stage: result for result in (friends, center, candidates, costs, ranking)
+    }
+
+
+def invalidate_stages(stage_keys, stages):
+    """
+    Invalide les entrées de certaines étapes utilisées par un calcul.
+
+    Invalider les bars candidats vide aussi les bars gardés en mémoire par
+    `src.bar_finder`, pour relire l'index local ou le cache des tuiles.
+
+    Args:
+        stage_keys (dict): {étape: clé de cache} du calcul concerné
+        stages (list): Étapes à recalculer
+
+    Returns:
+        int: Nombre d'entrées supprimées
+    """
+    cache = get_stage_cache()
+    removed = 0
+    for stage in stages:
+        if stage == "candidates":
+            clear_bar_candidates()
+        if stage in stage_keys:
+            removed += cache.invalidate(stage, stage_keys[stage])
+    return removed
@@ -0,0 +1,207 @@
+"""
+Module pour le profilage à la demande d'une exécution de la page.
+
+Un profil est lancé explicitement (paramètre `?profile=1` de la page
+Oucekonboi) pour une seule exécution ; sans profil en cours, rien n'est
+mesuré et l'exécution ne paie aucun surcoût. Pendant le profil :
+
+- le profileur déterministe `cProfile` mesure chaque fonction appelée :
+  fonctions les plus coûteuses et profil brut (format `pstats`, lisible
+  par `python -m pstats` ou snakeviz). Depuis Python 3.12, il observe
+  tous les threads du processus (autres sessions, attentes des threads
+  de fond comprises) ;
+- un thread échantillonne la pile de ce thread à intervalle régulier :
+  piles agrégées au format « collapsed » (une pile `a;b;c` et son nombre
+  d'échantillons par ligne), prêtes pour flamegraph.pl ou speedscope.
+
+Ce module ne dépend pas de Streamlit.
+"""
+
+import cProfile
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+
+
+# Intervalle d'échantillonnage des piles
+DEFAULT_SAMPLE_INTERVAL_S = 0.005
+
+# Nombre de fonctions affichées par défaut
+DEFAULT_TOP_FUNCTIONS = 20
+
+_active = {}
+_active_lock = threading.Lock()
+
+
+class StackSampler(threading.Thread):
+    """
+    Échantillonne la pile d'un thread à intervalle régulier.
+
+    Args:
+        thread_id (int): Identifiant du thread observé
+        interval_s (float): Intervalle entre deux échantillons
+    """
+
+    def __init__(self, thread_id, interval_s=DEFAULT_SAMPLE_INTERVAL_S):
+        super().__init__(name="oucekonboi-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        """Arrête l'échantillonnage et attend la fin du thread."""
+        self._stop_event.set()
+        self.join()
+
+
+def _frame_label(frame):
+    """Nom lisible d'une fonction dans une pile : `fichier:fonction`."""
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class ProfileReport:
+    """
+    Résultat d'un profil : fonctions coûteuses, profil brut et piles.
+
+    Args:
+        stats (pstats.Stats): Statistiques de cProfile
+        stacks (Counter): Nombre d'échantillons par pile
+        elapsed_ms (float): Durée de l'exécution profilée
+    """
+
+    def __init__(self, stats, stacks, elapsed_ms):
+        self.stats = stats
+        self.stacks = stacks
+        self.elapsed_ms = elapsed_ms
+
+    def top_functions(self, limit=DEFAULT_TOP_FUNCTIONS):
+        """
+        Renvoie les fonctions où l'exécution a passé le plus de temps propre.
+
+        Args:
+            limit (int): Nombre de fonctions renvoyées
+
+        Returns:
+            list: Dictionnaires {"function", "calls", "self_ms",
+                "cumulative_ms"}, du plus au moins coûteux
+        """
+        rows = []
+        for (filename, line, name), entry in self.stats.stats.items():
+            _, calls, self_s, cumulative_s, _ = entry
+            location = f"{os.path.basename(filename)}:{line}" if line else filename
+            rows.append(
+                {
+                    "function": f"{name} ({location})",
+                    "calls": calls,
+                    "self_ms": self_s * 1000,
+                    "cumulative_ms": cumulative_s * 1000,
+                }
+            )
+        rows.sort(key=lambda row: row["self_ms"], reverse=True)
+        return rows[:limit]
+
+    def raw_profile(self):
+        """
+        Renvoie le profil brut au format de `pstats.Stats.dump_stats`.
+
+        Returns:
+            bytes: Contenu d'un fichier .prof
+        """
+        return marshal.dumps(self.stats.stats)
+
+    def collapsed_stacks(self):
+        """
+        Renvoie les piles échantillonnées au format « collapsed ».
+
+        Returns:
+            str: Une ligne `pile;appelée nombre` par pile distincte
+        """
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+
+class Profile:
+    """
+    Profil de l'exécution du thread qui l'a démarré.
+
+    Args:
+        sample_interval_s (float): Intervalle d'échantillonnage des piles
+    """
+
+    def __init__(self, sample_interval_s=DEFAULT_SAMPLE_INTERVAL_S):
+        self.sample_interval_s = sample_interval_s
+        self.thread_id = None
+        self._profiler = cProfile.Profile()
+        self._sampler = None
+        self._started = None
+
+    def start(self):
+        """
+        Démarre le profil dans le thread courant.
+
+        Les profils restés ouverts dans ce thread (exécution interrompue)
+        ou dans un thread terminé sont arrêtés et abandonnés : leur
+        profileur resterait sinon actif pour tout le processus. Lève
+        ValueError si un autre profileur est déjà actif.
+
+        Returns:
+            Profile: Le profil lui-même
+        """
+        self.thread_id = threading.get_ident()
+        with _active_lock:
+            alive = sys._current_frames()
+            stale = [
+                _active.pop(thread_id)
+                for thread_id in list(_active)
+                if thread_id == self.thread_id or thread_id not in alive
+            ]
+        for previous in stale:
+            previous.abandon()
+
+        # Activé en premier : en cas d'erreur, rien n'est démarré
+        self._started = time.perf_counter()
+        self._profiler.enable()
+        self._sampler = StackSampler(self.thread_id, self.sample_interval_s)
+        self._sampler.start()
+        with _active_lock:
+            _active[self.thread_id] = self
+        return self
+
+    def abandon(self):
+        """Arrête le profil sans produire de résultat."""
+        self._profiler.disable()
+        self._sampler.stop()
+        with _active_lock:
+            if _active.get(self.thread_id) is self:
+                del _active[self.thread_id]
+
+    def stop(self):
+        """
+        Arrête le profil.
+
+        Returns:
+            ProfileReport: Résultat du profil
+        """
+        elapsed_ms = (time.perf_counter() - self._started) * 1000
+        self.abandon()
+        return ProfileReport(
+            pstats.Stats(self._profiler), self._sampler.stacks, elapsed_ms
+        )
@@ -0,0 +1,43 @@
+"""
+Module pour le suivi de progression des calculs.
+
+Les fonctions de calcul ne dépendent pas de Streamlit : elles signalent
+leurs étapes à une fonction de rappel optionnelle `progress(event)`, où
+`event` est un dictionnaire :
+
+- "stage" : identifiant de l'étape (ex. "initial_center", "bar_search") ;
+- "level" : "info", "detail", "success", "warning" ou "error" ;
+- "message" : texte lisible (Markdown) ;
+- des données propres à l'étape (temps, coordonnées...).
+
+L'interface affiche ces événements, un traitement par lots peut les
+journaliser ou les ignorer.
+"""
+
+PROGRESS_LEVELS = ("info", "detail", "success", "warning", "error")
+
+
+def notify(progress, stage, message, level="info", **data):
+    """
+    Envoie un événement de progression, si une fonction de rappel est fournie.
+
+    Args:
+        progress (callable): Fonction de rappel, ou None
+        stage (str): Identifiant de l'étape
+        message (str): Texte de l'événement
+        level (str): Niveau de l'événement (voir PROGRESS_LEVELS)
+        **data: Données supplémentaires de l'événement
+    """
+    if progress is not None:
+        progress({"stage": stage, "level": level, "message": message, **data})
+
+
+def print_progress(event):
+    """
+    Fonction de rappel qui affiche les événements dans la console.
+
+    Args:
+        event (dict): Événement de progression
+    """
+    prefix = {"success": "✅ ", "warning": "⚠️ ", "error": "❌ ", "detail": "   "}
+    print(prefix.get(event["level"], "ℹ️  ") + event["message"])
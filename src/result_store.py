@@ -0,0 +1,367 @@
+"""
+Module pour le stockage partagé des résultats de calcul entre processus.
+
+Plusieurs répliques Streamlit (derrière un répartiteur de charge), le
+service HTTP et les traitements par lots peuvent partager les mêmes
+résultats : une recommandation calculée par un processus est servie aux
+autres sans nouveau calcul, y compris après un redémarrage.
+
+Les résultats sont stockés en JSON compressé sous une clé fournie par
+l'appelant (empreinte du contenu, voir `src.pipeline`), avec une durée
+de vie et une taille totale maximale (éviction des entrées les moins
+récemment lues). Le stockage lui-même est interchangeable :
+
+- ``"sqlite"`` : fichier SQLite en mode WAL, partagé par les processus
+  d'une même machine ou d'un même volume ;
+- ``"memory"`` : dictionnaire du processus (tests, réplique unique) ;
+- ``"none"`` : aucun stockage partagé.
+
+Tout objet qui implémente l'interface de `StoreBackend` peut être passé
+à `ResultStore` (base clé-valeur distante, par exemple).
+"""
+
+import abc
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from src.paths import data_path
+
+
+DEFAULT_STORE_FILE = os.environ.get(
+    "OUCEKONBOI_RESULT_STORE", data_path("results.sqlite")
+)
+DEFAULT_STORE_BACKEND = os.environ.get("OUCEKONBOI_RESULT_BACKEND", "sqlite")
+
+STORE_BACKENDS = ("sqlite", "memory", "none")
+
+DEFAULT_TTL_S = 24 * 3600  # Une journée, les bars sont versionnés à part
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Une lecture ne met à jour la date d'accès (ordre d'éviction) que si la
+# précédente date de plus longtemps : évite une écriture à chaque lecture
+ACCESS_RESOLUTION_S = 60
+
+# Version du format stocké : la changer rend les anciens résultats invisibles
+STORE_FORMAT_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at);
+CREATE INDEX IF NOT EXISTS results_expires_at ON results (expires_at);
+"""
+
+
+class StoreBackend(abc.ABC):
+    """
+    Interface d'un stockage de résultats (octets) avec durée de vie.
+
+    Les dates sont des horodatages `time.time()` : elles doivent avoir le
+    même sens dans tous les processus qui partagent le stockage.
+    """
+
+    @abc.abstractmethod
+    def get(self, key, now):
+        """Renvoie les octets d'une entrée encore valide, ou None."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def put(self, key, payload, expires_at, now):
+        """Enregistre (ou remplace) une entrée."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def evict(self, max_bytes, now):
+        """Supprime les entrées expirées puis les moins récemment lues
+        jusqu'à revenir sous `max_bytes` ; renvoie le nombre supprimé."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def size_bytes(self):
+        """Renvoie la taille totale des entrées."""
+        raise NotImplementedError
+
+
+class SQLiteBackend(StoreBackend):
+    """
+    Stockage dans un fichier SQLite en mode WAL, partagé entre processus.
+
+    Args:
+        store_file (str): Fichier SQLite
+    """
+
+    def __init__(self, store_file=DEFAULT_STORE_FILE):
+        self.store_file = store_file
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(store_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Les autres processus peuvent écrire en même temps : on attend le
+        # verrou d'écriture plutôt que d'échouer
+        self._db = sqlite3.connect(store_file, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def get(self, key, now):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload, accessed_at FROM results "
+                "WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > ACCESS_RESOLUTION_S:
+                self._db.execute(
+                    "UPDATE results SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+                self._db.commit()
+            return row[0]
+
+    def put(self, key, payload, expires_at, now):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), expires_at, now),
+            )
+            self._db.commit()
+
+    def evict(self, max_bytes, now):
+        with self._lock:
+            removed = self._db.execute(
+                "DELETE FROM results WHERE expires_at <= ?", (now,)
+            ).rowcount
+            excess = self._size_bytes() - max_bytes
+            if excess > 0:
+                keys = []
+                rows = self._db.execute(
+                    "SELECT key, size FROM results ORDER BY accessed_at"
+                )
+                for key, size in rows:
+                    if excess <= 0:
+                        break
+                    keys.append((key,))
+                    excess -= size
+                self._db.executemany("DELETE FROM results WHERE key = ?", keys)
+                removed += len(keys)
+            self._db.commit()
+            return removed
+
+    def size_bytes(self):
+        with self._lock:
+            return self._size_bytes()
+
+    def _size_bytes(self):
+        return self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()[0]
+
+
+class MemoryBackend(StoreBackend):
+    """Stockage dans un dictionnaire du processus (tests, réplique unique)."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry["expires_at"] <= now:
+                return None
+            entry["accessed_at"] = now
+            return entry["payload"]
+
+    def put(self, key, payload, expires_at, now):
+        with self._lock:
+            self._entries[key] = {
+                "payload": payload,
+                "expires_at": expires_at,
+                "accessed_at": now,
+            }
+
+    def evict(self, max_bytes, now):
+        with self._lock:
+            expired = [k for k, e in self._entries.items() if e["expires_at"] <= now]
+            for key in expired:
+                del self._entries[key]
+            excess = sum(len(e["payload"]) for e in self._entries.values()) - max_bytes
+            by_access = sorted(
+                self._entries, key=lambda k: self._entries[k]["accessed_at"]
+            )
+            removed = len(expired)
+            for key in by_access:
+                if excess <= 0:
+                    break
+                excess -= len(self._entries.pop(key)["payload"])
+                removed += 1
+            return removed
+
+    def size_bytes(self):
+        with self._lock:
+            return sum(len(e["payload"]) for e in self._entries.values())
+
+
+class ResultStore:
+    """
+    Stockage partagé de résultats JSON avec durée de vie et taille maximale.
+
+    Args:
+        backend (StoreBackend): Stockage sous-jacent (None pour aucun)
+        ttl_s (float): Durée de vie des résultats en secondes
+        max_bytes (int): Taille totale maximale des résultats compressés
+        evict_every (int): Nombre d'écritures entre deux évictions
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        ttl_s=DEFAULT_TTL_S,
+        max_bytes=DEFAULT_MAX_BYTES,
+        evict_every=64,
+    ):
+        self.backend = backend
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.evict_every = evict_every
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+    def get(self, key):
+        """
+        Renvoie un résultat enregistré.
+
+        Args:
+            key (str): Clé du résultat
+
+        Returns:
+            Valeur décodée (les tuples sont relus comme des listes), ou None
+                si le résultat est absent ou expiré
+        """
+        if self.backend is None:
+            return None
+        payload = self.backend.get(self._versioned(key), time.time())
+        with self._lock:
+            self._stats["hits" if payload is not None else "misses"] += 1
+        if payload is None:
+            return None
+        return json.loads(zlib.decompress(payload))
+
+    def put(self, key, value):
+        """
+        Enregistre un résultat.
+
+        Args:
+            key (str): Clé du résultat
+            value: Valeur sérialisable en JSON (tableaux NumPy acceptés)
+        """
+        if self.backend is None:
+            return
+        payload = zlib.compress(
+            json.dumps(value, separators=(",", ":"), default=_encode_value).encode()
+        )
+        now = time.time()
+        self.backend.put(self._versioned(key), payload, now + self.ttl_s, now)
+
+        with self._lock:
+            self._stats["writes"] += 1
+            self._writes += 1
+            evict = self._writes % self.evict_every == 0
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """
+        Supprime les résultats expirés et ceux qui dépassent la taille maximale.
+
+        Returns:
+            int: Nombre de résultats supprimés
+        """
+        if self.backend is None:
+            return 0
+        removed = self.backend.evict(self.max_bytes, time.time())
+        with self._lock:
+            self._stats["evictions"] += removed
+        return removed
+
+    def stats(self):
+        """
+        Renvoie les statistiques d'utilisation du stockage.
+
+        Returns:
+            dict: Lectures trouvées (hits), manquantes (misses), écritures,
+                suppressions, taux de succès et taille totale en octets
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["size_bytes"] = self.backend.size_bytes() if self.backend else 0
+        return stats
+
+    @staticmethod
+    def _versioned(key):
+        return f"v{STORE_FORMAT_VERSION}:{key}"
+
+
+def _encode_value(value):
+    """Sérialisation JSON des tableaux et scalaires NumPy."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Valeur non prise en charge: {type(value).__name__}")
+
+
+def create_backend(name=DEFAULT_STORE_BACKEND, store_file=DEFAULT_STORE_FILE):
+    """
+    Crée un stockage par son nom.
+
+    Args:
+        name (str): "sqlite", "memory" ou "none"
+        store_file (str): Fichier SQLite (stockage "sqlite")
+
+    Returns:
+        StoreBackend: Stockage, ou None pour "none"
+    """
+    if name == "sqlite":
+        return SQLiteBackend(store_file)
+    if name == "memory":
+        return MemoryBackend()
+    if name == "none":
+        return None
+    raise ValueError(
+        f"Stockage de résultats inconnu: {name!r} (attendu: {', '.join(STORE_BACKENDS)})"
+    )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_result_store():
+    """
+    Renvoie le stockage de résultats partagé par le processus.
+
+    Returns:
+        ResultStore: Stockage choisi par OUCEKONBOI_RESULT_BACKEND
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ResultStore(create_backend())
+        return _store
@@ -0,0 +1,622 @@
+"""
+Module pour les distances à pied et à vélo sur le réseau de rues.
+
+Le réseau est lu une fois dans un extrait OpenStreetMap (fichier .osm.pbf
+ou export JSON d'Overpass des voies `highway` avec leurs nœuds) puis
+enregistré sous forme compacte : coordonnées des nœuds et tronçons avec
+leur longueur et leurs droits d'accès. Au chargement, chaque profil
+("walk", "bike") reçoit sa liste d'adjacence CSR (tableaux `indptr`,
+`indices`, `weights`) :
+
+- une recherche de Dijkstra par ami donne sa distance sur le réseau vers
+  tous les bars candidats à la fois ;
+- la recherche s'arrête dès que toutes les destinations demandées sont
+  atteintes et elle est gardée en mémoire par nœud de départ : de nouvelles
+  destinations (changement du rayon de recherche) reprennent la recherche
+  là où elle s'était arrêtée ;
+- les points sont rattachés au nœud le plus proche du profil par un index
+  spatial en grille (voir `GridIndex`).
+
+Construction du réseau :
+
+    python -m src.street_graph paris-streets.osm.pbf --graph data/street_graph.npz
+"""
+
+import argparse
+import array
+import heapq
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from src.geo_utils import as_points, distance_matrix, pairwise_distances
+from src.gtfs_router import GridIndex
+from src.paths import data_path
+
+
+DEFAULT_GRAPH_FILE = os.environ.get(
+    "OUCEKONBOI_STREET_GRAPH", data_path("street_graph.npz")
+)
+
+# Profils de déplacement sur le réseau et leurs libellés
+PROFILES = ("walk", "bike")
+PROFILE_LABELS = {"walk": "à pied", "bike": "à vélo"}
+
+# Voies retenues dans le réseau (valeurs de la clé highway)
+ROUTABLE_HIGHWAYS = frozenset(
+    (
+        "motorway",
+        "motorway_link",
+        "trunk",
+        "trunk_link",
+        "primary",
+        "primary_link",
+        "secondary",
+        "secondary_link",
+        "tertiary",
+        "tertiary_link",
+        "unclassified",
+        "residential",
+        "living_street",
+        "service",
+        "road",
+        "track",
+        "pedestrian",
+        "footway",
+        "path",
+        "steps",
+        "corridor",
+        "bridleway",
+        "cycleway",
+    )
+)
+# Voies interdites sauf autorisation explicite (tag foot ou bicycle)
+NO_WALK_HIGHWAYS = frozenset(("motorway", "motorway_link", "trunk", "trunk_link"))
+NO_BIKE_HIGHWAYS = NO_WALK_HIGHWAYS | {
+    "pedestrian",
+    "footway",
+    "steps",
+    "corridor",
+    "bridleway",
+}
+ACCESS_DENIED = ("no", "private")
+ACCESS_ALLOWED = ("yes", "designated", "permissive")
+
+# Droits d'accès d'un tronçon (bits) : à pied dans les deux sens, à vélo
+# dans le sens de la voie et dans le sens inverse
+WALK = 1
+BIKE_FORWARD = 2
+BIKE_BACKWARD = 4
+
+# Distance maximale d'un point au nœud du réseau auquel il est rattaché :
+# au-delà, le point est hors du réseau
+SNAP_MAX_KM = 0.3
+
+# Distance maximale parcourue par une recherche : les destinations plus
+# lointaines sont injoignables
+MAX_NETWORK_KM = {"walk": 15.0, "bike": 40.0}
+
+# Nombre de recherches (nœud de départ, profil) gardées en mémoire
+SEARCH_CACHE_SIZE = 64
+
+GRAPH_FORMAT = 1
+
+_GRAPH_ARRAYS = (
+    "node_lat",
+    "node_lon",
+    "edge_from",
+    "edge_to",
+    "edge_m",
+    "edge_access",
+)
+
+
+def way_access(tags):
+    """
+    Calcule les droits d'accès à pied et à vélo d'une voie OSM.
+
+    Args:
+        tags (dict): Tags de la voie
+
+    Returns:
+        int: Combinaison des bits WALK, BIKE_FORWARD et BIKE_BACKWARD
+            (0 si la voie n'est pas retenue)
+    """
+    highway = tags.get("highway")
+    if highway not in ROUTABLE_HIGHWAYS:
+        return 0
+    denied = tags.get("access") in ACCESS_DENIED
+
+    access = 0
+    foot = tags.get("foot")
+    if foot in ACCESS_ALLOWED or (
+        highway not in NO_WALK_HIGHWAYS and foot != "no" and not denied
+    ):
+        access |= WALK
+
+    bicycle = tags.get("bicycle")
+    if bicycle in ACCESS_ALLOWED or (
+        highway not in NO_BIKE_HIGHWAYS and bicycle != "no" and not denied
+    ):
+        roundabout = tags.get("junction") == "roundabout"
+        oneway = tags.get("oneway", "yes" if roundabout else "no")
+        # Double sens cyclable
+        if tags.get("oneway:bicycle") == "no" or tags.get("cycleway", "").startswith(
+            "opposite"
+        ):
+            oneway = "no"
+        if oneway in ("yes", "1", "true"):
+            access |= BIKE_FORWARD
+        elif oneway == "-1":
+            access |= BIKE_BACKWARD
+        else:
+            access |= BIKE_FORWARD | BIKE_BACKWARD
+    return access
+
+
+def read_overpass_json(path):
+    """
+    Lit les voies d'un export JSON d'Overpass.
+
+    L'export doit contenir les voies et leurs nœuds, par exemple avec la
+    requête `way["highway"](sud,ouest,nord,est); (._;>;); out body;`.
+
+    Args:
+        path (str): Chemin du fichier JSON (`{"elements": [...]}`)
+
+    Returns:
+        tuple: ({identifiant de nœud: (lat, lon)}, liste des voies
+            (identifiants des nœuds, droits d'accès))
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+
+    nodes, ways = {}, []
+    for element in data.get("elements", []):
+        if element.get("type") == "node" and "lat" in element:
+            nodes[element["id"]] = (element["lat"], element["lon"])
+        elif element.get("type") == "way":
+            access = way_access(element.get("tags", {}))
+            if access:
+                ways.append((element.get("nodes", []), access))
+    return nodes, ways
+
+
+def read_osm_pbf(path):
+    """
+    Lit les voies d'un extrait OpenStreetMap au format .osm.pbf.
+
+    Nécessite le paquet optionnel `osmium` (pyosmium).
+
+    Args:
+        path (str): Chemin du fichier .osm.pbf
+
+    Returns:
+        tuple: ({identifiant de nœud: (lat, lon)}, liste des voies
+            (identifiants des nœuds, droits d'accès))
+    """
+    try:
+        import osmium
+    except ImportError as e:
+        raise ImportError(
+            "La lecture des fichiers .osm.pbf nécessite pyosmium "
+            "(pip install osmium)"
+        ) from e
+
+    nodes, ways = {}, []
+
+    class WayHandler(osmium.SimpleHandler):
+        def way(self, w):
+            access = way_access({tag.k: tag.v for tag in w.tags})
+            if not access:
+                return
+            refs = []
+            for node in w.nodes:
+                if node.location.valid():
+                    nodes[node.ref] = (node.location.lat, node.location.lon)
+                    refs.append(node.ref)
+            ways.append((refs, access))
+
+    WayHandler().apply_file(path, locations=True)
+    return nodes, ways
+
+
+def build_graph(source_path, graph_file=DEFAULT_GRAPH_FILE):
+    """
+    Construit (ou remplace) le réseau de rues à partir d'un extrait OSM.
+
+    Args:
+        source_path (str): Fichier .osm.pbf ou export JSON d'Overpass
+        graph_file (str): Fichier .npz à créer
+
+    Returns:
+        dict: Métadonnées du réseau (nœuds, tronçons, durée de construction)
+    """
+    started = time.perf_counter()
+    if source_path.endswith(".pbf"):
+        nodes, ways = read_osm_pbf(source_path)
+    else:
+        nodes, ways = read_overpass_json(source_path)
+
+    # Tronçons entre nœuds consécutifs des voies
+    starts, ends, accesses = [], [], []
+    for refs, access in ways:
+        refs = [ref for ref in refs if ref in nodes]
+        starts.extend(refs[:-1])
+        ends.extend(refs[1:])
+        accesses.extend([access] * (len(refs) - 1))
+    if not starts:
+        raise ValueError(f"Aucune voie praticable dans {source_path}")
+
+    # Numérotation compacte des nœuds utilisés
+    node_ids, inverse = np.unique(
+        np.concatenate((starts, ends)).astype(np.int64), return_inverse=True
+    )
+    edge_from, edge_to = inverse.reshape(2, -1).astype(np.int32)
+    points = np.array([nodes[node_id] for node_id in node_ids.tolist()], dtype=float)
+    keep = edge_from != edge_to
+    edge_from, edge_to = edge_from[keep], edge_to[keep]
+    edge_access = np.asarray(accesses, dtype=np.uint8)[keep]
+    edge_m = 1000 * pairwise_distances(
+        points[edge_from], points[edge_to], method="equirectangular"
+    )
+
+    graph = {
+        "node_lat": points[:, 0],
+        "node_lon": points[:, 1],
+        "edge_from": edge_from,
+        "edge_to": edge_to,
+        "edge_m": edge_m.astype(np.float32),
+        "edge_access": edge_access,
+    }
+    metadata = {
+        "format": GRAPH_FORMAT,
+        "source": os.path.basename(source_path),
+        "nodes": len(node_ids),
+        "edges": int(len(edge_from)),
+        "walk_edges": int(np.count_nonzero(edge_access & WALK)),
+        "bike_edges": int(
+            np.count_nonzero(edge_access & (BIKE_FORWARD | BIKE_BACKWARD))
+        ),
+        "km": round(float(edge_m.sum()) / 1000, 1),
+        "build_s": round(time.perf_counter() - started, 2),
+    }
+
+    directory = os.path.dirname(graph_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Écriture dans un fichier temporaire puis remplacement atomique
+    tmp_file = graph_file + ".tmp.npz"
+    np.savez(tmp_file, metadata=np.array(json.dumps(metadata)), **graph)
+    os.replace(tmp_file, graph_file)
+    return metadata
+
+
+class _Adjacency:
+    """
+    Liste d'adjacence CSR d'un profil et index des nœuds qu'il dessert.
+
+    Les tableaux sont des `array.array` : aussi compacts que des tableaux
+    NumPy, mais bien plus rapides à découper et à parcourir élément par
+    élément dans la boucle de Dijkstra.
+    """
+
+    def __init__(self, sources, targets, weights, points):
+        order = np.argsort(sources, kind="stable")
+        counts = np.bincount(sources, minlength=len(points))
+        self.indptr = array.array("q", np.r_[0, np.cumsum(counts)].tobytes())
+        self.indices = array.array("i", targets[order].astype(np.int32).tobytes())
+        self.weights = array.array("f", weights[order].astype(np.float32).tobytes())
+        self.nodes = np.flatnonzero(
+            counts + np.bincount(targets, minlength=len(points))
+        )
+        self.node_grid = GridIndex(points[self.nodes], SNAP_MAX_KM)
+
+
+class _Search:
+    """État d'une recherche de Dijkstra, reprise à chaque nouvelle demande."""
+
+    __slots__ = ("dist", "heap")
+
+    def __init__(self, source):
+        self.dist = {source: 0.0}
+        self.heap = [(0.0, source)]
+
+
+class StreetGraph:
+    """
+    Calcul des distances à pied et à vélo sur un réseau de rues compact.
+
+    Le réseau est chargé une fois en mémoire. Les recherches de Dijkstra
+    sont gardées pour les `SEARCH_CACHE_SIZE` derniers nœuds de départ :
+    évaluer de nouvelles destinations depuis les mêmes amis ne parcourt
+    que la partie du réseau qui n'avait pas encore été atteinte.
+
+    Args:
+        graph_file (str): Fichier .npz créé par `build_graph`
+        cache_size (int): Nombre de recherches gardées en mémoire
+    """
+
+    def __init__(self, graph_file=DEFAULT_GRAPH_FILE, cache_size=SEARCH_CACHE_SIZE):
+        if not os.path.exists(graph_file):
+            raise FileNotFoundError(
+                f"Réseau de rues introuvable: {graph_file} "
+                f"(construisez-le avec `python -m src.street_graph <extrait OSM>`)"
+            )
+        self.graph_file = graph_file
+        # Version des données : change à chaque reconstruction du réseau
+        stat = os.stat(graph_file)
+        self.version = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+        with np.load(graph_file) as data:
+            self.metadata = json.loads(str(data["metadata"]))
+            for name in _GRAPH_ARRAYS:
+                setattr(self, name, data[name])
+        self.node_count = len(self.node_lat)
+
+        points = np.column_stack((self.node_lat, self.node_lon))
+        walk = (self.edge_access & WALK) > 0
+        forward = (self.edge_access & BIKE_FORWARD) > 0
+        backward = (self.edge_access & BIKE_BACKWARD) > 0
+        self._adjacency = {
+            "walk": _Adjacency(
+                np.r_[self.edge_from[walk], self.edge_to[walk]],
+                np.r_[self.edge_to[walk], self.edge_from[walk]],
+                np.r_[self.edge_m[walk], self.edge_m[walk]],
+                points,
+            ),
+            "bike": _Adjacency(
+                np.r_[self.edge_from[forward], self.edge_to[backward]],
+                np.r_[self.edge_to[forward], self.edge_from[backward]],
+                np.r_[self.edge_m[forward], self.edge_m[backward]],
+                points,
+            ),
+        }
+
+        self.cache_size = cache_size
+        self._searches = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "settled": 0}
+
+    def snap(self, points, profile="walk"):
+        """
+        Rattache des points au nœud le plus proche du réseau d'un profil.
+
+        Args:
+            points: Séquence de points (lat, lon)
+            profile (str): "walk" ou "bike"
+
+        Returns:
+            tuple: (indices des nœuds, -1 hors du réseau ; distances au nœud
+                en km)
+        """
+        adjacency = self._adjacency[profile]
+        points = as_points(points)
+        nodes = np.full(len(points), -1, dtype=np.int64)
+        offsets = np.full(len(points), np.inf)
+        query_idx, point_idx, distances = adjacency.node_grid.query(points, SNAP_MAX_KM)
+        if len(query_idx):
+            # Nœud le plus proche de chaque point
+            order = np.lexsort((distances, query_idx))
+            first = order[np.r_[True, query_idx[order][1:] != query_idx[order][:-1]]]
+            nodes[query_idx[first]] = adjacency.nodes[point_idx[first]]
+            offsets[query_idx[first]] = distances[first]
+        return nodes, offsets
+
+    def network_distances(self, source, targets, profile="walk"):
+        """
+        Renvoie les distances sur le réseau d'un nœud vers des nœuds cibles.
+
+        La recherche depuis `source` est reprise si elle est déjà en
+        mémoire, et poursuivie jusqu'à atteindre toutes les cibles.
+
+        Args:
+            source (int): Indice du nœud de départ
+            targets: Indices des nœuds cibles
+            profile (str): "walk" ou "bike"
+
+        Returns:
+            np.ndarray: Distances en mètres (inf au-delà de MAX_NETWORK_KM
+                ou sans chemin)
+        """
+        targets = np.asarray(targets, dtype=np.int64).tolist()
+        key = (profile, int(source))
+        with self._lock:
+            search = self._searches.get(key)
+            if search is None:
+                search = _Search(int(source))
+                self._searches[key] = search
+                self._stats["misses"] += 1
+            else:
+                self._searches.move_to_end(key)
+                self._stats["hits"] += 1
+            before = len(search.dist)
+            self._extend(search, targets, profile)
+            self._stats["settled"] += len(search.dist) - before
+            while len(self._searches) > self.cache_size:
+                self._searches.popitem(last=False)
+
+            dist, heap = search.dist, search.heap
+            limit = heap[0][0] if heap else np.inf
+            return np.array(
+                [dist[t] if t in dist and dist[t] <= limit else np.inf for t in targets]
+            )
+
+    def _extend(self, search, targets, profile):
+        """Poursuit une recherche jusqu'à fixer la distance de toutes les cibles."""
+        adjacency = self._adjacency[profile]
+        indptr, indices, weights = (
+            adjacency.indptr,
+            adjacency.indices,
+            adjacency.weights,
+        )
+        cutoff = MAX_NETWORK_KM[profile] * 1000
+        dist, heap = search.dist, search.heap
+        if not heap:
+            return
+        # Les distances inférieures au haut du tas sont définitives
+        limit = heap[0][0]
+        remaining = {t for t in targets if dist.get(t, np.inf) > limit}
+
+        inf = np.inf
+        while remaining and heap:
+            d, u = heap[0]
+            if d > cutoff:
+                break
+            heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            remaining.discard(u)
+            start, end = indptr[u], indptr[u + 1]
+            for v, w in zip(indices[start:end], weights[start:end]):
+                candidate = d + w
+                if candidate < dist.get(v, inf):
+                    dist[v] = candidate
+                    heapq.heappush(heap, (candidate, v))
+
+    def distance_matrix(self, origins, destinations, profile="walk"):
+        """
+        Calcule les distances sur le réseau de chaque origine vers chaque destination.
+
+        Une recherche par nœud de départ couvre toutes les destinations ;
+        la distance de chaque point à son nœud s'ajoute à celle du réseau.
+
+        Args:
+            origins: Séquence de N points (lat, lon) d'origine
+            destinations: Séquence de M points (lat, lon) de destination
+            profile (str): "walk" ou "bike"
+
+        Returns:
+            np.ndarray: Matrice (N, M) des distances en km (inf hors du
+                réseau ou au-delà de MAX_NETWORK_KM)
+        """
+        if profile not in PROFILES:
+            raise ValueError(
+                f"Profil inconnu: {profile!r} (attendu: {', '.join(PROFILES)})"
+            )
+        origin_nodes, origin_km = self.snap(origins, profile)
+        target_nodes, target_km = self.snap(destinations, profile)
+        result = np.full((len(origin_nodes), len(target_nodes)), np.inf)
+
+        reachable = np.flatnonzero(target_nodes >= 0)
+        for i, source in enumerate(origin_nodes.tolist()):
+            if source < 0 or len(reachable) == 0:
+                continue
+            meters = self.network_distances(source, target_nodes[reachable], profile)
+            result[i, reachable] = origin_km[i] + meters / 1000 + target_km[reachable]
+        return result
+
+    def stats(self):
+        """
+        Renvoie la taille du réseau et les compteurs du cache des recherches.
+
+        Returns:
+            dict: Nœuds, tronçons, recherches en cache, hits, misses et
+                nœuds atteints
+        """
+        with self._lock:
+            return {
+                "nodes": self.node_count,
+                "edges": int(len(self.edge_from)),
+                "cached_searches": len(self._searches),
+                **self._stats,
+            }
+
+
+_graphs = {}
+_graphs_lock = threading.Lock()
+
+
+def get_street_graph(graph_file=DEFAULT_GRAPH_FILE):
+    """
+    Renvoie le réseau de rues partagé par le processus.
+
+    Args:
+        graph_file (str): Fichier .npz du réseau
+
+    Returns:
+        StreetGraph: Réseau chargé en mémoire
+    """
+    with _graphs_lock:
+        if graph_file not in _graphs:
+            _graphs[graph_file] = StreetGraph(graph_file)
+        return _graphs[graph_file]
+
+
+def street_graph_available(graph_file=DEFAULT_GRAPH_FILE):
+    """
+    Indique si le réseau de rues a été construit.
+
+    Args:
+        graph_file (str): Fichier .npz du réseau
+
+    Returns:
+        bool: True si le fichier du réseau existe
+    """
+    return os.path.exists(graph_file)
+
+
+def street_graph_version():
+    """
+    Renvoie la version du réseau de rues.
+
+    Les résultats calculés à partir des distances sur le réseau l'incluent
+    dans leur clé : reconstruire le réseau les invalide.
+
+    Returns:
+        str: Version des données
+    """
+    try:
+        return f"streets:{get_street_graph().version}"
+    except FileNotFoundError:
+        return "streets:absent"
+
+
+def network_distance_matrix(origins, destinations, profile="walk"):
+    """
+    Calcule les distances à pied ou à vélo entre deux ensembles de points.
+
+    Les paires que le réseau ne relie pas (points hors de l'extrait, trop
+    éloignés) gardent la distance à vol d'oiseau.
+
+    Args:
+        origins: Séquence de N points (lat, lon) d'origine
+        destinations: Séquence de M points (lat, lon) de destination
+        profile (str): "walk" ou "bike"
+
+    Returns:
+        np.ndarray: Matrice (N, M) des distances en km
+    """
+    network = get_street_graph().distance_matrix(origins, destinations, profile)
+    if np.isfinite(network).all():
+        return network
+    straight = distance_matrix(origins, destinations)
+    return np.where(np.isfinite(network), network, straight)
+
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande pour construire le réseau de rues."""
+    parser = argparse.ArgumentParser(
+        description="Construit le réseau de rues compact à partir d'un extrait OpenStreetMap."
+    )
+    parser.add_argument("source", help="Fichier .osm.pbf ou export JSON d'Overpass")
+    parser.add_argument(
+        "--graph", default=DEFAULT_GRAPH_FILE, help="Fichier .npz à créer"
+    )
+    args = parser.parse_args(argv)
+
+    metadata = build_graph(args.source, args.graph)
+    size_mb = os.path.getsize(args.graph) / 2**20
+    print(
+        f"✅ {metadata['nodes']} nœuds, {metadata['edges']} tronçons "
+        f"({metadata['km']} km) en {metadata['build_s']:.1f} s "
+        f"({size_mb:.1f} Mo) dans {args.graph}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,212 @@
 Module pour les calculs de temps de trajet en transport en commun.
 """
 
-import requests
-import streamlit as st
-from geopy.distance import geodesic
+import os
+
 import numpy as np
 
+from src.geo_utils import (
+    as_points,
+    average_cost_by_bar,
+    calculate_distance_to_center,
+    distance_matrix,
+    friends_coordinates,
+    located_friends,
+    pairwise_distances,
+)
+from src.gtfs_router import DEFAULT_DEPARTURE, get_transit_router
+from src.memo import QuantizedCache
+from src.travel_grid import get_travel_grid
+from src.optimizer import optimize_meeting_point
+from src.progress import notify
+
+
+# Libellés des objectifs d'optimisation du barycentre
+OBJECTIVE_LABELS = {
+    "sum": "temps total minimal",
+    "max": "temps maximal minimal",
+    "median": "médiane géométrique",
+}
+
+# Libellés des raisons d'arrêt de l'optimisation
+STOP_REASON_LABELS = {
+    "tolerance": "convergence atteinte",
+    "max_iter": "nombre maximum d'itérations atteint",
+    "time_budget": "budget de temps épuisé",
+}
+
+# Calcul des temps de trajet : "heuristic" (estimation par la distance),
+# "gtfs" (itinéraires sur les horaires d'un flux GTFS, voir `src.gtfs_router`)
+# ou "grid" (grille précalculée avec l'un des deux, voir `src.travel_grid`)
+TRANSIT_BACKENDS = ("heuristic", "gtfs", "grid")
+DEFAULT_TRANSIT_BACKEND = os.environ.get("OUCEKONBOI_TRANSIT_BACKEND", "heuristic")
+
+# Cache des temps de trajet point à point : coordonnées arrondies à 10 m
+# (écart < 0.1 min sur le temps estimé, sauf au passage d'un palier du
+# modèle), 32 Mo au plus, entrées valables 1 h pour suivre les sources
+# d'horaires qui évoluent
+TRANSIT_CACHE_GRID_M = 10.0
+TRANSIT_CACHE_MAX_BYTES = 32 * 1024 * 1024
+TRANSIT_CACHE_TTL_S = 3600
+
+
+def estimate_transit_minutes(distance_km):
+    """
+    Estime le temps de trajet en transport à partir de la distance.
+
+    Modèle par paliers appliqué élément par élément sur un tableau :
+    marche sous 600 m, métro/bus jusqu'à 15 km, RER au-delà.
+
+    Args:
+        distance_km (array-like): Distances en kilomètres
+
+    Returns:
+        np.ndarray: Temps de trajet en minutes
+    """
+    distance_km = np.asarray(distance_km, dtype=float)
+
+    # Estimation approximative pour Paris:
+    # - Métro/Bus: ~20 km/h en moyenne
+    # - Temps d'attente moyen: 5 minutes
+    # - Temps de marche: 5 minutes
+    walking = distance_km * 12  # 5 km/h à pied
+    urban = (distance_km / 20) * 60 + 5 + 5  # 20 km/h + attente + marche
+    regional = (distance_km / 35) * 60 + 8 + 8  # 35 km/h pour RER
+
+    return np.where(
+        distance_km < 0.6,  # Très proche, à pied
+        walking,
+        np.where(distance_km < 15, urban, regional),  # Métro/bus ou RER
+    )
+
+
+def transit_data_version(backend=None):
+    """
+    Renvoie la version des données utilisées pour les temps de trajet.
+
+    Avec les horaires GTFS, la version change à chaque reconstruction des
+    horaires ou changement de l'heure de départ. Les résultats calculés à
+    partir des temps de trajet l'incluent dans leur clé.
+
+    Args:
+        backend (str): "heuristic", "gtfs" ou "grid" (par défaut DEFAULT_TRANSIT_BACKEND)
+
+    Returns:
+        str: Version des données
+    """
+    backend = backend or DEFAULT_TRANSIT_BACKEND
+    try:
+        if backend == "gtfs":
+            return f"gtfs:{get_transit_router().version}:{DEFAULT_DEPARTURE}"
+        if backend == "grid":
+            return f"grid:{get_travel_grid().version}"
+    except FileNotFoundError:
+        return f"{backend}:absent"
+    return backend
+
+
+def get_transit_time_matrix(origins, destinations, method="geodesic", backend=None):
+    """
+    Calcule les temps de trajet en transport entre deux ensembles de points.
+
+    Avec l'estimation par la distance, toutes les paires sont traitées en
+    un seul calcul vectorisé. Avec les horaires GTFS, un itinéraire est
+    calculé par origine vers toutes les destinations ; les paires que le
+    réseau ne relie pas (hors de la zone du flux) gardent l'estimation.
+    Avec la grille précalculée, chaque temps est lu dans la grille ; les
+    points hors de la grille sont calculés comme lors de sa construction.
+
+    Args:
+        origins: Séquence de N points (lat, lon) d'origine
+        destinations: Séquence de M points (lat, lon) de destination
+        method (str): Méthode de calcul de distance (voir `distance_matrix`)
+        backend (str): "heuristic", "gtfs" ou "grid" (par défaut DEFAULT_TRANSIT_BACKEND)
+
+    Returns:
+        np.ndarray: Matrice (N, M) des temps de trajet en minutes
+    """
+    if (backend or DEFAULT_TRANSIT_BACKEND) == "grid":
+        grid = get_travel_grid()
+        times = grid.time_matrix(origins, destinations)
+        missing = np.isnan(times)
+        if missing.any():
+            rows, cols = missing.any(axis=1), missing.any(axis=0)
+            computed = get_transit_time_matrix(
+                as_points(origins)[rows],
+                as_points(destinations)[cols],
+                method,
+                grid.backend,
+            )
+            block = times[np.ix_(rows, cols)]
+            times[np.ix_(rows, cols)] = np.where(np.isnan(block), computed, block)
+        return times
+
+    estimated = estimate_transit_minutes(distance_matrix(origins, destinations, method))
+    return _routed(
+        estimated, backend, lambda router: router.time_matrix(origins, destinations)
+    )
+
+
+def _pairwise_transit_minutes(origins, destinations, backend=None):
+    """Temps de trajet (minutes) entre origines et destinations deux à deux."""
+    if (backend or DEFAULT_TRANSIT_BACKEND) == "grid":
+        grid = get_travel_grid()
+        times = grid.time_pairs(origins, destinations)
+        missing = np.isnan(times)
+        if missing.any():
+            times[missing] = _pairwise_transit_minutes(
+                as_points(origins)[missing],
+                as_points(destinations)[missing],
+                grid.backend,
+            )
+        return times
+
+    estimated = estimate_transit_minutes(pairwise_distances(origins, destinations))
+    return _routed(
+        estimated, backend, lambda router: router.time_pairs(origins, destinations)
+    )
+
+
+def _routed(estimated, backend, route):
+    """
+    Remplace les temps estimés par ceux du calcul d'itinéraires, si choisi.
+
+    Args:
+        estimated (np.ndarray): Temps estimés par la distance
+        backend (str): "heuristic" ou "gtfs" (par défaut DEFAULT_TRANSIT_BACKEND)
+        route (callable): Fonction (TransitRouter) -> temps calculés, de même
+            forme que `estimated` (inf si injoignable)
+
+    Returns:
+        np.ndarray: Temps de trajet en minutes
+    """
+    backend = backend or DEFAULT_TRANSIT_BACKEND
+    if backend == "heuristic":
+        return estimated
+    if backend != "gtfs":
+        raise ValueError(
+            f"Calcul des temps de trajet inconnu: {backend!r} "
+            f"(attendu: {', '.join(TRANSIT_BACKENDS)})"
+        )
+    routed = route(get_transit_router())
+    return np.where(np.isfinite(routed), routed, estimated)
+
+
+_transit_time_cache = QuantizedCache(
+    _pairwise_transit_minutes,
+    grid_m=TRANSIT_CACHE_GRID_M,
+    max_bytes=TRANSIT_CACHE_MAX_BYTES,
+    ttl_s=TRANSIT_CACHE_TTL_S,
+)
+
 
-@st.cache_data
 def get_transit_time(origin_lat, origin_lon, dest_lat, dest_lon):
     """
     Calcule le temps de trajet en transport en commun entre deux points.
-    Utilise l'API OpenRouteService pour les transports publics.
+
+    Le résultat est mis en cache sur une grille de `TRANSIT_CACHE_GRID_M`
+    mètres (voir `src.memo`). Le calcul suit `DEFAULT_TRANSIT_BACKEND`
+    (voir `get_transit_time_matrix`).
 
     Args:
         origin_lat (float): Latitude d'origine
@@ -21,56 +216,85 @@ def get_transit_time(origin_lat, origin_lon, dest_lat, dest_lon):
         dest_lon (float): Longitude de destination
 
     Returns:
-        float: Temps de trajet en minutes, ou None si erreur
+        float: Temps de trajet en minutes
     """
-    try:
-        # API OpenRouteService (gratuite avec limites)
-        # Alternative: utiliser Google Directions API, RATP API, etc.
-
-        # Pour la démo, on va utiliser une estimation basée sur la distance
-        # En réalité, il faudrait une vraie API de transport
-        distance_km = geodesic(
-            (origin_lat, origin_lon), (dest_lat, dest_lon)
-        ).kilometers
-
-        # Estimation approximative pour Paris:
-        # - Métro/Bus: ~20 km/h en moyenne
-        # - Temps d'attente moyen: 5 minutes
-        # - Temps de marche: 5 minutes
-
-        if distance_km < 0.6:  # Très proche, à pied
-            return distance_km * 12  # 5 km/h à pied
-        elif distance_km < 15:  # Transport en commun urbain
-            travel_time = (distance_km / 20) * 60  # 20 km/h en transport
-            waiting_time = 5  # 5 min d'attente moyenne
-            walking_time = 5  # 5 min de marche
-            return travel_time + waiting_time + walking_time
-        else:  # RER/Transport plus lointain
-            travel_time = (distance_km / 35) * 60  # 35 km/h pour RER
-            waiting_time = 8  # Plus d'attente
-            walking_time = 8  # Plus de marche
-            return travel_time + waiting_time + walking_time
-
-    except Exception as e:
-        st.warning(f"Erreur calcul transport: {e}")
-        # Fallback: estimation très basique
-        distance_km = geodesic(
-            (origin_lat, origin_lon), (dest_lat, dest_lon)
-        ).kilometers
-        return distance_km * 4  # 15 km/h moyenne très conservative
-
-
-def calculate_weighted_center_by_transit_time(friends):
-    """
-    Calcule un barycentre pondéré par les temps de trajet en transport.
-    Utilise un algorithme itératif pour minimiser le temps total de trajet.
+    return _transit_time_cache.get((origin_lat, origin_lon), (dest_lat, dest_lon))
+
+
+def get_transit_times(origins, destinations):
+    """
+    Calcule les temps de trajet en transport pour des paires de points.
+
+    Les paires déjà en cache ne sont pas recalculées ; les autres sont
+    calculées en un seul appel vectorisé.
+
+    Args:
+        origins: Séquence de N points (lat, lon) d'origine
+        destinations: Séquence de N points (lat, lon) de destination
+
+    Returns:
+        np.ndarray: Temps de trajet en minutes de origins[i] à destinations[i]
+    """
+    return _transit_time_cache.get_many(origins, destinations)
+
+
+def transit_cache_stats():
+    """
+    Renvoie les compteurs du cache des temps de trajet point à point.
+
+    Returns:
+        dict: Compteurs (voir `QuantizedCache.stats`)
+    """
+    return _transit_time_cache.stats()
+
+
+def _fast_transit_time_matrix(origins, destinations):
+    """
+    Matrice des temps de trajet avec l'approximation plane (optimiseur).
+
+    La grille précalculée interpole entre les centres des cellules et ne
+    lit pas les paires proches : l'optimiseur, qui estime la pente du coût
+    sur quelques mètres, utilise le calcul qui a construit la grille.
+    """
+    backend = DEFAULT_TRANSIT_BACKEND
+    if backend == "grid":
+        backend = get_travel_grid().backend
+    return get_transit_time_matrix(
+        origins, destinations, method="equirectangular", backend=backend
+    )
+
+
+def calculate_weighted_center_by_transit_time(
+    friends,
+    objective="sum",
+    tolerance_km=0.001,
+    max_iter=500,
+    time_budget_s=0.1,
+    progress=None,
+):
+    """
+    Calcule un barycentre optimisé par les temps de trajet en transport.
+    Utilise un algorithme itératif (voir `src.optimizer`) pour minimiser
+    l'objectif choisi à partir du barycentre géographique.
 
     Args:
         friends (list): Liste des amis avec leurs coordonnées
+        objective (str): "sum" (temps total), "max" (temps du plus éloigné)
+            ou "median" (médiane géométrique)
+        tolerance_km (float): Déplacement minimal avant convergence (km)
+        max_iter (int): Nombre maximum d'itérations
+        time_budget_s (float): Budget de temps de l'optimisation en secondes
+        progress (callable): Fonction de rappel recevant les étapes du calcul
+            (voir `src.progress`)
 
     Returns:
         tuple: (latitude, longitude, dict avec temps de trajet, dict avec infos de calcul)
     """
+    if objective not in OBJECTIVE_LABELS:
+        raise ValueError(
+            f"Objectif inconnu: {objective!r} "
+            f"(attendu: {', '.join(OBJECTIVE_LABELS)})"
+        )
     if not friends or len(friends) < 2:
         if friends:
             return friends[0]["latitude"], friends[0]["longitude"], {}, {}
@@ -86,112 +310,137 @@ def calculate_weighted_center_by_transit_time(friends):
     initial_center_lat = float(np.mean(lats))
     initial_center_lon = float(np.mean(lons))
 
-    st.info(
+    notify(
+        progress,
+        "initial_center",
         f"📍 **Étape 1:** Barycentre géographique initial calculé\n"
-        f"Latitude: {initial_center_lat:.6f}, Longitude: {initial_center_lon:.6f}"
+        f"Latitude: {initial_center_lat:.6f}, Longitude: {initial_center_lon:.6f}",
+        center=(initial_center_lat, initial_center_lon),
     )
 
     # Étape 2: Calculer les temps de trajet vers ce centre initial
-    st.info("⏱️ **Étape 2:** Calcul des temps de trajet vers le centre initial...")
-
-    initial_transit_times = {}
-    total_initial_time = 0
-
-    for friend in friends:
-        if friend.get("latitude") and friend.get("longitude"):
-            time_minutes = get_transit_time(
-                friend["latitude"],
-                friend["longitude"],
-                initial_center_lat,
-                initial_center_lon,
-            )
-            initial_transit_times[friend["name"]] = time_minutes
-            total_initial_time += time_minutes
-            st.write(
-                f"🚇 **{friend['name']}**: {time_minutes:.0f} min vers le centre initial"
-            )
-
-    avg_initial_time = total_initial_time / len(initial_transit_times)
-    st.success(f"⏱️ **Temps moyen initial:** {avg_initial_time:.0f} minutes")
-
-    # Étape 3: Calculer les poids inversés (plus de poids = moins de temps)
-    st.info("⚖️ **Étape 3:** Calcul des poids pour optimiser le barycentre...")
+    notify(
+        progress,
+        "initial_times",
+        "⏱️ **Étape 2:** Calcul des temps de trajet vers le centre initial...",
+    )
 
-    weights = []
-    weighted_lats = []
-    weighted_lons = []
+    located = located_friends(friends)
+    friend_points = friends_coordinates(located)
 
-    for friend in friends:
-        if friend.get("latitude") and friend.get("longitude"):
-            time_minutes = initial_transit_times[friend["name"]]
-            # Éviter division par zéro et donner un poids minimum
-            weight = 1.0 / max(time_minutes, 5.0)  # Minimum 5 minutes
+    initial_times = get_transit_time_matrix(
+        friend_points, (initial_center_lat, initial_center_lon)
+    )[:, 0]
+    initial_transit_times = {}
 
-            weights.append(weight)
-            weighted_lats.append(friend["latitude"] * weight)
-            weighted_lons.append(friend["longitude"] * weight)
+    for friend, time_minutes in zip(located, initial_times):
+        initial_transit_times[friend["name"]] = float(time_minutes)
+        notify(
+            progress,
+            "initial_times",
+            f"🚇 **{friend['name']}**: {time_minutes:.0f} min vers le centre initial",
+            level="detail",
+        )
 
-            st.write(
-                f"⚖️ **{friend['name']}**: poids = {weight:.4f} (temps: {time_minutes:.0f} min)"
-            )
+    avg_initial_time = float(initial_times.mean())
+    notify(
+        progress,
+        "initial_times",
+        f"⏱️ **Temps moyen initial:** {avg_initial_time:.0f} minutes",
+        level="success",
+        avg_time=avg_initial_time,
+    )
 
-    # Étape 4: Calculer le nouveau centre pondéré
-    st.info("🎯 **Étape 4:** Calcul du nouveau barycentre pondéré...")
+    # Étape 3: Optimisation itérative du point de rendez-vous
+    notify(
+        progress,
+        "optimization",
+        f"🔁 **Étape 3:** Optimisation itérative du barycentre "
+        f"(objectif: {OBJECTIVE_LABELS[objective]})...",
+    )
 
-    total_weight = sum(weights)
-    if total_weight > 0:
-        new_center_lat = sum(weighted_lats) / total_weight
-        new_center_lon = sum(weighted_lons) / total_weight
-    else:
-        new_center_lat, new_center_lon = initial_center_lat, initial_center_lon
+    result = optimize_meeting_point(
+        friend_points,
+        cost_matrix=_fast_transit_time_matrix,
+        objective=objective,
+        start=(initial_center_lat, initial_center_lon),
+        tolerance_km=tolerance_km,
+        max_iter=max_iter,
+        time_budget_s=time_budget_s,
+    )
+    new_center_lat, new_center_lon = result["point"]
+
+    notify(
+        progress,
+        "optimization",
+        f"🔁 {result['iterations']} itérations en {result['elapsed_ms']:.1f} ms "
+        f"({STOP_REASON_LABELS[result['stop_reason']]})",
+        level="detail",
+        iterations=result["iterations"],
+        elapsed_ms=result["elapsed_ms"],
+    )
 
-    # Calculer le déplacement
-    displacement_km = geodesic(
-        (initial_center_lat, initial_center_lon), (new_center_lat, new_center_lon)
-    ).kilometers
+    # Étape 4: Calculer le déplacement du barycentre
+    displacement_km = calculate_distance_to_center(
+        initial_center_lat, initial_center_lon, new_center_lat, new_center_lon
+    )
 
-    st.success(
+    notify(
+        progress,
+        "optimized_center",
         f"🎯 **Nouveau barycentre optimisé calculé !**\n"
         f"Latitude: {new_center_lat:.6f}, Longitude: {new_center_lon:.6f}\n"
-        f"📏 Déplacement: {displacement_km:.0f} mètres"
+        f"📏 Déplacement: {displacement_km:.0f} mètres",
+        level="success",
+        center=(float(new_center_lat), float(new_center_lon)),
     )
 
     # Étape 5: Recalculer les temps vers le nouveau centre
-    st.info("🔄 **Étape 5:** Vérification des temps vers le nouveau centre...")
+    notify(
+        progress,
+        "final_times",
+        "🔄 **Étape 5:** Vérification des temps vers le nouveau centre...",
+    )
 
+    final_times = get_transit_time_matrix(
+        friend_points, (new_center_lat, new_center_lon)
+    )[:, 0]
     final_transit_times = {}
-    total_final_time = 0
 
-    for friend in friends:
-        if friend.get("latitude") and friend.get("longitude"):
-            time_minutes = get_transit_time(
-                friend["latitude"], friend["longitude"], new_center_lat, new_center_lon
-            )
-            final_transit_times[friend["name"]] = time_minutes
-            total_final_time += time_minutes
-
-            initial_time = initial_transit_times[friend["name"]]
-            time_diff = time_minutes - initial_time
-            emoji = "✅" if time_diff <= 0 else "⚠️"
-            st.write(
-                f"{emoji} **{friend['name']}**: {time_minutes:.0f} min "
-                f"({time_diff:+.0f} min vs initial)"
-            )
+    for friend, time_minutes, initial_time in zip(located, final_times, initial_times):
+        final_transit_times[friend["name"]] = float(time_minutes)
+
+        time_diff = time_minutes - initial_time
+        emoji = "✅" if time_diff <= 0 else "⚠️"
+        notify(
+            progress,
+            "final_times",
+            f"{emoji} **{friend['name']}**: {time_minutes:.0f} min "
+            f"({time_diff:+.0f} min vs initial)",
+            level="detail",
+        )
 
-    avg_final_time = total_final_time / len(final_transit_times)
+    avg_final_time = float(final_times.mean())
     time_improvement = avg_initial_time - avg_final_time
 
     if time_improvement > 0:
-        st.success(
+        notify(
+            progress,
+            "final_times",
             f"🎉 **Amélioration obtenue !**\n"
             f"⏱️ Temps moyen final: {avg_final_time:.0f} minutes\n"
-            f"📈 Gain: {time_improvement:.0f} minutes en moyenne"
+            f"📈 Gain: {time_improvement:.0f} minutes en moyenne",
+            level="success",
+            avg_time=avg_final_time,
         )
     else:
-        st.info(
+        notify(
+            progress,
+            "final_times",
             f"ℹ️ **Résultat:**\n"
             f"⏱️ Temps moyen final: {avg_final_time:.0f} minutes\n"
-            f"📊 Différence: {time_improvement:+.0f} minutes"
+            f"📊 Différence: {time_improvement:+.0f} minutes",
+            avg_time=avg_final_time,
         )
 
     # Informations de calcul pour le debug/affichage
@@ -202,11 +451,31 @@ def calculate_weighted_center_by_transit_time(friends):
         "avg_final_time": avg_final_time,
         "time_improvement": time_improvement,
         "displacement_km": displacement_km,
+        "objective": objective,
+        "iterations": result["iterations"],
+        "converged": result["converged"],
+        "stop_reason": result["stop_reason"],
+        "elapsed_ms": result["elapsed_ms"],
+        "trace": result["trace"],
     }
 
     return float(new_center_lat), float(new_center_lon), final_transit_times, calc_info
 
 
+def calculate_average_transit_times(bars, friends):
+    """
+    Calcule le temps de trajet moyen en transport vers chaque bar.
+
+    Args:
+        bars (list): Liste des bars avec leurs clés "lat" et "lon"
+        friends (list): Liste des amis
+
+    Returns:
+        np.ndarray: Temps de trajet moyen en minutes pour chaque bar
+    """
+    return average_cost_by_bar(bars, friends, get_transit_time_matrix)
+
+
 def calculate_average_transit_time(bar_lat, bar_lon, friends):
     """
     Calcule le temps de trajet moyen en transport pour aller à un bar.
@@ -219,12 +488,7 @@ def calculate_average_transit_time(bar_lat, bar_lon, friends):
     Returns:
         float: Temps de trajet moyen en minutes
     """
-    times = []
-    for friend in friends:
-        if friend.get("latitude") and friend.get("longitude"):
-            time_minutes = get_transit_time(
-                friend["latitude"], friend["longitude"], bar_lat, bar_lon
-            )
-            times.append(time_minutes)
-
-    return np.mean(times) if times else float("inf")
+    averages = calculate_average_transit_times(
+        [{"lat": bar_lat, "lon": bar_lon}], friends
+    )
+    return float(averages[0])
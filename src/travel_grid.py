@@ -0,0 +1,440 @@
+"""
+Module pour la grille précalculée des temps de trajet en transport.
+
+La zone desservie (par défaut l'Île-de-France) est découpée en cellules
+carrées ; les temps de trajet de chaque cellule vers chaque autre sont
+calculés une fois, avec le calcul configuré (estimation par la distance ou
+itinéraires GTFS, voir `src.transit_utils`), puis enregistrés dans un
+fichier lu par projection en mémoire (`np.memmap`) :
+
+- un en-tête JSON de quelques centaines d'octets (zone, taille des
+  cellules, calcul utilisé, date de construction) ;
+- l'indice de ligne de la matrice pour chaque cellule de la zone (-1 pour
+  une cellule sans desserte) ;
+- la matrice cellules × cellules des temps en dixièmes de minute
+  (entiers de 16 bits : 4 fois moins de place que des flottants).
+
+Un temps de trajet se lit alors par interpolation bilinéaire entre les
+centres des quatre cellules qui entourent chaque point : deux bars d'une
+même cellule gardent des temps différents. Les paires de points trop
+proches (moins de `NEAR_CELLS` cellules, trajets à pied compris) ne sont
+pas lues dans la grille : l'appelant les calcule avec le calcul qui a
+construit la grille. Les processus Streamlit qui ouvrent le même fichier
+en partagent les pages par le cache du système : seules les lignes lues
+sont chargées, une fois pour tous.
+
+Construction de la grille :
+
+    python -m src.travel_grid --backend gtfs --cell-km 1
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from src.geo_utils import as_points, distance_matrix, km_per_degree, pairwise_distances
+from src.gtfs_router import ACCESS_MAX_KM, WALK_S_PER_KM, get_transit_router
+from src.paths import data_path
+
+
+DEFAULT_GRID_FILE = os.environ.get(
+    "OUCEKONBOI_TRAVEL_GRID", data_path("travel_grid.bin")
+)
+
+# Zone couverte par défaut : (sud, ouest, nord, est) de l'Île-de-France
+ILE_DE_FRANCE_BBOX = (48.12, 1.44, 49.24, 3.56)
+DEFAULT_CELL_KM = 1.0
+
+# Temps enregistrés en dixièmes de minute, sur 16 bits (jusqu'à 109 h)
+UNITS_PER_MINUTE = 10
+MAX_UNITS = np.iinfo(np.uint16).max
+
+# Distance moyenne entre deux points d'un carré de côté 1
+MEAN_INTRA_CELL_DISTANCE = 0.5214
+
+# Distance (en côtés de cellule) sous laquelle une paire n'est pas lue dans
+# la grille : l'interpolation y mêlerait les temps à l'intérieur d'une cellule
+NEAR_CELLS = 2.0
+
+GRID_MAGIC = b"OUCEKGRD"
+GRID_FORMAT = 1
+# Alignement des tableaux (taille d'une page mémoire)
+PAGE_BYTES = 4096
+
+# Nombre de cellules d'origine calculées à la fois pendant la construction
+BUILD_CHUNK = 64
+
+
+def _aligned(offset):
+    """Arrondit une position du fichier à la page suivante."""
+    return -(-offset // PAGE_BYTES) * PAGE_BYTES
+
+
+class GridLayout:
+    """
+    Découpage d'une zone en cellules carrées d'environ `cell_km` de côté.
+
+    Le pas en longitude est calculé à la latitude du centre de la zone.
+
+    Args:
+        bbox (tuple): (sud, ouest, nord, est) en degrés
+        cell_km (float): Côté des cellules en km
+    """
+
+    def __init__(self, bbox, cell_km):
+        self.bbox = tuple(float(value) for value in bbox)
+        self.cell_km = float(cell_km)
+        south, west, north, east = self.bbox
+        km_per_deg_lat, km_per_deg_lon = km_per_degree((south + north) / 2)
+        self.lat_step = self.cell_km / km_per_deg_lat
+        self.lon_step = self.cell_km / km_per_deg_lon
+        self.rows = int(np.ceil((north - south) / self.lat_step))
+        self.cols = int(np.ceil((east - west) / self.lon_step))
+
+    def __len__(self):
+        return self.rows * self.cols
+
+    def cells(self, points):
+        """
+        Renvoie la cellule de chaque point.
+
+        Args:
+            points: Séquence de points (lat, lon)
+
+        Returns:
+            np.ndarray: Numéro de cellule (ligne × colonnes + colonne), -1
+                hors de la zone
+        """
+        points = as_points(points)
+        rows = np.floor((points[:, 0] - self.bbox[0]) / self.lat_step).astype(np.int64)
+        cols = np.floor((points[:, 1] - self.bbox[1]) / self.lon_step).astype(np.int64)
+        inside = (rows >= 0) & (rows < self.rows) & (cols >= 0) & (cols < self.cols)
+        return np.where(inside, rows * self.cols + cols, -1)
+
+    def centers(self):
+        """
+        Renvoie le centre de chaque cellule.
+
+        Returns:
+            np.ndarray: Tableau (cellules, 2) de (latitude, longitude)
+        """
+        rows, cols = np.divmod(np.arange(len(self)), self.cols)
+        return np.column_stack(
+            (
+                self.bbox[0] + (rows + 0.5) * self.lat_step,
+                self.bbox[1] + (cols + 0.5) * self.lon_step,
+            )
+        )
+
+
+def build_grid(
+    grid_file=DEFAULT_GRID_FILE,
+    backend=None,
+    bbox=ILE_DE_FRANCE_BBOX,
+    cell_km=DEFAULT_CELL_KM,
+    progress=None,
+):
+    """
+    Construit (ou remplace) la grille des temps de trajet.
+
+    Avec les horaires GTFS, seules les cellules à portée de marche d'un
+    arrêt sont retenues ; les autres points sont calculés à la demande.
+    La matrice est écrite par blocs de lignes directement dans le fichier :
+    la mémoire utilisée ne dépend pas de la taille de la grille.
+
+    Args:
+        grid_file (str): Fichier à créer
+        backend (str): Calcul des temps, "heuristic" ou "gtfs" (par défaut
+            celui de `src.transit_utils`)
+        bbox (tuple): Zone couverte (sud, ouest, nord, est)
+        cell_km (float): Côté des cellules en km
+        progress (callable): Fonction recevant (lignes calculées, total)
+
+    Returns:
+        dict: En-tête de la grille (nombre de cellules, durée de construction...)
+    """
+    from src.transit_utils import (
+        DEFAULT_TRANSIT_BACKEND,
+        get_transit_time_matrix,
+        transit_data_version,
+    )
+
+    started = time.perf_counter()
+    backend = backend or DEFAULT_TRANSIT_BACKEND
+    if backend == "grid":
+        raise ValueError(
+            "La grille se construit avec un autre calcul (heuristic ou gtfs)"
+        )
+    layout = GridLayout(bbox, cell_km)
+    centers = layout.centers()
+
+    active = np.ones(len(layout), dtype=bool)
+    if backend == "gtfs":
+        # Cellules dont le centre est à portée de marche d'un arrêt
+        cell_idx, _, _ = get_transit_router().stop_grid.query(centers, ACCESS_MAX_KM)
+        active[:] = False
+        active[cell_idx] = True
+    count = int(active.sum())
+    cell_rows = np.full(len(layout), -1, dtype=np.int32)
+    cell_rows[active] = np.arange(count, dtype=np.int32)
+    active_centers = centers[active]
+
+    header = {
+        "format": GRID_FORMAT,
+        "bbox": layout.bbox,
+        "cell_km": layout.cell_km,
+        "rows": layout.rows,
+        "cols": layout.cols,
+        "cells": count,
+        "backend": backend,
+        "data_version": transit_data_version(backend),
+        "units_per_minute": UNITS_PER_MINUTE,
+    }
+    cell_rows_offset = PAGE_BYTES
+    matrix_offset = _aligned(cell_rows_offset + cell_rows.nbytes)
+    header.update(cell_rows_offset=cell_rows_offset, matrix_offset=matrix_offset)
+
+    directory = os.path.dirname(grid_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # Écriture dans un fichier temporaire puis remplacement atomique : les
+    # processus qui lisent l'ancienne grille gardent leur projection
+    tmp_file = grid_file + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.truncate(matrix_offset + count * count * 2)
+    matrix = np.memmap(
+        tmp_file, dtype=np.uint16, mode="r+", offset=matrix_offset, shape=(count, count)
+    )
+    # Deux points d'une même cellule : marche sur la distance moyenne
+    intra_cell = MEAN_INTRA_CELL_DISTANCE * cell_km * WALK_S_PER_KM / 60
+    for start in range(0, count, BUILD_CHUNK):
+        stop = min(start + BUILD_CHUNK, count)
+        minutes = get_transit_time_matrix(
+            active_centers[start:stop],
+            active_centers,
+            method="equirectangular",
+            backend=backend,
+        )
+        minutes[np.arange(stop - start), np.arange(start, stop)] = intra_cell
+        matrix[start:stop] = np.minimum(
+            np.rint(minutes * UNITS_PER_MINUTE), MAX_UNITS
+        ).astype(np.uint16)
+        if progress:
+            progress(stop, count)
+    matrix.flush()
+    del matrix
+
+    header["build_s"] = round(time.perf_counter() - started, 2)
+    header["built_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    encoded = json.dumps(header).encode()
+    if len(GRID_MAGIC) + 4 + len(encoded) > cell_rows_offset:
+        raise ValueError("En-tête de la grille trop long")
+    with open(tmp_file, "r+b") as f:
+        f.write(GRID_MAGIC + len(encoded).to_bytes(4, "little") + encoded)
+        f.seek(cell_rows_offset)
+        f.write(cell_rows.tobytes())
+    os.replace(tmp_file, grid_file)
+    return header
+
+
+class TravelGrid:
+    """
+    Grille précalculée des temps de trajet, en lecture seule.
+
+    Le fichier est projeté en mémoire : rien n'est lu à l'ouverture, et les
+    pages lues sont partagées entre processus par le cache du système.
+
+    Args:
+        grid_file (str): Fichier créé par `build_grid`
+    """
+
+    def __init__(self, grid_file=DEFAULT_GRID_FILE):
+        if not os.path.exists(grid_file):
+            raise FileNotFoundError(
+                f"Grille des temps de trajet introuvable: {grid_file} "
+                f"(construisez-la avec `python -m src.travel_grid`)"
+            )
+        self.grid_file = grid_file
+        # Version des données : change à chaque reconstruction de la grille
+        stat = os.stat(grid_file)
+        self.version = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+        with open(grid_file, "rb") as f:
+            if f.read(len(GRID_MAGIC)) != GRID_MAGIC:
+                raise ValueError(f"Fichier de grille invalide: {grid_file}")
+            length = int.from_bytes(f.read(4), "little")
+            self.header = json.loads(f.read(length))
+
+        self.layout = GridLayout(self.header["bbox"], self.header["cell_km"])
+        self.backend = self.header["backend"]
+        count = self.header["cells"]
+        self.cell_rows = np.memmap(
+            grid_file,
+            dtype=np.int32,
+            mode="r",
+            offset=self.header["cell_rows_offset"],
+            shape=(len(self.layout),),
+        )
+        self.matrix = np.memmap(
+            grid_file,
+            dtype=np.uint16,
+            mode="r",
+            offset=self.header["matrix_offset"],
+            shape=(count, count),
+        )
+
+    def matrix_rows(self, points):
+        """
+        Renvoie la ligne de la matrice de chaque point.
+
+        Args:
+            points: Séquence de points (lat, lon)
+
+        Returns:
+            np.ndarray: Ligne de la matrice, -1 hors de la grille
+        """
+        cells = self.layout.cells(points)
+        return np.where(cells >= 0, self.cell_rows[np.maximum(cells, 0)], -1)
+
+    def _corners(self, points):
+        """
+        Renvoie les lignes de la matrice des quatre cellules dont les centres
+        entourent chaque point, leurs poids d'interpolation bilinéaire
+        (répartis sur les cellules desservies) et si le point est lisible.
+        """
+        layout = self.layout
+        points = as_points(points)
+        y = (points[:, 0] - layout.bbox[0]) / layout.lat_step - 0.5
+        x = (points[:, 1] - layout.bbox[1]) / layout.lon_step - 0.5
+        row0, col0 = np.floor(y), np.floor(x)
+        fy, fx = y - row0, x - col0
+        rows, weights = [], []
+        for d_row, w_row in ((0, 1 - fy), (1, fy)):
+            for d_col, w_col in ((0, 1 - fx), (1, fx)):
+                row = np.clip(row0 + d_row, 0, layout.rows - 1).astype(np.int64)
+                col = np.clip(col0 + d_col, 0, layout.cols - 1).astype(np.int64)
+                rows.append(self.cell_rows[row * layout.cols + col])
+                weights.append(w_row * w_col)
+        rows, weights = np.array(rows), np.array(weights)
+        weights = np.where(rows >= 0, weights, 0.0)
+        # La cellule du point est l'un des quatre coins, de poids >= 1/4
+        readable = self.matrix_rows(points) >= 0
+        weights /= np.where(readable, weights.sum(axis=0), 1.0)
+        return np.maximum(rows, 0), weights, readable
+
+    def _near(self, distances_km):
+        """Paires trop proches pour être lues dans la grille."""
+        return distances_km < NEAR_CELLS * self.layout.cell_km
+
+    def time_matrix(self, origins, destinations):
+        """
+        Lit les temps de trajet de chaque origine vers chaque destination.
+
+        Args:
+            origins: Séquence de N points (lat, lon) d'origine
+            destinations: Séquence de M points (lat, lon) de destination
+
+        Returns:
+            np.ndarray: Matrice (N, M) des temps en minutes (NaN pour les
+                points hors de la grille et les paires trop proches)
+        """
+        o_rows, o_weights, o_readable = self._corners(origins)
+        d_rows, d_weights, d_readable = self._corners(destinations)
+        units = np.zeros((len(o_readable), len(d_readable)))
+        for o_row, o_weight in zip(o_rows, o_weights):
+            for d_row, d_weight in zip(d_rows, d_weights):
+                units += (
+                    o_weight[:, None] * d_weight * self.matrix[np.ix_(o_row, d_row)]
+                )
+        minutes = units / UNITS_PER_MINUTE
+        near = self._near(distance_matrix(origins, destinations, "equirectangular"))
+        minutes[near] = np.nan
+        minutes[~o_readable, :] = np.nan
+        minutes[:, ~d_readable] = np.nan
+        return minutes
+
+    def time_pairs(self, origins, destinations):
+        """
+        Lit les temps de trajet pour des paires de points.
+
+        Args:
+            origins: Séquence de N points (lat, lon) d'origine
+            destinations: Séquence de N points (lat, lon) de destination
+
+        Returns:
+            np.ndarray: Temps en minutes de origins[i] à destinations[i]
+                (NaN pour les points hors de la grille et les paires trop
+                proches)
+        """
+        o_rows, o_weights, o_readable = self._corners(origins)
+        d_rows, d_weights, d_readable = self._corners(destinations)
+        units = np.zeros(len(o_readable))
+        for o_row, o_weight in zip(o_rows, o_weights):
+            for d_row, d_weight in zip(d_rows, d_weights):
+                units += o_weight * d_weight * self.matrix[o_row, d_row]
+        near = self._near(pairwise_distances(origins, destinations, "equirectangular"))
+        return np.where(
+            o_readable & d_readable & ~near, units / UNITS_PER_MINUTE, np.nan
+        )
+
+
+_grids = {}
+_grids_lock = threading.Lock()
+
+
+def get_travel_grid(grid_file=DEFAULT_GRID_FILE):
+    """
+    Renvoie la grille des temps de trajet partagée par le processus.
+
+    Args:
+        grid_file (str): Fichier de la grille
+
+    Returns:
+        TravelGrid: Grille projetée en mémoire
+    """
+    with _grids_lock:
+        if grid_file not in _grids:
+            _grids[grid_file] = TravelGrid(grid_file)
+        return _grids[grid_file]
+
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande pour construire la grille."""
+    parser = argparse.ArgumentParser(
+        description="Précalcule la grille des temps de trajet entre cellules."
+    )
+    parser.add_argument("--grid", default=DEFAULT_GRID_FILE, help="Fichier à créer")
+    parser.add_argument(
+        "--backend",
+        choices=("heuristic", "gtfs"),
+        help="Calcul des temps (par défaut OUCEKONBOI_TRANSIT_BACKEND)",
+    )
+    parser.add_argument("--cell-km", type=float, default=DEFAULT_CELL_KM)
+    parser.add_argument(
+        "--bbox",
+        type=float,
+        nargs=4,
+        default=ILE_DE_FRANCE_BBOX,
+        metavar=("SUD", "OUEST", "NORD", "EST"),
+    )
+    args = parser.parse_args(argv)
+
+    def progress(done, total):
+        print(f"\r{done}/{total} cellules", end="", file=sys.stderr, flush=True)
+
+    header = build_grid(args.grid, args.backend, args.bbox, args.cell_km, progress)
+    size_mb = os.path.getsize(args.grid) / 2**20
+    print(
+        f"\n✅ {header['cells']} cellules de {header['cell_km']} km "
+        f"({header['backend']}) en {header['build_s']:.1f} s, "
+        f"{size_mb:.1f} Mo dans {args.grid}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,19 @@ Module pour les composants de l'interface utilisateur.
 
 import streamlit as st
 import pandas as pd
-from geopy.distance import geodesic
+
+from src.bar_finder import MAX_SEARCH_RADIUS_KM
+from src.data_manager import DEFAULT_GROUP, create_group, list_groups
+from src.geo_utils import (
+    calculate_distance_to_center,
+    distance_matrix,
+    friends_coordinates,
+    located_friends,
+)
+from src.metrics import summary
+from src.pipeline import STAGE_LABELS, invalidate_stages
+from src.profiling import Profile
+from src.street_graph import PROFILE_LABELS
 
 
 def display_header():
@@ -13,6 +25,51 @@ def display_header():
     st.markdown("### Découvrez les meilleurs bars proches de vos amis")
 
 
+def select_group():
+    """
+    Affiche le choix du groupe dans la barre latérale.
+
+    Le groupe choisi est gardé dans la session et dans l'URL (`?group=...`),
+    si bien qu'une équipe peut partager le lien de son groupe.
+
+    Returns:
+        str: Identifiant du groupe sélectionné
+    """
+    groups = list_groups()
+    names = {group["id"]: f"{group['name']} ({group['size']})" for group in groups}
+
+    if "group_id" not in st.session_state:
+        requested = st.query_params.get("group", DEFAULT_GROUP)
+        st.session_state["group_id"] = (
+            requested if requested in names else DEFAULT_GROUP
+        )
+    elif st.session_state["group_id"] not in names:
+        st.session_state["group_id"] = DEFAULT_GROUP
+
+    with st.sidebar:
+        group_id = st.selectbox(
+            "👥 Groupe",
+            list(names),
+            format_func=names.get,
+            key="group_id",
+        )
+
+        with st.expander("➕ Nouveau groupe"):
+            st.text_input("Nom du groupe", key="new_group_name")
+            st.button("Créer le groupe", on_click=_create_group_from_input)
+
+    st.query_params["group"] = group_id
+    return group_id
+
+
+def _create_group_from_input():
+    """Crée le groupe saisi et le sélectionne (rappel du bouton de création)."""
+    name = st.session_state.get("new_group_name", "").strip()
+    if name:
+        st.session_state["group_id"] = create_group(name)
+        st.session_state["new_group_name"] = ""
+
+
 def display_no_friends_warning():
     """Affiche un avertissement si aucun ami n'est enregistré."""
     st.warning(
@@ -21,6 +78,38 @@ def display_no_friends_warning():
     st.stop()
 
 
+def display_progress_events(events):
+    """
+    Affiche les étapes d'un calcul du moteur (voir `src.progress`).
+
+    Les erreurs et avertissements sont toujours affichés ; les autres
+    étapes sont repliées quand il y en a plusieurs.
+
+    Args:
+        events (list): Événements de progression
+    """
+    for event in events:
+        if event["level"] == "error":
+            st.error(event["message"])
+        elif event["level"] == "warning":
+            st.warning(event["message"])
+
+    steps = [event for event in events if event["level"] not in ("error", "warning")]
+    if len(steps) > 1:
+        container = st.expander("🧮 Détail des étapes du calcul")
+    else:
+        container = st.container()
+
+    with container:
+        for event in steps:
+            if event["level"] == "success":
+                st.success(event["message"])
+            elif event["level"] == "detail":
+                st.write(event["message"])
+            else:
+                st.info(event["message"])
+
+
 def display_center_info(center_lat, center_lon):
     """
     Affiche les informations sur le centre géographique.
@@ -44,7 +133,7 @@ def display_center_info(center_lat, center_lon):
         radius_km = st.slider(
             "🔍 Rayon de recherche (km)",
             min_value=0.05,
-            max_value=2.0,
+            max_value=MAX_SEARCH_RADIUS_KM,
             value=0.6,
             step=0.1,
             help="Distance maximum pour rechercher les bars autour du centre du groupe",
@@ -144,6 +233,7 @@ def display_best_bar_details(
     use_transit=False,
     metric_type="Distance moyenne",
     metric_unit="km",
+    network_profile=None,
 ):
     """
     Affiche les détails du meilleur bar recommandé.
@@ -156,6 +246,8 @@ def display_best_bar_details(
         use_transit (bool): Si True, utilise les temps de transport
         metric_type (str): Type de métrique
         metric_unit (str): Unité de métrique
+        network_profile (str): "walk" ou "bike" pour les distances
+            individuelles sur le réseau de rues
     """
     st.subheader("🎯 Recommandation principale")
 
@@ -169,9 +261,9 @@ def display_best_bar_details(
         center_metric = f"{time_to_center:.0f} min"
         center_label = "🚇 Temps vers le centre"
     else:
-        distance_to_center = geodesic(
-            (best_bar["lat"], best_bar["lon"]), (center_lat, center_lon)
-        ).kilometers
+        distance_to_center = calculate_distance_to_center(
+            best_bar["lat"], best_bar["lon"], center_lat, center_lon
+        )
         center_metric = f"{distance_to_center:.1f} km"
         center_label = "🎯 Distance du centre"
 
@@ -197,29 +289,163 @@ def display_best_bar_details(
         st.markdown(f"**📊 {metric_type} individuelles :**")
 
         if use_transit:
-            from src.transit_utils import get_transit_time
-
-            for friend in friends:
-                if friend.get("latitude") and friend.get("longitude"):
-                    time_minutes = get_transit_time(
-                        friend["latitude"],
-                        friend["longitude"],
-                        best_bar["lat"],
-                        best_bar["lon"],
-                    )
-                    st.write(f"🚇 {friend['name']}: {time_minutes:.0f} min")
+            from src.transit_utils import get_transit_time_matrix
+
+            times = get_transit_time_matrix(
+                friends_coordinates(friends), (best_bar["lat"], best_bar["lon"])
+            )[:, 0]
+            for friend, time_minutes in zip(located_friends(friends), times):
+                st.write(f"🚇 {friend['name']}: {time_minutes:.0f} min")
+        elif network_profile:
+            from src.street_graph import network_distance_matrix
+
+            distances = network_distance_matrix(
+                friends_coordinates(friends),
+                (best_bar["lat"], best_bar["lon"]),
+                network_profile,
+            )[:, 0]
+            for friend, distance in zip(located_friends(friends), distances):
+                st.write(
+                    f"• {friend['name']}: {distance:.1f} km "
+                    f"{PROFILE_LABELS[network_profile]}"
+                )
         else:
-            for friend in friends:
-                if friend.get("latitude") and friend.get("longitude"):
-                    distance = geodesic(
-                        (best_bar["lat"], best_bar["lon"]),
-                        (friend["latitude"], friend["longitude"]),
-                    ).kilometers
-                    st.write(f"• {friend['name']}: {distance:.1f} km")
-
-
-def display_refresh_button():
-    """Affiche le bouton de rafraîchissement."""
-    if st.button("🔄 Recalculer les recommandations"):
-        st.cache_data.clear()
+            distances = distance_matrix(
+                (best_bar["lat"], best_bar["lon"]), friends_coordinates(friends)
+            )[0]
+            for friend, distance in zip(located_friends(friends), distances):
+                st.write(f"• {friend['name']}: {distance:.1f} km")
+
+
+def display_refresh_button(stage_keys):
+    """
+    Affiche le bouton de rafraîchissement des étapes choisies.
+
+    Seules les entrées du calcul affiché sont invalidées : les autres
+    groupes et sessions gardent leurs résultats en cache.
+
+    Args:
+        stage_keys (dict): {étape: clé de cache} du calcul affiché
+    """
+    stages = st.multiselect(
+        "Étapes à recalculer :",
+        list(stage_keys),
+        default=list(stage_keys),
+        format_func=STAGE_LABELS.get,
+    )
+    if st.button("🔄 Recalculer les recommandations", disabled=not stages):
+        invalidate_stages(stage_keys, stages)
         st.rerun()
+
+
+def display_performance_panel(trace):
+    """
+    Affiche le temps passé dans chaque étape, si l'option est cochée.
+
+    Le tableau des étapes de l'exécution en cours est complété des
+    percentiles mesurés depuis le démarrage du serveur (voir `src.metrics`).
+
+    Args:
+        trace (list): Spans de l'exécution en cours (`start_trace`)
+    """
+    if not st.sidebar.toggle("⏱️ Mesures de performance", key="show_performance"):
+        return
+
+    process_stats = summary()
+    with st.expander("⏱️ Performance"):
+        st.caption(
+            f"Exécution en cours : {sum(s['ms'] for s in trace):.0f} ms mesurées "
+            f"en {len(trace)} étapes"
+        )
+        st.dataframe(
+            pd.DataFrame(
+                [
+                    {
+                        "Étape": s["span"],
+                        "Durée (ms)": round(s["ms"], 1),
+                        "Cache": "✅" if s["cached"] else "",
+                        "p50 (ms)": round(process_stats[s["span"]]["p50_ms"], 1),
+                        "p95 (ms)": round(process_stats[s["span"]]["p95_ms"], 1),
+                        "Appels": process_stats[s["span"]]["count"],
+                    }
+                    for s in trace
+                ]
+            ),
+            hide_index=True,
+            use_container_width=True,
+        )
+
+
+def start_requested_profile():
+    """
+    Démarre le profil de l'exécution si la page est ouverte avec `?profile=1`.
+
+    Le paramètre est retiré de l'adresse : seule cette exécution est
+    profilée.
+
+    Returns:
+        Profile: Profil en cours, ou None (aucun surcoût)
+    """
+    if st.query_params.get("profile") != "1":
+        return None
+    del st.query_params["profile"]
+    try:
+        return Profile().start()
+    except ValueError:
+        st.warning("⚠️ Un autre profil est en cours, réessayez dans un instant.")
+        return None
+
+
+def display_profile_report(profile):
+    """
+    Arrête le profil de l'exécution et affiche le dernier profil de la session.
+
+    Le profil reste affiché aux exécutions suivantes (téléchargements)
+    jusqu'à sa fermeture.
+
+    Args:
+        profile (Profile): Profil en cours, ou None
+    """
+    if profile is not None:
+        st.session_state["profile_report"] = profile.stop()
+    report = st.session_state.get("profile_report")
+    if report is None:
+        return
+
+    with st.expander("🔬 Profil de l'exécution", expanded=True):
+        st.caption(f"Exécution profilée en {report.elapsed_ms:.0f} ms")
+        st.dataframe(
+            pd.DataFrame(
+                [
+                    {
+                        "Fonction": row["function"],
+                        "Appels": row["calls"],
+                        "Temps propre (ms)": round(row["self_ms"], 1),
+                        "Temps cumulé (ms)": round(row["cumulative_ms"], 1),
+                    }
+                    for row in report.top_functions()
+                ]
+            ),
+            hide_index=True,
+            use_container_width=True,
+        )
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.download_button(
+                "📥 Profil brut (.prof)",
+                report.raw_profile(),
+                file_name="oucekonboi.prof",
+                mime="application/octet-stream",
+            )
+        with col2:
+            st.download_button(
+                "🔥 Piles pour flamegraph",
+                report.collapsed_stacks(),
+                file_name="oucekonboi.collapsed.txt",
+                mime="text/plain",
+            )
+        with col3:
+            if st.button("✖️ Fermer le profil"):
+                del st.session_state["profile_report"]
+                st.rerun()
@@ -0,0 +1,471 @@
+"""
+Module pour le préchauffage des caches à partir des requêtes fréquentes.
+
+La page principale enregistre les recommandations affichées dans un
+journal (`QueryLog`) : groupe, version, mode, objectif, rayon, centre et
+durée du calcul. Une session n'enregistre une requête que lorsque ses
+paramètres changent (les réexécutions de la page ne comptent pas), et
+seulement si le journal est actif (`QUERY_LOG_ENABLED`). Les lignes plus
+anciennes que la période de rétention sont supprimées. Le préchauffage
+rejoue ensuite :
+
+- les requêtes (groupe, mode, objectif, rayon) les plus fréquentes de la
+  période récente, sur la version actuelle du groupe, à travers toutes les
+  étapes de `src.pipeline` (résultats gardés en mémoire et dans le
+  stockage partagé, voir `src.result_store`) ;
+- les zones de la carte les plus demandées (tuiles de `src.overpass_cache`)
+  à travers `get_bars_around_center`, ce qui remplit le cache de tuiles.
+
+Le nombre de requêtes Overpass envoyées est borné par un budget ; les
+appels passent par le client HTTP partagé et respectent donc ses limites
+de débit. La durée de calcul à froid de chaque requête préchauffée est
+enregistrée : `latency_saved` compare ensuite les visites suivantes à
+cette durée pour estimer le temps gagné.
+
+Le préchauffage tourne dans un thread de l'application
+(`start_warmup_thread`, activé par OUCEKONBOI_WARMUP_INTERVAL_S) ou en
+ligne de commande :
+
+    python -m src.warmup --budget 20 --top 20 --areas 10
+    python -m src.warmup --report
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+from src.bar_finder import MAX_SEARCH_RADIUS_KM, get_bars_around_center
+from src.data_manager import get_group_version, list_groups
+from src.overpass_cache import TILE_DEG, get_overpass_cache, tile_of
+from src.paths import data_path
+from src.pipeline import content_hash, recommend
+
+
+DEFAULT_LOG_FILE = os.environ.get("OUCEKONBOI_QUERY_LOG", data_path("query_log.sqlite"))
+
+# Période des requêtes prises en compte et budget de requêtes Overpass
+DEFAULT_WINDOW_S = 24 * 3600
+DEFAULT_BUDGET = 20
+DEFAULT_TOP_QUERIES = 20
+DEFAULT_TOP_AREAS = 10
+
+# Intervalle entre deux préchauffages du thread de l'application (0 : inactif)
+WARMUP_INTERVAL_S = float(os.environ.get("OUCEKONBOI_WARMUP_INTERVAL_S", "0"))
+
+# Le journal n'est tenu que si le préchauffage en a l'usage : thread actif,
+# ou OUCEKONBOI_QUERY_LOG_ENABLED=1 pour un préchauffage en ligne de commande
+QUERY_LOG_ENABLED = (
+    WARMUP_INTERVAL_S > 0 or os.environ.get("OUCEKONBOI_QUERY_LOG_ENABLED", "0") == "1"
+)
+
+# Durée de conservation des requêtes du journal
+QUERY_LOG_RETENTION_S = float(
+    os.environ.get("OUCEKONBOI_QUERY_LOG_RETENTION_S", DEFAULT_WINDOW_S)
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS queries (
+    id INTEGER PRIMARY KEY,
+    at REAL NOT NULL,
+    query_key TEXT NOT NULL,
+    group_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    mode TEXT NOT NULL,
+    objective TEXT,
+    radius_km REAL NOT NULL,
+    center_lat REAL NOT NULL,
+    center_lon REAL NOT NULL,
+    latency_ms REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS queries_at ON queries (at);
+CREATE TABLE IF NOT EXISTS warmups (
+    query_key TEXT PRIMARY KEY,
+    warmed_at REAL NOT NULL,
+    cold_ms REAL NOT NULL
+);
+"""
+
+
+def query_key(group_id, version, mode, objective, radius_km):
+    """
+    Renvoie la clé d'une requête de recommandation.
+
+    Args:
+        group_id (str): Identifiant du groupe
+        version (int): Version du groupe
+        mode (str): "distance" ou "transit"
+        objective (str): Objectif d'optimisation (None en mode "distance")
+        radius_km (float): Rayon de recherche en km
+
+    Returns:
+        str: Empreinte de la requête
+    """
+    return content_hash(group_id, version, mode, objective, float(radius_km))
+
+
+class QueryLog:
+    """
+    Journal des recommandations demandées et des préchauffages.
+
+    Args:
+        log_file (str): Fichier SQLite du journal
+        retention_s (float): Durée de conservation des requêtes en secondes
+    """
+
+    def __init__(self, log_file=DEFAULT_LOG_FILE, retention_s=QUERY_LOG_RETENTION_S):
+        self.log_file = log_file
+        self.retention_s = retention_s
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(log_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(log_file, timeout=30, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def record(self, group_id, version, mode, objective, radius_km, center, latency_ms):
+        """
+        Enregistre une recommandation demandée.
+
+        Les requêtes plus anciennes que la durée de conservation sont
+        supprimées au passage.
+
+        Args:
+            group_id (str): Identifiant du groupe
+            version (int): Version du groupe
+            mode (str): "distance" ou "transit"
+            objective (str): Objectif d'optimisation (None en mode "distance")
+            radius_km (float): Rayon de recherche en km
+            center (tuple): (latitude, longitude) du centre calculé
+            latency_ms (float): Durée du calcul en millisecondes
+        """
+        key = query_key(group_id, version, mode, objective, radius_km)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM queries WHERE at < ?", (now - self.retention_s,)
+            )
+            self._db.execute(
+                "INSERT INTO queries (at, query_key, group_id, version, mode, "
+                "objective, radius_km, center_lat, center_lon, latency_ms) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    now,
+                    key,
+                    group_id,
+                    version,
+                    mode,
+                    objective,
+                    float(radius_km),
+                    *map(float, center),
+                    latency_ms,
+                ),
+            )
+            self._db.commit()
+
+    def popular_queries(self, since, limit=DEFAULT_TOP_QUERIES):
+        """
+        Renvoie les requêtes les plus fréquentes depuis une date.
+
+        Args:
+            since (float): Horodatage de début de période
+            limit (int): Nombre maximum de requêtes
+
+        Returns:
+            list: {"group_id", "mode", "objective", "radius_km", "count"},
+                de la plus fréquente à la moins fréquente
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT group_id, mode, objective, radius_km, COUNT(*) AS n "
+                "FROM queries WHERE at >= ? "
+                "GROUP BY group_id, mode, objective, radius_km "
+                "ORDER BY n DESC, MAX(at) DESC LIMIT ?",
+                (since, limit),
+            ).fetchall()
+        columns = ("group_id", "mode", "objective", "radius_km", "count")
+        return [dict(zip(columns, row)) for row in rows]
+
+    def busy_areas(self, since, limit=DEFAULT_TOP_AREAS):
+        """
+        Renvoie les zones de la carte les plus demandées depuis une date.
+
+        Les centres sont regroupés par tuile de `TILE_DEG` degrés.
+
+        Args:
+            since (float): Horodatage de début de période
+            limit (int): Nombre maximum de zones
+
+        Returns:
+            list: {"lat", "lon", "count"} (centre de la tuile), de la plus
+                demandée à la moins demandée
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT center_lat, center_lon FROM queries WHERE at >= ?", (since,)
+            ).fetchall()
+        counts = Counter(tile_of(lat, lon) for lat, lon in rows)
+        return [
+            {"lat": (ty + 0.5) * TILE_DEG, "lon": (tx + 0.5) * TILE_DEG, "count": n}
+            for (ty, tx), n in counts.most_common(limit)
+        ]
+
+    def record_warmup(self, key, cold_ms):
+        """
+        Enregistre la durée à froid d'une requête préchauffée.
+
+        Args:
+            key (str): Clé de la requête (voir `query_key`)
+            cold_ms (float): Durée du calcul pendant le préchauffage
+        """
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO warmups VALUES (?, ?, ?)",
+                (key, time.time(), cold_ms),
+            )
+            self._db.commit()
+
+    def latency_saved(self, since=0.0):
+        """
+        Estime le temps gagné grâce au préchauffage.
+
+        Chaque visite postérieure au préchauffage de sa requête compte pour
+        la différence entre la durée à froid et sa durée réelle.
+
+        Args:
+            since (float): Horodatage de début de période
+
+        Returns:
+            dict: Visites servies après préchauffage ("warm_queries"), temps
+                gagné total ("saved_ms") et durées moyennes à froid et à chaud
+        """
+        with self._lock:
+            count, saved, cold, warm = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(MAX(w.cold_ms - q.latency_ms, 0)), 0), "
+                "AVG(w.cold_ms), AVG(q.latency_ms) "
+                "FROM queries q JOIN warmups w ON w.query_key = q.query_key "
+                "WHERE q.at >= w.warmed_at AND q.at >= ?",
+                (since,),
+            ).fetchone()
+        return {
+            "warm_queries": count,
+            "saved_ms": saved,
+            "avg_cold_ms": cold or 0.0,
+            "avg_warm_ms": warm or 0.0,
+        }
+
+
+_log = None
+_log_lock = threading.Lock()
+
+
+def get_query_log():
+    """
+    Renvoie le journal des requêtes partagé par le processus.
+
+    Returns:
+        QueryLog: Journal ouvert sur DEFAULT_LOG_FILE
+    """
+    global _log
+    with _log_lock:
+        if _log is None:
+            _log = QueryLog()
+        return _log
+
+
+def warm_up(
+    log=None,
+    budget=DEFAULT_BUDGET,
+    window_s=DEFAULT_WINDOW_S,
+    top_queries=DEFAULT_TOP_QUERIES,
+    top_areas=DEFAULT_TOP_AREAS,
+    backend=None,
+    pause_s=0.0,
+):
+    """
+    Préchauffe les caches avec les requêtes et les zones les plus demandées.
+
+    Les requêtes sont rejouées une par une, pour laisser le débit amont aux
+    utilisateurs ; le préchauffage s'arrête dès que `budget` requêtes
+    Overpass ont été envoyées.
+
+    Args:
+        log (QueryLog): Journal des requêtes (par défaut celui du processus)
+        budget (int): Nombre maximum de requêtes Overpass
+        window_s (float): Période récente prise en compte, en secondes
+        top_queries (int): Nombre de requêtes fréquentes rejouées
+        top_areas (int): Nombre de zones préchauffées
+        backend (str): Source des bars (voir `BAR_BACKENDS`)
+        pause_s (float): Pause entre deux éléments, en secondes
+
+    Returns:
+        dict: Requêtes et zones préchauffées, requêtes Overpass envoyées,
+            durée à froid cumulée, erreurs et arrêt sur budget
+    """
+    log = log or get_query_log()
+    since = time.time() - window_s
+    overpass = get_overpass_cache()
+    upstream_start = overpass.stats()["upstream_queries"]
+    groups = {group["id"] for group in list_groups()}
+    report = {
+        "queries": 0,
+        "areas": 0,
+        "upstream_requests": 0,
+        "cold_ms": 0.0,
+        "errors": 0,
+        "budget_exhausted": False,
+    }
+
+    def within_budget():
+        used = overpass.stats()["upstream_queries"] - upstream_start
+        report["upstream_requests"] = used
+        if used >= budget:
+            report["budget_exhausted"] = True
+        return not report["budget_exhausted"]
+
+    for query in log.popular_queries(since, top_queries):
+        if query["group_id"] not in groups:
+            continue
+        if not within_budget():
+            return report
+        version = get_group_version(query["group_id"])
+        started = time.perf_counter()
+        try:
+            results = recommend(
+                query["group_id"],
+                version,
+                query["mode"],
+                query["objective"],
+                query["radius_km"],
+                backend,
+            )
+        except Exception:
+            report["errors"] += 1
+            continue
+        cold_ms = (time.perf_counter() - started) * 1000
+        # Déjà chaud : la durée mesurée n'est pas une durée à froid
+        if all(
+            result.cached for stage, result in results.items() if stage != "friends"
+        ):
+            continue
+        log.record_warmup(
+            query_key(
+                query["group_id"],
+                version,
+                query["mode"],
+                query["objective"],
+                query["radius_km"],
+            ),
+            cold_ms,
+        )
+        report["queries"] += 1
+        report["cold_ms"] += cold_ms
+        time.sleep(pause_s)
+
+    for area in log.busy_areas(since, top_areas):
+        if not within_budget():
+            return report
+        get_bars_around_center(
+            area["lat"], area["lon"], MAX_SEARCH_RADIUS_KM, backend, progress=None
+        )
+        report["areas"] += 1
+        time.sleep(pause_s)
+
+    within_budget()
+    return report
+
+
+_warmup_thread = None
+_warmup_thread_lock = threading.Lock()
+
+
+def start_warmup_thread(interval_s=WARMUP_INTERVAL_S, **options):
+    """
+    Lance (une seule fois par processus) le préchauffage périodique.
+
+    Args:
+        interval_s (float): Intervalle entre deux préchauffages en secondes
+            (0 ou moins : rien n'est lancé)
+        **options: Options transmises à `warm_up`
+
+    Returns:
+        threading.Thread: Thread de préchauffage, ou None s'il est inactif
+    """
+    global _warmup_thread
+    if interval_s <= 0:
+        return None
+    with _warmup_thread_lock:
+        if _warmup_thread is None:
+
+            def loop():
+                while True:
+                    try:
+                        warm_up(**options)
+                    except Exception as e:
+                        print(f"⚠️ Préchauffage interrompu : {e}")
+                    time.sleep(interval_s)
+
+            _warmup_thread = threading.Thread(
+                target=loop, name="oucekonboi-warmup", daemon=True
+            )
+            _warmup_thread.start()
+        return _warmup_thread
+
+
+def main(argv=None):
+    """Point d'entrée en ligne de commande du préchauffage."""
+    parser = argparse.ArgumentParser(
+        description="Préchauffe les caches avec les requêtes les plus fréquentes."
+    )
+    parser.add_argument(
+        "--budget", type=int, default=DEFAULT_BUDGET, help="Requêtes Overpass max."
+    )
+    parser.add_argument(
+        "--window-hours",
+        type=float,
+        default=DEFAULT_WINDOW_S / 3600,
+        help="Période des requêtes prises en compte (heures)",
+    )
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP_QUERIES)
+    parser.add_argument("--areas", type=int, default=DEFAULT_TOP_AREAS)
+    parser.add_argument("--backend", default=None, help="Source des bars")
+    parser.add_argument(
+        "--pause", type=float, default=0.0, help="Pause entre deux éléments (s)"
+    )
+    parser.add_argument(
+        "--report",
+        action="store_true",
+        help="Afficher seulement le temps gagné par les préchauffages passés",
+    )
+    args = parser.parse_args(argv)
+
+    if not args.report:
+        report = warm_up(
+            budget=args.budget,
+            window_s=args.window_hours * 3600,
+            top_queries=args.top,
+            top_areas=args.areas,
+            backend=args.backend,
+            pause_s=args.pause,
+        )
+        print(
+            f"🔥 {report['queries']} requêtes et {report['areas']} zones préchauffées "
+            f"({report['upstream_requests']} requêtes Overpass, "
+            f"{report['cold_ms']:.0f} ms de calcul, {report['errors']} erreurs)"
+            + (" — budget épuisé" if report["budget_exhausted"] else "")
+        )
+
+    saved = get_query_log().latency_saved()
+    print(
+        f"⏱️ {saved['warm_queries']} visites servies après préchauffage, "
+        f"{saved['saved_ms'] / 1000:.1f} s gagnées "
+        f"({saved['avg_cold_ms']:.0f} ms à froid, {saved['avg_warm_ms']:.0f} ms à chaud)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests du service HTTP/JSON de recommandation de bars.
+"""
+
+import asyncio
+import json
+import sys
+import os
+import time
+
+import pytest
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+import src.bar_finder as bar_finder
+from src.api import RankingService, serve
+from src.bar_index import BarIndex, build_index
+
+FRIENDS = [
+    {"name": "Alice", "latitude": 48.8620, "longitude": 2.3400},
+    {"name": "Bob", "latitude": 48.8560, "longitude": 2.3520},
+]
+
+
+@pytest.fixture
+def local_index(tmp_path, monkeypatch):
+    """Index local de 40 bars autour du centre de Paris."""
+    source = tmp_path / "bars.json"
+    source.write_text(
+        json.dumps(
+            {
+                "elements": [
+                    {
+                        "type": "node",
+                        "id": i,
+                        "lat": 48.855 + (i % 8) * 0.002,
+                        "lon": 2.340 + (i // 8) * 0.003,
+                        "tags": {"amenity": "bar", "name": f"Bar {i}"},
+                    }
+                    for i in range(40)
+                ]
+            }
+        )
+    )
+    build_index(str(source), str(tmp_path / "bars.sqlite"))
+    index = BarIndex(str(tmp_path / "bars.sqlite"))
+    monkeypatch.setattr(bar_finder, "get_bar_index", lambda: index)
+    bar_finder._cached_bar_candidates.cache_clear()
+    yield index
+    bar_finder._cached_bar_candidates.cache_clear()
+
+
+def rank(service, payload):
+    body = json.dumps(payload).encode()
+    return asyncio.run(service.handle("POST", "/rank", body))
+
+
+def test_rank_returns_bars_and_stage_timings(local_index):
+    """La réponse contient le classement et le temps de chaque étape."""
+    service = RankingService(workers=0, backend="local")
+
+    status, response = rank(service, {"friends": FRIENDS, "top": 3})
+
+    assert status == 200
+    assert len(response["bars"]) == 3
+    distances = [bar["avg_distance"] for bar in response["bars"]]
+    assert distances == sorted(distances)
+    assert set(response["timings_ms"]) == {
+        "geocode",
+        "center",
+        "bar_search",
+        "ranking",
+        "total",
+    }
+
+
+def test_invalid_requests_are_rejected():
+    """Les requêtes invalides reçoivent une erreur 4xx explicite."""
+    service = RankingService(workers=0)
+
+    assert rank(service, {"friends": []})[0] == 400
+    assert rank(service, {"friends": FRIENDS, "mode": "vélo"})[0] == 400
+    assert asyncio.run(service.handle("POST", "/rank", b"{"))[0] == 400
+    assert asyncio.run(service.handle("GET", "/rank", b""))[0] == 405
+    assert asyncio.run(service.handle("GET", "/inconnu", b""))[0] == 404
+
+
+def test_slow_requests_time_out(local_index, monkeypatch):
+    """Une requête qui dépasse le délai reçoit une erreur 504."""
+    service = RankingService(workers=0, backend="local", timeout_s=0.05)
+    monkeypatch.setattr(
+        "src.api.get_bars_around_center", lambda *args: time.sleep(0.2) or []
+    )
+
+    status, response = rank(service, {"friends": FRIENDS})
+
+    assert status == 504
+    assert service.health()["timeouts"] == 1
+
+
+def test_concurrent_requests_over_http(local_index):
+    """Le serveur traite de nombreuses requêtes simultanées."""
+    service = RankingService(workers=0, backend="local")
+
+    async def request(port, path, payload=None):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        body = json.dumps(payload).encode() if payload else b""
+        method = "POST" if payload else "GET"
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode() + body
+        )
+        data = await reader.read()
+        writer.close()
+        head, _, body = data.partition(b"\r\n\r\n")
+        return int(head.split()[1]), json.loads(body)
+
+    async def scenario():
+        server = await serve(service, port=0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            results = await asyncio.gather(
+                *(request(port, "/rank", {"friends": FRIENDS}) for _ in range(50))
+            )
+            health = await request(port, "/health")
+        return results, health
+
+    results, (health_status, health) = asyncio.run(scenario())
+
+    assert [status for status, _ in results] == [200] * 50
+    assert health_status == 200
+    assert health["requests"] == 50 and health["in_flight"] == 0
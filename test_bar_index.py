@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Tests de l'index spatial local des bars.
+"""
+
+import sys
+import os
+import json
+import threading
+
+import pytest
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from src import bar_finder
+from src.bar_index import BarIndex, build_index, get_bar_index
+
+
+def _write_source(path, bars):
+    elements = [
+        {
+            "type": "node",
+            "id": id_,
+            "lat": lat,
+            "lon": lon,
+            "tags": {"amenity": amenity, "name": f"Bar {id_}"},
+        }
+        for id_, lat, lon, amenity in bars
+    ]
+    path.write_text(json.dumps({"elements": elements}))
+    return str(path)
+
+
+@pytest.fixture
+def index_file(tmp_path):
+    source = _write_source(
+        tmp_path / "bars.json",
+        [
+            (1, 48.8566, 2.3522, "bar"),
+            (2, 48.8600, 2.3522, "pub"),
+            (3, 48.8566, 2.3700, "bar"),
+            (4, 48.8570, 2.3525, "restaurant"),
+        ],
+    )
+    path = str(tmp_path / "bars.sqlite")
+    build_index(source, path)
+    return path
+
+
+def test_only_bars_and_pubs_are_indexed(index_file):
+    """Les autres valeurs d'amenity ne sont pas retenues."""
+    index = BarIndex(index_file)
+
+    assert len(index) == 3
+    assert index.query_bbox(48.85, 2.35, 48.87, 2.38)[1]["tags"] == {
+        "amenity": "pub",
+        "name": "Bar 2",
+    }
+
+
+def test_radius_query_filters_the_bounding_box(index_file):
+    """Les bars de la boîte englobante hors du cercle sont écartés."""
+    index = BarIndex(index_file)
+
+    # Bar 2 à 378 m, bar 3 à 1,3 km du centre
+    assert [bar["id"] for bar in index.query_radius(48.8566, 2.3522, 0.5)] == [1, 2]
+    assert [bar["id"] for bar in index.query_radius(48.8566, 2.3522, 1.5)] == [1, 2, 3]
+
+
+def test_bars_mapped_as_ways_are_indexed_at_their_center(tmp_path):
+    """Les bars dessinés comme des contours sont indexés à leur centre."""
+    square = [(48.8560, 2.3520), (48.8560, 2.3530), (48.8570, 2.3530)]
+    square += [(48.8570, 2.3520), square[0]]
+    elements = [
+        {"type": "node", "id": 7, "lat": 48.8566, "lon": 2.3522, "tags": {}},
+        {
+            "type": "way",
+            "id": 7,
+            "geometry": [{"lat": lat, "lon": lon} for lat, lon in square],
+            "tags": {"amenity": "pub", "name": "Contour"},
+        },
+        {
+            "type": "way",
+            "id": 8,
+            "center": {"lat": 48.8600, "lon": 2.3522},
+            "tags": {"amenity": "bar", "name": "Centre"},
+        },
+    ]
+    elements[0]["tags"] = {"amenity": "bar", "name": "Point"}
+    source = tmp_path / "bars.json"
+    source.write_text(json.dumps({"elements": elements}))
+    build_index(str(source), str(tmp_path / "bars.sqlite"))
+
+    bars = BarIndex(str(tmp_path / "bars.sqlite")).query_radius(48.8566, 2.3522, 1.0)
+
+    assert [(bar["type"], bar["id"]) for bar in bars] == [
+        ("node", 7),
+        ("way", 7),
+        ("way", 8),
+    ]
+    assert (bars[1]["lat"], bars[1]["lon"]) == pytest.approx((48.8565, 2.3525))
+
+
+def test_rebuilt_index_is_reopened_with_a_new_version(index_file, tmp_path):
+    """Une reconstruction pendant l'exécution change la version et les résultats."""
+    before = get_bar_index(index_file)
+    before.query_radius(48.8566, 2.3522, 1.0)
+
+    source = _write_source(tmp_path / "new.json", [(10, 48.8566, 2.3522, "bar")])
+    build_index(source, index_file)
+
+    after = get_bar_index(index_file)
+    assert after is not before and after.version != before.version
+    assert [bar["id"] for bar in after.query_radius(48.8566, 2.3522, 1.0)] == [10]
+
+    # Un thread qui utilise encore l'ancien index lit, sans erreur, l'état
+    # ouvert (recherche et attributs viennent du même fichier)
+    results = []
+    thread = threading.Thread(
+        target=lambda: results.append(before.query_radius(48.8566, 2.3522, 1.0))
+    )
+    thread.start()
+    thread.join()
+    assert [bar["id"] for bar in results[0]] == [1, 2]
+
+
+def test_rebuild_invalidates_the_candidates_kept_in_memory(
+    index_file, tmp_path, monkeypatch
+):
+    """Les bars candidats gardés en mémoire suivent la version de l'index."""
+    monkeypatch.setattr(bar_finder, "get_bar_index", lambda: get_bar_index(index_file))
+    bar_finder._cached_bar_candidates.cache_clear()
+
+    before, _ = bar_finder.get_bar_candidates(48.8566, 2.3522, 1.0, "local")
+    source = _write_source(tmp_path / "new.json", [(10, 48.8566, 2.3522, "bar")])
+    build_index(source, index_file)
+    after, _ = bar_finder.get_bar_candidates(48.8566, 2.3522, 1.0, "local")
+
+    assert len(before) == 2 and len(after) == 1
+    bar_finder._cached_bar_candidates.cache_clear()
+
+
+def test_bars_around_center_keeps_the_ten_nearest(tmp_path, monkeypatch):
+    """La limite de 10 bars garde les plus proches, pas les plus petits ids."""
+    # Identifiants croissants, bars de plus en plus proches du centre
+    source = _write_source(
+        tmp_path / "bars.json",
+        [(id_, 48.8566 + (15 - id_) * 0.0003, 2.3522, "bar") for id_ in range(15)],
+    )
+    index_file = str(tmp_path / "bars.sqlite")
+    build_index(source, index_file)
+    monkeypatch.setattr(bar_finder, "get_bar_index", lambda: get_bar_index(index_file))
+    bar_finder._cached_bar_candidates.cache_clear()
+
+    bars = bar_finder.get_bars_around_center(48.8566, 2.3522, 0.6, backend="local")
+
+    assert [bar["name"] for bar in bars] == [f"Bar {id_}" for id_ in range(14, 4, -1)]
+    bar_finder._cached_bar_candidates.cache_clear()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests du calcul des recommandations en lot.
+"""
+
+import json
+import sys
+import os
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from src.batch import completed_group_ids, read_groups, run_batch
+
+# Source de bars inconnue : les bars de secours sont utilisés, sans réseau
+OPTIONS = {
+    "mode": "distance",
+    "objective": "sum",
+    "radius_km": 0.6,
+    "backend": "aucune",
+    "top": 3,
+}
+
+
+def make_groups(count):
+    return [
+        {
+            "id": f"team-{i}",
+            "friends": [
+                {"name": "A", "latitude": 48.85 + i * 1e-3, "longitude": 2.35},
+                {"name": "B", "latitude": 48.87, "longitude": 2.33 + i * 1e-3},
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_read_groups_from_csv(tmp_path):
+    """Les amis d'un CSV sont regroupés par groupe, dans l'ordre du fichier."""
+    path = tmp_path / "groups.csv"
+    path.write_text(
+        "groupe,nom,latitude,longitude\n"
+        "b,Alice,48.85,2.35\n"
+        "a,Bob,48.86,2.34\n"
+        "b,Chloé,48.87,2.33\n"
+        "a,Sans coordonnées,,\n"
+    )
+
+    groups = read_groups(str(path))
+
+    assert [group["id"] for group in groups] == ["b", "a"]
+    assert [f["name"] for f in groups[0]["friends"]] == ["Alice", "Chloé"]
+    assert len(groups[1]["friends"]) == 1
+
+
+def test_output_is_ordered_with_process_pool(tmp_path):
+    """Les lignes sortent dans l'ordre des groupes, quel que soit le pool."""
+    output = str(tmp_path / "out.jsonl")
+    groups = make_groups(25)
+
+    summary = run_batch(groups, output, OPTIONS, workers=2, chunk_size=4, log=None)
+
+    lines = read_lines(output)
+    assert summary["processed"] == 25
+    assert [line["group_id"] for line in lines] == [g["id"] for g in groups]
+    assert all(len(line["bars"]) == 3 for line in lines)
+
+
+def test_resume_skips_done_groups_and_partial_line(tmp_path):
+    """La reprise saute les groupes écrits et retire une ligne tronquée."""
+    output = tmp_path / "out.jsonl"
+    groups = make_groups(6)
+    run_batch(groups[:3], str(output), OPTIONS, workers=1, log=None)
+    with open(output, "a", encoding="utf-8") as f:
+        f.write('{"group_id": "team-3", "ba')  # Interruption en cours d'écriture
+
+    assert completed_group_ids(str(output)) == {"team-0", "team-1", "team-2"}
+
+    summary = run_batch(groups, str(output), OPTIONS, workers=1, resume=True, log=None)
+
+    assert (summary["processed"], summary["skipped"]) == (3, 3)
+    assert [line["group_id"] for line in read_lines(output)] == [
+        g["id"] for g in groups
+    ]
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests des mesures de performance sur données synthétiques.
+"""
+
+import sys
+import os
+
+import pytest
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from src.benchmark import (
+    compare_to_baseline,
+    load_baseline,
+    main,
+    run_benchmarks,
+    save_baseline,
+    synthetic_bars,
+    synthetic_friends,
+)
+from src.geo_utils import distance_matrix
+
+
+def test_synthetic_data_is_seeded_and_around_paris():
+    """Une même graine donne les mêmes données, réparties autour de Paris."""
+    assert synthetic_friends(100, seed=1) == synthetic_friends(100, seed=1)
+    assert synthetic_friends(100, seed=1) != synthetic_friends(100, seed=2)
+
+    bars = synthetic_bars(1_000)
+    distances = distance_matrix((48.8566, 2.3522), [(b["lat"], b["lon"]) for b in bars])
+
+    assert len(bars) == 1_000 and distances.max() <= 2.0
+    assert len({bar["name"] for bar in bars}) == 1_000
+
+
+def test_regressions_beyond_threshold_are_reported():
+    """Seuls les cas nettement et sensiblement plus lents régressent."""
+    baseline = {
+        "cases": {
+            "rank_bars_distance/f10/b1000": {"median_ms": 5.0},
+            "calculate_center/f2/b0": {"median_ms": 0.01},
+            "create_interactive_map/f2/b10": {"median_ms": 40.0},
+        }
+    }
+    results = {
+        "cases": {
+            "rank_bars_distance/f10/b1000": {"median_ms": 8.0},  # +60 %
+            "calculate_center/f2/b0": {"median_ms": 0.05},  # ×5 mais +0,04 ms
+            "create_interactive_map/f2/b10": {"median_ms": 44.0},  # +10 %
+            "calculate_center/f10/b0": {"median_ms": 1.0},  # Sans référence
+        }
+    }
+
+    comparisons = compare_to_baseline(results, baseline, threshold=0.25)
+
+    assert len(comparisons) == 3
+    assert [c["case"] for c in comparisons if c["regressed"]] == [
+        "rank_bars_distance/f10/b1000"
+    ]
+
+
+def test_baseline_round_trip_and_check(tmp_path):
+    """Les mesures enregistrées servent de référence à la vérification."""
+    sizes = {"calculate_center": [(2, 0), (10, 0)], "rank_bars_distance": [(2, 10)]}
+    results = run_benchmarks(sizes, min_time_s=0)
+    path = str(tmp_path / "baseline.json")
+    save_baseline(results, path)
+
+    assert set(load_baseline(path)["cases"]) == {
+        "calculate_center/f2/b0",
+        "calculate_center/f10/b0",
+        "rank_bars_distance/f2/b10",
+    }
+    with pytest.raises(SystemExit) as exit_info:
+        main(["--quick", "--path", "calculate_center", "--baseline", path, "--check"])
+    # Pas de régression attendue entre deux mesures du même calcul
+    # (cas de l'ordre de la microseconde, sous la hausse minimale)
+    assert exit_info.value.code == 0
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Tests du stockage transactionnel des amis.
+"""
+
+import json
+import sqlite3
+import sys
+import os
+import threading
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from src.data_manager import FriendsStore
+
+
+def make_friend(name, lat=48.85, lon=2.35):
+    return {
+        "name": name,
+        "email": "",
+        "address": f"Adresse de {name}",
+        "latitude": lat,
+        "longitude": lon,
+    }
+
+
+def test_json_is_migrated_once(tmp_path):
+    """L'ancien fichier JSON est importé à la création, une seule fois."""
+    json_file = tmp_path / "friends.json"
+    json_file.write_text(json.dumps([make_friend("Alice"), make_friend("Bob")]))
+    db_file = str(tmp_path / "friends.sqlite")
+
+    store = FriendsStore(db_file, str(json_file))
+    assert [f["name"] for f in store.load()] == ["Alice", "Bob"]
+
+    store.delete("Alice")
+    reopened = FriendsStore(db_file, str(json_file))
+    assert [f["name"] for f in reopened.load()] == ["Bob"]
+
+
+def test_upsert_and_delete(tmp_path):
+    """Un ami du même nom (casse ignorée) est mis à jour, pas dupliqué."""
+    store = FriendsStore(str(tmp_path / "friends.sqlite"), None)
+
+    store.upsert(make_friend("Alice", lat=48.0))
+    store.upsert(make_friend("alice", lat=49.0))
+
+    friends = store.load()
+    assert len(friends) == 1
+    assert friends[0]["latitude"] == 49.0
+
+    assert store.delete("ALICE")
+    assert not store.delete("Alice")
+    assert store.load() == []
+
+
+def test_load_is_cached_until_version_changes(tmp_path):
+    """La liste n'est relue que si une écriture a changé la version."""
+    store = FriendsStore(str(tmp_path / "friends.sqlite"), None)
+    store.upsert(make_friend("Alice"))
+
+    first = store.load()
+    cached = store._cache["default"]
+    first[0]["name"] = "modifié par l'appelant"
+
+    assert store.load()[0]["name"] == "Alice"
+    assert store._cache["default"] is cached
+
+    store.upsert(make_friend("Bob"))
+    assert [f["name"] for f in store.load()] == ["Alice", "Bob"]
+
+
+def test_groups_are_independent(tmp_path):
+    """Modifier un groupe ne change ni la version ni le cache des autres."""
+    store = FriendsStore(str(tmp_path / "friends.sqlite"), None)
+    team_a = store.create_group("Équipe A")
+    team_b = store.create_group("Équipe B")
+    assert (team_a, team_b) == ("equipe-a", "equipe-b")
+    assert store.create_group("équipe a") == "equipe-a-2"
+
+    store.upsert(make_friend("Alice"), team_a)
+    store.upsert(make_friend("Alice", lat=43.3), team_b)
+    cached_b = store.load(team_b)
+    version_b = store.version(team_b)
+
+    store.upsert(make_friend("Bob"), team_a)
+    store.delete("Alice", team_a)
+
+    assert [f["name"] for f in store.load(team_a)] == ["Bob"]
+    assert store.load(team_b) == cached_b
+    assert store.version(team_b) == version_b
+    sizes = {group["id"]: group["size"] for group in store.list_groups()}
+    assert sizes[team_a] == 1 and sizes[team_b] == 1
+
+
+def test_ungrouped_database_is_converted(tmp_path):
+    """Une base créée avant les groupes est rangée dans le groupe par défaut."""
+    db_file = str(tmp_path / "friends.sqlite")
+    db = sqlite3.connect(db_file)
+    db.executescript(
+        """
+        CREATE TABLE friends (id INTEGER PRIMARY KEY, name_key TEXT NOT NULL UNIQUE,
+            name TEXT NOT NULL, email TEXT NOT NULL DEFAULT '',
+            address TEXT NOT NULL DEFAULT '', latitude REAL, longitude REAL);
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        INSERT INTO meta VALUES ('version', '3'), ('migrated_from', 'friends.json');
+        INSERT INTO friends VALUES (1, 'alice', 'Alice', '', 'Paris', 48.85, 2.35);
+        """
+    )
+    db.close()
+
+    store = FriendsStore(db_file, None)
+    assert [f["name"] for f in store.load("default")] == ["Alice"]
+
+
+def test_concurrent_writers_do_not_lose_updates(tmp_path):
+    """Des écritures simultanées (threads et connexions séparées) sont toutes gardées."""
+    db_file = str(tmp_path / "friends.sqlite")
+    stores = [FriendsStore(db_file, None) for _ in range(4)]
+
+    def add_friends(store, prefix):
+        for i in range(25):
+            store.upsert(make_friend(f"{prefix}-{i}"))
+
+    threads = [
+        threading.Thread(target=add_friends, args=(store, f"session{n}"))
+        for n, store in enumerate(stores)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(FriendsStore(db_file, None).load()) == 100
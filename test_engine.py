@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests du moteur de calcul sans Streamlit.
+"""
+
+import subprocess
+import sys
+import os
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from src.engine import compute_center, find_ranked_bars, rank_bars
+
+FRIENDS = [
+    {"name": "Alice", "latitude": 48.8920, "longitude": 2.3430},
+    {"name": "Bob", "latitude": 48.8286, "longitude": 2.3209},
+    {"name": "Chloé", "latitude": 48.8640, "longitude": 2.3610},
+]
+
+
+def test_engine_does_not_import_streamlit():
+    """Le moteur s'importe sans charger Streamlit."""
+    code = "import sys, src.engine; sys.exit('streamlit' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    assert result.returncode == 0
+
+
+def test_transit_center_reports_progress():
+    """Les étapes de l'optimisation sont envoyées à la fonction de rappel."""
+    events = []
+    center_lat, center_lon, times, calc_info = compute_center(
+        FRIENDS, "transit", progress=events.append
+    )
+
+    stages = [event["stage"] for event in events]
+    assert stages[0] == "initial_center"
+    assert "optimized_center" in stages
+    assert set(times) == {"Alice", "Bob", "Chloé"}
+    assert calc_info["avg_final_time"] <= calc_info["avg_initial_time"] + 1e-9
+
+    # Sans fonction de rappel, le résultat est le même
+    assert compute_center(FRIENDS, "transit")[:2] == (center_lat, center_lon)
+
+
+def test_rank_bars_orders_by_average_distance():
+    """Le bar le plus proche du groupe arrive en tête."""
+    bars = [
+        {"name": "Loin", "lat": 48.95, "lon": 2.50},
+        {"name": "Central", "lat": 48.862, "lon": 2.342},
+    ]
+
+    ranked = rank_bars(bars, FRIENDS, "distance")
+
+    assert [bar["name"] for bar in ranked] == ["Central", "Loin"]
+    assert ranked[0]["avg_distance"] < ranked[1]["avg_distance"]
+
+
+def test_search_errors_are_reported_not_raised():
+    """Une erreur de recherche devient un événement et des bars de secours."""
+    events = []
+
+    bars = find_ranked_bars(
+        FRIENDS, 48.86, 2.34, 0.6, backend="inconnu", progress=events.append
+    )
+
+    assert bars
+    assert [event["level"] for event in events] == ["error"]
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests de l'import en masse d'amis depuis un fichier CSV ou JSON.
+"""
+
+import sys
+import os
+import json
+
+import pytest
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from src import friend_import
+from src.friend_import import parse_friends_file
+
+
+def test_csv_with_french_headers_and_semicolons():
+    """Le séparateur est détecté ; les lignes sans adresse sont ignorées."""
+    content = (
+        "\ufeffNom;Adresse;E-mail\n"
+        "Alice;10 rue de Rivoli, Paris;alice@example.com\n"
+        "Bob;;bob@example.com\n"
+    ).encode("utf-8")
+
+    friends = parse_friends_file(content, "amis.csv")
+
+    assert friends == [
+        {
+            "name": "Alice",
+            "email": "alice@example.com",
+            "address": "10 rue de Rivoli, Paris",
+        }
+    ]
+
+
+def test_json_list_or_friends_key():
+    """Le JSON est une liste d'objets ou un objet avec une clé "friends"."""
+    rows = [{"name": "Alice", "address": "Paris", "age": 30}]
+
+    assert parse_friends_file(json.dumps(rows), "amis.json") == parse_friends_file(
+        json.dumps({"friends": rows}), "AMIS.JSON"
+    )
+    assert parse_friends_file(json.dumps(rows), "amis.json")[0]["email"] == ""
+
+
+@pytest.mark.parametrize(
+    "content, filename",
+    [
+        ('["Alice", "Bob"]', "amis.json"),
+        ('{"friends": "Alice"}', "amis.json"),
+        ("{pas du json", "amis.json"),
+        ("une seule colonne\nsans séparateur\n", "amis.csv"),
+    ],
+)
+def test_unreadable_files_raise_value_error(content, filename):
+    """Les fichiers d'un autre format lèvent une ValueError, gérée par la page."""
+    with pytest.raises(ValueError):
+        parse_friends_file(content, filename)
+
+
+def test_import_returns_the_friends_to_save(monkeypatch):
+    """Un ami mis à jour sous un nom de casse différente est bien à enregistrer."""
+    monkeypatch.setattr(
+        friend_import,
+        "geocode_addresses",
+        lambda addresses, progress=None: {
+            address: (48.85, 2.35, f"{address}, France") for address in addresses
+        },
+    )
+    friends = [{"name": "Alice", "address": "Lyon", "latitude": 45.7, "longitude": 4.8}]
+    new_friends = [
+        {"name": "ALICE", "email": "", "address": "Paris"},
+        {"name": "Bob", "email": "", "address": "Paris"},
+    ]
+
+    report = friend_import.import_friends(new_friends, friends)
+
+    assert report["updated"] == ["ALICE"] and report["added"] == ["Bob"]
+    assert report["friends"] == friends
+    assert friends[0]["address"] == "Paris, France"
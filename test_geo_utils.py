@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests des calculs de distances vectorisés.
+"""
+
+import sys
+import os
+
+import numpy as np
+import pytest
+from geopy.distance import geodesic
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from src.geo_utils import _vincenty, distance_matrix, pairwise_distances
+
+# Quelques lieux de Paris et de la petite couronne (paires de 0,3 à 20 km)
+PARIS = [
+    (48.8566, 2.3522),  # Hôtel de Ville
+    (48.8584, 2.2945),  # Tour Eiffel
+    (48.8867, 2.3431),  # Montmartre
+    (48.8530, 2.3499),  # Notre-Dame
+    (48.9362, 2.3574),  # Saint-Denis
+    (48.7904, 2.4556),  # Créteil
+]
+# Paire quasi antipodale : Vincenty ne converge pas
+ANTIPODAL = ((0.0, 0.0), (0.5, 179.7))
+
+
+def _reference(points_a, points_b):
+    return np.array([[geodesic(a, b).kilometers for b in points_b] for a in points_a])
+
+
+def test_geodesic_matches_geopy_within_a_millimetre():
+    """Vincenty vectorisé : erreur < 1 mm par rapport à geopy."""
+    distances = distance_matrix(PARIS, PARIS, "geodesic")
+
+    np.testing.assert_allclose(distances, _reference(PARIS, PARIS), rtol=0, atol=1e-6)
+
+
+def test_near_antipodal_pair_falls_back_to_geopy():
+    """Les paires non convergées sont recalculées avec geopy."""
+    (lat1, lon1), (lat2, lon2) = np.radians(ANTIPODAL)
+    assert np.isnan(_vincenty(lat1, lon1, lat2, lon2))
+
+    points = [ANTIPODAL[0], PARIS[0]]
+    distances = distance_matrix(points, [ANTIPODAL[1]], "geodesic")
+
+    np.testing.assert_allclose(
+        distances, _reference(points, [ANTIPODAL[1]]), rtol=0, atol=1e-6
+    )
+
+
+@pytest.mark.parametrize(
+    "method, max_relative_error",
+    [
+        # Sphère de rayon moyen : ≤ 0,56 % partout
+        ("haversine", 0.0056),
+        # Plan tangent local : 0,0002 % jusqu'à 25 km en France
+        ("equirectangular", 0.000002),
+    ],
+)
+def test_approximations_stay_within_their_documented_bounds(method, max_relative_error):
+    """Les approximations restent dans les bornes annoncées par le module."""
+    reference = _reference(PARIS, PARIS)
+    distances = distance_matrix(PARIS, PARIS, method)
+
+    off_diagonal = ~np.eye(len(PARIS), dtype=bool)
+    errors = np.abs(distances - reference)[off_diagonal] / reference[off_diagonal]
+    assert errors.max() <= max_relative_error
+    assert reference[off_diagonal].max() < 25
+    np.testing.assert_allclose(np.diag(distances), 0.0, atol=1e-12)
+
+
+def test_pairwise_distances_are_the_matrix_diagonal():
+    """Les distances deux à deux sont la diagonale de la matrice."""
+    destinations = PARIS[1:] + PARIS[:1]
+
+    for method in ("geodesic", "haversine", "equirectangular"):
+        np.testing.assert_allclose(
+            pairwise_distances(PARIS, destinations, method),
+            np.diag(distance_matrix(PARIS, destinations, method)),
+        )
+    with pytest.raises(ValueError):
+        pairwise_distances(PARIS, PARIS[:2])
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests du géocodage des adresses et de son cache disque.
+"""
+
+import sys
+import os
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from src import geocoder
+from src.geocoder import GeocodeCache, geocode_addresses, normalize_address
+
+PARIS = (48.8566, 2.3522, "Paris, Île-de-France, France")
+
+
+def test_normalized_addresses_ignore_case_and_punctuation():
+    """Casse, espaces et séparateurs n'influencent pas la clé du cache."""
+    assert normalize_address("  10, Rue de RIVOLI ;  Paris. ") == (
+        "10 rue de rivoli paris"
+    )
+    assert normalize_address("Straße") == normalize_address("STRASSE")
+
+
+def test_cache_persists_and_expires_not_found_addresses(tmp_path, monkeypatch):
+    """Les résultats survivent à la réouverture ; les échecs expirent."""
+    cache_file = str(tmp_path / "geocode.sqlite")
+    cache = GeocodeCache(cache_file)
+    cache.put("paris", PARIS)
+    cache.put("nulle part", (None, None, None))
+
+    reopened = GeocodeCache(cache_file)
+    assert reopened.get("paris") == PARIS
+    assert reopened.get("nulle part") == (None, None, None)
+
+    monkeypatch.setattr(geocoder, "NOT_FOUND_TTL_S", -1)
+    assert reopened.get("nulle part") is None
+    assert reopened.get("paris") == PARIS
+    assert reopened.stats() == {"hits": 3, "misses": 1}
+
+
+def test_batch_geocodes_each_normalized_address_once(tmp_path, monkeypatch):
+    """Les doublons sont regroupés et les adresses en cache pas redemandées."""
+    cache = GeocodeCache(str(tmp_path / "geocode.sqlite"))
+    queried = []
+    monkeypatch.setattr(geocoder, "get_geocode_cache", lambda: cache)
+    monkeypatch.setattr(
+        geocoder, "query_nominatim", lambda address: queried.append(address) or PARIS
+    )
+
+    first = geocode_addresses(["Paris", "PARIS ", "paris,"])
+    second = geocode_addresses(["paris"])
+
+    assert queried == ["Paris"]
+    assert set(first.values()) == {PARIS} and second == {"paris": PARIS}
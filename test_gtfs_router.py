@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Tests du calcul des temps de trajet sur un flux GTFS.
+"""
+
+import sys
+import os
+import datetime
+
+import numpy as np
+import pytest
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from src import transit_utils
+from src.geo_utils import distance_matrix
+from src.gtfs_router import WALK_S_PER_KM, TransitRouter, build_timetable
+
+TUESDAY = datetime.date(2026, 10, 20)
+
+
+def _clock(seconds):
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+@pytest.fixture
+def timetable(tmp_path):
+    """
+    Deux lignes en semaine : A (ouest → est, toutes les 10 min dès 18:00,
+    3 min entre arrêts) et B (sud → nord, toutes les 15 min, 4 min entre
+    arrêts), reliées à pied entre A3 et B1 (environ 230 m).
+    """
+    feed = tmp_path / "gtfs"
+    feed.mkdir()
+    (feed / "stops.txt").write_text(
+        "stop_id,stop_name,stop_lat,stop_lon,location_type\n"
+        "A1,Alpha 1,48.85,2.30,0\nA2,Alpha 2,48.85,2.32,0\nA3,Alpha 3,48.85,2.34,0\n"
+        "B1,Bravo 1,48.852,2.341,\nB2,Bravo 2,48.87,2.341,\nB3,Bravo 3,48.89,2.341,\n"
+        "S,Gare,48.85,2.34,1\n"
+    )
+    trips, stop_times = ["trip_id,service_id"], []
+    for line, headway, step, count in (("A", 600, 180, 18), ("B", 900, 240, 12)):
+        for k in range(count):
+            trips.append(f"{line}{k},SEMAINE")
+            for i in range(3):
+                time_ = _clock(18 * 3600 + k * headway + i * step)
+                stop_times.append(f"{line}{k},{time_},{time_},{line}{i + 1},{i + 1}")
+    (feed / "trips.txt").write_text("\n".join(trips) + "\n")
+    (feed / "stop_times.txt").write_text(
+        "trip_id,arrival_time,departure_time,stop_id,stop_sequence\n"
+        + "\n".join(stop_times)
+        + "\n"
+    )
+    (feed / "calendar.txt").write_text(
+        "service_id,monday,tuesday,wednesday,thursday,friday,saturday,sunday,"
+        "start_date,end_date\nSEMAINE,1,1,1,1,1,0,0,20260101,20271231\n"
+    )
+    path = str(tmp_path / "timetable.npz")
+    build_timetable(str(feed), path, TUESDAY)
+    return path
+
+
+def test_earliest_arrival_uses_transfers_on_foot(timetable):
+    """Départ 19:00 : A de 19:10 à 19:16, marche vers B1, B de 19:30 à 19:38."""
+    router = TransitRouter(timetable)
+    origin, destination = (48.851, 2.30), (48.889, 2.341)
+
+    minutes = router.time_matrix([origin], [destination], departure="19:00")[0, 0]
+
+    egress_s = distance_matrix(destination, (48.89, 2.341), "equirectangular")[0, 0]
+    assert minutes == pytest.approx(38 + egress_s * WALK_S_PER_KM / 60)
+    assert router.metadata["stops"] == 6 and router.metadata["routes"] == 2
+
+
+def test_one_query_per_origin_covers_all_destinations(timetable):
+    """La matrice un-vers-plusieurs est celle des paires, sans nouvel itinéraire."""
+    router = TransitRouter(timetable)
+    origins = [(48.851, 2.30), (48.849, 2.32)]
+    destinations = [(48.889, 2.341), (48.85, 2.34), (48.851, 2.305), (45.0, 2.0)]
+
+    matrix = router.time_matrix(origins, destinations)
+    pairs = router.time_pairs(
+        [o for o in origins for _ in destinations], destinations * len(origins)
+    )
+
+    np.testing.assert_allclose(pairs.reshape(matrix.shape), matrix)
+    assert np.isinf(matrix[:, 3]).all()  # Hors du réseau, trop loin à pied
+    assert router.stats()["misses"] == 2
+
+
+def test_services_follow_the_calendar(timetable, tmp_path):
+    """Les trajets d'un jour sans service ne sont pas retenus."""
+    with pytest.raises(ValueError):
+        build_timetable(
+            str(tmp_path / "gtfs"),
+            str(tmp_path / "weekend.npz"),
+            datetime.date(2026, 10, 18),
+        )
+
+
+def test_gtfs_backend_falls_back_to_estimate_outside_network(timetable, monkeypatch):
+    """Les paires que le réseau ne relie pas gardent l'estimation par la distance."""
+    router = TransitRouter(timetable)
+    monkeypatch.setattr(transit_utils, "get_transit_router", lambda: router)
+    origins, destinations = [(48.851, 2.30)], [(48.889, 2.341), (45.0, 2.0)]
+
+    routed = transit_utils.get_transit_time_matrix(
+        origins, destinations, backend="gtfs"
+    )
+    estimated = transit_utils.get_transit_time_matrix(
+        origins, destinations, backend="heuristic"
+    )
+
+    assert routed[0, 0] == pytest.approx(
+        router.time_matrix(origins, destinations)[0, 0]
+    )
+    assert routed[0, 1] == estimated[0, 1]
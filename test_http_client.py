@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests du client HTTP partagé contre un serveur local de substitution.
+"""
+
+import json
+import sys
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from src.http_client import UpstreamClient, UpstreamError
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Serveur de substitution : les réponses sont pilotées par `server.script`."""
+
+    def do_GET(self):
+        self.server.hits += 1
+        status, delay_s = self.server.script.pop(0) if self.server.script else (200, 0)
+        time.sleep(delay_s)
+        body = json.dumps({"path": self.path, "hit": self.server.hits}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status == 429:
+            self.send_header("Retry-After", self.server.retry_after)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.hits = 0
+    server.script = []
+    server.retry_after = "0"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_client(server, **kwargs):
+    options = {"rate_per_s": 100.0, "burst": 10, "backoff_s": 0.01}
+    options.update(kwargs)
+    return UpstreamClient(
+        "stand-in", f"http://127.0.0.1:{server.server_port}", **options
+    )
+
+
+def test_retries_on_server_errors(stand_in):
+    """Les erreurs 503 et 429 sont retentées jusqu'au succès."""
+    stand_in.script = [(503, 0), (429, 0)]
+    client = make_client(stand_in)
+
+    result = client.get_json("/search", params={"q": "Paris"})
+
+    assert result["hit"] == 3
+    assert client.stats()["retries"] == 2
+
+
+def test_gives_up_after_max_retries(stand_in):
+    """Une erreur persistante remonte après épuisement des tentatives."""
+    stand_in.script = [(500, 0)] * 10
+    client = make_client(stand_in, max_retries=2)
+
+    with pytest.raises(UpstreamError):
+        client.get_json("/search")
+
+    assert stand_in.hits == 3
+    assert client.stats()["errors"] == 1
+
+
+def test_identical_requests_are_coalesced(stand_in):
+    """Des requêtes identiques simultanées partagent un seul appel amont."""
+    stand_in.script = [(200, 0.3)]
+    client = make_client(stand_in)
+    results = []
+
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(client.get_json("/q", params={"a": 1}))
+        )
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert stand_in.hits == 1
+    assert len(results) == 5
+    assert client.stats()["coalesced"] == 4
+
+
+def test_rate_limit_spaces_requests(stand_in):
+    """Le limiteur de débit espace les requêtes distinctes."""
+    client = make_client(stand_in, rate_per_s=10.0, burst=1)
+
+    started_at = time.perf_counter()
+    for i in range(4):
+        client.get_json("/q", params={"i": i})
+
+    assert time.perf_counter() - started_at >= 0.3
+
+
+def test_long_retry_after_fails_without_waiting(stand_in):
+    """Un Retry-After plus long que le délai d'une requête n'est pas attendu."""
+    stand_in.script = [(429, 0)]
+    stand_in.retry_after = "3600"
+    client = make_client(stand_in, timeout_s=1)
+
+    started_at = time.perf_counter()
+    with pytest.raises(UpstreamError, match="Retry-After"):
+        client.get_json("/search")
+
+    assert time.perf_counter() - started_at < 1
+    assert stand_in.hits == 1
+    assert client.stats()["retries"] == 0
+    assert client.stats()["errors"] == 1
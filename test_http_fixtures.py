@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests de l'enregistrement et du rejeu des réponses HTTP.
+"""
+
+import sys
+import os
+import time
+
+import pytest
+import requests
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from src.http_client import UpstreamClient
+from src.http_fixtures import FixtureStore, StandInServer
+
+
+@pytest.fixture
+def fixtures(tmp_path):
+    """Une réponse Nominatim enregistrée."""
+    store = FixtureStore(str(tmp_path / "fixtures"))
+    store.save(
+        "nominatim",
+        "/search",
+        {"q": "Paris", "format": "json", "limit": 1},
+        [{"lat": "48.8566", "lon": "2.3522", "display_name": "Paris"}],
+    )
+    return store
+
+
+def start_stand_in(fixtures, **options):
+    server = StandInServer(fixtures, port=0, **options).start()
+    client = UpstreamClient(
+        "nominatim",
+        f"{server.url}/nominatim",
+        rate_per_s=100.0,
+        burst=10,
+        backoff_s=0.01,
+        max_retries=5,
+    )
+    return server, client
+
+
+def test_replayed_responses_can_be_recorded_again(fixtures, tmp_path):
+    """Une réponse rejouée est identique à l'enregistrement, et réenregistrable."""
+    server, client = start_stand_in(fixtures)
+    client.fixtures = FixtureStore(str(tmp_path / "copy"))
+    try:
+        result = client.get_json(
+            "/search", {"q": "Paris", "format": "json", "limit": 1}
+        )
+        with pytest.raises(requests.HTTPError):
+            client.get_json("/search", {"q": "Lyon", "format": "json", "limit": 1})
+    finally:
+        server.stop()
+
+    assert result[0]["display_name"] == "Paris"
+    assert (
+        client.fixtures.load(
+            "nominatim", "/search", {"q": "Paris", "format": "json", "limit": "1"}
+        )
+        == result
+    )
+    assert server.stats() == {
+        "requests": 2,
+        "served": 1,
+        "missing": 1,
+        "injected_errors": 0,
+    }
+
+
+def test_injected_errors_are_seeded_and_retried(fixtures):
+    """Les erreurs injectées sont reproductibles et retentées par le client."""
+    outcomes = []
+    for _ in range(2):
+        server, client = start_stand_in(fixtures, error_rate=0.5, seed=7)
+        try:
+            for _ in range(5):
+                client.get_json("/search", {"q": "Paris", "format": "json", "limit": 1})
+        finally:
+            server.stop()
+        outcomes.append((server.stats()["injected_errors"], client.stats()["retries"]))
+
+    assert outcomes[0] == outcomes[1]
+    assert outcomes[0][0] == outcomes[0][1] > 0
+
+
+def test_injected_latency_is_added_to_each_response(fixtures):
+    """La latence injectée s'ajoute au temps de réponse."""
+    server, client = start_stand_in(fixtures, latency_ms=50, jitter_ms=10)
+    try:
+        started = time.perf_counter()
+        client.get_json("/search", {"q": "Paris", "format": "json", "limit": 1})
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    finally:
+        server.stop()
+
+    assert 50 <= elapsed_ms < 1000
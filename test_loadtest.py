@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests du test de charge des pages Streamlit.
+"""
+
+import sys
+import os
+import json
+import subprocess
+import threading
+
+import pytest
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from src import metrics
+from src.data_manager import FriendsStore
+from src.loadtest import prepare_environment
+
+
+def test_concurrent_sessions_are_measured_without_errors(tmp_path):
+    """Deux sessions simultanées (explorer et éditer) sont mesurées sans erreur."""
+    env = dict(
+        os.environ,
+        OUCEKONBOI_BAR_INDEX=str(tmp_path / "bars.sqlite"),
+        PYTHONPATH=os.path.dirname(os.path.abspath(__file__)),
+    )
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "src.loadtest",
+            "--sessions=2",
+            "--editors=1",
+            "--iterations=1",
+            "--backend=local",
+            f"--work-dir={tmp_path}",
+        ],
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=600,
+    )
+    report = json.loads(completed.stdout)
+
+    assert completed.returncode == 0
+    assert report["errors"] == {}
+    assert {"editor.add_friend", "editor.delete_friend", "explorer.radius"} <= set(
+        report["actions"]
+    )
+    assert report["actions"]["explorer.radius"]["count"] == 8
+    # Création du groupe, amis initiaux, ajout et suppression
+    assert report["friends_store"]["writes"] >= 4
+    assert report["memory_mb"]["peak"] >= report["memory_mb"]["start"]
+
+
+def test_write_lock_wait_is_recorded(tmp_path):
+    """Chaque écriture dans le stockage des amis mesure l'attente du verrou."""
+    db_file = str(tmp_path / "friends.sqlite")
+    stores = [FriendsStore(db_file, None) for _ in range(4)]
+    before = metrics.summary().get("friends.lock_wait", {}).get("count", 0)
+
+    threads = [
+        threading.Thread(
+            target=store.upsert,
+            args=({"name": f"Ami {i}", "lat": 48.85, "lon": 2.35},),
+        )
+        for i, store in enumerate(stores)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert metrics.summary()["friends.lock_wait"]["count"] - before == 4
+
+
+def test_environment_must_be_prepared_before_import(tmp_path):
+    """Les chemins des bases sont lus à l'import : trop tard une fois importé."""
+    with pytest.raises(RuntimeError):
+        prepare_environment(str(tmp_path))
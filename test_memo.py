@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Tests du cache borné à coordonnées arrondies.
+"""
+
+import sys
+import os
+import threading
+
+import numpy as np
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from src.memo import QuantizedCache
+from src.transit_utils import get_transit_time, get_transit_times
+
+
+def counting_sum(calls):
+    """Fonction vectorisée qui enregistre la taille de chaque lot calculé."""
+
+    def func(origins, destinations):
+        calls.append(len(origins))
+        return origins.sum(axis=1) + destinations.sum(axis=1)
+
+    return func
+
+
+def test_nearby_points_share_an_entry():
+    """Deux positions à quelques mètres l'une de l'autre tombent dans la même cellule."""
+    calls = []
+    cache = QuantizedCache(counting_sum(calls), grid_m=10)
+
+    first = cache.get((48.86, 2.34), (48.85, 2.35))
+    second = cache.get((48.86001, 2.34002), (48.85, 2.35))
+    third = cache.get((48.861, 2.34), (48.85, 2.35))
+
+    assert first == second != third
+    assert calls == [1, 1]
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_batch_lookup_computes_missing_entries_once():
+    """Un lot ne calcule que les cellules absentes, en un seul appel."""
+    calls = []
+    cache = QuantizedCache(counting_sum(calls))
+    origins = [(48.86, 2.34), (48.87, 2.33), (48.86, 2.34)]
+    destinations = [(48.85, 2.35)] * 3
+
+    cache.get((48.87, 2.33), (48.85, 2.35))
+    values = cache.get_many(origins, destinations)
+
+    assert calls == [1, 1]
+    assert values[0] == values[2]
+    assert values[1] == cache.get((48.87, 2.33), (48.85, 2.35))
+
+
+def test_memory_cap_and_ttl_evict_entries():
+    """Le plafond mémoire évince les entrées les moins récentes, la durée de vie les périme."""
+    now = [0.0]
+    cache = QuantizedCache(
+        counting_sum([]),
+        max_bytes=3 * QuantizedCache(None).entry_bytes,
+        ttl_s=60,
+        clock=lambda: now[0],
+    )
+    points = [((48.80 + i / 100, 2.30), (48.85, 2.35)) for i in range(4)]
+
+    for origin, destination in points[:3]:
+        cache.get(origin, destination)
+    cache.get(*points[0])  # Le premier redevient le plus récent
+    cache.get(*points[3])
+
+    assert cache.stats()["size"] == 3 and cache.stats()["evictions"] == 1
+    hits = cache.stats()["hits"]
+    cache.get(*points[0])
+    assert cache.stats()["hits"] == hits + 1
+
+    now[0] = 61
+    cache.get_many([points[0][0]], [points[0][1]])
+    assert cache.stats()["expirations"] == 1
+
+
+def test_concurrent_lookups_are_counted_consistently():
+    """Les compteurs restent cohérents avec plusieurs threads."""
+    cache = QuantizedCache(counting_sum([]), max_entries=50)
+    rng = np.random.default_rng(0)
+    origins = rng.uniform([48.8, 2.25], [48.9, 2.42], (200, 2))
+
+    def worker():
+        for origin in origins:
+            cache.get(tuple(origin), (48.86, 2.34))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 800
+    assert stats["size"] == 50
+
+
+def test_transit_times_match_between_single_and_batch():
+    """Le temps de trajet d'une paire est le même seul ou dans un lot."""
+    origins = [(48.8920, 2.3430), (48.8286, 2.3209)]
+    destinations = [(48.8640, 2.3610), (48.8640, 2.3610)]
+
+    times = get_transit_times(origins, destinations)
+
+    assert times.tolist() == [
+        get_transit_time(*origin, *destination)
+        for origin, destination in zip(origins, destinations)
+    ]
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests de la mesure du temps passé dans les étapes.
+"""
+
+import sys
+import os
+import json
+
+import pytest
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+import src.metrics as metrics
+from src.metrics import prometheus_text, record_span, span, start_trace, summary
+from src.pipeline import StageCache
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    """Part de mesures vides pour chaque test."""
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_spans_are_aggregated_with_percentiles_and_cache_hits():
+    """Les durées d'un même span donnent nombre d'appels, succès et percentiles."""
+    for elapsed_ms in range(1, 101):
+        record_span("stage.center", float(elapsed_ms), cached=elapsed_ms <= 30)
+    with span("geocode") as timing:
+        timing.cached = True
+
+    stats = summary()
+
+    assert stats["stage.center"]["count"] == 100
+    assert stats["stage.center"]["cache_hits"] == 30
+    assert stats["stage.center"]["p50_ms"] == pytest.approx(50.5)
+    assert stats["stage.center"]["p95_ms"] == pytest.approx(95.05)
+    assert stats["geocode"]["cache_hits"] == 1
+
+
+def test_trace_keeps_the_stages_of_the_current_run():
+    """Les étapes d'une exécution sont gardées à part, y compris en cache."""
+    cache = StageCache()
+    cache.run("center", ("amis",), lambda: (48.86, 2.34))
+    trace = start_trace()
+    cache.run("center", ("amis",), lambda: (48.86, 2.34))
+
+    assert [(s["span"], s["cached"]) for s in trace] == [("stage.center", True)]
+    assert summary()["stage.center"]["count"] == 2
+
+
+def test_prometheus_and_json_lines_export(tmp_path, monkeypatch):
+    """Les mesures sont exportées au format Prometheus et en JSON Lines."""
+    jsonl = tmp_path / "spans.jsonl"
+    monkeypatch.setattr(metrics, "METRICS_JSONL", str(jsonl))
+    monkeypatch.setattr(metrics, "_jsonl_file", None)
+
+    record_span("http.overpass", 250.0)
+    record_span("http.overpass", 10.0, cached=True)
+    text = prometheus_text()
+
+    assert 'oucekonboi_span_seconds{span="http.overpass",quantile="0.5"} 0.130000' in (
+        text
+    )
+    assert 'oucekonboi_span_seconds_count{span="http.overpass"} 2' in text
+    assert 'oucekonboi_span_cache_hits_total{span="http.overpass"} 1' in text
+    metrics._jsonl_file.close()
+    lines = [json.loads(line) for line in jsonl.read_text().splitlines()]
+    assert [(line["span"], line["cached"]) for line in lines] == [
+        ("http.overpass", False),
+        ("http.overpass", True),
+    ]
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests de l'optimisation itérative du point de rendez-vous.
+"""
+
+import sys
+import os
+
+import numpy as np
+import pytest
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from src.geo_utils import distance_matrix
+from src.optimizer import OBJECTIVES, optimize_meeting_point
+from src.transit_utils import (
+    _fast_transit_time_matrix,
+    calculate_weighted_center_by_transit_time,
+)
+
+# Douze amis dispersés dans Paris, position de départ décalée vers l'est
+RNG = np.random.default_rng(0)
+FRIENDS = np.column_stack(
+    (48.85 + RNG.uniform(-0.05, 0.05, 12), 2.35 + RNG.uniform(-0.08, 0.08, 12))
+)
+START = (48.86, 2.40)
+
+
+@pytest.mark.parametrize("objective", OBJECTIVES)
+def test_each_objective_is_no_worse_than_the_start(objective):
+    """Le point renvoyé n'est jamais moins bon que le point de départ."""
+    result = optimize_meeting_point(
+        FRIENDS, _fast_transit_time_matrix, objective, start=START
+    )
+
+    assert result["cost"] <= result["start_cost"]
+    assert result["cost"] < result["start_cost"] - 0.1
+    if objective == "median":
+        # Objectif de la médiane : somme des distances aux amis (km)
+        distances = distance_matrix(FRIENDS, [result["point"]], "equirectangular")
+        assert result["cost"] == pytest.approx(distances.sum(), rel=1e-3)
+
+
+def test_trace_best_cost_never_gets_worse():
+    """Le meilleur objectif de la trace ne fait que baisser, jusqu'au résultat."""
+    result = optimize_meeting_point(
+        FRIENDS, _fast_transit_time_matrix, "max", start=START, tolerance_km=0.0
+    )
+    trace = result["trace"]
+    best = np.minimum.accumulate([step["cost"] for step in trace])
+
+    np.testing.assert_allclose([step["best_cost"] for step in trace], best)
+    assert trace[-1]["best_cost"] == result["cost"]
+
+
+def test_time_budget_stops_the_iterations():
+    """Un budget minuscule arrête l'optimisation, avec le point de départ."""
+    result = optimize_meeting_point(
+        FRIENDS, _fast_transit_time_matrix, "sum", start=START, time_budget_s=1e-9
+    )
+
+    assert result["stop_reason"] == "time_budget"
+    assert result["iterations"] == 0 and result["cost"] == result["start_cost"]
+
+    # Budget par défaut (100 ms) : des centaines d'itérations possibles
+    result = optimize_meeting_point(
+        FRIENDS, _fast_transit_time_matrix, "max", start=START, tolerance_km=0.0
+    )
+    assert result["iterations"] >= 100
+
+
+def test_unknown_objective_is_a_value_error():
+    """Un objectif inconnu est refusé avant tout calcul."""
+    friends = [
+        {"name": f"Ami {i}", "latitude": lat, "longitude": lon}
+        for i, (lat, lon) in enumerate(FRIENDS[:3])
+    ]
+
+    with pytest.raises(ValueError):
+        calculate_weighted_center_by_transit_time(friends, objective="moyenne")
+    with pytest.raises(ValueError):
+        optimize_meeting_point(FRIENDS, objective="moyenne")
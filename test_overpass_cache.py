@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests du cache disque des réponses Overpass par tuiles.
+"""
+
+import sys
+import os
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from src.overpass_cache import OverpassTileCache, tile_bbox, tiles_for_bbox
+
+BARS = [
+    {"type": "node", "id": 2, "lat": 48.8555, "lon": 2.3455, "tags": {}},
+    {"type": "node", "id": 1, "lat": 48.8605, "lon": 2.3555, "tags": {}},
+    {"type": "node", "id": 3, "lat": 48.8705, "lon": 2.3655, "tags": {}},
+]
+
+
+class FakeOverpass:
+    """Faux serveur : renvoie les bars et compte les requêtes reçues."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, query):
+        self.queries.append(query)
+        return BARS
+
+
+def test_tiles_cover_the_bounding_box():
+    """Les tuiles d'une boîte la couvrent entièrement, sans tuile en trop."""
+    tiles = tiles_for_bbox(48.855, 2.345, 48.865, 2.355)
+
+    assert len(tiles) == 4
+    south, west, _, _ = tile_bbox(min(tiles))
+    _, _, north, east = tile_bbox(max(tiles))
+    assert south <= 48.855 and west <= 2.345 and north >= 48.865 and east >= 2.355
+
+
+def test_missing_tiles_are_fetched_once_in_one_query(tmp_path):
+    """Une seule requête pour les tuiles manquantes, aucune ensuite."""
+    fetcher = FakeOverpass()
+    cache = OverpassTileCache(str(tmp_path / "cache.sqlite"), fetcher=fetcher)
+
+    first = cache.get_elements(48.855, 2.345, 48.865, 2.360)
+    second = cache.get_elements(48.855, 2.345, 48.865, 2.360)
+
+    assert [element["id"] for element in first] == [1, 2]
+    assert second == first
+    assert len(fetcher.queries) == 1
+    assert cache.stats()["hits"] == cache.stats()["misses"]
+
+
+def test_tiles_are_shared_between_processes_through_the_file(tmp_path):
+    """Un autre cache ouvert sur le même fichier relit les tuiles."""
+    cache_file = str(tmp_path / "cache.sqlite")
+    OverpassTileCache(cache_file, fetcher=FakeOverpass()).get_elements(
+        48.855, 2.345, 48.865, 2.360
+    )
+    fetcher = FakeOverpass()
+
+    elements = OverpassTileCache(cache_file, fetcher=fetcher).get_elements(
+        48.855, 2.345, 48.865, 2.360
+    )
+
+    assert len(elements) == 2 and fetcher.queries == []
+
+
+def test_expired_tiles_are_fetched_again_and_purged(tmp_path):
+    """Les tuiles plus anciennes que la durée de vie sont redemandées."""
+    fetcher = FakeOverpass()
+    cache = OverpassTileCache(str(tmp_path / "cache.sqlite"), ttl_s=-1, fetcher=fetcher)
+
+    cache.get_elements(48.855, 2.345, 48.865, 2.360)
+    cache.get_elements(48.855, 2.345, 48.865, 2.360)
+
+    assert len(fetcher.queries) == 2
+    assert cache.stats()["expired"] > 0
+    assert cache.purge_expired() > 0
+
+
+def test_ways_are_stored_at_their_center(tmp_path):
+    """Les bars dessinés comme des contours sont rangés à leur centre."""
+    way = {
+        "type": "way",
+        "id": 1,
+        "center": {"lat": 48.8575, "lon": 2.3505},
+        "tags": {"amenity": "pub"},
+    }
+    cache = OverpassTileCache(
+        str(tmp_path / "cache.sqlite"), fetcher=lambda query: BARS + [way]
+    )
+
+    elements = cache.get_elements(48.855, 2.345, 48.865, 2.360)
+
+    assert [(e["type"], e["id"]) for e in elements] == [
+        ("node", 1),
+        ("node", 2),
+        ("way", 1),
+    ]
+    assert (elements[2]["lat"], elements[2]["lon"]) == (48.8575, 2.3505)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests du cache des étapes du calcul.
+"""
+
+import sys
+import os
+
+import numpy as np
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from src.pipeline import StageCache, content_hash
+
+
+def run_chain(cache, friends, radius_km, calls):
+    """Chaîne amis → centre → candidats en comptant les calculs."""
+
+    def compute(stage, value):
+        calls.append(stage)
+        return value
+
+    friends_result = cache.run(
+        "friends", ("groupe",), lambda: compute("friends", friends)
+    )
+    center = cache.run(
+        "center",
+        (friends_result,),
+        lambda: compute("center", np.mean([f["latitude"] for f in friends])),
+    )
+    candidates = cache.run(
+        "candidates",
+        (center, radius_km),
+        lambda: compute("candidates", [center.value, radius_km]),
+    )
+    return friends_result, center, candidates
+
+
+def test_only_downstream_stages_are_recomputed():
+    """Changer une entrée ne recalcule que les étapes situées en aval."""
+    cache = StageCache()
+    friends = [{"name": "Alice", "latitude": 48.86}]
+    calls = []
+
+    run_chain(cache, friends, 0.6, calls)
+    run_chain(cache, friends, 0.6, calls)
+    assert calls == ["friends", "center", "candidates"]
+
+    calls.clear()
+    run_chain(cache, friends, 1.0, calls)
+    assert calls == ["candidates"]
+
+
+def test_identical_upstream_result_keeps_downstream_cache():
+    """Un résultat en amont recalculé à l'identique ne recalcule pas l'aval."""
+    cache = StageCache()
+    friends = [{"name": "Alice", "latitude": 48.86}]
+    calls = []
+    friends_result, _, _ = run_chain(cache, friends, 0.6, calls)
+
+    assert cache.invalidate("friends", friends_result.key) == 1
+    calls.clear()
+    *_, candidates = run_chain(cache, [dict(friends[0])], 0.6, calls)
+
+    assert calls == ["friends"]
+    assert candidates.cached
+
+
+def test_invalidate_targets_one_entry():
+    """L'invalidation d'une entrée laisse les autres entrées de l'étape en cache."""
+    cache = StageCache()
+    calls = []
+    friends = [{"name": "Alice", "latitude": 48.86}]
+    _, _, small = run_chain(cache, friends, 0.6, calls)
+    run_chain(cache, friends, 1.0, calls)
+
+    cache.invalidate("candidates", small.key)
+    calls.clear()
+    run_chain(cache, friends, 0.6, calls)
+    run_chain(cache, friends, 1.0, calls)
+
+    assert calls == ["candidates"]
+    assert cache.stats()["candidates"]["size"] == 2
+
+
+def test_content_hash_ignores_key_order_and_reads_arrays():
+    """L'empreinte dépend du contenu, pas de l'ordre des clés."""
+    assert content_hash({"a": 1, "b": 2}) == content_hash({"b": 2, "a": 1})
+    assert content_hash(np.arange(3.0)) == content_hash(np.arange(3.0))
+    assert content_hash(np.arange(3.0)) != content_hash(np.arange(1.0, 4.0))
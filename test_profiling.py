@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests du profilage à la demande.
+"""
+
+import sys
+import os
+import pstats
+import threading
+import time
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from src.profiling import Profile
+
+
+def busy_loop(duration_s):
+    """Occupe le processeur pendant la durée demandée."""
+    deadline = time.perf_counter() + duration_s
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(200))
+    return total
+
+
+def test_top_functions_show_where_time_is_spent():
+    """La fonction la plus coûteuse apparaît en tête du profil."""
+    profile = Profile().start()
+    busy_loop(0.05)
+    report = profile.stop()
+
+    top = report.top_functions(limit=3)
+
+    assert any("builtins.sum" in row["function"] for row in top)
+    assert any(
+        row["function"].startswith("busy_loop") for row in report.top_functions(100)
+    )
+    assert report.elapsed_ms >= 50
+
+
+def test_raw_profile_is_readable_by_pstats(tmp_path):
+    """Le profil brut téléchargé se relit avec pstats."""
+    profile = Profile().start()
+    busy_loop(0.01)
+    report = profile.stop()
+    path = tmp_path / "oucekonboi.prof"
+    path.write_bytes(report.raw_profile())
+
+    stats = pstats.Stats(str(path))
+
+    assert any(name == "busy_loop" for _, _, name in stats.stats)
+
+
+def test_collapsed_stacks_are_ready_for_flamegraphs():
+    """Les piles échantillonnées vont de l'appelant à la fonction appelée."""
+    profile = Profile(sample_interval_s=0.001).start()
+    busy_loop(0.1)
+    report = profile.stop()
+
+    lines = report.collapsed_stacks().splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+
+    assert int(count) > 0
+    assert "test_profiling.py:busy_loop" in stack.split(";")
+    assert stack.index("test_collapsed_stacks") < stack.index("busy_loop")
+
+
+def test_profile_left_open_by_a_finished_thread_is_abandoned():
+    """Un profil jamais arrêté (thread terminé) ne bloque pas les suivants."""
+    worker = threading.Thread(target=lambda: Profile().start())
+    worker.start()
+    worker.join()
+
+    profile = Profile().start()
+    busy_loop(0.01)
+    report = profile.stop()
+
+    assert report.elapsed_ms >= 10
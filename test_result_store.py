@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests du stockage de résultats partagé entre processus.
+"""
+
+import sys
+import os
+
+import numpy as np
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from src.pipeline import StageCache
+from src.result_store import MemoryBackend, ResultStore, SQLiteBackend
+
+
+def test_replicas_share_results_through_sqlite(tmp_path):
+    """Un résultat écrit par une réplique est relu par une autre."""
+    store_file = str(tmp_path / "results.sqlite")
+    first = ResultStore(SQLiteBackend(store_file))
+    second = ResultStore(SQLiteBackend(store_file))
+
+    first.put("clé", {"center": (48.86, 2.34), "costs": np.array([1.5, 2.0])})
+
+    assert second.get("clé") == {"center": [48.86, 2.34], "costs": [1.5, 2.0]}
+    assert second.get("autre") is None
+    assert second.stats()["hits"] == 1 and second.stats()["misses"] == 1
+
+
+def test_expired_and_oversized_results_are_evicted(tmp_path, monkeypatch):
+    """Les résultats expirés puis les moins récemment lus sont supprimés."""
+    for backend in (SQLiteBackend(str(tmp_path / "results.sqlite")), MemoryBackend()):
+        now = [1000.0]
+        monkeypatch.setattr("src.result_store.time.time", lambda: now[0])
+        store = ResultStore(backend, ttl_s=60, max_bytes=10**6)
+        payload = list(range(200))
+
+        store.put("expiré", payload)
+        now[0] += 100
+        store.ttl_s = 600
+        store.put("lu", payload)
+        store.put("oublié", payload)
+        assert store.get("expiré") is None
+        assert store.evict() == 1
+
+        now[0] += 100  # Après ACCESS_RESOLUTION_S : la lecture date l'accès
+        assert store.get("lu") == payload
+        store.max_bytes = backend.size_bytes() - 1
+        assert store.evict() == 1
+        assert store.get("oublié") is None and store.get("lu") == payload
+
+
+def test_stage_cache_reads_results_computed_by_another_process():
+    """Un nouveau processus relit les étapes persistées au lieu de les recalculer."""
+    store = ResultStore(MemoryBackend())
+    calls = []
+
+    def compute():
+        calls.append("center")
+        return (48.86, 2.34), []
+
+    StageCache(store=store).run("center", ("amis", "distance"), compute)
+    restarted = StageCache(store=store)
+    result = restarted.run("center", ("amis", "distance"), compute)
+
+    assert calls == ["center"]
+    assert result.cached and result.value == [[48.86, 2.34], []]
+    assert restarted.stats()["center"]["store_hits"] == 1
+
+    # Une entrée invalidée est recalculée, pas relue depuis le stockage
+    restarted.invalidate("center", result.key)
+    restarted.run("center", ("amis", "distance"), compute)
+    assert calls == ["center", "center"]
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests des distances à pied et à vélo sur le réseau de rues.
+"""
+
+import sys
+import os
+import json
+
+import numpy as np
+import pytest
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from src import street_graph
+from src.engine import cost_matrix
+from src.geo_utils import distance_matrix
+from src.street_graph import StreetGraph, build_graph
+
+SOUTH, NORTH = 48.850, 48.856
+LONS = [2.30, 2.31, 2.32, 2.33]
+
+
+def _path_km(points):
+    return sum(
+        distance_matrix(a, b, "equirectangular")[0, 0]
+        for a, b in zip(points[:-1], points[1:])
+    )
+
+
+@pytest.fixture
+def graph_file(tmp_path):
+    """
+    Deux rives reliées par un seul pont, à l'est : la rive sud à double
+    sens, la rive nord à sens unique d'est en ouest (sauf à pied).
+    """
+    nodes = [(1 + i, SOUTH, lon) for i, lon in enumerate(LONS)]
+    nodes += [(11 + i, NORTH, lon) for i, lon in enumerate(LONS)]
+    elements = [
+        {"type": "node", "id": node_id, "lat": lat, "lon": lon}
+        for node_id, lat, lon in nodes
+    ]
+    elements += [
+        {
+            "type": "way",
+            "id": 100,
+            "nodes": [1, 2, 3, 4],
+            "tags": {"highway": "residential"},
+        },
+        {
+            "type": "way",
+            "id": 101,
+            "nodes": [14, 13, 12, 11],
+            "tags": {"highway": "residential", "oneway": "yes"},
+        },
+        {"type": "way", "id": 102, "nodes": [4, 14], "tags": {"highway": "primary"}},
+        # Voie express, interdite à pied et à vélo
+        {"type": "way", "id": 103, "nodes": [1, 11], "tags": {"highway": "motorway"}},
+    ]
+    source = tmp_path / "streets.json"
+    source.write_text(json.dumps({"elements": elements}))
+    path = str(tmp_path / "streets.npz")
+    build_graph(str(source), path)
+    return path
+
+
+def test_network_distance_goes_around_by_the_bridge(graph_file):
+    """D'une rive à l'autre, le trajet passe par le pont et non à vol d'oiseau."""
+    graph = StreetGraph(graph_file)
+    south, north = (SOUTH, LONS[0]), (NORTH, LONS[0])
+
+    walk = graph.distance_matrix([south], [north], "walk")[0, 0]
+
+    expected = _path_km([south, (SOUTH, LONS[-1]), (NORTH, LONS[-1]), north])
+    assert walk == pytest.approx(expected, rel=1e-5)
+    assert walk > 6 * distance_matrix(south, north)[0, 0]
+    assert graph.metadata["nodes"] == 8 and graph.metadata["walk_edges"] == 7
+
+
+def test_bike_follows_one_way_streets(graph_file):
+    """À vélo, la rive nord ne se parcourt que d'est en ouest."""
+    graph = StreetGraph(graph_file)
+    south, north = (SOUTH, LONS[0]), (NORTH, LONS[0])
+
+    walk = graph.distance_matrix([south, north], [north, south], "walk")
+    bike = graph.distance_matrix([south, north], [north, south], "bike")
+
+    assert bike[0, 0] == pytest.approx(walk[0, 0])
+    assert np.isfinite(walk[1, 1]) and np.isinf(bike[1, 1])
+
+
+def test_one_search_per_friend_is_resumed_for_new_bars(graph_file):
+    """Les nouveaux bars (rayon élargi) reprennent la recherche de chaque ami."""
+    graph = StreetGraph(graph_file)
+    friends = [(SOUTH, LONS[0]), (SOUTH, LONS[1])]
+    near = [(SOUTH, LONS[2]), (SOUTH, LONS[3])]
+    far = near + [(NORTH, LONS[0]), (NORTH, LONS[2])]
+
+    graph.distance_matrix(friends, near, "walk")
+    widened = graph.distance_matrix(friends, far, "walk")
+
+    fresh = StreetGraph(graph_file).distance_matrix(friends, far, "walk")
+    np.testing.assert_allclose(widened, fresh)
+    assert graph.stats()["misses"] == 2 and graph.stats()["hits"] == 2
+
+
+def test_walk_mode_falls_back_to_straight_line_off_the_network(graph_file, monkeypatch):
+    """Les amis hors du réseau gardent la distance à vol d'oiseau."""
+    graph = StreetGraph(graph_file)
+    monkeypatch.setattr(street_graph, "get_street_graph", lambda: graph)
+    friends = [
+        {"name": "Rive sud", "latitude": SOUTH, "longitude": LONS[0]},
+        {"name": "Loin", "latitude": 45.0, "longitude": 2.0},
+    ]
+    bars = [{"lat": NORTH, "lon": LONS[0]}, {"lat": SOUTH, "lon": LONS[2]}]
+
+    costs = cost_matrix(bars, friends, "walk")
+
+    network = graph.distance_matrix([(SOUTH, LONS[0])], [(NORTH, LONS[0])], "walk")
+    assert costs[0, 0] == pytest.approx(network[0, 0])
+    np.testing.assert_allclose(
+        costs[1], distance_matrix((45.0, 2.0), [(NORTH, LONS[0]), (SOUTH, LONS[2])])[0]
+    )
@@ -6,21 +6,24 @@ Script de test pour vérifier le calcul du barycentre pondéré par temps de tra
 import sys
 import os
 import json
+import pathlib
+import tempfile
 
 # Ajouter le dossier src au path Python
 sys.path.append(os.path.join(os.path.dirname(__file__)))
 
-from src.data_manager import load_friends
+from src.data_manager import DATA_FILE, FriendsStore
 from src.geo_utils import calculate_center
+from src.progress import print_progress
 from src.transit_utils import calculate_weighted_center_by_transit_time
 
 
-def test_transit_calculation():
+def test_transit_calculation(tmp_path):
     """Test du calcul du barycentre pondéré."""
     print("🚇 Test du calcul du barycentre pondéré par temps de transport\n")
 
-    # Charger les amis
-    friends = load_friends()
+    # Charger les amis d'exemple dans un stockage temporaire
+    friends = FriendsStore(str(tmp_path / "friends.sqlite"), DATA_FILE).load()
     print(f"📋 Amis chargés: {len(friends)}")
     for friend in friends:
         print(f"  - {friend['name']}: {friend['address']}")
@@ -34,56 +37,27 @@ def test_transit_calculation():
     print("🔄 CALCUL DU BARYCENTRE PONDÉRÉ PAR TEMPS DE TRANSPORT")
     print("=" * 60)
 
-    # Simulation sans Streamlit (on va capturer les messages)
-    # Pour cela, on va modifier temporairement les appels st.info/st.write
+    # Calculer le barycentre pondéré (étapes affichées dans la console)
+    transit_lat, transit_lon, transit_times, calc_info = (
+        calculate_weighted_center_by_transit_time(friends, progress=print_progress)
+    )
 
-    # Importer le module sans Streamlit
-    import importlib
-    import src.transit_utils as transit_module
-
-    # Mock des fonctions Streamlit pour affichage console
-    class MockST:
-        @staticmethod
-        def info(msg):
-            print(f"ℹ️  {msg}")
-
-        @staticmethod
-        def write(msg):
-            print(f"   {msg}")
-
-        @staticmethod
-        def success(msg):
-            print(f"✅ {msg}")
-
-    # Remplacer temporairement st par notre mock
-    original_st = transit_module.st
-    transit_module.st = MockST()
-
-    try:
-        # Calculer le barycentre pondéré
-        transit_lat, transit_lon, transit_times, calc_info = (
-            calculate_weighted_center_by_transit_time(friends)
-        )
-
-        print("\n" + "=" * 60)
-        print("📊 RÉSULTATS FINAUX")
-        print("=" * 60)
-        print(f"📍 Barycentre optimisé: {transit_lat:.6f}, {transit_lon:.6f}")
-        print(
-            f"📏 Déplacement depuis le centre géo: {calc_info.get('displacement_km', 0):.0f} mètres"
-        )
-        print(f"⏱️  Temps moyen initial: {calc_info.get('avg_initial_time', 0):.1f} min")
-        print(f"⏱️  Temps moyen final: {calc_info.get('avg_final_time', 0):.1f} min")
-        print(f"📈 Amélioration: {calc_info.get('time_improvement', 0):+.1f} min")
-
-        print("\n🎯 Temps de trajet finaux vers le barycentre optimisé:")
-        for name, time_min in transit_times.items():
-            print(f"  🚇 {name}: {time_min:.1f} min")
+    print("\n" + "=" * 60)
+    print("📊 RÉSULTATS FINAUX")
+    print("=" * 60)
+    print(f"📍 Barycentre optimisé: {transit_lat:.6f}, {transit_lon:.6f}")
+    print(
+        f"📏 Déplacement depuis le centre géo: {calc_info.get('displacement_km', 0):.0f} mètres"
+    )
+    print(f"⏱️  Temps moyen initial: {calc_info.get('avg_initial_time', 0):.1f} min")
+    print(f"⏱️  Temps moyen final: {calc_info.get('avg_final_time', 0):.1f} min")
+    print(f"📈 Amélioration: {calc_info.get('time_improvement', 0):+.1f} min")
 
-    finally:
-        # Remettre l'original
-        transit_module.st = original_st
+    print("\n🎯 Temps de trajet finaux vers le barycentre optimisé:")
+    for name, time_min in transit_times.items():
+        print(f"  🚇 {name}: {time_min:.1f} min")
 
 
 if __name__ == "__main__":
-    test_transit_calculation()
+    with tempfile.TemporaryDirectory() as directory:
+        test_transit_calculation(pathlib.Path(directory))
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests du modèle de temps de trajet vectorisé.
+"""
+
+import sys
+import os
+
+import numpy as np
+import pytest
+from geopy.distance import geodesic
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+import src.transit_utils as transit_utils
+from src.transit_utils import (
+    estimate_transit_minutes,
+    get_transit_time,
+    get_transit_time_matrix,
+)
+
+ORIGINS = [
+    (48.8566, 2.3522),  # Hôtel de Ville
+    (48.8584, 2.2945),  # Tour Eiffel
+]
+# Pour chaque origine : une destination à pied, une en métro, une en RER
+DESTINATIONS = [
+    (48.8530, 2.3499),  # Notre-Dame (0,4 km de l'Hôtel de Ville)
+    (48.8606, 2.2970),  # Trocadéro (0,3 km de la tour Eiffel)
+    (48.8867, 2.3431),  # Montmartre
+    (49.0097, 2.5479),  # Roissy-Charles-de-Gaulle
+]
+# Marge du cache quantifié (mailles de 10 m) : ~15 m à pied, soit 0,2 min
+CACHE_TOLERANCE_MIN = 0.2
+
+
+def _baseline_transit_time(origin, destination):
+    """Temps de trajet calculé paire par paire, comme avant la vectorisation."""
+    distance = geodesic(origin, destination).kilometers
+    if distance < 0.6:
+        return distance * 12
+    if distance < 15:
+        return (distance / 20) * 60 + 5 + 5
+    return (distance / 35) * 60 + 8 + 8
+
+
+@pytest.fixture(autouse=True)
+def heuristic_backend(monkeypatch):
+    """Force le modèle par paliers, sans routeur ni grille précalculée."""
+    monkeypatch.setattr(transit_utils, "DEFAULT_TRANSIT_BACKEND", "heuristic")
+
+
+def test_fixture_covers_each_distance_band():
+    """Les paires du jeu de test couvrent les trois paliers du modèle."""
+    distances = np.array(
+        [[geodesic(o, d).kilometers for d in DESTINATIONS] for o in ORIGINS]
+    )
+
+    assert (distances < 0.6).any()
+    assert ((distances >= 0.6) & (distances < 15)).any()
+    assert (distances >= 15).any()
+    # Aucune paire assez proche d'un seuil pour changer de palier dans le cache
+    for threshold in (0.6, 15):
+        assert np.abs(distances - threshold).min() > 0.05
+
+
+def test_matrix_matches_the_per_pair_baseline():
+    """La matrice vectorisée reproduit le calcul historique paire par paire."""
+    expected = [[_baseline_transit_time(o, d) for d in DESTINATIONS] for o in ORIGINS]
+
+    times = get_transit_time_matrix(ORIGINS, DESTINATIONS, backend="heuristic")
+
+    np.testing.assert_allclose(times, expected, rtol=1e-9)
+
+
+def test_matrix_matches_get_transit_time():
+    """La matrice et une boucle de get_transit_time donnent les mêmes temps."""
+    expected = [
+        [get_transit_time(*origin, *destination) for destination in DESTINATIONS]
+        for origin in ORIGINS
+    ]
+
+    times = get_transit_time_matrix(ORIGINS, DESTINATIONS, backend="heuristic")
+
+    np.testing.assert_allclose(times, expected, rtol=0, atol=CACHE_TOLERANCE_MIN)
+
+
+@pytest.mark.parametrize(
+    "distance_km, minutes",
+    [
+        (0.0, 0.0),
+        (0.5, 6.0),
+        (0.6, 11.8),  # Le seuil appartient au palier métro/bus
+        (10.0, 40.0),
+        (15.0, 41.71428571428571),  # Le seuil appartient au palier RER
+        (35.0, 76.0),
+    ],
+)
+def test_estimate_transit_minutes_band_edges(distance_km, minutes):
+    """Chaque palier s'applique à partir de son seuil, scalaire ou tableau."""
+    assert estimate_transit_minutes(distance_km) == pytest.approx(minutes)
+    assert estimate_transit_minutes([distance_km, distance_km]) == pytest.approx(
+        [minutes, minutes]
+    )
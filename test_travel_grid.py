@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests de la grille précalculée des temps de trajet.
+"""
+
+import sys
+import os
+
+import numpy as np
+import pytest
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+from src import transit_utils
+from src.travel_grid import GridLayout, TravelGrid, build_grid
+
+PARIS_BBOX = (48.80, 2.25, 48.92, 2.42)
+
+
+@pytest.fixture
+def grid_file(tmp_path):
+    path = str(tmp_path / "grid.bin")
+    build_grid(path, "heuristic", PARIS_BBOX, cell_km=0.5)
+    return path
+
+
+def test_times_are_interpolated_between_cell_centers(grid_file):
+    """Aux centres, le temps est celui du calcul ; entre eux, il est interpolé."""
+    grid = TravelGrid(grid_file)
+    centers = grid.layout.centers()
+    cells = grid.layout.cells([(48.853, 2.349), (48.884, 2.301)])
+    origin, destination = centers[cells[0]], centers[cells[1]]
+    neighbour = centers[cells[1] + 1]
+
+    expected = transit_utils.get_transit_time_matrix(
+        [origin], [destination, neighbour], backend="heuristic"
+    )[0]
+    halfway = (destination + neighbour) / 2
+
+    times = grid.time_matrix([origin], [destination, halfway, neighbour])[0]
+
+    assert times[0] == pytest.approx(expected[0], abs=0.05)
+    assert times[1] == pytest.approx(expected.mean(), abs=0.05)
+    # Paire trop proche : calculée par l'appelant, et non la moyenne de la cellule
+    assert np.isnan(grid.time_pairs([origin], [origin + 0.0001])[0])
+
+
+def test_bars_of_one_cell_are_not_tied(grid_file, monkeypatch):
+    """Deux bars d'une même cellule gardent chacun leur temps de trajet."""
+    grid = TravelGrid(grid_file)
+    monkeypatch.setattr(transit_utils, "get_travel_grid", lambda: grid)
+    friends = [(48.853, 2.349), (48.884, 2.301)]
+    center = grid.layout.centers()[grid.layout.cells(friends[1:])[0]]
+    bars = [center + (0.0005, -0.0008), center + (0.0015, 0.0025)]
+
+    times = transit_utils.get_transit_time_matrix(friends, bars, backend="grid")
+    computed = transit_utils.get_transit_time_matrix(
+        friends[1:], bars, backend="heuristic"
+    )
+
+    assert len(set(grid.layout.cells(bars))) == 1
+    assert times[0, 0] != times[0, 1]
+    # Ami dans la cellule des bars : marche calculée directement
+    np.testing.assert_allclose(times[1], computed[0])
+
+
+def test_grid_is_memory_mapped_with_a_header(grid_file):
+    """La matrice est projetée en mémoire ; l'en-tête décrit la grille."""
+    grid = TravelGrid(grid_file)
+    layout = GridLayout(PARIS_BBOX, 0.5)
+
+    assert isinstance(grid.matrix, np.memmap)
+    assert grid.header["backend"] == "heuristic"
+    assert grid.header["cells"] == len(layout) == grid.matrix.shape[0]
+    assert grid.matrix.dtype == np.uint16
+
+
+def test_grid_backend_computes_points_outside_the_grid(grid_file, monkeypatch):
+    """Les points hors de la grille sont calculés avec le calcul de la grille."""
+    grid = TravelGrid(grid_file)
+    monkeypatch.setattr(transit_utils, "get_travel_grid", lambda: grid)
+    origins = [(48.853, 2.349), (48.60, 2.35)]
+    destinations = [(48.884, 2.301)]
+
+    times = transit_utils.get_transit_time_matrix(origins, destinations, backend="grid")
+    computed = transit_utils.get_transit_time_matrix(
+        origins, destinations, backend="heuristic"
+    )
+
+    assert times[0, 0] == grid.time_matrix(origins[:1], destinations)[0, 0]
+    assert times[1, 0] == computed[1, 0]
+    assert np.isnan(grid.time_matrix(origins, destinations)[1, 0])
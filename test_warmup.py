@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests du préchauffage des caches.
+"""
+
+import sys
+import os
+
+import pytest
+
+# Ajouter le dossier racine au path Python
+sys.path.append(os.path.join(os.path.dirname(__file__)))
+
+import src.warmup as warmup
+from src.pipeline import StageResult
+from src.warmup import QueryLog, query_key, warm_up
+
+
+@pytest.fixture
+def log(tmp_path):
+    """Journal contenant des visites de deux groupes."""
+    log = QueryLog(str(tmp_path / "query_log.sqlite"))
+    for _ in range(3):
+        log.record("bureau", 1, "transit", "sum", 0.6, (48.8625, 2.3405), 800.0)
+    log.record("famille", 4, "distance", None, 1.0, (48.8405, 2.3705), 300.0)
+    return log
+
+
+class FakeOverpassCache:
+    """Compte une requête Overpass par zone préchauffée."""
+
+    def __init__(self):
+        self.upstream_queries = 0
+
+    def stats(self):
+        return {"upstream_queries": self.upstream_queries}
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """Remplace le calcul et la recherche de bars par des enregistreurs."""
+    calls = []
+    overpass = FakeOverpassCache()
+
+    def recommend(group_id, version, mode, objective, radius_km, backend):
+        calls.append(("recommend", group_id, version, mode, objective, radius_km))
+        return {"center": StageResult("center", "clé", None, None, cached=False)}
+
+    def get_bars_around_center(lat, lon, radius_km, backend, progress):
+        calls.append(("area", round(lat, 3), round(lon, 3)))
+        overpass.upstream_queries += 1
+        return []
+
+    monkeypatch.setattr(warmup, "recommend", recommend)
+    monkeypatch.setattr(warmup, "get_bars_around_center", get_bars_around_center)
+    monkeypatch.setattr(warmup, "get_overpass_cache", lambda: overpass)
+    monkeypatch.setattr(
+        warmup, "list_groups", lambda: [{"id": "bureau"}, {"id": "famille"}]
+    )
+    monkeypatch.setattr(warmup, "get_group_version", lambda group_id: 7)
+    return calls
+
+
+def test_popular_queries_and_busy_areas(log):
+    """Les requêtes et zones sont classées de la plus à la moins demandée."""
+    queries = log.popular_queries(since=0)
+    areas = log.busy_areas(since=0)
+
+    assert [(q["group_id"], q["count"]) for q in queries] == [
+        ("bureau", 3),
+        ("famille", 1),
+    ]
+    assert queries[1]["objective"] is None
+    assert [area["count"] for area in areas] == [3, 1]
+    assert areas[0]["lat"] == pytest.approx(48.865)
+
+
+def test_warm_up_replays_queries_within_budget(log, pipeline):
+    """Les requêtes fréquentes sont rejouées à la version actuelle, dans le budget."""
+    report = warm_up(log, budget=1)
+
+    assert pipeline == [
+        ("recommend", "bureau", 7, "transit", "sum", 0.6),
+        ("recommend", "famille", 7, "distance", None, 1.0),
+        ("area", 48.865, 2.345),
+    ]
+    assert report["queries"] == 2 and report["areas"] == 1
+    assert report["upstream_requests"] == 1 and report["budget_exhausted"]
+
+
+def test_latency_saved_counts_visits_after_warm_up(log):
+    """Seules les visites postérieures au préchauffage comptent comme gain."""
+    log.record_warmup(query_key("bureau", 1, "transit", "sum", 0.6), 800.0)
+    log.record("bureau", 1, "transit", "sum", 0.6, (48.8625, 2.3405), 50.0)
+    log.record("famille", 4, "distance", None, 1.0, (48.8405, 2.3705), 20.0)
+
+    saved = log.latency_saved()
+
+    assert saved["warm_queries"] == 1
+    assert saved["saved_ms"] == pytest.approx(750.0)
+
+
+def test_record_prunes_queries_older_than_retention(tmp_path, monkeypatch):
+    """Les requêtes sorties de la période de conservation sont supprimées."""
+    now = [1000.0]
+    monkeypatch.setattr("src.warmup.time.time", lambda: now[0])
+    log = QueryLog(str(tmp_path / "query_log.sqlite"), retention_s=100)
+    log.record("bureau", 1, "transit", "sum", 0.6, (48.8625, 2.3405), 800.0)
+    now[0] += 150
+    log.record("famille", 4, "distance", None, 1.0, (48.8405, 2.3705), 300.0)
+
+    queries = log.popular_queries(since=0)
+
+    assert [q["group_id"] for q in queries] == ["famille"]